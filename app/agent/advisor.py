@@ -3,12 +3,23 @@ AI Advisor module for trading signal analysis and recommendation
 
 This module provides intelligent trading signal scoring using either OpenAI GPT models
 or a deterministic mock for testing/fallback scenarios.
+
+LLM answers are cached per symbol and bucketed feature vector for a short TTL, and the
+async API batches several symbols into one prompt with single-flight deduplication and
+a concurrency limit, so a decision cycle pays for at most one call per distinct market view.
 """
 
+import asyncio
 import json
 import logging
+import math
 import os
-from typing import Any
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any, Protocol
 
 try:
     import openai
@@ -19,33 +30,247 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+OPENAI_MODEL = "gpt-3.5-turbo"
+SYSTEM_PROMPT = (
+    "You are an expert trading advisor. Analyze the provided market data "
+    "and return a JSON response with trading recommendations."
+)
+BATCH_FEATURES_MARKER = "Market features by symbol (JSON):"
+
+# Feature -> (bucketing mode, step). "rel" buckets on a log scale (step is a relative
+# change), "abs" on a linear one. Values inside one bucket share a cached answer.
+DEFAULT_FEATURE_BUCKETS: dict[str, tuple[str, float]] = {
+    "price": ("rel", 0.001),
+    "ema": ("rel", 0.001),
+    "atr": ("rel", 0.05),
+    "volume": ("rel", 0.10),
+    "change_24h": ("abs", 0.002),
+    "rsi": ("abs", 1.0),
+    "adx": ("abs", 1.0),
+}
+# Features that never influence the answer and would defeat the cache
+IGNORED_FEATURES = frozenset({"timestamp"})
+
+
+class SignalModel(Protocol):
+    """Chat-completion backend used by SignalAdvisor"""
+
+    def complete(self, system: str, prompt: str, max_tokens: int) -> str: ...
+
+    async def acomplete(self, system: str, prompt: str, max_tokens: int) -> str: ...
+
+
+class OpenAIChatModel:
+    """
+    OpenAI chat completions with a hard request timeout
+
+    The async client is created per event loop: its connection pool is bound to the loop
+    it was first used on, and callers such as AgentLoop.make_decisions run each cycle
+    in a fresh asyncio.run().
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = OPENAI_MODEL,
+        timeout: float = 10.0,
+        temperature: float = 0.3,
+        base_url: str | None = None,
+    ):
+        self.model = model
+        self.temperature = temperature
+        self._client_options = {"api_key": api_key, "base_url": base_url, "timeout": timeout, "max_retries": 0}
+        self._client = openai.OpenAI(**self._client_options)
+        self._async_client: openai.AsyncOpenAI | None = None
+        self._async_loop: asyncio.AbstractEventLoop | None = None
+        self._async_closer: asyncio.Task | None = None
+
+    def _get_async_client(self) -> "openai.AsyncOpenAI":
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = openai.AsyncOpenAI(**self._client_options)
+            self._async_loop = loop
+            self._async_closer = loop.create_task(self._close_on_shutdown(self._async_client))
+        return self._async_client
+
+    @staticmethod
+    async def _close_on_shutdown(client: "openai.AsyncOpenAI"):
+        """Parked until its loop shuts down (asyncio.run cancels it), then closes the client's pool there"""
+        try:
+            await asyncio.get_running_loop().create_future()
+        finally:
+            await client.close()
+
+    def _messages(self, system: str, prompt: str) -> list[dict[str, str]]:
+        return [{"role": "system", "content": system}, {"role": "user", "content": prompt}]
+
+    def complete(self, system: str, prompt: str, max_tokens: int) -> str:
+        response = self._client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(system, prompt),
+            max_tokens=max_tokens,
+            temperature=self.temperature,
+        )
+        return response.choices[0].message.content.strip()
+
+    async def acomplete(self, system: str, prompt: str, max_tokens: int) -> str:
+        response = await self._get_async_client().chat.completions.create(
+            model=self.model,
+            messages=self._messages(system, prompt),
+            max_tokens=max_tokens,
+            temperature=self.temperature,
+        )
+        return response.choices[0].message.content.strip()
+
+
+class LocalSignalModel:
+    """
+    Local stand-in for the LLM: answers both prompt formats with a deterministic scorer,
+    so tests exercise prompt building, batching and response parsing without network access
+    """
+
+    def __init__(self, scorer: Callable[[dict[str, Any]], dict[str, Any]] | None = None, latency: float = 0.0):
+        self.scorer = scorer or SignalAdvisor._get_mock_signal_score
+        self.latency = latency
+        self.calls: list[str] = []
+
+    def _answer(self, prompt: str) -> str:
+        self.calls.append(prompt)
+        if BATCH_FEATURES_MARKER in prompt:
+            payload = prompt.split(BATCH_FEATURES_MARKER, 1)[1].strip().splitlines()[0]
+            return json.dumps({symbol: self.scorer(features) for symbol, features in json.loads(payload).items()})
+        features = {}
+        for name, key in (("Current Price", "price"), ("EMA", "ema"), ("RSI", "rsi"), ("ATR", "atr"), ("ADX", "adx")):
+            match = re.search(rf"- {name}: ([-0-9.e]+)", prompt)
+            if match:
+                features[key] = float(match.group(1))
+        return json.dumps(self.scorer(features))
+
+    def complete(self, system: str, prompt: str, max_tokens: int) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._answer(prompt)
+
+    async def acomplete(self, system: str, prompt: str, max_tokens: int) -> str:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._answer(prompt)
+
+
+def feature_cache_key(
+    features: dict[str, Any], symbol: str | None = None, buckets: dict[str, tuple[str, float]] | None = None
+) -> tuple:
+    """Hashable key of a feature vector with numeric values snapped to buckets"""
+    buckets = DEFAULT_FEATURE_BUCKETS if buckets is None else buckets
+    parts = []
+    for name in sorted(features):
+        if name in IGNORED_FEATURES:
+            continue
+        value = features[name]
+        if isinstance(value, bool) or not isinstance(value, int | float):
+            parts.append((name, str(value)))
+            continue
+        mode, step = buckets.get(name, ("abs", 1e-6))
+        if mode == "rel" and value > 0:
+            parts.append((name, round(math.log(value) / math.log1p(step))))
+        else:
+            parts.append((name, round(value / step)))
+    return (symbol, tuple(parts))
+
+
+class ResponseCache:
+    """TTL + LRU cache of advisor answers keyed by feature_cache_key"""
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return dict(entry[1])
+
+    def put(self, key: tuple, result: dict[str, Any]):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, dict(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
 
 class SignalAdvisor:
     """AI-powered trading signal advisor"""
 
-    def __init__(self, api_key: str | None = None):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        model: SignalModel | None = None,
+        cache_ttl: float = 30.0,
+        feature_buckets: dict[str, tuple[str, float]] | None = None,
+        max_concurrency: int = 4,
+        batch_size: int = 10,
+        timeout: float = 10.0,
+    ):
         """
         Initialize the advisor with optional OpenAI API key
 
         Args:
             api_key: OpenAI API key, if None will try to get from environment
+            model: Chat backend to use instead of OpenAI (e.g. LocalSignalModel in tests)
+            cache_ttl: Seconds an answer is reused for the same bucketed features (0 disables)
+            feature_buckets: Per-feature bucketing overrides, see DEFAULT_FEATURE_BUCKETS
+            max_concurrency: Maximum LLM requests in flight from the async API
+            batch_size: Maximum symbols per batched prompt
+            timeout: Per-request timeout in seconds
         """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        self.use_openai = OPENAI_AVAILABLE and bool(self.api_key)
+        self.use_openai = model is None and OPENAI_AVAILABLE and bool(self.api_key)
+        self.model = model
+        self.cache = ResponseCache(ttl=cache_ttl)
+        self.feature_buckets = feature_buckets
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.stats = {"llm_calls": 0, "cache_hits": 0, "deduplicated": 0, "errors": 0}
+
+        # Per event loop: concurrency limiter and in-flight requests for single-flight
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._inflight: dict[tuple, asyncio.Future] = {}
 
         if self.use_openai:
-            openai.api_key = self.api_key
+            self.model = OpenAIChatModel(self.api_key, timeout=timeout)
             logger.info("SignalAdvisor initialized with OpenAI integration")
+        elif self.model is not None:
+            logger.info(f"SignalAdvisor initialized with {type(self.model).__name__}")
         else:
             logger.info("SignalAdvisor initialized with deterministic mock (no OpenAI key)")
 
-    def get_signal_score(self, features: dict[str, Any]) -> dict[str, Any]:
+    def get_signal_score(self, features: dict[str, Any], symbol: str | None = None) -> dict[str, Any]:
         """
         Analyze market features and return trading signal score
 
         Args:
             features: Dictionary containing market data and technical indicators
                      Expected keys: price, ema, rsi, atr, adx, volume_trend, etc.
+            symbol: Optional symbol, keeps cached answers of different symbols apart
 
         Returns:
             Dictionary with keys:
@@ -54,48 +279,129 @@ class SignalAdvisor:
             - strategy: str - trading strategy description
             - action: str - "BUY", "SELL", or "HOLD"
         """
-        if self.use_openai:
-            return self._get_openai_signal_score(features)
-        else:
+        if self.model is None:
             return self._get_mock_signal_score(features)
 
-    def _get_openai_signal_score(self, features: dict[str, Any]) -> dict[str, Any]:
-        """Get signal score using OpenAI GPT"""
+        key = feature_cache_key(features, symbol, self.feature_buckets)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return cached
+
+        result = self._get_llm_signal_score(features)
+        if result["strategy"] != "fallback":
+            self.cache.put(key, result)
+        return result
+
+    async def get_signal_scores(self, features_by_symbol: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+        """
+        Score several symbols at once
+
+        Cached answers are returned directly, symbols whose bucketed features are already
+        being requested join that request, and the rest are sent in prompts of up to
+        batch_size symbols with at most max_concurrency requests in flight.
+
+        Args:
+            features_by_symbol: Mapping symbol -> features (same keys as get_signal_score)
+
+        Returns:
+            Mapping symbol -> signal score response dictionary
+        """
+        if self.model is None:
+            return {symbol: self._get_mock_signal_score(features) for symbol, features in features_by_symbol.items()}
+
+        self._bind_loop()
+        results: dict[str, dict[str, Any]] = {}
+        waiting: dict[str, asyncio.Future] = {}
+        to_fetch: dict[str, tuple[tuple, dict[str, Any]]] = {}
+
+        for symbol, features in features_by_symbol.items():
+            key = feature_cache_key(features, symbol, self.feature_buckets)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                results[symbol] = cached
+            elif key in self._inflight:
+                self.stats["deduplicated"] += 1
+                waiting[symbol] = self._inflight[key]
+            else:
+                self._inflight[key] = waiting[symbol] = asyncio.get_running_loop().create_future()
+                to_fetch[symbol] = (key, features)
+
+        symbols = list(to_fetch)
+        batches = [symbols[i : i + self.batch_size] for i in range(0, len(symbols), self.batch_size)]
+        await asyncio.gather(*(self._fetch_batch({s: to_fetch[s] for s in batch}) for batch in batches))
+
+        for symbol, future in waiting.items():
+            results[symbol] = dict(await future)
+        return {symbol: results[symbol] for symbol in features_by_symbol}
+
+    async def get_signal_score_async(self, features: dict[str, Any], symbol: str = "SYMBOL") -> dict[str, Any]:
+        """Async single-symbol variant of get_signal_score (cached and deduplicated)"""
+        return (await self.get_signal_scores({symbol: features}))[symbol]
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._inflight = {}
+
+    async def _fetch_batch(self, batch: dict[str, tuple[tuple, dict[str, Any]]]):
+        """One LLM request for a batch; resolves the in-flight futures of its symbols"""
+        try:
+            async with self._semaphore:
+                self.stats["llm_calls"] += 1
+                prompt = self._build_batch_prompt({symbol: features for symbol, (_, features) in batch.items()})
+                content = await asyncio.wait_for(
+                    self.model.acomplete(SYSTEM_PROMPT, prompt, max_tokens=120 * len(batch) + 60),
+                    timeout=self.timeout,
+                )
+            parsed = self._parse_batch_response(content, list(batch))
+        except asyncio.CancelledError:
+            # Do not leave requests that joined this batch waiting forever
+            for key, _ in batch.values():
+                future = self._inflight.pop(key, None)
+                if future is not None and not future.done():
+                    future.cancel()
+            raise
+        except Exception as e:
+            self.stats["errors"] += 1
+            error = "timeout" if isinstance(e, asyncio.TimeoutError) else f"{type(e).__name__}: {e}"
+            logger.error(f"LLM batch request failed for {list(batch)}: {error}")
+            parsed = {symbol: self._get_fallback_response(f"LLM error: {error}") for symbol in batch}
+
+        for symbol, (key, _) in batch.items():
+            result = parsed[symbol]
+            if result["strategy"] != "fallback":
+                self.cache.put(key, result)
+            future = self._inflight.pop(key)
+            future.set_result(result)
+
+    def _get_llm_signal_score(self, features: dict[str, Any]) -> dict[str, Any]:
+        """Get signal score from the chat model (blocking)"""
         try:
             # Prepare the prompt with market features
             prompt = self._build_analysis_prompt(features)
 
-            response = openai.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are an expert trading advisor. Analyze the provided market data "
-                            "and return a JSON response with trading recommendations."
-                        ),
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                max_tokens=300,
-                temperature=0.3,
-            )
-
-            content = response.choices[0].message.content.strip()
+            self.stats["llm_calls"] += 1
+            content = self.model.complete(SYSTEM_PROMPT, prompt, max_tokens=300)
 
             # Try to parse JSON response
             try:
-                result = json.loads(content)
+                result = json.loads(self._strip_code_fence(content))
                 return self._validate_and_normalize_response(result)
-            except json.JSONDecodeError:
-                logger.warning(f"Failed to parse OpenAI JSON response: {content}")
-                return self._get_fallback_response("OpenAI returned invalid JSON")
+            except (json.JSONDecodeError, TypeError, ValueError, AttributeError):
+                logger.warning(f"Failed to parse LLM JSON response: {content}")
+                return self._get_fallback_response("LLM returned invalid JSON")
 
         except Exception as e:
-            logger.error(f"OpenAI API error: {e}")
-            return self._get_fallback_response(f"OpenAI API error: {str(e)}")
+            self.stats["errors"] += 1
+            logger.error(f"LLM API error: {e}")
+            return self._get_fallback_response(f"LLM API error: {str(e)}")
 
-    def _get_mock_signal_score(self, features: dict[str, Any]) -> dict[str, Any]:
+    @staticmethod
+    def _get_mock_signal_score(features: dict[str, Any]) -> dict[str, Any]:
         """Deterministic mock for testing and fallback"""
         # Extract key indicators with safe defaults
         price = features.get("price", 50000.0)
@@ -198,6 +504,65 @@ class SignalAdvisor:
         - Be conservative in uncertain conditions
         """
 
+    def _build_batch_prompt(self, features_by_symbol: dict[str, dict[str, Any]]) -> str:
+        """Build one prompt covering several symbols; the features line must stay single-line JSON"""
+        payload = {
+            symbol: {name: value for name, value in features.items() if name not in IGNORED_FEATURES}
+            for symbol, features in features_by_symbol.items()
+        }
+        return f"""
+        Analyze the following markets independently and provide a trading recommendation for each.
+
+        {BATCH_FEATURES_MARKER}
+        {json.dumps(payload, default=str)}
+
+        Please return a single JSON object keyed by symbol, each value with the structure:
+        {{
+            "score": <float between 0.0 and 1.0>,
+            "rationale": "<brief explanation of your analysis>",
+            "strategy": "<trading strategy name>",
+            "action": "<BUY, SELL, or HOLD>"
+        }}
+
+        Guidelines:
+        - Include every symbol listed above exactly once
+        - Score should reflect confidence in the trading signal (0.0 = very bearish, 1.0 = very bullish)
+        - Rationale should be concise but informative
+        - Consider trend, momentum, volatility, and risk factors
+        - Be conservative in uncertain conditions
+        """
+
+    def _parse_batch_response(self, content: str, symbols: list[str]) -> dict[str, dict[str, Any]]:
+        """Split a multi-symbol JSON answer; symbols missing from it get the fallback response"""
+        try:
+            data = json.loads(self._strip_code_fence(content))
+        except json.JSONDecodeError:
+            logger.warning(f"Failed to parse LLM batch JSON response: {content}")
+            return {symbol: self._get_fallback_response("LLM returned invalid JSON") for symbol in symbols}
+
+        # A single-symbol prompt may be answered with a bare object
+        if isinstance(data, dict) and len(symbols) == 1 and "score" in data:
+            data = {symbols[0]: data}
+
+        parsed = {}
+        for symbol in symbols:
+            entry = data.get(symbol) if isinstance(data, dict) else None
+            try:
+                parsed[symbol] = self._validate_and_normalize_response(entry)
+            except (TypeError, ValueError, AttributeError):
+                logger.warning(f"LLM batch response has no valid entry for {symbol}")
+                parsed[symbol] = self._get_fallback_response("LLM response missing symbol")
+        return parsed
+
+    @staticmethod
+    def _strip_code_fence(content: str) -> str:
+        """Drop a ```json fence some models wrap their answer in"""
+        content = content.strip()
+        if content.startswith("```"):
+            content = content.split("\n", 1)[1] if "\n" in content else ""
+            content = content.rsplit("```", 1)[0]
+        return content.strip()
+
     def _validate_and_normalize_response(self, response: dict[str, Any]) -> dict[str, Any]:
         """Validate and normalize API response"""
         # Ensure all required fields exist
@@ -234,12 +599,13 @@ class SignalAdvisor:
 _advisor_instance = None
 
 
-def get_signal_score(features: dict[str, Any]) -> dict[str, Any]:
+def get_signal_score(features: dict[str, Any], symbol: str | None = None) -> dict[str, Any]:
     """
     Global function to get signal score - maintains singleton advisor instance
 
     Args:
         features: Market features dictionary
+        symbol: Optional symbol the features belong to (scopes the response cache)
 
     Returns:
         Signal score response dictionary
@@ -249,7 +615,25 @@ def get_signal_score(features: dict[str, Any]) -> dict[str, Any]:
     if _advisor_instance is None:
         _advisor_instance = SignalAdvisor()
 
-    return _advisor_instance.get_signal_score(features)
+    return _advisor_instance.get_signal_score(features, symbol)
+
+
+async def get_signal_scores(features_by_symbol: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """
+    Batched async counterpart of get_signal_score using the same singleton advisor
+
+    Args:
+        features_by_symbol: Mapping symbol -> market features dictionary
+
+    Returns:
+        Mapping symbol -> signal score response dictionary
+    """
+    global _advisor_instance
+
+    if _advisor_instance is None:
+        _advisor_instance = SignalAdvisor()
+
+    return await _advisor_instance.get_signal_scores(features_by_symbol)
 
 
 def reset_advisor():
@@ -3,33 +3,419 @@ Explainability logging module for trading decisions
 
 This module provides structured logging of trading decisions with all relevant
 context for auditing and analysis.
+
+Decisions are appended to one JSONL segment per UTC day (``explain-YYYY-MM-DD.log``
+next to the configured log path). Each segment has a ``.stats.json`` file with the
+day's aggregate counters and the segment offset they cover, so daily stats only
+read lines appended since the last snapshot and recent decisions are read by
+seeking backwards from the end of the newest segments.
+
+With ``background=True`` (the global logger) decisions are handed to a
+BackgroundLogWriter: callers only enqueue, and a writer thread group-commits
+queued lines with one write and fsync per segment per flush interval.
 """
 
+import atexit
 import json
 import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
 from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
 
 logger = logging.getLogger(__name__)
 
+ACTIONS = ("BUY", "SELL", "HOLD")
+# Rationale prefixes tracked per day; the rarest are pruned beyond this
+MAX_TRACKED_RATIONALES = 500
+TAIL_BLOCK_SIZE = 64 * 1024
+
+
+class DailyAggregate:
+    """Incrementally maintained counters of one day segment"""
+
+    def __init__(self, date_str: str):
+        self.date = date_str
+        self.offset = 0  # Segment bytes already counted
+        self.total = 0
+        self.accepted = 0
+        self.score_sum = 0.0
+        self.accepted_score_sum = 0.0
+        self.filtered_by_advisor = 0
+        self.actions = dict.fromkeys(ACTIONS, 0)
+        self.rationales: dict[str, int] = {}
+
+    def add(self, entry: dict[str, Any]):
+        score = float(entry.get("score", 0.0) or 0.0)
+        accepted = bool(entry.get("accepted"))
+        self.total += 1
+        self.score_sum += score
+        if accepted:
+            self.accepted += 1
+            self.accepted_score_sum += score
+        elif "advisor" in (entry.get("deny_reason") or "").lower():
+            self.filtered_by_advisor += 1
+
+        action = entry.get("action", "HOLD")
+        if action in self.actions:
+            self.actions[action] += 1
+
+        rationale = (entry.get("rationale") or "")[:50]  # First 50 chars
+        if rationale:
+            self.rationales[rationale] = self.rationales.get(rationale, 0) + 1
+            if len(self.rationales) > MAX_TRACKED_RATIONALES:
+                keep = sorted(self.rationales.items(), key=lambda x: x[1], reverse=True)[: MAX_TRACKED_RATIONALES // 2]
+                self.rationales = dict(keep)
+
+    def add_lines(self, data: bytes):
+        """Count complete JSON lines of ``data`` and advance the offset past them"""
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            line = line.strip()
+            if line:
+                try:
+                    self.add(json.loads(line))
+                except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+                    continue
+        self.offset += end
+
+    def to_stats(self) -> dict[str, Any]:
+        denied = self.total - self.accepted
+        denied_score_sum = self.score_sum - self.accepted_score_sum
+        top = sorted(self.rationales.items(), key=lambda x: x[1], reverse=True)[:3]
+        return {
+            "date": self.date,
+            "total_decisions": self.total,
+            "accepted_decisions": self.accepted,
+            "denied_decisions": denied,
+            "avg_score": round(self.score_sum / self.total, 3) if self.total else 0.0,
+            "action_breakdown": dict(self.actions),
+            "top_rationales": [{"rationale": r[0], "count": r[1]} for r in top],
+            "filtered_by_advisor": self.filtered_by_advisor,
+            "avg_score_accepted": self.accepted_score_sum / self.accepted if self.accepted else 0.0,
+            "avg_score_denied": denied_score_sum / denied if denied else 0.0,
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "date": self.date,
+            "offset": self.offset,
+            "total": self.total,
+            "accepted": self.accepted,
+            "score_sum": self.score_sum,
+            "accepted_score_sum": self.accepted_score_sum,
+            "filtered_by_advisor": self.filtered_by_advisor,
+            "actions": self.actions,
+            "rationales": self.rationales,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "DailyAggregate":
+        aggregate = cls(data["date"])
+        aggregate.offset = int(data["offset"])
+        aggregate.total = int(data["total"])
+        aggregate.accepted = int(data["accepted"])
+        aggregate.score_sum = float(data["score_sum"])
+        aggregate.accepted_score_sum = float(data["accepted_score_sum"])
+        aggregate.filtered_by_advisor = int(data["filtered_by_advisor"])
+        aggregate.actions.update(data["actions"])
+        aggregate.rationales = dict(data["rationales"])
+        return aggregate
+
+
+class BackgroundLogWriter:
+    """
+    Bounded queue drained by a writer thread with group commit
+
+    When the queue is full the backpressure policy decides what happens to new entries:
+    "block" waits for space, "drop" discards them (counted in metrics), "spill" appends
+    them to a spill file that the writer replays, in order, once the queue has drained.
+    The spill file is renamed to *.draining for replay and removed only after its entries
+    were written; a failed write is retried, and a file left by a previous process is
+    replayed on start.
+    """
+
+    BACKPRESSURE_POLICIES = ("block", "drop", "spill")
+
+    def __init__(
+        self,
+        write_batch: Callable[[list[dict[str, Any]]], None],
+        max_queue: int = 10000,
+        flush_interval: float = 0.2,
+        max_batch: int = 5000,
+        backpressure: str = "block",
+        spill_path: str | Path | None = None,
+        block_timeout: float | None = None,
+    ):
+        if backpressure not in self.BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {backpressure}")
+        if backpressure == "spill" and spill_path is None:
+            raise ValueError("spill backpressure requires spill_path")
+
+        self.write_batch = write_batch
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.backpressure = backpressure
+        self.spill_path = Path(spill_path) if spill_path else None
+        self.draining_path = self.spill_path.with_name(self.spill_path.name + ".draining") if spill_path else None
+        self.block_timeout = block_timeout
+
+        self._pending: deque[dict[str, Any]] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._flush_requested = False
+        self._spilling = False
+        self._draining = False  # the batch being written came from draining_path
+        self._submitted = 0  # entries accepted (queued or spilled)
+        self._written = 0  # entries handed to write_batch
+        self._metrics = {
+            "dropped": 0,
+            "spilled": 0,
+            "blocked": 0,
+            "batches": 0,
+            "write_errors": 0,
+            "max_queue_depth": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+        }
+
+        # Entries spilled by a previous process are replayed first
+        if self.spill_path and (self.draining_path.exists() or self.spill_path.exists()):
+            self._spilling = True
+
+        self._thread = threading.Thread(target=self._run, name="explain-log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, entries: list[dict[str, Any]]) -> bool:
+        """Enqueue entries; returns False if they were dropped"""
+        n = len(entries)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("BackgroundLogWriter is closed")
+
+            if self._spilling:
+                # Keep order: while older entries sit in the spill file, newer ones follow them there
+                self._spill(entries)
+                return True
+
+            if len(self._pending) + n > self.max_queue:
+                if self.backpressure == "drop":
+                    self._metrics["dropped"] += n
+                    return False
+                if self.backpressure == "spill":
+                    self._spilling = True
+                    self._spill(entries)
+                    return True
+                self._metrics["blocked"] += 1
+                self._cond.notify_all()
+                has_space = self._cond.wait_for(
+                    lambda: self._closed or not self._pending or len(self._pending) + n <= self.max_queue,
+                    timeout=self.block_timeout,
+                )
+                if not has_space or self._closed:
+                    self._metrics["dropped"] += n
+                    return False
+
+            self._pending.extend(entries)
+            self._submitted += n
+            self._metrics["max_queue_depth"] = max(self._metrics["max_queue_depth"], len(self._pending))
+            self._cond.notify_all()
+            return True
+
+    def _spill(self, entries: list[dict[str, Any]]):
+        # Caller holds the lock
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+        self._submitted += len(entries)
+        self._metrics["spilled"] += len(entries)
+
+    def _take_batch(self) -> list[dict[str, Any]]:
+        # Caller holds the lock
+        batch = []
+        while self._pending and len(batch) < self.max_batch:
+            batch.append(self._pending.popleft())
+        if batch:
+            return batch
+
+        if self._spilling:
+            # A draining file left by a failed write or a previous process goes before newer spills
+            if not self.draining_path.exists() and self.spill_path.exists():
+                os.replace(self.spill_path, self.draining_path)
+            if self.draining_path.exists():
+                with open(self.draining_path, encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            try:
+                                batch.append(json.loads(line))
+                            except json.JSONDecodeError:
+                                continue
+                if not batch:
+                    self.draining_path.unlink()
+                self._draining = bool(batch)
+            self._spilling = self.spill_path.exists()
+        return batch
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            with self._cond:
+                # Group commit: gather entries until the interval since the last flush has passed
+                while not (self._closed or self._flush_requested or len(self._pending) >= self.max_batch):
+                    if self._pending or self._spilling:
+                        remaining = self.flush_interval - (time.monotonic() - last_flush)
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+                batch = self._take_batch()
+                draining, self._draining = self._draining, False
+                if not batch:
+                    self._flush_requested = False
+                    self._cond.notify_all()
+                    if self._closed:
+                        return
+                    continue
+                # Space freed for blocked producers
+                self._cond.notify_all()
+
+            started = time.perf_counter()
+            written = True
+            try:
+                self.write_batch(batch)
+            except Exception as e:
+                written = False
+                self._metrics["write_errors"] += 1
+                logger.error(f"Explain log writer failed to write {len(batch)} entries: {e}")
+            if draining and written:
+                self.draining_path.unlink()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            last_flush = time.monotonic()
+
+            with self._cond:
+                if draining and not written:
+                    if self._closed:
+                        return  # left on disk for the next start
+                    # Retried after the next interval; the file stays until it is written
+                    self._spilling = True
+                    continue
+                self._written += len(batch)
+                self._metrics["batches"] += 1
+                self._metrics["last_flush_ms"] = elapsed_ms
+                self._metrics["max_flush_ms"] = max(self._metrics["max_flush_ms"], elapsed_ms)
+                self._metrics["total_flush_ms"] += elapsed_ms
+                self._cond.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until everything submitted so far has been written"""
+        with self._cond:
+            target = self._submitted
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(
+                lambda: self._written >= target or not self._thread.is_alive(), timeout=timeout
+            )
+
+    def close(self, timeout: float | None = 10.0):
+        """Write out queued entries and stop the writer thread"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def metrics(self) -> dict[str, Any]:
+        with self._cond:
+            metrics = dict(self._metrics)
+            metrics["queue_depth"] = len(self._pending)
+            metrics["pending"] = self._submitted - self._written
+            metrics["written"] = self._written
+            batches = metrics["batches"]
+            metrics["avg_flush_ms"] = metrics.pop("total_flush_ms") / batches if batches else 0.0
+            return metrics
+
 
 class ExplainabilityLogger:
     """Logger for trading decision explanations and audit trail"""
 
-    def __init__(self, log_path: str = "logs/explain.log"):
+    # log_decision parameters; other keys of a batched decision are additional context
+    _ENTRY_FIELDS = frozenset({"symbol", "score", "action", "strategy", "rationale", "accepted", "deny_reason"})
+
+    def __init__(
+        self,
+        log_path: str = "logs/explain.log",
+        stats_interval: float = 5.0,
+        background: bool = False,
+        max_queue: int = 10000,
+        flush_interval: float = 0.2,
+        backpressure: str = "block",
+        fsync: bool | None = None,
+    ):
         """
         Initialize explainability logger
 
         Args:
-            log_path: Path to the explain log file
+            log_path: Path of the explain log; day segments are written next to it
+                      as <stem>-YYYY-MM-DD<suffix>
+            stats_interval: Seconds between persisting aggregate snapshots while logging
+            background: Hand entries to a BackgroundLogWriter instead of writing inline
+            max_queue: Queue bound of the background writer (entries)
+            flush_interval: Group commit interval of the background writer (seconds)
+            backpressure: What to do when the queue is full: "block", "drop" or "spill"
+            fsync: fsync each segment write (defaults to on for background writes)
         """
         self.log_path = Path(log_path)
         self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self.stats_interval = stats_interval
+        self.fsync = background if fsync is None else fsync
+        self._lock = threading.RLock()
+        self._aggregates: dict[str, DailyAggregate] = {}
+        self._dirty: set[str] = set()
+        self._last_persist = time.monotonic()
+        self._segment_pattern = re.compile(
+            rf"^{re.escape(self.log_path.stem)}-(\d{{4}}-\d{{2}}-\d{{2}}){re.escape(self.log_path.suffix)}$"
+        )
+
+        # Split a pre-segment single-file log into day segments once
+        if self.log_path.exists() and self.log_path.stat().st_size > 0:
+            self._migrate_legacy_log()
+        if self.log_path.with_name(self.log_path.name + ".migrating").exists():
+            # Re-running could duplicate the entries already copied
+            logger.warning(f"Interrupted legacy explain log migration left {self.log_path}.migrating behind")
+
+        self._writer: BackgroundLogWriter | None = None
+        if background:
+            self._writer = BackgroundLogWriter(
+                self._write_entries,
+                max_queue=max_queue,
+                flush_interval=flush_interval,
+                backpressure=backpressure,
+                spill_path=self.log_path.with_name(self.log_path.name + ".spill"),
+            )
 
-        # Ensure log file exists
-        if not self.log_path.exists():
-            self.log_path.touch()
+    def segment_path(self, date_str: str) -> Path:
+        """Path of the log segment for a UTC day"""
+        return self.log_path.with_name(f"{self.log_path.stem}-{date_str}{self.log_path.suffix}")
+
+    def _stats_path(self, date_str: str) -> Path:
+        return self.segment_path(date_str).with_suffix(".stats.json")
+
+    def segment_dates(self) -> list[str]:
+        """Dates with a log segment, oldest first"""
+        dates = []
+        for path in self.log_path.parent.iterdir():
+            match = self._segment_pattern.match(path.name)
+            if match:
+                dates.append(match.group(1))
+        return sorted(dates)
 
     def log_decision(
         self,
@@ -55,11 +441,53 @@ class ExplainabilityLogger:
             deny_reason: Reason for denial if not accepted
             additional_context: Extra context data
         """
-        timestamp = datetime.now(UTC).isoformat()
+        log_entry = self._build_entry(
+            symbol, score, action, strategy, rationale, accepted, deny_reason, additional_context, datetime.now(UTC)
+        )
+        self._submit([log_entry])
+
+    def log_decisions(self, decisions: list[dict[str, Any]]):
+        """
+        Log several decisions with a single file write
 
+        Args:
+            decisions: Dicts with the log_decision arguments; keys other than the
+                       named parameters are logged as additional context
+        """
+        timestamp = datetime.now(UTC)
+        entries = []
+        for decision in decisions:
+            context = {key: value for key, value in decision.items() if key not in self._ENTRY_FIELDS}
+            entries.append(
+                self._build_entry(
+                    decision["symbol"],
+                    decision["score"],
+                    decision["action"],
+                    decision["strategy"],
+                    decision["rationale"],
+                    decision["accepted"],
+                    decision.get("deny_reason"),
+                    context,
+                    timestamp,
+                )
+            )
+        self._submit(entries)
+
+    @staticmethod
+    def _build_entry(
+        symbol: str,
+        score: float,
+        action: str,
+        strategy: str,
+        rationale: str,
+        accepted: bool,
+        deny_reason: str | None,
+        additional_context: dict[str, Any] | None,
+        timestamp: datetime,
+    ) -> dict[str, Any]:
         # Build log entry
         log_entry = {
-            "ts": timestamp,
+            "ts": timestamp.isoformat(),
             "symbol": symbol,
             "score": round(float(score), 3),
             "action": action,
@@ -72,13 +500,176 @@ class ExplainabilityLogger:
         # Add additional context if provided
         if additional_context:
             log_entry.update(additional_context)
-
-        # Write to log file
+        return log_entry
+
+    def _submit(self, entries: list[dict[str, Any]]):
+        if not entries:
+            return
+        if self._writer is not None:
+            self._writer.submit(entries)
+        else:
+            self._write_entries(entries)
+
+    def _write_entries(self, entries: list[dict[str, Any]]):
+        """Append entries to their day segments (one write per segment) and update the day aggregates"""
+        with self._lock:
+            self._write_entries_locked(entries)
+
+    def _write_entries_locked(self, entries: list[dict[str, Any]]):
+        by_date: dict[str, list[dict[str, Any]]] = {}
+        for entry in entries:
+            by_date.setdefault(entry["ts"][:10], []).append(entry)
+
+        for date_str, day_entries in by_date.items():
+            data = "".join(json.dumps(entry) + "\n" for entry in day_entries).encode("utf-8")
+            # Bring counters up to the current end first so the new bytes are counted exactly once
+            aggregate = self._aggregate(date_str)
+
+            # Write to log file
+            try:
+                with open(self.segment_path(date_str), "ab") as f:
+                    f.write(data)
+                    if self.fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+            except Exception as e:
+                logger.error(f"Failed to write to explain log: {e}")
+                continue
+
+            for entry in day_entries:
+                aggregate.add(entry)
+            aggregate.offset += len(data)
+            self._dirty.add(date_str)
+
+        if time.monotonic() - self._last_persist >= self.stats_interval:
+            self.flush_stats()
+
+    def _aggregate(self, date_str: str) -> DailyAggregate:
+        """Day counters caught up with the segment (only bytes past the snapshot are read)"""
+        aggregate = self._aggregates.get(date_str)
+        if aggregate is None:
+            aggregate = self._load_aggregate(date_str)
+            self._aggregates[date_str] = aggregate
+
+        segment = self.segment_path(date_str)
         try:
-            with open(self.log_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps(log_entry) + "\n")
+            size = segment.stat().st_size
+        except FileNotFoundError:
+            return aggregate
+        if size < aggregate.offset:
+            # Segment replaced or truncated behind our back: recount it
+            aggregate = self._aggregates[date_str] = DailyAggregate(date_str)
+        if size > aggregate.offset:
+            with open(segment, "rb") as f:
+                f.seek(aggregate.offset)
+                aggregate.add_lines(f.read(size - aggregate.offset))
+            self._dirty.add(date_str)
+        return aggregate
+
+    def _load_aggregate(self, date_str: str) -> DailyAggregate:
+        try:
+            with open(self._stats_path(date_str), encoding="utf-8") as f:
+                return DailyAggregate.from_dict(json.load(f))
+        except FileNotFoundError:
+            return DailyAggregate(date_str)
         except Exception as e:
-            logger.error(f"Failed to write to explain log: {e}")
+            logger.warning(f"Ignoring unreadable explain stats for {date_str}: {e}")
+            return DailyAggregate(date_str)
+
+    def flush_stats(self):
+        """Persist aggregate snapshots of days changed since the last flush"""
+        with self._lock:
+            self._flush_stats_locked()
+
+    def _flush_stats_locked(self):
+        for date_str in sorted(self._dirty):
+            path = self._stats_path(date_str)
+            tmp_path = path.with_name(path.name + ".tmp")
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._aggregates[date_str].to_dict(), f)
+                os.replace(tmp_path, path)
+            except Exception as e:
+                logger.error(f"Failed to persist explain stats for {date_str}: {e}")
+        self._dirty.clear()
+        self._last_persist = time.monotonic()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait for queued entries to be written and persist aggregate snapshots"""
+        done = self._writer.flush(timeout) if self._writer is not None else True
+        self.flush_stats()
+        return done
+
+    def close(self):
+        """Write out queued entries, stop the background writer and persist aggregate snapshots"""
+        if self._writer is not None:
+            self._writer.close()
+        self.flush_stats()
+
+    def get_writer_metrics(self) -> dict[str, Any]:
+        """Queue depth, drops/spills and flush latency of the background writer"""
+        if self._writer is None:
+            return {"background": False}
+        return {"background": True, "backpressure": self._writer.backpressure, **self._writer.metrics()}
+
+    def _migrate_legacy_log(self):
+        """
+        Move entries of the single-file log into day segments, keeping the old file as *.migrated
+
+        The log is first renamed to *.migrating: the rename succeeds for exactly one of several
+        processes starting together, so only that one copies the entries.
+        """
+        migrating = self.log_path.with_name(self.log_path.name + ".migrating")
+        try:
+            os.rename(self.log_path, migrating)
+        except FileNotFoundError:
+            return  # another process is migrating it
+        logger.info(f"Splitting legacy explain log {self.log_path} into day segments")
+        fallback_date = datetime.fromtimestamp(migrating.stat().st_mtime, UTC).strftime("%Y-%m-%d")
+        handles: dict[str, Any] = {}
+        try:
+            with open(migrating, "rb") as src:
+                for line in src:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        date_str = str(json.loads(line).get("ts", ""))[:10]
+                    except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+                        continue
+                    if not re.match(r"^\d{4}-\d{2}-\d{2}$", date_str):
+                        date_str = fallback_date
+                    if date_str not in handles:
+                        handles[date_str] = open(self.segment_path(date_str), "ab")
+                    handles[date_str].write(line + b"\n")
+        finally:
+            for handle in handles.values():
+                handle.close()
+        os.replace(migrating, self.log_path.with_name(self.log_path.name + ".migrated"))
+
+    def _tail_lines(self, path: Path, limit: int) -> list[bytes]:
+        """Last ``limit`` non-empty lines of a file, read backwards in blocks"""
+        lines: list[bytes] = []
+        with open(path, "rb") as f:
+            position = f.seek(0, os.SEEK_END)
+            remainder = b""
+            while position > 0 and len(lines) < limit:
+                step = min(TAIL_BLOCK_SIZE, position)
+                position -= step
+                f.seek(position)
+                chunk = f.read(step) + remainder
+                parts = chunk.split(b"\n")
+                # The first part may be cut mid-line unless we reached the file start
+                remainder = parts.pop(0) if position > 0 else b""
+                for part in reversed(parts):
+                    if part.strip():
+                        lines.append(part)
+                        if len(lines) == limit:
+                            break
+            if remainder.strip() and len(lines) < limit:
+                lines.append(remainder)
+        lines.reverse()
+        return lines
 
     def get_recent_decisions(self, limit: int = 100) -> list:
         """
@@ -93,23 +684,18 @@ class ExplainabilityLogger:
         decisions: list[dict[str, Any]] = []
 
         try:
-            if not self.log_path.exists():
-                return decisions
-
-            with open(self.log_path, encoding="utf-8") as f:
-                lines = f.readlines()
-
-            # Get the last N lines
-            recent_lines = lines[-limit:] if len(lines) > limit else lines
-
-            for line in recent_lines:
-                line = line.strip()
-                if line:
+            # Newest segments first until enough lines are collected
+            for date_str in reversed(self.segment_dates()):
+                needed = limit - len(decisions)
+                if needed <= 0:
+                    break
+                day: list[dict[str, Any]] = []
+                for line in self._tail_lines(self.segment_path(date_str), needed):
                     try:
-                        decision = json.loads(line)
-                        decisions.append(decision)
-                    except json.JSONDecodeError:
+                        day.append(json.loads(line))
+                    except (json.JSONDecodeError, UnicodeDecodeError):
                         continue
+                decisions = day + decisions
 
         except Exception as e:
             logger.error(f"Failed to read explain log: {e}")
@@ -129,58 +715,12 @@ class ExplainabilityLogger:
         if date_str is None:
             date_str = datetime.now(UTC).strftime("%Y-%m-%d")
 
-        stats: dict[str, Any] = {
-            "date": date_str,
-            "total_decisions": 0,
-            "accepted_decisions": 0,
-            "denied_decisions": 0,
-            "avg_score": 0.0,
-            "action_breakdown": {"BUY": 0, "SELL": 0, "HOLD": 0},
-            "top_rationales": [],
-            "filtered_by_advisor": 0,
-        }
-
         try:
-            decisions = self.get_recent_decisions(limit=1000)  # Get more for daily analysis
-            daily_decisions = [d for d in decisions if d.get("ts", "").startswith(date_str)]
-
-            if not daily_decisions:
-                return stats
-
-            stats["total_decisions"] = len(daily_decisions)
-            stats["accepted_decisions"] = sum(1 for d in daily_decisions if d.get("accepted"))
-            stats["denied_decisions"] = stats["total_decisions"] - stats["accepted_decisions"]
-
-            # Calculate average score
-            scores = [d.get("score", 0.0) for d in daily_decisions]
-            stats["avg_score"] = round(sum(scores) / len(scores), 3) if scores else 0.0
-
-            # Action breakdown
-            for decision in daily_decisions:
-                action = decision.get("action", "HOLD")
-                if action in stats["action_breakdown"]:
-                    stats["action_breakdown"][action] += 1
-
-            # Count advisor-filtered decisions
-            stats["filtered_by_advisor"] = sum(
-                1 for d in daily_decisions if not d.get("accepted") and "advisor" in d.get("deny_reason", "").lower()
-            )
-
-            # Top rationales (by frequency)
-            rationale_counts: dict[str, int] = {}
-            for decision in daily_decisions:
-                rationale = decision.get("rationale", "")[:50]  # First 50 chars
-                if rationale:
-                    rationale_counts[rationale] = rationale_counts.get(rationale, 0) + 1
-
-            # Sort by frequency and get top 3
-            sorted_rationales = sorted(rationale_counts.items(), key=lambda x: x[1], reverse=True)
-            stats["top_rationales"] = [{"rationale": r[0], "count": r[1]} for r in sorted_rationales[:3]]
-
+            with self._lock:
+                return self._aggregate(date_str).to_stats()
         except Exception as e:
             logger.error(f"Failed to calculate daily stats: {e}")
-
-        return stats
+            return DailyAggregate(date_str).to_stats()
 
 
 # Global explainability logger instance
@@ -192,7 +732,10 @@ def get_explain_logger() -> ExplainabilityLogger:
     global _explain_logger
 
     if _explain_logger is None:
-        _explain_logger = ExplainabilityLogger()
+        _explain_logger = ExplainabilityLogger(
+            background=True, backpressure=os.getenv("EXPLAIN_LOG_BACKPRESSURE", "block")
+        )
+        atexit.register(_explain_logger.close)
 
     return _explain_logger
 
@@ -231,3 +774,13 @@ def log_decision(
         deny_reason=deny_reason,
         additional_context=kwargs,
     )
+
+
+def log_decisions(decisions: list[dict[str, Any]]):
+    """
+    Convenience function to log a batch of trading decisions with one write
+
+    Args:
+        decisions: Dicts with log_decision arguments (extra keys become context)
+    """
+    get_explain_logger().log_decisions(decisions)
@@ -2,18 +2,24 @@
 Main agent loop for trading decisions
 """
 
+import asyncio
+import inspect
 import logging
 import os
 import sys
+import time
+from collections.abc import Callable
 from datetime import UTC, datetime
 from typing import Any
 
+import numpy as np
+
 # Add the app directory to the Python path for CLI usage
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from .advisor import get_signal_score
+from .advisor import get_signal_score, get_signal_scores
 from .config import load_advisor_config
-from .explain_logger import log_decision
+from .explain_logger import log_decision, log_decisions
 from .policy import MockLLMPolicy
 from .schema import AgentDecision, MarketData, RiskParameters
 
@@ -48,6 +54,10 @@ class AgentLoop:
         self.latest_advisor_result: dict[str, Any] | None = None
         self.recovery_tries = 0  # Track recovery attempts after losses
 
+        # Multi-symbol decision cycle
+        self.last_cycle_timings: dict[str, float] = {}
+        self._rng = np.random.default_rng()
+
         logger.info(f"AgentLoop initialized with advisor config: {self.advisor_config}")
 
     def _build_market_features(self, market_data: MarketData) -> dict[str, Any]:
@@ -108,6 +118,50 @@ class AgentLoop:
 
         return features
 
+    def _build_market_features_batch(self, market_data: list[MarketData]) -> dict[str, dict[str, Any]]:
+        """
+        Build advisor features for several symbols in one vectorized pass
+
+        Args:
+            market_data: Current market data, one entry per symbol
+
+        Returns:
+            Mapping symbol -> features (same keys as _build_market_features)
+        """
+        if not market_data:
+            return {}
+
+        n = len(market_data)
+        price = np.array([data.price for data in market_data])
+        volume = np.array([data.volume for data in market_data])
+        change = np.array([data.change_24h for data in market_data])
+
+        # Mock technical indicators, same distributions as _build_market_features
+        ema = price * (1 + self._rng.uniform(-0.01, 0.01, n))
+        rsi = np.where(
+            change > 0.02,
+            self._rng.uniform(55, 75, n),
+            np.where(change < -0.02, self._rng.uniform(25, 45, n), self._rng.uniform(40, 60, n)),
+        )
+        atr = price * self._rng.uniform(0.01, 0.04, n)
+        adx = self._rng.uniform(15, 40, n)
+        increasing = volume > 1000000
+
+        return {
+            data.symbol: {
+                "price": data.price,
+                "volume": data.volume,
+                "change_24h": data.change_24h,
+                "timestamp": data.timestamp.isoformat(),
+                "ema": float(ema[i]),
+                "rsi": float(rsi[i]),
+                "atr": float(atr[i]),
+                "adx": float(adx[i]),
+                "volume_trend": "increasing" if increasing[i] else "decreasing",
+            }
+            for i, data in enumerate(market_data)
+        }
+
     def _check_recovery_logic(self, advisor_score: float) -> tuple[bool, str]:
         """
         Check if recovery logic allows trade after consecutive losses
@@ -161,6 +215,171 @@ class AgentLoop:
 
         return True, "recovery_check_default"
 
+    def _paused_decision(self, symbol: str) -> dict[str, Any]:
+        return {
+            "score": 0.0,
+            "rationale": "Agent is paused",
+            "intent": "HOLD",
+            "action": "HOLD",
+            "timestamp": datetime.now(UTC).isoformat(),
+            "symbol": symbol,
+        }
+
+    def _error_decision(self, symbol: str, error: Exception) -> dict[str, Any]:
+        return {
+            "score": 0.0,
+            "rationale": f"Error in decision making: {str(error)}",
+            "intent": "HOLD",
+            "action": "HOLD",
+            "timestamp": datetime.now(UTC).isoformat(),
+            "symbol": symbol,
+            "advisor_score": 0.0,
+            "advisor_rationale": "Error occurred",
+            "advisor_strategy": "error",
+            "advisor_action": "HOLD",
+        }
+
+    @staticmethod
+    def _to_market_data(symbol: str, market_data_dict: dict[str, Any]) -> MarketData:
+        return MarketData(
+            symbol=symbol,
+            price=float(market_data_dict.get("price", 0)),
+            volume=float(market_data_dict.get("volume", 0)),
+            change_24h=float(market_data_dict.get("change_24h", 0)),
+            timestamp=datetime.now(UTC),
+        )
+
+    def _finalize_decision(
+        self,
+        symbol: str,
+        market_data: MarketData,
+        advisor_result: dict[str, Any],
+        base_decision: AgentDecision,
+        get_account_info: Callable[[], dict[str, Any]],
+    ) -> tuple[AgentDecision, dict[str, Any], dict[str, Any]]:
+        """
+        Apply advisor gating, Risk Engine gates and policy risk checks to a base decision
+
+        Args:
+            symbol: Trading symbol
+            market_data: Market data the decision was made on
+            advisor_result: Advisor signal score response
+            base_decision: Decision proposed by the policy
+            get_account_info: Returns account state for the Risk Engine (called only for entries)
+
+        Returns:
+            Tuple of (final decision, decision dict, explain log entry); the caller records them
+        """
+        # Apply advisor gating logic
+        decision_accepted = True
+        deny_reason = None
+
+        # Check if action is not HOLD (i.e., wants to trade)
+        if base_decision.action != "HOLD":
+            # Check advisor threshold
+            if advisor_result["score"] < self.advisor_config["ADVISOR_THRESHOLD"]:
+                decision_accepted = False
+                deny_reason = (
+                    f"advisor_low_score ({advisor_result['score']:.3f} < {self.advisor_config['ADVISOR_THRESHOLD']})"
+                )
+            else:
+                # Check recovery logic if we have consecutive losses
+                recovery_allowed, recovery_reason = self._check_recovery_logic(advisor_result["score"])
+                if not recovery_allowed:
+                    decision_accepted = False
+                    deny_reason = recovery_reason
+
+        # Create final decision based on advisor gating
+        if decision_accepted:
+            # Use the base decision but incorporate advisor info
+            final_decision = base_decision
+            final_rationale = f"Advisor approved (score: {advisor_result['score']:.3f}): {advisor_result['rationale']}"
+        else:
+            # Override to HOLD due to advisor
+            final_decision = AgentDecision(
+                score=advisor_result["score"],
+                rationale=f"Advisor denied: {deny_reason}. {advisor_result['rationale']}",
+                intent="HOLD",
+                action="HOLD",
+                target_price=None,
+                stop_loss=None,
+                take_profit=None,
+                quantity=None,
+            )
+            final_rationale = final_decision.rationale
+
+        # Explain log entry records the advisor verdict before risk gates
+        explain_entry = {
+            "symbol": symbol,
+            "score": advisor_result["score"],
+            "action": advisor_result["action"],
+            "strategy": advisor_result["strategy"],
+            "rationale": advisor_result["rationale"],
+            "accepted": decision_accepted,
+            "deny_reason": deny_reason,
+            "final_action": final_decision.action,
+            "market_price": market_data.price,
+        }
+
+        # Check Risk Engine gates before proposing order (only if advisor approved)
+        if final_decision.action != "HOLD":
+            risk_engine = get_risk_engine()
+            now_utc = datetime.now(UTC)
+
+            # Get account state for position checking
+            try:
+                account_info = get_account_info()
+            except Exception as e:
+                logger.warning(f"Could not get account info for risk check: {e}")
+                account_info = {}
+
+            allowed, reason = risk_engine.allow_entry(now_utc, symbol, account_info)
+
+            if not allowed:
+                logger.warning(f"Risk Engine rejected entry: {reason}")
+                # Notify about risk block
+                if self.notifier:
+                    self.notifier.notify_risk_block(symbol, reason)
+
+                final_decision = AgentDecision(
+                    score=0.0,
+                    rationale=f"Risk Engine rejection: {reason}",
+                    intent="HOLD",
+                    action="HOLD",
+                    target_price=None,
+                    stop_loss=None,
+                    take_profit=None,
+                    quantity=None,
+                )
+                final_rationale = final_decision.rationale
+
+        # Evaluate risk (existing policy risk check)
+        if not self.policy.evaluate_risk(final_decision, self.positions):
+            logger.warning("Decision rejected due to risk constraints")
+            final_decision = AgentDecision(
+                score=0.0,
+                rationale="Decision rejected due to risk management constraints",
+                intent="HOLD",
+                action="HOLD",
+                target_price=None,
+                stop_loss=None,
+                take_profit=None,
+                quantity=None,
+            )
+            final_rationale = final_decision.rationale
+
+        # Create dict for return
+        decision_dict = final_decision.model_dump()
+        decision_dict["timestamp"] = datetime.now(UTC).isoformat()
+        decision_dict["symbol"] = symbol
+        decision_dict["advisor_score"] = advisor_result["score"]
+        decision_dict["advisor_rationale"] = advisor_result["rationale"]
+        decision_dict["advisor_strategy"] = advisor_result["strategy"]
+        decision_dict["advisor_action"] = advisor_result["action"]
+
+        logger.info(f"Decision made for {symbol}: {final_decision.intent} - {final_rationale}")
+        return final_decision, decision_dict, explain_entry
+
     def make_decision(self, symbol: str = "BTCUSDT") -> dict[str, Any]:
         """
         Make a trading decision for the given symbol
@@ -170,31 +389,17 @@ class AgentLoop:
         # Check if agent is paused
         if self.paused:
             logger.info("Agent is paused, returning HOLD decision")
-            return {
-                "score": 0.0,
-                "rationale": "Agent is paused",
-                "intent": "HOLD",
-                "action": "HOLD",
-                "timestamp": datetime.now(UTC).isoformat(),
-                "symbol": symbol,
-            }
+            return self._paused_decision(symbol)
 
         try:
             # Get market data
-            market_data_dict = self.trading_client.get_market_data(symbol)
-            market_data = MarketData(
-                symbol=symbol,
-                price=float(market_data_dict.get("price", 0)),
-                volume=float(market_data_dict.get("volume", 0)),
-                change_24h=float(market_data_dict.get("change_24h", 0)),
-                timestamp=datetime.now(UTC),
-            )
+            market_data = self._to_market_data(symbol, self.trading_client.get_market_data(symbol))
 
             # Build features for advisor
             features = self._build_market_features(market_data)
 
             # Get advisor signal score
-            advisor_result = get_signal_score(features)
+            advisor_result = get_signal_score(features, symbol)
             self.latest_advisor_result = advisor_result
             logger.info(
                 f"Advisor result: score={advisor_result['score']}, action={advisor_result['action']}, "
@@ -204,137 +409,141 @@ class AgentLoop:
             # Get base agent decision from policy
             base_decision = self.policy.analyze_market(market_data)
 
-            # Apply advisor gating logic
-            decision_accepted = True
-            deny_reason = None
-
-            # Check if action is not HOLD (i.e., wants to trade)
-            if base_decision.action != "HOLD":
-                # Check advisor threshold
-                if advisor_result["score"] < self.advisor_config["ADVISOR_THRESHOLD"]:
-                    decision_accepted = False
-                    deny_reason = (
-                        f"advisor_low_score ({advisor_result['score']:.3f} < "
-                        f"{self.advisor_config['ADVISOR_THRESHOLD']})"
-                    )
-                else:
-                    # Check recovery logic if we have consecutive losses
-                    recovery_allowed, recovery_reason = self._check_recovery_logic(advisor_result["score"])
-                    if not recovery_allowed:
-                        decision_accepted = False
-                        deny_reason = recovery_reason
-
-            # Create final decision based on advisor gating
-            if decision_accepted:
-                # Use the base decision but incorporate advisor info
-                final_decision = base_decision
-                final_rationale = (
-                    f"Advisor approved (score: {advisor_result['score']:.3f}): {advisor_result['rationale']}"
-                )
-            else:
-                # Override to HOLD due to advisor
-                final_decision = AgentDecision(
-                    score=advisor_result["score"],
-                    rationale=f"Advisor denied: {deny_reason}. {advisor_result['rationale']}",
-                    intent="HOLD",
-                    action="HOLD",
-                    target_price=None,
-                    stop_loss=None,
-                    take_profit=None,
-                    quantity=None,
-                )
-                final_rationale = final_decision.rationale
-
-            # Log the decision for explainability
-            log_decision(
-                symbol=symbol,
-                score=advisor_result["score"],
-                action=advisor_result["action"],
-                strategy=advisor_result["strategy"],
-                rationale=advisor_result["rationale"],
-                accepted=decision_accepted,
-                deny_reason=deny_reason,
-                final_action=final_decision.action,
-                market_price=market_data.price,
+            final_decision, decision_dict, explain_entry = self._finalize_decision(
+                symbol, market_data, advisor_result, base_decision, self.trading_client.get_account_info
             )
 
-            # Check Risk Engine gates before proposing order (only if advisor approved)
-            if final_decision.action != "HOLD":
-                risk_engine = get_risk_engine()
-                now_utc = datetime.now(UTC)
-
-                # Get account state for position checking
-                try:
-                    account_info = self.trading_client.get_account_info()
-                except Exception as e:
-                    logger.warning(f"Could not get account info for risk check: {e}")
-                    account_info = {}
-
-                allowed, reason = risk_engine.allow_entry(now_utc, symbol, account_info)
-
-                if not allowed:
-                    logger.warning(f"Risk Engine rejected entry: {reason}")
-                    # Notify about risk block
-                    if self.notifier:
-                        self.notifier.notify_risk_block(symbol, reason)
-
-                    final_decision = AgentDecision(
-                        score=0.0,
-                        rationale=f"Risk Engine rejection: {reason}",
-                        intent="HOLD",
-                        action="HOLD",
-                        target_price=None,
-                        stop_loss=None,
-                        take_profit=None,
-                        quantity=None,
-                    )
-                    final_rationale = final_decision.rationale
-
-            # Evaluate risk (existing policy risk check)
-            if not self.policy.evaluate_risk(final_decision, self.positions):
-                logger.warning("Decision rejected due to risk constraints")
-                final_decision = AgentDecision(
-                    score=0.0,
-                    rationale="Decision rejected due to risk management constraints",
-                    intent="HOLD",
-                    action="HOLD",
-                    target_price=None,
-                    stop_loss=None,
-                    take_profit=None,
-                    quantity=None,
-                )
-                final_rationale = final_decision.rationale
+            # Log the decision for explainability
+            log_decision(**explain_entry)
 
             # Store decision in history with advisor info
             self.decision_history.append(final_decision)
-
-            # Create dict for return
-            decision_dict = final_decision.model_dump()
-            decision_dict["timestamp"] = datetime.now(UTC).isoformat()
-            decision_dict["symbol"] = symbol
-            decision_dict["advisor_score"] = advisor_result["score"]
-            decision_dict["advisor_rationale"] = advisor_result["rationale"]
-            decision_dict["advisor_strategy"] = advisor_result["strategy"]
-            decision_dict["advisor_action"] = advisor_result["action"]
-
-            logger.info(f"Decision made: {final_decision.intent} - {final_rationale}")
             return decision_dict
 
         except Exception as e:
             logger.error(f"Error making decision: {str(e)}")
             # Return safe default decision
-            return {
-                "score": 0.0,
-                "rationale": f"Error in decision making: {str(e)}",
-                "intent": "HOLD",
-                "action": "HOLD",
-                "timestamp": datetime.now(UTC).isoformat(),
-                "symbol": symbol,
-                "advisor_score": 0.0,
-                "advisor_rationale": "Error occurred",
-                "advisor_strategy": "error",
-                "advisor_action": "HOLD",
-            }
+            return self._error_decision(symbol, e)
+
+    def make_decisions(self, symbols: list[str], max_concurrency: int = 8) -> dict[str, dict[str, Any]]:
+        """
+        Run one decision cycle over several symbols (blocking wrapper of make_decisions_async)
+        """
+        return asyncio.run(self.make_decisions_async(symbols, max_concurrency))
+
+    async def make_decisions_async(self, symbols: list[str], max_concurrency: int = 8) -> dict[str, dict[str, Any]]:
+        """
+        Make trading decisions for several symbols in one cycle
+
+        Market data is fetched concurrently, features are built in one vectorized pass,
+        advisor calls are batched, policy analyses run with at most ``max_concurrency``
+        in flight, and decisions plus explain-log entries are committed together.
+        Per-stage timings of the cycle are kept in ``last_cycle_timings``.
+
+        Args:
+            symbols: Trading symbols to decide on
+            max_concurrency: Maximum concurrent market data fetches / policy analyses
+
+        Returns:
+            Mapping symbol -> decision dict (same shape as make_decision)
+        """
+        symbols = list(dict.fromkeys(symbols))
+        timings: dict[str, float] = {}
+        cycle_started = time.perf_counter()
+
+        if self.paused:
+            logger.info("Agent is paused, returning HOLD decisions")
+            return {symbol: self._paused_decision(symbol) for symbol in symbols}
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+        decisions: dict[str, dict[str, Any]] = {}
+
+        # 1. Market data for all symbols concurrently
+        started = time.perf_counter()
+
+        async def fetch(symbol: str) -> dict[str, Any]:
+            async with semaphore:
+                if inspect.iscoroutinefunction(self.trading_client.get_market_data):
+                    return await self.trading_client.get_market_data(symbol)
+                return await asyncio.to_thread(self.trading_client.get_market_data, symbol)
+
+        fetched = await asyncio.gather(*(fetch(symbol) for symbol in symbols), return_exceptions=True)
+        market: dict[str, MarketData] = {}
+        for symbol, result in zip(symbols, fetched, strict=True):
+            try:
+                if isinstance(result, BaseException):
+                    raise result
+                market[symbol] = self._to_market_data(symbol, result)
+            except Exception as e:
+                logger.error(f"Error fetching market data for {symbol}: {e}")
+                decisions[symbol] = self._error_decision(symbol, e)
+        timings["market_data"] = time.perf_counter() - started
+
+        # 2. Features in one vectorized pass
+        started = time.perf_counter()
+        features_by_symbol = self._build_market_features_batch(list(market.values()))
+        timings["features"] = time.perf_counter() - started
+
+        # 3. Advisor (batched, cached) and policy analyses (bounded) side by side
+        started = time.perf_counter()
+
+        async def analyze(data: MarketData) -> AgentDecision:
+            async with semaphore:
+                return await self.policy.analyze_market_with_ai(data)
+
+        advisor_results, *policy_results = await asyncio.gather(
+            get_signal_scores(features_by_symbol), *(analyze(data) for data in market.values()), return_exceptions=True
+        )
+        if isinstance(advisor_results, BaseException):
+            logger.error(f"Advisor batch failed: {advisor_results}")
+            advisor_results = {}
+        timings["advisor_policy"] = time.perf_counter() - started
+
+        # 4. Gating and risk checks; account info is fetched at most once per cycle. Both it
+        # and the risk engine block, so gating runs off the event loop
+        started = time.perf_counter()
+        account_info: list[dict[str, Any]] = []
+
+        def get_account_info() -> dict[str, Any]:
+            if not account_info:
+                account_info.append(self.trading_client.get_account_info())
+            return account_info[0]
+
+        explain_entries = []
+        history = []
+        for (symbol, data), base_decision in zip(market.items(), policy_results, strict=True):
+            try:
+                if isinstance(base_decision, BaseException):
+                    raise base_decision
+                advisor_result = advisor_results.get(symbol)
+                if advisor_result is None:
+                    raise RuntimeError("advisor returned no result")
+                final_decision, decision_dict, explain_entry = await asyncio.to_thread(
+                    self._finalize_decision, symbol, data, advisor_result, base_decision, get_account_info
+                )
+                self.latest_advisor_result = advisor_result
+                decisions[symbol] = decision_dict
+                explain_entries.append(explain_entry)
+                history.append(final_decision)
+            except Exception as e:
+                logger.error(f"Error making decision for {symbol}: {e}")
+                decisions[symbol] = self._error_decision(symbol, e)
+        timings["gating"] = time.perf_counter() - started
+
+        # 5. Commit decisions and explain log in one batch
+        started = time.perf_counter()
+        self.decision_history.extend(history)
+        if explain_entries:
+            log_decisions(explain_entries)
+        timings["commit"] = time.perf_counter() - started
+
+        timings["total"] = time.perf_counter() - cycle_started
+        self.last_cycle_timings = timings
+        logger.info(
+            f"Decision cycle for {len(symbols)} symbols in {timings['total']:.3f}s: "
+            + ", ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in timings.items() if stage != "total")
+        )
+        return {symbol: decisions[symbol] for symbol in symbols}
 
     def execute_action(self, decision: dict[str, Any], symbol: str) -> dict[str, Any]:
         """
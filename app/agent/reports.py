@@ -7,11 +7,11 @@ and decision analysis.
 
 import json
 import logging
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
 from typing import Any
 
-from .explain_logger import get_explain_logger
+from .explain_logger import ACTIONS, get_explain_logger
 
 logger = logging.getLogger(__name__)
 
@@ -161,26 +161,16 @@ ACTION BREAKDOWN
         total = daily_stats["total_decisions"]
         filtered = daily_stats["filtered_by_advisor"]
 
-        # Get recent decisions for more detailed analysis
-        recent_decisions = self.explain_logger.get_recent_decisions(limit=1000)
-
-        # Filter decisions for the current day
-        date_str = daily_stats["date"]
-        daily_decisions = [d for d in recent_decisions if d.get("ts", "").startswith(date_str)]
-
-        # Calculate metrics
-        accepted_scores = [d.get("score", 0.0) for d in daily_decisions if d.get("accepted", False)]
-        denied_scores = [d.get("score", 0.0) for d in daily_decisions if not d.get("accepted", True)]
+        # Per-day score averages are maintained by the explain logger
+        avg_accepted = daily_stats.get("avg_score_accepted", 0.0)
+        avg_denied = daily_stats.get("avg_score_denied", 0.0)
 
         return {
             "gating_rate": self._calculate_percentage(filtered, total),
             "decision_quality": self._assess_decision_quality(daily_stats),
-            "avg_score_accepted": (sum(accepted_scores) / len(accepted_scores) if accepted_scores else 0.0),
-            "avg_score_denied": sum(denied_scores) / len(denied_scores) if denied_scores else 0.0,
-            "score_separation": abs(
-                (sum(accepted_scores) / len(accepted_scores) if accepted_scores else 0.0)
-                - (sum(denied_scores) / len(denied_scores) if denied_scores else 0.0)
-            ),
+            "avg_score_accepted": avg_accepted,
+            "avg_score_denied": avg_denied,
+            "score_separation": abs(avg_accepted - avg_denied),
         }
 
     def _assess_decision_quality(self, daily_stats: dict[str, Any]) -> str:
@@ -216,15 +206,33 @@ ACTION BREAKDOWN
         if end_date is None:
             end_date = datetime.now(UTC).strftime("%Y-%m-%d")
 
-        # This is a simplified weekly summary
-        # In a full implementation, you'd aggregate multiple daily reports
-        daily_report = self.generate_daily_report(end_date)
+        # Seven daily aggregates, each read from its segment's stats snapshot
+        end = datetime.strptime(end_date, "%Y-%m-%d")
+        days = [
+            self.explain_logger.get_daily_stats((end - timedelta(days=offset)).strftime("%Y-%m-%d"))
+            for offset in range(6, -1, -1)
+        ]
+        total = sum(day["total_decisions"] for day in days)
+        accepted = sum(day["accepted_decisions"] for day in days)
+        filtered = sum(day["filtered_by_advisor"] for day in days)
+        action_breakdown = {action: sum(day["action_breakdown"].get(action, 0) for day in days) for action in ACTIONS}
 
         return {
             "week_ending": end_date,
             "generated_at": datetime.now(UTC).isoformat(),
-            "daily_snapshot": daily_report,
-            "note": "Weekly aggregation not yet implemented - showing daily snapshot",
+            "summary": {
+                "total_decisions": total,
+                "accepted_decisions": accepted,
+                "denied_decisions": total - accepted,
+                "avg_advisor_score": (
+                    round(sum(day["avg_score"] * day["total_decisions"] for day in days) / total, 3) if total else 0.0
+                ),
+                "filtered_by_advisor_count": filtered,
+                "filtered_by_advisor_percent": self._calculate_percentage(filtered, total),
+            },
+            "action_breakdown": action_breakdown,
+            "days": days,
+            "daily_snapshot": self.generate_daily_report(end_date),
         }
 
 
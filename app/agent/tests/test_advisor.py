@@ -0,0 +1,102 @@
+"""
+Tests for batched, cached and deduplicated advisor calls
+"""
+
+import asyncio
+
+from app.agent.advisor import LocalSignalModel, SignalAdvisor, feature_cache_key
+
+
+def _features(price, rsi=50.0):
+    return {"price": price, "ema": price * 0.97, "rsi": rsi, "atr": price * 0.02, "adx": 30.0,
+            "timestamp": f"2025-01-01T00:00:{price % 60:02.0f}"}
+
+
+def test_batch_prompt_round_trip_matches_mock_scores():
+    model = LocalSignalModel()
+    advisor = SignalAdvisor(model=model, batch_size=2)
+    features = {"BTCUSDT": _features(50000.0, 25.0), "ETHUSDT": _features(3000.0, 75.0), "SOLUSDT": _features(150.0)}
+
+    results = asyncio.run(advisor.get_signal_scores(features))
+
+    assert list(results) == list(features)
+    for symbol, result in results.items():
+        assert result == SignalAdvisor._get_mock_signal_score(features[symbol])
+    # Three symbols in prompts of at most two
+    assert advisor.stats["llm_calls"] == len(model.calls) == 2
+
+
+def test_cache_reuses_answers_for_near_identical_features():
+    model = LocalSignalModel()
+    advisor = SignalAdvisor(model=model, cache_ttl=60)
+
+    first = advisor.get_signal_score(_features(50000.0), symbol="BTCUSDT")
+    # Price moved by less than one bucket, timestamp changed
+    again = advisor.get_signal_score(_features(50000.0 * 1.0001), symbol="BTCUSDT")
+    batched = asyncio.run(advisor.get_signal_scores({"BTCUSDT": _features(50000.0 * 0.9999)}))
+
+    assert again == first == batched["BTCUSDT"]
+    assert len(model.calls) == 1 and advisor.stats["cache_hits"] == 2
+    assert feature_cache_key(_features(50000.0), "BTCUSDT") != feature_cache_key(_features(51000.0), "BTCUSDT")
+    assert feature_cache_key(_features(50000.0), "BTCUSDT") != feature_cache_key(_features(50000.0), "ETHUSDT")
+
+    advisor.get_signal_score(_features(50000.0), symbol="ETHUSDT")
+    assert len(model.calls) == 2
+
+
+def test_single_flight_and_concurrency_limit():
+    model = LocalSignalModel(latency=0.05)
+    advisor = SignalAdvisor(model=model, batch_size=1, max_concurrency=2)
+    in_flight, peak = 0, 0
+    acomplete = model.acomplete
+
+    async def tracked(*args, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            return await acomplete(*args, **kwargs)
+        finally:
+            in_flight -= 1
+
+    model.acomplete = tracked
+
+    async def cycle():
+        same = [advisor.get_signal_score_async(_features(100.0), "BTCUSDT") for _ in range(5)]
+        other = [advisor.get_signal_score_async(_features(100.0 + i * 10), f"SYM{i}") for i in range(4)]
+        return await asyncio.gather(*same, *other)
+
+    results = asyncio.run(cycle())
+
+    assert all(result == results[0] for result in results[:5])
+    assert len(model.calls) == 5 and advisor.stats["deduplicated"] == 4
+    assert peak == 2
+
+
+def test_errors_and_missing_symbols_fall_back_without_caching():
+    class Broken(LocalSignalModel):
+        def _answer(self, prompt):
+            self.calls.append(prompt)
+            return '```json\n{"BTCUSDT": {"score": 0.9, "action": "buy", "strategy": "trend"}}\n```'
+
+    model = Broken()
+    advisor = SignalAdvisor(model=model, timeout=1.0)
+    results = asyncio.run(advisor.get_signal_scores({"BTCUSDT": _features(10.0), "ETHUSDT": _features(20.0)}))
+
+    assert results["BTCUSDT"]["action"] == "BUY" and results["BTCUSDT"]["score"] == 0.9
+    assert results["ETHUSDT"]["strategy"] == "fallback"
+    asyncio.run(advisor.get_signal_scores({"ETHUSDT": _features(20.0)}))
+    assert len(model.calls) == 2
+
+    slow = SignalAdvisor(model=LocalSignalModel(latency=0.5), timeout=0.05)
+    result = asyncio.run(slow.get_signal_score_async(_features(10.0)))
+    assert result["action"] == "HOLD" and "timeout" in result["rationale"]
+    assert slow.stats["errors"] == 1
+
+
+def test_without_model_uses_deterministic_mock(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    advisor = SignalAdvisor()
+    features = _features(50000.0, 25.0)
+    assert advisor.get_signal_score(features) == SignalAdvisor._get_mock_signal_score(features)
+    assert asyncio.run(advisor.get_signal_scores({"BTCUSDT": features}))["BTCUSDT"] == advisor.get_signal_score(features)
@@ -0,0 +1,215 @@
+"""
+Tests for the segmented explain log
+"""
+
+import json
+import threading
+import time
+from datetime import UTC, datetime
+
+from app.agent.explain_logger import BackgroundLogWriter, ExplainabilityLogger
+
+
+def _decision(i, accepted=True, ts="2025-03-01T10:00:00+00:00"):
+    return {"ts": ts, "symbol": f"SYM{i}", "score": 0.5 + (i % 5) / 10, "action": ("BUY", "SELL", "HOLD")[i % 3],
+            "strategy": "s", "rationale": f"reason {i % 4}", "accepted": accepted,
+            "deny_reason": None if accepted else "advisor_low_score"}
+
+
+def _full_scan_stats(decisions):
+    total = len(decisions)
+    accepted = [d for d in decisions if d["accepted"]]
+    return {
+        "total_decisions": total,
+        "accepted_decisions": len(accepted),
+        "avg_score": round(sum(d["score"] for d in decisions) / total, 3),
+        "filtered_by_advisor": total - len(accepted),
+    }
+
+
+def test_recent_decisions_tail_across_segments(tmp_path):
+    log = ExplainabilityLogger(str(tmp_path / "explain.log"))
+    for i in range(30):
+        log.log_decision(f"SYM{i}", 0.5, "BUY", "s", "r" * (i * 300), True)
+    # A later day segment; recent decisions span both
+    today = datetime.now(UTC).strftime("%Y-%m-%d")
+    with open(log.segment_path("2099-01-01"), "w") as f:
+        f.write(json.dumps({"ts": "2099-01-01T00:00:00+00:00", "symbol": "LAST"}) + "\n")
+
+    recent = log.get_recent_decisions(limit=5)
+    assert [d["symbol"] for d in recent] == ["SYM26", "SYM27", "SYM28", "SYM29", "LAST"]
+    assert len(log.get_recent_decisions(limit=1000)) == 31
+    assert log.segment_dates() == [today, "2099-01-01"]
+
+
+def test_daily_stats_incremental_and_persisted(tmp_path):
+    path = str(tmp_path / "explain.log")
+    log = ExplainabilityLogger(path, stats_interval=0)
+    first = [_decision(i, accepted=i % 3 != 0) for i in range(10)]
+    for d in first:
+        log._write_entries([d])
+
+    stats = log.get_daily_stats("2025-03-01")
+    assert {k: stats[k] for k in _full_scan_stats(first)} == _full_scan_stats(first)
+    assert stats["action_breakdown"] == {"BUY": 4, "SELL": 3, "HOLD": 3}
+    assert stats["top_rationales"][0] == {"rationale": "reason 0", "count": 3}
+
+    # Another process appends; a fresh reader resumes from the persisted offset
+    more = [_decision(i, ts="2025-03-01T23:59:59+00:00") for i in range(10, 15)]
+    with open(log.segment_path("2025-03-01"), "a") as f:
+        for d in more:
+            f.write(json.dumps(d) + "\n")
+        f.write('{"partial": ')  # torn write is not counted yet
+    reader = ExplainabilityLogger(path)
+    snapshot = json.loads(log._stats_path("2025-03-01").read_text())
+    assert snapshot["total"] == 10
+    stats = reader.get_daily_stats("2025-03-01")
+    assert {k: stats[k] for k in _full_scan_stats(first + more)} == _full_scan_stats(first + more)
+    assert reader.get_daily_stats("2025-02-28")["total_decisions"] == 0
+
+
+def test_legacy_single_file_log_is_split(tmp_path):
+    legacy = tmp_path / "explain.log"
+    rows = [_decision(0, ts="2025-01-01T10:00:00+00:00"), _decision(1, ts="2025-01-02T10:00:00+00:00"),
+            _decision(2, ts="2025-01-02T11:00:00+00:00")]
+    legacy.write_text("".join(json.dumps(r) + "\n" for r in rows) + "not json\n")
+
+    log = ExplainabilityLogger(str(legacy))
+
+    assert log.segment_dates() == ["2025-01-01", "2025-01-02"]
+    assert log.get_daily_stats("2025-01-02")["total_decisions"] == 2
+    assert [d["symbol"] for d in log.get_recent_decisions(10)] == ["SYM0", "SYM1", "SYM2"]
+    assert not legacy.exists() and (tmp_path / "explain.log.migrated").exists()
+
+
+def test_legacy_log_migrated_once_by_concurrent_starts(tmp_path):
+    legacy = tmp_path / "explain.log"
+    rows = [_decision(i, ts="2025-01-02T10:00:00+00:00") for i in range(5000)]
+    legacy.write_text("".join(json.dumps(r) + "\n" for r in rows))
+
+    # Several loggers (processes in production) starting together on the same file
+    barrier = threading.Barrier(4)
+
+    def start():
+        barrier.wait()
+        ExplainabilityLogger(str(legacy))
+
+    threads = [threading.Thread(target=start) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    log = ExplainabilityLogger(str(legacy))
+    assert log.get_daily_stats("2025-01-02")["total_decisions"] == 5000
+    assert not (tmp_path / "explain.log.migrating").exists()
+
+
+def _stalled_writer(tmp_path, backpressure, max_queue=5):
+    """Writer whose first write blocks until released, so the queue fills up"""
+    release = threading.Event()
+    written = []
+
+    def write_batch(batch):
+        release.wait(5)
+        written.extend(entry["i"] for entry in batch)
+
+    writer = BackgroundLogWriter(write_batch, max_queue=max_queue, flush_interval=0.0, backpressure=backpressure,
+                                 spill_path=tmp_path / "explain.log.spill", block_timeout=0.2)
+    writer.submit([{"i": 0}])
+    deadline = time.monotonic() + 2
+    while writer.metrics()["queue_depth"] and time.monotonic() < deadline:
+        time.sleep(0.005)  # writer took entry 0 and is now stuck in write_batch
+    return writer, release, written
+
+
+def test_background_logger_group_commits(tmp_path):
+    log = ExplainabilityLogger(str(tmp_path / "explain.log"), background=True, flush_interval=0.05)
+    try:
+        for i in range(200):
+            log.log_decision(f"SYM{i}", 0.7, "BUY", "s", "r", True)
+        assert log.flush(timeout=5)
+
+        assert len(log.get_recent_decisions(limit=500)) == 200
+        assert log.get_daily_stats()["total_decisions"] == 200
+        metrics = log.get_writer_metrics()
+        assert metrics["written"] == 200 and metrics["pending"] == 0 and metrics["queue_depth"] == 0
+        assert metrics["batches"] < 20 and metrics["max_flush_ms"] >= metrics["avg_flush_ms"] > 0
+    finally:
+        log.close()
+
+
+def test_drop_backpressure(tmp_path):
+    writer, release, written = _stalled_writer(tmp_path, "drop")
+    assert writer.submit([{"i": i} for i in range(1, 6)])
+    assert not writer.submit([{"i": 6}])
+    release.set()
+    writer.close()
+    assert written == [0, 1, 2, 3, 4, 5]
+    assert writer.metrics()["dropped"] == 1
+
+
+def test_block_backpressure_times_out_then_drops(tmp_path):
+    writer, release, written = _stalled_writer(tmp_path, "block")
+    writer.submit([{"i": i} for i in range(1, 6)])
+    started = time.monotonic()
+    assert not writer.submit([{"i": 6}])
+    assert time.monotonic() - started >= 0.2
+    release.set()
+    assert writer.submit([{"i": 7}])
+    writer.close()
+    assert written == [0, 1, 2, 3, 4, 5, 7]
+    assert writer.metrics()["blocked"] >= 1
+
+
+def test_spill_backpressure_keeps_order(tmp_path):
+    writer, release, written = _stalled_writer(tmp_path, "spill")
+    for i in range(1, 12):
+        assert writer.submit([{"i": i}])
+    assert (tmp_path / "explain.log.spill").exists()
+    release.set()
+    assert writer.flush(timeout=5)
+    writer.close()
+    assert written == list(range(12))
+    assert writer.metrics()["spilled"] == 6
+    assert not (tmp_path / "explain.log.spill").exists()
+
+
+def test_leftover_draining_file_replayed_on_start(tmp_path):
+    # A previous process died while replaying its spill file
+    spill = tmp_path / "explain.log.spill"
+    (tmp_path / "explain.log.spill.draining").write_text("".join(json.dumps({"i": i}) + "\n" for i in range(3)))
+    spill.write_text("".join(json.dumps({"i": i}) + "\n" for i in range(3, 5)))
+    written = []
+
+    writer = BackgroundLogWriter(lambda batch: written.extend(e["i"] for e in batch), flush_interval=0.0,
+                                 backpressure="spill", spill_path=spill)
+    writer.submit([{"i": 5}])
+    assert writer.flush(timeout=5)
+    writer.close()
+
+    assert written == list(range(6))
+    assert not spill.exists() and not (tmp_path / "explain.log.spill.draining").exists()
+
+
+def test_draining_file_kept_until_written(tmp_path):
+    spill = tmp_path / "explain.log.spill"
+    spill.write_text("".join(json.dumps({"i": i}) + "\n" for i in range(3)))
+    written, attempts = [], []
+
+    def write_batch(batch):
+        attempts.append(len(batch))
+        if len(attempts) == 1:
+            assert (tmp_path / "explain.log.spill.draining").exists()
+            raise OSError("disk full")
+        written.extend(e["i"] for e in batch)
+
+    writer = BackgroundLogWriter(write_batch, flush_interval=0.0, backpressure="spill", spill_path=spill)
+    deadline = time.monotonic() + 5
+    while len(written) < 3 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    writer.close()
+
+    assert attempts == [3, 3] and written == [0, 1, 2]
+    assert writer.metrics()["write_errors"] == 1
+    assert not (tmp_path / "explain.log.spill.draining").exists()
@@ -0,0 +1,175 @@
+"""
+Tests for the concurrent multi-symbol decision cycle
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from aiohttp import web
+
+from app.agent import advisor, explain_logger, loop
+from app.agent.advisor import LocalSignalModel, OpenAIChatModel, SignalAdvisor
+from app.agent.explain_logger import ExplainabilityLogger
+from app.agent.loop import AgentLoop
+from app.agent.schema import AgentDecision
+
+
+class SlowClient:
+    """Blocking client with per-call latency, like the REST BinanceClient"""
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.account_calls = 0
+
+    def get_market_data(self, symbol):
+        time.sleep(self.latency)
+        if symbol == "BADUSDT":
+            raise RuntimeError("unknown symbol")
+        return {"symbol": symbol, "price": 100.0 + len(symbol), "volume": 2_000_000.0, "change_24h": 0.03}
+
+    def get_account_info(self):
+        self.account_calls += 1
+        return {"totalWalletBalance": "10000.00"}
+
+
+class AllowAll:
+    def allow_entry(self, now, symbol, account_info=None):
+        return True, "ok"
+
+    def get_day_state(self, now):
+        return type("DayState", (), {"consecutive_losses": 0})()
+
+
+class StubPolicy:
+    async def analyze_market_with_ai(self, market_data):
+        await asyncio.sleep(0.01)
+        return AgentDecision(score=0.8, rationale="stub", intent="BUY", action="MARKET_BUY", quantity=0.1)
+
+    def analyze_market(self, market_data):
+        return AgentDecision(score=0.8, rationale="stub", intent="BUY", action="MARKET_BUY", quantity=0.1)
+
+    def evaluate_risk(self, decision, positions):
+        return True
+
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    monkeypatch.setattr(loop, "get_risk_engine", lambda: AllowAll())
+    monkeypatch.setattr(explain_logger, "_explain_logger", ExplainabilityLogger(str(tmp_path / "explain.log")))
+    model = LocalSignalModel(scorer=lambda features: {"score": 0.9, "rationale": "ok", "strategy": "s", "action": "BUY"})
+    monkeypatch.setattr(advisor, "_advisor_instance", SignalAdvisor(model=model))
+    agent = AgentLoop(SlowClient())
+    agent.policy = StubPolicy()
+    return agent
+
+
+def test_make_decisions_runs_symbols_concurrently(agent):
+    symbols = [f"SYM{i}USDT" for i in range(20)] + ["BADUSDT"]
+
+    started = time.perf_counter()
+    decisions = agent.make_decisions(symbols, max_concurrency=10)
+    elapsed = time.perf_counter() - started
+
+    # 21 fetches of 50ms each would take over a second sequentially
+    assert elapsed < 0.6
+    assert list(decisions) == symbols
+    assert decisions["BADUSDT"]["advisor_strategy"] == "error"
+    assert all(decisions[s]["advisor_score"] == 0.9 for s in symbols[:-1])
+    assert len(agent.decision_history) == 20
+    assert agent.trading_client.account_calls <= 1
+    assert set(agent.last_cycle_timings) == {"market_data", "features", "advisor_policy", "gating", "commit", "total"}
+
+    entries = explain_logger.get_explain_logger().get_recent_decisions(limit=100)
+    assert [entry["symbol"] for entry in entries] == symbols[:-1]
+    assert all(entry["accepted"] and entry["market_price"] > 100 for entry in entries)
+
+
+def test_single_and_batched_decisions_agree(agent):
+    single = agent.make_decision("BTCUSDT")
+    batched = agent.make_decisions(["BTCUSDT"])["BTCUSDT"]
+
+    ignored = {"timestamp"}
+    assert {k: v for k, v in single.items() if k not in ignored} == {
+        k: v for k, v in batched.items() if k not in ignored
+    }
+    first, second = explain_logger.get_explain_logger().get_recent_decisions(limit=10)
+    assert first.keys() == second.keys()
+
+
+def test_batch_features_cover_single_symbol_keys(agent):
+    data = agent._to_market_data("BTCUSDT", agent.trading_client.get_market_data("BTCUSDT"))
+    batch = agent._build_market_features_batch([data])["BTCUSDT"]
+    single = agent._build_market_features(data)
+
+    assert set(batch) == set(single)
+    assert 55 <= batch["rsi"] <= 75 and batch["volume_trend"] == "increasing"
+    assert abs(batch["ema"] / data.price - 1) <= 0.01
+
+
+def test_paused_cycle_holds(agent):
+    agent.paused = True
+    decisions = agent.make_decisions(["BTCUSDT", "ETHUSDT"])
+    assert {d["action"] for d in decisions.values()} == {"HOLD"}
+    assert not agent.decision_history
+
+
+def test_back_to_back_cycles_reuse_openai_model(agent, monkeypatch):
+    scorer = LocalSignalModel(scorer=lambda features: {"score": 0.9, "rationale": "ok", "strategy": "s", "action": "BUY"})
+
+    async def completions(request):
+        body = await request.json()
+        content = scorer._answer(body["messages"][-1]["content"])
+        return web.json_response(
+            {
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [
+                    {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}
+                ],
+            }
+        )
+
+    # Server on its own thread: every make_decisions cycle runs in a new asyncio.run loop
+    server_loop = asyncio.new_event_loop()
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", completions)
+    runner = web.AppRunner(app)
+    server_loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    server_loop.run_until_complete(site.start())
+    url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/v1"
+    thread = threading.Thread(target=server_loop.run_forever, daemon=True)
+    thread.start()
+
+    model = OpenAIChatModel("test-key", base_url=url)
+    monkeypatch.setattr(advisor, "_advisor_instance", SignalAdvisor(model=model, cache_ttl=0))
+    try:
+        for _ in range(2):
+            decisions = agent.make_decisions(["BTCUSDT", "ETHUSDT"])
+            assert {d["advisor_score"] for d in decisions.values()} == {0.9}
+        assert len(scorer.calls) == 2
+    finally:
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), server_loop).result(5)
+        server_loop.call_soon_threadsafe(server_loop.stop)
+        thread.join(5)
+        server_loop.close()
+
+
+def test_gating_runs_off_the_event_loop(agent, monkeypatch):
+    threads = []
+
+    class RecordingRiskEngine(AllowAll):
+        def allow_entry(self, now, symbol, account_info=None):
+            threads.append(threading.current_thread())
+            return super().allow_entry(now, symbol, account_info)
+
+    monkeypatch.setattr(loop, "get_risk_engine", lambda: RecordingRiskEngine())
+    agent.make_decisions(["BTCUSDT", "ETHUSDT"])
+
+    # Blocking risk and account calls must not stall the cycle's event loop thread
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
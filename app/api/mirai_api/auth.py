@@ -14,6 +14,11 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from .models import User, UserCreate, UserRole, TokenData
 
+try:
+    from app.trader.storage import Database
+except ImportError:  # standalone mirai-api image ships without the trader package
+    Database = None
+
 # Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", secrets.token_urlsafe(32))
 ALGORITHM = "HS256"
@@ -63,10 +68,14 @@ class DatabaseManager:
     
     def __init__(self, db_path: str = "/root/mirai-agent/state/mirai.db"):
         self.db_path = db_path
+        # Long-lived per-thread connections (WAL, busy timeout, statement cache) when available
+        self._db = Database(db_path, row_factory=sqlite3.Row) if Database is not None else None
         self.init_database()
     
     def get_connection(self):
-        """Get database connection"""
+        """Get database connection (autocommit; the calling thread's shared connection when pooled)"""
+        if self._db is not None:
+            return self._db.connection()
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         return conn
@@ -122,7 +122,17 @@ class MarketRegimeDetector:
             if len(data) < 50:
                 return MarketRegime.UNKNOWN
             
-            close = data['close'].values
+            return self.detect_regime_from_close(data['close'].values)
+                
+        except Exception as e:
+            logger.error(f"Ошибка определения режима рынка: {e}")
+            return MarketRegime.UNKNOWN
+    
+    def detect_regime_from_close(self, close: np.ndarray) -> MarketRegime:
+        """Определение режима рынка по массиву цен закрытия"""
+        try:
+            if len(close) < 50:
+                return MarketRegime.UNKNOWN
             
             # Расчет трендовости через линейную регрессию
             x = np.arange(len(close))
@@ -179,16 +189,59 @@ class BaseTradingStrategy:
             low = data['low'].values if 'low' in data.columns else close
             volume = data['volume'].values if 'volume' in data.columns else np.ones_like(close)
             
-            # Расчет индикаторов
-            indicators = await self._calculate_indicators(close, high, low, volume)
+            return await self._analyze_arrays(symbol, close, high, low, volume)
             
-            # Определение режима рынка
-            market_regime = self.regime_detector.detect_regime(data)
+        except Exception as e:
+            logger.error(f"Ошибка анализа рынка для {symbol}: {e}")
+            return self._create_hold_signal(symbol, data['close'].iloc[-1] if len(data) > 0 else 0)
+    
+    async def analyze_bars(self, symbol: str, bars) -> TradingSignal:
+        """Анализ по колоночному представлению баров (OHLCVView из BarStore) без построения DataFrame"""
+        try:
+            if len(bars) < max(self.params.ma_slow_period, self.params.rsi_period) + 10:
+                logger.warning(f"Недостаточно данных для анализа {symbol}")
+                return self._create_hold_signal(symbol, bars.close[-1] if len(bars) > 0 else 0)
             
-            # Генерация сигнала
-            signal = await self._generate_signal(symbol, close, indicators, market_regime)
+            return await self._analyze_arrays(symbol, bars.close, bars.high, bars.low, bars.volume)
             
-            # Расчет уровней входа, стоп-лосса и тейк-профита
+        except Exception as e:
+            logger.error(f"Ошибка анализа рынка для {symbol}: {e}")
+            return self._create_hold_signal(symbol, bars.close[-1] if len(bars) > 0 else 0)
+    
+    async def _analyze_arrays(self, symbol: str, close: np.ndarray, high: np.ndarray,
+                              low: np.ndarray, volume: np.ndarray) -> TradingSignal:
+        """Общий конвейер анализа по массивам цен"""
+        # talib требует непрерывные float64 массивы
+        close, high, low, volume = (np.ascontiguousarray(a, dtype=np.float64) for a in (close, high, low, volume))
+        
+        # Расчет индикаторов
+        indicators = await self._calculate_indicators(close, high, low, volume)
+        
+        # Определение режима рынка
+        market_regime = self.regime_detector.detect_regime_from_close(close)
+        
+        # Генерация сигнала
+        signal = await self._generate_signal(symbol, close, indicators, market_regime)
+        
+        # Расчет уровней входа, стоп-лосса и тейк-профита
+        signal = await self._calculate_levels(signal, close, indicators)
+        
+        logger.info(f"Сигнал для {symbol}: {signal.signal_type.value} (уверенность: {signal.confidence}%)")
+        
+        return signal
+    
+    async def analyze_stream(self, symbol: str, indicator_set) -> TradingSignal:
+        """Анализ по инкрементальным индикаторам (IncrementalIndicatorSet) без пересчета истории"""
+        try:
+            close = indicator_set.recent_close()
+            if not indicator_set.ready:
+                logger.warning(f"Индикаторы для {symbol} еще не прогреты")
+                return self._create_hold_signal(symbol, close[-1] if len(close) > 0 else 0)
+            
+            indicators = indicator_set.as_arrays()
+            market_regime = self.regime_detector.detect_regime_from_close(close)
+            
+            signal = await self._generate_signal(symbol, close, indicators, market_regime)
             signal = await self._calculate_levels(signal, close, indicators)
             
             logger.info(f"Сигнал для {symbol}: {signal.signal_type.value} (уверенность: {signal.confidence}%)")
@@ -196,8 +249,8 @@ class BaseTradingStrategy:
             return signal
             
         except Exception as e:
-            logger.error(f"Ошибка анализа рынка для {symbol}: {e}")
-            return self._create_hold_signal(symbol, data['close'].iloc[-1] if len(data) > 0 else 0)
+            logger.error(f"Ошибка потокового анализа для {symbol}: {e}")
+            return self._create_hold_signal(symbol, 0)
     
     async def _calculate_indicators(self, close: np.ndarray, high: np.ndarray, low: np.ndarray, volume: np.ndarray) -> Dict:
         """Расчет всех технических индикаторов"""
@@ -305,11 +358,20 @@ class BaseTradingStrategy:
             stop_loss=0,  # Будет рассчитан позже
             take_profit=0,  # Будет рассчитан позже
             timestamp=datetime.now(),
-            indicators={k: float(v[-1]) if hasattr(v, '__iter__') and len(v) > 0 else 0 
-                       for k, v in indicators.items() if not np.isnan(v[-1] if hasattr(v, '__iter__') and len(v) > 0 else 0)},
+            indicators=self._latest_values(indicators),
             reasoning=reasoning
         )
     
+    @staticmethod
+    def _latest_values(indicators: Dict) -> Dict[str, float]:
+        """Последние значения индикаторов без NaN (одно обращение к массиву на ключ)"""
+        latest = {}
+        for key, values in indicators.items():
+            value = float(values[-1]) if hasattr(values, '__iter__') and len(values) > 0 else 0
+            if value == value:  # NaN != NaN
+                latest[key] = value
+        return latest
+    
     def _analyze_moving_averages(self, indicators: Dict) -> int:
         """Анализ сигналов скользящих средних"""
         try:
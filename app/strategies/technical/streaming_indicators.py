@@ -0,0 +1,424 @@
+"""
+Mirai Agent - Инкрементальные технические индикаторы
+Потоковый расчет SMA/EMA/RSI/MACD/BBANDS/STOCH/ATR за O(1) на каждый новый бар.
+Результаты численно совпадают с пакетным расчетом talib (включая правила прогрева).
+"""
+import logging
+import math
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NAN = float('nan')
+
+
+def _is_zero(value: float) -> bool:
+    """Аналог TA_IS_ZERO из talib"""
+    return -0.00000001 < value < 0.00000001
+
+
+class StreamingSMA:
+    """Простая скользящая средняя (talib.SMA)"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self._window: deque = deque()
+        self._total = 0.0
+        self.value = NAN
+
+    @property
+    def ready(self) -> bool:
+        return not math.isnan(self.value)
+
+    def update(self, x: float) -> float:
+        self._total += x
+        self._window.append(x)
+        if len(self._window) < self.period:
+            return NAN
+        self.value = self._total / self.period
+        self._total -= self._window.popleft()
+        return self.value
+
+
+class StreamingEMA:
+    """Экспоненциальная скользящая средняя (talib.EMA, затравка через SMA)"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self._seed_total = 0.0
+        self._count = 0
+        self.value = NAN
+
+    @property
+    def ready(self) -> bool:
+        return not math.isnan(self.value)
+
+    def seed(self, value: float):
+        """Принудительная установка начального значения (используется MACD)"""
+        self.value = value
+        self._count = self.period
+
+    def update(self, x: float) -> float:
+        if self._count < self.period:
+            self._seed_total += x
+            self._count += 1
+            if self._count == self.period:
+                self.value = self._seed_total / self.period
+            return self.value
+        self.value = (x - self.value) * self.k + self.value
+        return self.value
+
+
+class StreamingRSI:
+    """Relative Strength Index по Уайлдеру (talib.RSI)"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._prev: Optional[float] = None
+        self._gain = 0.0
+        self._loss = 0.0
+        self._count = 0
+        self.value = NAN
+
+    @property
+    def ready(self) -> bool:
+        return not math.isnan(self.value)
+
+    def update(self, x: float) -> float:
+        if self._prev is None:
+            self._prev = x
+            return NAN
+
+        change = x - self._prev
+        self._prev = x
+
+        if self._count < self.period:
+            if change < 0:
+                self._loss -= change
+            else:
+                self._gain += change
+            self._count += 1
+            if self._count < self.period:
+                return NAN
+            self._loss /= self.period
+            self._gain /= self.period
+        else:
+            self._loss *= self.period - 1
+            self._gain *= self.period - 1
+            if change < 0:
+                self._loss -= change
+            else:
+                self._gain += change
+            self._loss /= self.period
+            self._gain /= self.period
+
+        total = self._gain + self._loss
+        self.value = 100.0 * (self._gain / total) if not _is_zero(total) else 0.0
+        return self.value
+
+
+class StreamingMACD:
+    """MACD (talib.MACD): быстрая EMA стартует одновременно с медленной"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        if slow < fast:
+            fast, slow = slow, fast
+        self.fast_period = fast
+        self.slow_period = slow
+        self._fast = StreamingEMA(fast)
+        self._slow = StreamingEMA(slow)
+        self._signal = StreamingEMA(signal)
+        # Последние fast цен нужны только до момента затравки быстрой EMA
+        self._fast_seed: Optional[deque] = deque(maxlen=fast)
+        self.value: Tuple[float, float, float] = (NAN, NAN, NAN)
+
+    @property
+    def ready(self) -> bool:
+        return not math.isnan(self.value[1])
+
+    def update(self, x: float) -> Tuple[float, float, float]:
+        slow = self._slow.update(x)
+
+        if self._fast_seed is not None:
+            self._fast_seed.append(x)
+            if math.isnan(slow):
+                return self.value
+            fast_values = list(self._fast_seed)
+            self._fast.seed(sum(fast_values) / self.fast_period)
+            self._fast_seed = None
+            fast = self._fast.value
+        else:
+            fast = self._fast.update(x)
+
+        macd = fast - slow
+        signal = self._signal.update(macd)
+        if not math.isnan(signal):
+            self.value = (macd, signal, macd - signal)
+        return self.value
+
+
+class StreamingBollingerBands:
+    """Bollinger Bands на SMA (talib.BBANDS, matype=0)"""
+
+    def __init__(self, period: int = 20, std_dev: float = 2.0):
+        self.period = period
+        self.std_dev = std_dev
+        self._sma = StreamingSMA(period)
+        self._squares: deque = deque()
+        self._total2 = 0.0
+        self.value: Tuple[float, float, float] = (NAN, NAN, NAN)
+
+    @property
+    def ready(self) -> bool:
+        return not math.isnan(self.value[1])
+
+    def update(self, x: float) -> Tuple[float, float, float]:
+        middle = self._sma.update(x)
+        square = x * x
+        self._total2 += square
+        self._squares.append(square)
+        if len(self._squares) < self.period:
+            return self.value
+
+        mean2 = self._total2 / self.period
+        self._total2 -= self._squares.popleft()
+        mean2 -= middle * middle
+        deviation = math.sqrt(mean2) if mean2 >= 0.00000001 else 0.0
+
+        band = deviation * self.std_dev
+        self.value = (middle + band, middle, middle - band)
+        return self.value
+
+
+class _MonotonicWindow:
+    """Скользящий максимум/минимум за амортизированное O(1)"""
+
+    def __init__(self, period: int, compare: Callable[[float, float], bool]):
+        self.period = period
+        self._compare = compare
+        self._items: deque = deque()
+        self._index = 0
+
+    def update(self, x: float) -> float:
+        while self._items and self._compare(x, self._items[-1][1]):
+            self._items.pop()
+        self._items.append((self._index, x))
+        if self._items[0][0] <= self._index - self.period:
+            self._items.popleft()
+        self._index += 1
+        return self._items[0][1]
+
+
+class StreamingStochastic:
+    """Stochastic Oscillator со сглаживанием SMA (talib.STOCH)"""
+
+    def __init__(self, k_period: int = 14, slow_k_period: int = 3, slow_d_period: int = 3):
+        self.k_period = k_period
+        self._highest = _MonotonicWindow(k_period, lambda new, old: new >= old)
+        self._lowest = _MonotonicWindow(k_period, lambda new, old: new <= old)
+        self._slow_k = StreamingSMA(slow_k_period)
+        self._slow_d = StreamingSMA(slow_d_period)
+        self._count = 0
+        self.value: Tuple[float, float] = (NAN, NAN)
+
+    @property
+    def ready(self) -> bool:
+        return not math.isnan(self.value[1])
+
+    def update(self, high: float, low: float, close: float) -> Tuple[float, float]:
+        highest = self._highest.update(high)
+        lowest = self._lowest.update(low)
+        self._count += 1
+        if self._count < self.k_period:
+            return self.value
+
+        diff = (highest - lowest) / 100.0
+        fast_k = (close - lowest) / diff if diff != 0 else 0.0
+
+        slow_k = self._slow_k.update(fast_k)
+        if math.isnan(slow_k):
+            return self.value
+        slow_d = self._slow_d.update(slow_k)
+        if not math.isnan(slow_d):
+            self.value = (slow_k, slow_d)
+        return self.value
+
+
+class StreamingATR:
+    """Average True Range по Уайлдеру (talib.ATR)"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._prev_close: Optional[float] = None
+        self._seed_total = 0.0
+        self._count = 0
+        self.value = NAN
+
+    @property
+    def ready(self) -> bool:
+        return not math.isnan(self.value)
+
+    def update(self, high: float, low: float, close: float) -> float:
+        prev_close = self._prev_close
+        self._prev_close = close
+        if prev_close is None:
+            return NAN
+
+        true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+        if self._count < self.period:
+            self._seed_total += true_range
+            self._count += 1
+            if self._count == self.period:
+                self.value = self._seed_total / self.period
+            return self.value
+
+        self.value = (self.value * (self.period - 1) + true_range) / self.period
+        return self.value
+
+
+class IncrementalIndicatorSet:
+    """
+    Набор инкрементальных индикаторов для одной пары (symbol, interval).
+    Ключи совпадают с BaseTradingStrategy._calculate_indicators.
+    """
+
+    # Истории закрытий достаточно для MarketRegimeDetector
+    CLOSE_HISTORY = 50
+
+    def __init__(self, ma_fast_period: int = 10, ma_slow_period: int = 30, rsi_period: int = 14,
+                 macd_fast: int = 12, macd_slow: int = 26, macd_signal: int = 9,
+                 bb_period: int = 20, bb_std_dev: float = 2.0, stoch_k_period: int = 14,
+                 atr_period: int = 14):
+        self.ma_fast = StreamingSMA(ma_fast_period)
+        self.ma_slow = StreamingSMA(ma_slow_period)
+        self.ema_fast = StreamingEMA(ma_fast_period)
+        self.rsi = StreamingRSI(rsi_period)
+        self.macd = StreamingMACD(macd_fast, macd_slow, macd_signal)
+        self.bbands = StreamingBollingerBands(bb_period, bb_std_dev)
+        self.stoch = StreamingStochastic(stoch_k_period)
+        self.atr = StreamingATR(atr_period)
+
+        self.closes: deque = deque(maxlen=self.CLOSE_HISTORY)
+        self.bars = 0
+        self.last_open_time: Optional[int] = None
+        self._current: Dict[str, float] = {}
+        self._previous: Dict[str, float] = {}
+
+    @classmethod
+    def from_params(cls, params: Any) -> 'IncrementalIndicatorSet':
+        """Создание набора из StrategyParams"""
+        return cls(
+            ma_fast_period=params.ma_fast_period,
+            ma_slow_period=params.ma_slow_period,
+            rsi_period=params.rsi_period,
+            macd_fast=params.macd_fast,
+            macd_slow=params.macd_slow,
+            macd_signal=params.macd_signal,
+        )
+
+    @property
+    def ready(self) -> bool:
+        """Все индикаторы прогреты и есть предыдущее значение"""
+        return bool(self._previous) and not any(math.isnan(v) for v in self._previous.values())
+
+    def update(self, high: float, low: float, close: float) -> Dict[str, float]:
+        """Добавление закрытого бара, O(1)"""
+        macd, macd_signal, macd_histogram = self.macd.update(close)
+        bb_upper, bb_middle, bb_lower = self.bbands.update(close)
+        stoch_k, stoch_d = self.stoch.update(high, low, close)
+
+        self._previous = self._current
+        self._current = {
+            'ma_fast': self.ma_fast.update(close),
+            'ma_slow': self.ma_slow.update(close),
+            'ema_fast': self.ema_fast.update(close),
+            'rsi': self.rsi.update(close),
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'macd_histogram': macd_histogram,
+            'bb_upper': bb_upper,
+            'bb_middle': bb_middle,
+            'bb_lower': bb_lower,
+            'stoch_k': stoch_k,
+            'stoch_d': stoch_d,
+            'atr': self.atr.update(high, low, close),
+        }
+        self.closes.append(close)
+        self.bars += 1
+        return self._current
+
+    def warm_up(self, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict[str, float]:
+        """Прогрев по историческим барам"""
+        for h, l, c in zip(high, low, close):
+            self.update(float(h), float(l), float(c))
+        return self._current
+
+    def latest(self) -> Dict[str, float]:
+        """Текущие значения индикаторов"""
+        return dict(self._current)
+
+    def as_arrays(self) -> Dict[str, np.ndarray]:
+        """Два последних значения каждого индикатора в формате _calculate_indicators"""
+        return {
+            key: np.array([self._previous.get(key, NAN), value])
+            for key, value in self._current.items()
+        }
+
+    def recent_close(self) -> np.ndarray:
+        return np.fromiter(self.closes, dtype=float, count=len(self.closes))
+
+
+class StreamingIndicatorEngine:
+    """
+    Движок инкрементальных индикаторов для множества (symbol, interval).
+    Метод on_kline подключается как callback к BinanceDataStream.
+    """
+
+    def __init__(self, params: Any = None, on_update: Optional[Callable[[str, str, IncrementalIndicatorSet], None]] = None):
+        self.params = params
+        self.on_update = on_update
+        self.sets: Dict[Tuple[str, str], IncrementalIndicatorSet] = {}
+
+    def get(self, symbol: str, interval: str) -> IncrementalIndicatorSet:
+        key = (symbol, interval)
+        indicator_set = self.sets.get(key)
+        if indicator_set is None:
+            if self.params is not None:
+                indicator_set = IncrementalIndicatorSet.from_params(self.params)
+            else:
+                indicator_set = IncrementalIndicatorSet()
+            self.sets[key] = indicator_set
+        return indicator_set
+
+    def update_bar(self, symbol: str, interval: str, high: float, low: float, close: float,
+                   open_time: Optional[int] = None) -> Dict[str, float]:
+        """Добавление закрытого бара для пары"""
+        indicator_set = self.get(symbol, interval)
+        if open_time is not None:
+            if indicator_set.last_open_time is not None and open_time <= indicator_set.last_open_time:
+                # Бар уже учтен (повторная доставка)
+                return indicator_set.latest()
+            indicator_set.last_open_time = open_time
+
+        values = indicator_set.update(high, low, close)
+        if self.on_update:
+            try:
+                self.on_update(symbol, interval, indicator_set)
+            except Exception as e:
+                logger.error(f"Ошибка callback индикаторов для {symbol} {interval}: {e}")
+        return values
+
+    def on_kline(self, kline) -> Optional[Dict[str, float]]:
+        """Callback для KlineData: учитываются только закрытые бары"""
+        if not getattr(kline, 'is_closed', False):
+            return None
+        return self.update_bar(
+            kline.symbol, getattr(kline, 'interval', '') or '',
+            kline.high_price, kline.low_price, kline.close_price,
+            open_time=kline.open_time,
+        )
@@ -0,0 +1,88 @@
+"""
+Tests for incremental technical indicators
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Add the strategies directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "technical"))
+
+from streaming_indicators import IncrementalIndicatorSet, StreamingIndicatorEngine
+
+try:
+    import talib
+except ImportError:  # pragma: no cover
+    talib = None
+
+
+def _make_bars(n=400, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 50000 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    high = close * (1 + np.abs(rng.normal(0, 0.003, n)))
+    low = close * (1 - np.abs(rng.normal(0, 0.003, n)))
+    return high, low, close
+
+
+@unittest.skipIf(talib is None, "talib not installed")
+class TestMatchesTalib(unittest.TestCase):
+    """Streaming values must match the talib batch output bar by bar"""
+
+    def test_all_indicators(self):
+        high, low, close = _make_bars()
+        indicator_set = IncrementalIndicatorSet()
+        rows = [indicator_set.update(h, l, c) for h, l, c in zip(high, low, close)]
+
+        macd = talib.MACD(close, 12, 26, 9)
+        bbands = talib.BBANDS(close, 20, 2.0, 2.0)
+        stoch = talib.STOCH(high, low, close, fastk_period=14, slowk_period=3, slowd_period=3)
+        expected = {
+            "ma_fast": talib.SMA(close, 10),
+            "ma_slow": talib.SMA(close, 30),
+            "ema_fast": talib.EMA(close, 10),
+            "rsi": talib.RSI(close, 14),
+            "macd": macd[0],
+            "macd_signal": macd[1],
+            "macd_histogram": macd[2],
+            "bb_upper": bbands[0],
+            "bb_middle": bbands[1],
+            "bb_lower": bbands[2],
+            "stoch_k": stoch[0],
+            "stoch_d": stoch[1],
+            "atr": talib.ATR(high, low, close, 14),
+        }
+
+        for key, reference in expected.items():
+            streamed = np.array([row[key] for row in rows])
+            np.testing.assert_array_equal(np.isnan(streamed), np.isnan(reference), err_msg=key)
+            np.testing.assert_allclose(streamed, reference, rtol=1e-9, atol=1e-7, equal_nan=True, err_msg=key)
+
+
+class TestStreamingIndicatorEngine(unittest.TestCase):
+    """Test cases for StreamingIndicatorEngine"""
+
+    def test_ready_and_arrays(self):
+        high, low, close = _make_bars(60)
+        indicator_set = IncrementalIndicatorSet()
+        indicator_set.warm_up(high, low, close)
+
+        self.assertTrue(indicator_set.ready)
+        arrays = indicator_set.as_arrays()
+        self.assertEqual(len(arrays["rsi"]), 2)
+        self.assertEqual(arrays["ma_fast"][-1], indicator_set.latest()["ma_fast"])
+        self.assertEqual(len(indicator_set.recent_close()), IncrementalIndicatorSet.CLOSE_HISTORY)
+
+    def test_duplicate_bars_are_ignored(self):
+        engine = StreamingIndicatorEngine()
+        engine.update_bar("BTCUSDT", "1m", 101.0, 99.0, 100.0, open_time=1000)
+        engine.update_bar("BTCUSDT", "1m", 101.0, 99.0, 100.0, open_time=1000)
+
+        self.assertEqual(engine.get("BTCUSDT", "1m").bars, 1)
+        self.assertEqual(engine.get("ETHUSDT", "1m").bars, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
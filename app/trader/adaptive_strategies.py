@@ -11,7 +11,6 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, asdict
 from enum import Enum
-import sqlite3
 import sys
 import os
 
@@ -24,11 +23,15 @@ try:
     from ..strategies.technical.base_strategy import BaseTradingStrategy, TradingSignal, StrategyParams
     from .advanced_risk_engine import AdvancedRiskEngine, PositionType, RiskLimits, RiskLevel
     from .strategy_risk_integration import StrategyRiskManager
+    from .storage import epoch, get_database
+    from .trade_analytics import ensure_schema
 except ImportError:
     try:
         from strategies.technical.base_strategy import BaseTradingStrategy, TradingSignal, StrategyParams
         from advanced_risk_engine import AdvancedRiskEngine, PositionType, RiskLimits, RiskLevel
         from strategy_risk_integration import StrategyRiskManager
+        from storage import epoch, get_database
+        from trade_analytics import ensure_schema
     except ImportError:
         # Fallback для standalone запуска
         import sys
@@ -38,6 +41,8 @@ except ImportError:
         from base_strategy import BaseTradingStrategy, TradingSignal, StrategyParams
         from advanced_risk_engine import AdvancedRiskEngine, PositionType, RiskLimits, RiskLevel
         from strategy_risk_integration import StrategyRiskManager
+        from storage import epoch, get_database
+        from trade_analytics import ensure_schema
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
@@ -284,14 +289,15 @@ class PerformanceAnalyzer:
         self.db_path = "/root/mirai-agent/state/mirai.db"
         self._init_database()
     
+    def _db(self):
+        """Общий обработчик SQLite (WAL, соединение на поток, повторы при блокировке)"""
+        return get_database(self.db_path)
+    
     def _init_database(self):
         """Инициализация таблиц для анализа производительности"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Таблица истории торгов (если не существует)
-            cursor.execute("""
+            self._db().executescript("""
+                -- Таблица истории торгов (если не существует)
                 CREATE TABLE IF NOT EXISTS trades (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     timestamp TEXT,
@@ -306,11 +312,9 @@ class PerformanceAnalyzer:
                     volatility REAL,
                     confidence REAL,
                     adaptation_version INTEGER DEFAULT 1
-                )
-            """)
-            
-            # Таблица адаптаций стратегий
-            cursor.execute("""
+                );
+                
+                -- Таблица адаптаций стратегий
                 CREATE TABLE IF NOT EXISTS strategy_adaptations (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     timestamp TEXT,
@@ -322,11 +326,10 @@ class PerformanceAnalyzer:
                     performance_after TEXT,
                     adaptation_reason TEXT,
                     confidence REAL
-                )
+                );
             """)
-            
-            conn.commit()
-            conn.close()
+            # Эпохальные метки времени, индексы (strategy_name, ts) и почасовые агрегаты
+            ensure_schema(self._db())
             
         except Exception as e:
             logger.error(f"Ошибка инициализации базы данных: {e}")
@@ -336,37 +339,29 @@ class PerformanceAnalyzer:
         """Анализ производительности стратегии за период"""
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            db = self._db()
             
             # Пробуем получить данные из таблицы trades
-            since_time = (datetime.now() - timedelta(hours=lookback_hours)).isoformat()
+            since_ts = epoch(datetime.now() - timedelta(hours=lookback_hours))
             
-            cursor.execute("""
+            trade_records = await db.afetchall("""
                 SELECT * FROM trades 
-                WHERE strategy_name = ? AND timestamp > ?
-                ORDER BY timestamp DESC
-            """, (strategy_name, since_time))
-            
-            trade_records = cursor.fetchall()
+                WHERE strategy_name = ? AND ts > ?
+                ORDER BY ts DESC
+            """, (strategy_name, since_ts))
             
             # Если нет данных в trades, используем risk_events как fallback
             if not trade_records:
                 logger.info(f"Нет данных в таблице trades для {strategy_name}, используем risk_events")
-                cursor.execute("""
+                risk_events = await db.afetchall("""
                     SELECT timestamp, description, severity, position_id 
                     FROM risk_events 
-                    WHERE timestamp > ? AND description LIKE ?
-                    ORDER BY timestamp DESC
-                """, (since_time, f'%{strategy_name}%'))
-                
-                risk_events = cursor.fetchall()
-                conn.close()
+                    WHERE ts > ? AND description LIKE ?
+                    ORDER BY ts DESC
+                """, (since_ts, f'%{strategy_name}%'))
                 
                 return self._analyze_from_risk_events(risk_events, strategy_name)
             
-            conn.close()
-            
             # Анализ торговых данных
             return self._analyze_trading_performance(trade_records, strategy_name)
             
@@ -759,10 +754,7 @@ class AdaptiveStrategyManager:
         """Сохранение записи об адаптации в базу данных"""
         
         try:
-            conn = sqlite3.connect(self.performance_analyzer.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
+            await self.performance_analyzer._db().aexecute("""
                 INSERT INTO strategy_adaptations 
                 (timestamp, strategy_name, old_params, new_params, market_conditions, 
                  performance_before, adaptation_reason, confidence)
@@ -778,9 +770,6 @@ class AdaptiveStrategyManager:
                 record.confidence
             ))
             
-            conn.commit()
-            conn.close()
-            
         except Exception as e:
             logger.error(f"Ошибка сохранения записи адаптации: {e}")
     
@@ -4,14 +4,18 @@ Mirai Agent - Улучшенный Risk Engine
 """
 import asyncio
 import logging
-import sqlite3
 import json
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
 import numpy as np
 
+try:
+    from .storage import get_database
+except ImportError:
+    from storage import get_database
+
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -82,15 +86,149 @@ class RiskMetrics:
     win_rate: float = 0.0
     risk_level: RiskLevel = RiskLevel.LOW
 
+class PositionBook:
+    """
+    Открытые позиции в виде struct-of-arrays (NumPy): переоценка и проверка
+    SL/TP/времени удержания выполняются векторно для всех позиций сразу.
+    Поля объектов Position синхронизируются лениво через sync_positions().
+    """
+    
+    CLOSE_REASONS = ("time_limit", "stop_loss", "take_profit")
+    
+    def __init__(self, capacity: int = 64):
+        self.size = 0
+        self.capacity = 0
+        self.positions: List[Position] = []
+        self._rows: Dict[str, int] = {}
+        self.symbols: Dict[str, int] = {}
+        self._dirty = False
+        self._grow(capacity)
+    
+    def _grow(self, capacity: int):
+        def resized(name: str, dtype) -> np.ndarray:
+            array = np.zeros(capacity, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                array[:self.size] = old[:self.size]
+            return array
+        
+        self.entry = resized("entry", np.float64)
+        self.quantity = resized("quantity", np.float64)
+        self.side = resized("side", np.float64)  # +1 long, -1 short
+        self.stop_loss = resized("stop_loss", np.float64)
+        self.take_profit = resized("take_profit", np.float64)
+        self.entry_ts = resized("entry_ts", np.float64)
+        self.current = resized("current", np.float64)
+        self.unrealized = resized("unrealized", np.float64)
+        self.symbol_idx = resized("symbol_idx", np.int64)
+        self.capacity = capacity
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def __contains__(self, position_id: str) -> bool:
+        return position_id in self._rows
+    
+    def add(self, position: Position):
+        """Добавление позиции (позиция с тем же id заменяется)"""
+        if position.id in self._rows:
+            self.remove(position.id)
+        if self.size == self.capacity:
+            self._grow(self.capacity * 2)
+        
+        row = self.size
+        self.entry[row] = position.entry_price
+        self.quantity[row] = position.quantity
+        self.side[row] = 1.0 if position.position_type == PositionType.LONG else -1.0
+        self.stop_loss[row] = position.stop_loss
+        self.take_profit[row] = position.take_profit
+        self.entry_ts[row] = position.entry_time.timestamp()
+        self.current[row] = position.current_price
+        self.unrealized[row] = position.unrealized_pnl
+        self.symbol_idx[row] = self.symbols.setdefault(position.symbol, len(self.symbols))
+        self.positions.append(position)
+        self._rows[position.id] = row
+        self.size += 1
+    
+    def remove(self, position_id: str):
+        """Удаление позиции: последняя строка переносится на место удалённой"""
+        row = self._rows.pop(position_id)
+        last = self.size - 1
+        if row != last:
+            for array in (self.entry, self.quantity, self.side, self.stop_loss, self.take_profit,
+                          self.entry_ts, self.current, self.unrealized, self.symbol_idx):
+                array[row] = array[last]
+            moved = self.positions[last]
+            self.positions[row] = moved
+            self._rows[moved.id] = row
+        self.positions.pop()
+        self.size = last
+    
+    def row(self, position_id: str) -> int:
+        return self._rows[position_id]
+    
+    def mark(self, price_data: Dict[str, float], now: float, max_hold_seconds: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Переоценка всех позиций по новым ценам.
+        Возвращает маску сработавших позиций и коды причин (индекс в CLOSE_REASONS).
+        """
+        n = self.size
+        if not n:
+            return np.zeros(0, dtype=bool), np.zeros(0, dtype=np.int64)
+        
+        prices = np.full(len(self.symbols), np.nan)
+        for symbol, price in price_data.items():
+            idx = self.symbols.get(symbol)
+            if idx is not None:
+                prices[idx] = price
+        
+        px = prices[self.symbol_idx[:n]]
+        has_price = ~np.isnan(px)
+        np.copyto(self.current[:n], px, where=has_price)
+        
+        side = self.side[:n]
+        current = self.current[:n]
+        np.multiply((current - self.entry[:n]) * self.quantity[:n], side, out=self.unrealized[:n])
+        self._dirty = True
+        
+        # side * (price - level): <= 0 — стоп для long и short, >= 0 — тейк-профит
+        with np.errstate(invalid="ignore"):
+            should_stop = has_price & (side * (px - self.stop_loss[:n]) <= 0)
+            should_take_profit = has_price & (side * (px - self.take_profit[:n]) >= 0)
+        expired = has_price & (now - self.entry_ts[:n] > max_hold_seconds)
+        
+        triggered = expired | should_stop | should_take_profit
+        reasons = np.where(expired, 0, np.where(should_stop, 1, 2))
+        return triggered, reasons
+    
+    def exposure(self) -> float:
+        """Суммарная стоимость открытых позиций по текущим ценам"""
+        n = self.size
+        return float(np.dot(self.current[:n], self.quantity[:n])) if n else 0.0
+    
+    def sync_positions(self):
+        """Запись текущих цен и нереализованного P&L обратно в объекты Position"""
+        if not self._dirty:
+            return
+        for position, current, unrealized in zip(self.positions, self.current[:self.size].tolist(),
+                                                 self.unrealized[:self.size].tolist()):
+            position.current_price = current
+            position.unrealized_pnl = unrealized
+        self._dirty = False
+
 class AdvancedRiskEngine:
     """Продвинутый движок управления рисками"""
     
-    def __init__(self, initial_balance: float = 10000.0, limits: RiskLimits = None):
+    def __init__(self, initial_balance: float = 10000.0, limits: RiskLimits = None,
+                 clock: Callable[[], datetime] = None):
         self.initial_balance = initial_balance
+        # Источник текущего времени (в бэктесте подменяется временем бара)
+        self.clock = clock or datetime.now
         self.current_balance = initial_balance
         self.limits = limits or RiskLimits()
         
         self.positions: Dict[str, Position] = {}
+        self.book = PositionBook()
         self.closed_positions: List[Position] = []
         self.daily_trades_count = 0
         self.daily_pnl = 0.0
@@ -103,14 +241,15 @@ class AdvancedRiskEngine:
         
         logger.info(f"Инициализирован продвинутый Risk Engine с балансом ${initial_balance}")
     
+    def _db(self):
+        """Общий обработчик SQLite для текущего db_path (WAL, соединение на поток, повторы при блокировке)"""
+        return get_database(self.db_path)
+    
     def init_database(self):
         """Инициализация базы данных"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Таблица позиций
-            cursor.execute("""
+            self._db().executescript("""
+                -- Таблица позиций
                 CREATE TABLE IF NOT EXISTS positions (
                     id TEXT PRIMARY KEY,
                     symbol TEXT,
@@ -125,11 +264,9 @@ class AdvancedRiskEngine:
                     realized_pnl REAL,
                     status TEXT,
                     created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Таблица метрик риска
-            cursor.execute("""
+                );
+                
+                -- Таблица метрик риска
                 CREATE TABLE IF NOT EXISTS risk_metrics (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     timestamp TEXT,
@@ -139,11 +276,9 @@ class AdvancedRiskEngine:
                     open_positions_count INTEGER,
                     portfolio_volatility REAL,
                     risk_level TEXT
-                )
-            """)
-            
-            # Таблица лимитов риска
-            cursor.execute("""
+                );
+                
+                -- Таблица событий риска
                 CREATE TABLE IF NOT EXISTS risk_events (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     timestamp TEXT,
@@ -152,12 +287,9 @@ class AdvancedRiskEngine:
                     severity TEXT,
                     position_id TEXT,
                     action_taken TEXT
-                )
+                );
             """)
             
-            conn.commit()
-            conn.close()
-            
         except Exception as e:
             logger.error(f"Ошибка инициализации базы данных: {e}")
     
@@ -224,7 +356,8 @@ class AdvancedRiskEngine:
             return False, message
         
         # Создание позиции
-        position_id = f"{symbol}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        now = self.clock()
+        position_id = f"{symbol}_{now.strftime('%Y%m%d_%H%M%S')}"
         position = Position(
             id=position_id,
             symbol=symbol,
@@ -232,18 +365,19 @@ class AdvancedRiskEngine:
             entry_price=entry_price,
             current_price=entry_price,
             quantity=quantity,
-            entry_time=datetime.now(),
+            entry_time=now,
             stop_loss=stop_loss,
             take_profit=take_profit
         )
         
         # Сохранение в память и базу данных
         self.positions[position_id] = position
+        self.book.add(position)
         await self.save_position_to_db(position)
         
         # Обновление счетчиков
         self.daily_trades_count += 1
-        self.last_trade_time = datetime.now()
+        self.last_trade_time = now
         
         # Логирование
         await self.log_risk_event("POSITION_OPENED", f"Открыта позиция {symbol} {position_type.value}", "INFO", position_id)
@@ -258,91 +392,70 @@ class AdvancedRiskEngine:
         if position_id not in self.positions:
             return False, "Позиция не найдена"
         
-        position = self.positions[position_id]
-        
-        # Расчет P&L
-        if position.position_type == PositionType.LONG:
-            pnl = (exit_price - position.entry_price) * position.quantity
-        else:  # SHORT
-            pnl = (position.entry_price - exit_price) * position.quantity
-        
-        # Обновление позиции
-        position.current_price = exit_price
-        position.realized_pnl = pnl
-        position.status = "closed"
-        
-        # Обновление баланса и метрик
-        self.current_balance += pnl
-        self.daily_pnl += pnl
-        
-        # Перенос в закрытые позиции
-        self.closed_positions.append(position)
-        del self.positions[position_id]
-        
-        # Сохранение в базу данных
-        await self.save_position_to_db(position)
-        
-        # Логирование
-        pnl_pct = (pnl / (position.entry_price * position.quantity)) * 100
-        await self.log_risk_event(
-            "POSITION_CLOSED", 
-            f"Закрыта позиция {position.symbol} с P&L ${pnl:.2f} ({pnl_pct:.1f}%). Причина: {reason}",
-            "INFO",
-            position_id
-        )
+        pnl = (await self.close_positions([position_id], [exit_price], [reason]))[0]
+        return True, f"P&L: ${pnl:.2f}"
+    
+    async def close_positions(self, position_ids: List[str], exit_prices: List[float], reasons: List[str]) -> List[float]:
+        """Закрытие группы позиций с одной транзакцией записи в БД"""
         
-        logger.info(f"Закрыта позиция: {position_id} - P&L: ${pnl:.2f} ({pnl_pct:.1f}%)")
+        self.book.sync_positions()
+        rows = np.array([self.book.row(position_id) for position_id in position_ids], dtype=np.int64)
+        exits = np.asarray(exit_prices, dtype=np.float64)
         
-        # Проверка критических потерь
-        if pnl < 0:
-            loss_pct = abs(pnl) / self.current_balance * 100
-            if loss_pct > 2.0:  # Крупная потеря
-                await self.log_risk_event("LARGE_LOSS", f"Крупная потеря: ${abs(pnl):.2f}", "WARNING", position_id)
+        # Расчет P&L для всех позиций сразу
+        pnls = ((exits - self.book.entry[rows]) * self.book.quantity[rows] * self.book.side[rows]).tolist()
         
-        return True, f"P&L: ${pnl:.2f}"
+        closed = []
+        events = []
+        for position_id, exit_price, reason, pnl in zip(position_ids, exits.tolist(), reasons, pnls):
+            position = self.positions.pop(position_id)
+            self.book.remove(position_id)
+            
+            # Обновление позиции
+            position.current_price = exit_price
+            position.realized_pnl = pnl
+            position.status = "closed"
+            
+            # Обновление баланса и метрик
+            self.current_balance += pnl
+            self.daily_pnl += pnl
+            self.closed_positions.append(position)
+            closed.append(position)
+            
+            pnl_pct = (pnl / (position.entry_price * position.quantity)) * 100
+            events.append((
+                "POSITION_CLOSED",
+                f"Закрыта позиция {position.symbol} с P&L ${pnl:.2f} ({pnl_pct:.1f}%). Причина: {reason}",
+                "INFO",
+                position_id
+            ))
+            logger.info(f"Закрыта позиция: {position_id} - P&L: ${pnl:.2f} ({pnl_pct:.1f}%)")
+            
+            # Проверка критических потерь
+            if pnl < 0:
+                loss_pct = abs(pnl) / self.current_balance * 100
+                if loss_pct > 2.0:  # Крупная потеря
+                    events.append(("LARGE_LOSS", f"Крупная потеря: ${abs(pnl):.2f}", "WARNING", position_id))
+        
+        # Пакетное сохранение позиций и событий
+        await self.save_closed_positions_to_db(closed, events)
+        return pnls
     
     async def update_positions(self, price_data: Dict[str, float]):
         """Обновление цен и проверка стоп-лоссов/тейк-профитов"""
         
-        positions_to_close = []
-        
-        for position_id, position in self.positions.items():
-            if position.symbol in price_data:
-                current_price = price_data[position.symbol]
-                position.current_price = current_price
-                
-                # Расчет нереализованного P&L
-                if position.position_type == PositionType.LONG:
-                    position.unrealized_pnl = (current_price - position.entry_price) * position.quantity
-                else:
-                    position.unrealized_pnl = (position.entry_price - current_price) * position.quantity
-                
-                # Проверка стоп-лосса
-                should_stop = False
-                if position.position_type == PositionType.LONG and current_price <= position.stop_loss:
-                    should_stop = True
-                elif position.position_type == PositionType.SHORT and current_price >= position.stop_loss:
-                    should_stop = True
-                
-                # Проверка тейк-профита
-                should_take_profit = False
-                if position.position_type == PositionType.LONG and current_price >= position.take_profit:
-                    should_take_profit = True
-                elif position.position_type == PositionType.SHORT and current_price <= position.take_profit:
-                    should_take_profit = True
-                
-                # Проверка времени удержания
-                hold_time = datetime.now() - position.entry_time
-                if hold_time.total_seconds() / 3600 > self.limits.max_position_hold_hours:
-                    positions_to_close.append((position_id, current_price, "time_limit"))
-                elif should_stop:
-                    positions_to_close.append((position_id, current_price, "stop_loss"))
-                elif should_take_profit:
-                    positions_to_close.append((position_id, current_price, "take_profit"))
-        
-        # Закрытие позиций
-        for position_id, exit_price, reason in positions_to_close:
-            await self.close_position(position_id, exit_price, reason)
+        triggered, reasons = self.book.mark(
+            price_data, self.clock().timestamp(), self.limits.max_position_hold_hours * 3600
+        )
+        rows = np.flatnonzero(triggered)
+        if not len(rows):
+            return
+        
+        # Закрытие сработавших позиций одним пакетом
+        position_ids = [self.book.positions[row].id for row in rows.tolist()]
+        exit_prices = self.book.current[rows].tolist()
+        close_reasons = [PositionBook.CLOSE_REASONS[code] for code in reasons[rows].tolist()]
+        await self.close_positions(position_ids, exit_prices, close_reasons)
     
     async def calculate_risk_metrics(self) -> RiskMetrics:
         """Расчет текущих метрик риска"""
@@ -364,9 +477,7 @@ class AdvancedRiskEngine:
         
         # Средний размер позиции
         if len(self.positions) > 0:
-            total_position_value = sum(
-                pos.current_price * pos.quantity for pos in self.positions.values()
-            )
+            total_position_value = self.book.exposure()
             metrics.avg_position_size_pct = (total_position_value / len(self.positions) / self.current_balance) * 100
         
         # Волатильность портфеля (упрощенная)
@@ -450,11 +561,7 @@ class AdvancedRiskEngine:
         if not self.positions:
             return 0.0
         
-        total_value = sum(
-            pos.current_price * pos.quantity for pos in self.positions.values()
-        )
-        
-        return (total_value / self.current_balance) * 100
+        return (self.book.exposure() / self.current_balance) * 100
     
     async def check_cooldown(self) -> bool:
         """Проверка cooldown после убыточной сделки"""
@@ -465,7 +572,7 @@ class AdvancedRiskEngine:
         if last_position.realized_pnl >= 0:  # Последняя сделка была прибыльной
             return False
         
-        time_since_last = datetime.now() - last_position.entry_time
+        time_since_last = self.clock() - last_position.entry_time
         return time_since_last.total_seconds() / 60 < self.limits.cooldown_after_loss_minutes
     
     async def check_correlation_risk(self, symbol: str) -> float:
@@ -481,10 +588,14 @@ class AdvancedRiskEngine:
         self.emergency_stop_active = True
         
         # Закрытие всех открытых позиций
-        positions_to_close = list(self.positions.keys())
-        for position_id in positions_to_close:
-            position = self.positions[position_id]
-            await self.close_position(position_id, position.current_price, f"emergency_stop: {reason}")
+        if self.positions:
+            self.book.sync_positions()
+            position_ids = list(self.positions.keys())
+            await self.close_positions(
+                position_ids,
+                [self.positions[position_id].current_price for position_id in position_ids],
+                [f"emergency_stop: {reason}"] * len(position_ids)
+            )
         
         await self.log_risk_event("EMERGENCY_STOP", f"Активирован emergency stop: {reason}", "CRITICAL", None)
         logger.critical(f"EMERGENCY STOP активирован: {reason}")
@@ -495,54 +606,69 @@ class AdvancedRiskEngine:
         await self.log_risk_event("EMERGENCY_STOP_RESET", "Emergency stop сброшен", "INFO", None)
         logger.info("Emergency stop сброшен")
     
+    POSITION_UPSERT = """
+        INSERT OR REPLACE INTO positions 
+        (id, symbol, position_type, entry_price, current_price, quantity, 
+         entry_time, stop_loss, take_profit, unrealized_pnl, realized_pnl, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    
+    RISK_EVENT_INSERT = """
+        INSERT INTO risk_events 
+        (timestamp, event_type, description, severity, position_id, action_taken)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """
+    
+    @staticmethod
+    def _position_row(position: Position) -> tuple:
+        return (
+            position.id, position.symbol, position.position_type.value,
+            position.entry_price, position.current_price, position.quantity,
+            position.entry_time.isoformat(), position.stop_loss, position.take_profit,
+            position.unrealized_pnl, position.realized_pnl, position.status
+        )
+    
     async def save_position_to_db(self, position: Position):
         """Сохранение позиции в базу данных"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT OR REPLACE INTO positions 
-                (id, symbol, position_type, entry_price, current_price, quantity, 
-                 entry_time, stop_loss, take_profit, unrealized_pnl, realized_pnl, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                position.id, position.symbol, position.position_type.value,
-                position.entry_price, position.current_price, position.quantity,
-                position.entry_time.isoformat(), position.stop_loss, position.take_profit,
-                position.unrealized_pnl, position.realized_pnl, position.status
-            ))
-            
-            conn.commit()
-            conn.close()
+            # Запись выполняется в потоке базы данных и не блокирует event loop
+            await self._db().aexecute(self.POSITION_UPSERT, self._position_row(position))
             
         except Exception as e:
             logger.error(f"Ошибка сохранения позиции в БД: {e}")
     
+    async def save_closed_positions_to_db(self, positions: List[Position], events: List[Tuple[str, str, str, str]]):
+        """Пакетное сохранение позиций и событий риска в одной транзакции"""
+        now = datetime.now().isoformat()
+        position_rows = [self._position_row(position) for position in positions]
+        event_rows = [(now, event_type, description, severity, position_id, "logged")
+                      for event_type, description, severity, position_id in events]
+        
+        def write(conn):
+            conn.executemany(self.POSITION_UPSERT, position_rows)
+            conn.executemany(self.RISK_EVENT_INSERT, event_rows)
+        
+        try:
+            await self._db().arun_transaction(write)
+            
+        except Exception as e:
+            logger.error(f"Ошибка пакетного сохранения позиций в БД: {e}")
+    
     async def log_risk_event(self, event_type: str, description: str, severity: str, position_id: str = None):
         """Логирование события риска"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO risk_events 
-                (timestamp, event_type, description, severity, position_id, action_taken)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
+            await self._db().aexecute(self.RISK_EVENT_INSERT, (
                 datetime.now().isoformat(), event_type, description, severity, 
                 position_id, "logged"
             ))
             
-            conn.commit()
-            conn.close()
-            
         except Exception as e:
             logger.error(f"Ошибка логирования события риска: {e}")
     
     async def get_risk_report(self) -> Dict:
         """Генерация отчета по рискам"""
         metrics = await self.calculate_risk_metrics()
+        self.book.sync_positions()
         
         # Конвертируем метрики в сериализуемый формат
         metrics_dict = asdict(metrics)
@@ -564,7 +690,7 @@ class AdvancedRiskEngine:
                     "entry_price": pos.entry_price,
                     "current_price": pos.current_price,
                     "unrealized_pnl": pos.unrealized_pnl,
-                    "hold_time_hours": (datetime.now() - pos.entry_time).total_seconds() / 3600
+                    "hold_time_hours": (self.clock() - pos.entry_time).total_seconds() / 3600
                 } for pos_id, pos in self.positions.items()
             },
             "recent_trades": len(self.closed_positions[-10:]) if self.closed_positions else 0,
@@ -3,11 +3,17 @@
 48h Trading Performance Analysis
 Computes win rate per strategy, top signals, and issues.
 """
-import sqlite3
 from datetime import datetime, timedelta
 from pathlib import Path
 import json
 
+try:
+    from .storage import epoch, get_database
+    from .trade_analytics import ensure_schema, window_stats
+except ImportError:
+    from storage import epoch, get_database
+    from trade_analytics import ensure_schema, window_stats
+
 DB_PATH = '/root/mirai-agent/state/mirai.db'
 
 def analyze_last_48h(db_path: str = DB_PATH) -> dict:
@@ -24,45 +30,51 @@ def analyze_last_48h(db_path: str = DB_PATH) -> dict:
         result['error'] = 'database_not_found'
         return result
 
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
+    db = get_database(db_path)
 
-    # Try trades table first
+    # Indexed epoch timestamps + hourly rollups (see trade_analytics)
     try:
-        c.execute("""
-            SELECT strategy, COUNT(*) as n,
-                   SUM(CASE WHEN pnl > 0 THEN 1 ELSE 0 END) as wins,
-                   SUM(pnl) as total_pnl
-            FROM trades
-            WHERE datetime(created_at) >= datetime(?)
-            GROUP BY strategy
-        """, (since.isoformat(),))
-        rows = c.fetchall()
+        ensure_schema(db)
+        stats = window_stats(db, since, now)
+    except Exception as e:
+        # Fall back to risk_events below
+        result['trades_error'] = str(e)
+        stats = {}
+
+    if stats:
         total_trades = 0
         total_pnl = 0.0
-        for strategy, n, wins, total_p in rows:
-            win_rate = (wins or 0) / n * 100 if n else 0
-            result['strategies'][strategy or 'unknown'] = {
+        for strategy, entry in stats.items():
+            n = entry['trades']
+            result['strategies'][strategy] = {
                 'trades': n,
-                'wins': wins or 0,
-                'win_rate': round(win_rate, 2),
-                'pnl': round(total_p or 0.0, 2)
+                'wins': entry['wins'],
+                'win_rate': round(entry['wins'] / n * 100 if n else 0, 2),
+                'pnl': round(entry['pnl'], 2)
             }
             total_trades += n
-            total_pnl += total_p or 0.0
+            total_pnl += entry['pnl']
         result['summary'] = {
             'total_trades': total_trades,
             'total_pnl': round(total_pnl, 2)
         }
-    except Exception:
+    else:
         # Fallback: derive from risk_events POSITION_CLOSED messages
         try:
-            c.execute("""
-                SELECT description
-                FROM risk_events
-                WHERE datetime(timestamp) >= datetime(?)
-            """, (since.isoformat(),))
-            rows = c.fetchall()
+            columns = {row[1] for row in db.fetchall("PRAGMA table_info(risk_events)")}
+            if 'ts' in columns:
+                rows = db.fetchall("""
+                    SELECT description
+                    FROM risk_events
+                    WHERE ts >= ? AND event_type = 'POSITION_CLOSED'
+                """, (epoch(since),))
+            else:
+                # Schema migration did not run: unindexed scan of the ISO timestamps
+                rows = db.fetchall("""
+                    SELECT description
+                    FROM risk_events
+                    WHERE datetime(timestamp) >= datetime(?) AND event_type = 'POSITION_CLOSED'
+                """, (since.isoformat(),))
             wins = losses = 0
             for (desc,) in rows:
                 if not desc:
@@ -87,8 +99,6 @@ def analyze_last_48h(db_path: str = DB_PATH) -> dict:
             result['summary'] = {'total_trades': n}
         except Exception as e:
             result['error'] = str(e)
-    finally:
-        conn.close()
 
     return result
 
@@ -0,0 +1,802 @@
+"""
+Mirai Agent - Бэктестинг стратегий
+Векторный режим (NumPy) для сигнальных стратегий и событийный режим, прогоняющий
+бары через BaseTradingStrategy, AdvancedRiskEngine и симулятор брокера.
+История читается из локальных Parquet/CSV, прогоны по символам и наборам
+параметров распараллеливаются пулом процессов.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from ..strategies.technical.base_strategy import (
+        BaseTradingStrategy, MarketRegime, SignalType, StrategyParams, TechnicalIndicators
+    )
+    from .advanced_risk_engine import AdvancedRiskEngine, PositionType, RiskLimits
+    from .bar_store import OHLCVView
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    from strategies.technical.base_strategy import (
+        BaseTradingStrategy, MarketRegime, SignalType, StrategyParams, TechnicalIndicators
+    )
+    from advanced_risk_engine import AdvancedRiskEngine, PositionType, RiskLimits
+    from bar_store import OHLCVView
+
+logger = logging.getLogger(__name__)
+
+DAY_MS = 86_400_000
+YEAR_MS = 365 * DAY_MS
+
+# Окно цен закрытия для детектора режима (как IncrementalIndicatorSet.CLOSE_HISTORY)
+REGIME_WINDOW = 50
+REGIME_MIN_BARS = 50
+REGIME_FIT_BARS = 20
+
+# Колонки CSV-выгрузок Binance klines без заголовка
+KLINE_COLUMNS = ('open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time',
+                 'quote_volume', 'count', 'taker_buy_volume', 'taker_buy_quote_volume', 'ignore')
+TS_COLUMNS = ('ts', 'timestamp', 'open_time', 'time', 'date', 'datetime')
+
+DEFAULT_RESULTS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'state', 'backtests', 'latest.json'
+)
+
+_SIGNAL_DIRECTION = {
+    SignalType.BUY: 1, SignalType.STRONG_BUY: 1,
+    SignalType.SELL: -1, SignalType.STRONG_SELL: -1,
+}
+
+
+# ---------------------------------------------------------------------------
+# Загрузка истории
+# ---------------------------------------------------------------------------
+
+def _to_ms(values: Union[pd.Series, pd.Index]) -> np.ndarray:
+    """Метки времени (числа в с/мс/мкс или даты) в int64 миллисекунды UTC"""
+    if pd.api.types.is_numeric_dtype(values):
+        ts = np.asarray(values, dtype=np.int64)
+        peak = int(ts.max()) if len(ts) else 0
+        if peak > 10 ** 14:  # микросекунды (новые выгрузки Binance)
+            ts = ts // 1000
+        elif peak < 10 ** 11:  # секунды
+            ts = ts * 1000
+        return ts
+    index = pd.DatetimeIndex(pd.to_datetime(values, utc=True)).tz_localize(None)
+    return index.as_unit('ms').asi8
+
+
+def bars_from_frame(frame: pd.DataFrame) -> OHLCVView:
+    """OHLCV-бары из DataFrame: колонка времени или DatetimeIndex, сортировка и дедупликация"""
+    columns = {str(name).lower(): name for name in frame.columns}
+    if 'close' not in columns:
+        raise ValueError("В данных нет колонки close")
+
+    ts_column = next((columns[name] for name in TS_COLUMNS if name in columns), None)
+    if ts_column is not None:
+        ts = _to_ms(frame[ts_column])
+    elif isinstance(frame.index, pd.DatetimeIndex):
+        ts = _to_ms(frame.index)
+    else:
+        raise ValueError("В данных нет колонки времени (%s)" % ", ".join(TS_COLUMNS))
+
+    close = frame[columns['close']].to_numpy(dtype=np.float64)
+    prices = [
+        frame[columns[name]].to_numpy(dtype=np.float64) if name in columns else close
+        for name in ('open', 'high', 'low')
+    ]
+    volume = (frame[columns['volume']].to_numpy(dtype=np.float64) if 'volume' in columns
+              else np.zeros_like(close))
+
+    order = np.argsort(ts, kind='stable')
+    ts = ts[order]
+    # При повторах времени остается последний бар
+    keep = np.append(ts[1:] != ts[:-1], True) if len(ts) else np.zeros(0, dtype=bool)
+    order = order[keep]
+    columns_out = [np.ascontiguousarray(a[order]) for a in (*prices, close, volume)]
+    return OHLCVView(np.ascontiguousarray(ts[keep]), *columns_out)
+
+
+def _read_csv(path: str) -> pd.DataFrame:
+    with open(path, 'r') as f:
+        first = f.readline().split(',')[0].strip()
+    try:
+        float(first)
+    except ValueError:
+        return pd.read_csv(path)
+    # Выгрузка без заголовка - формат Binance klines
+    frame = pd.read_csv(path, header=None)
+    frame.columns = list(KLINE_COLUMNS[:frame.shape[1]]) + [f"extra_{i}" for i in range(frame.shape[1] - len(KLINE_COLUMNS))]
+    return frame
+
+
+@lru_cache(maxsize=8)
+def _load_bars_cached(path: str, mtime: float) -> OHLCVView:
+    if path.endswith(('.parquet', '.pq')):
+        frame = pd.read_parquet(path)
+    else:
+        frame = _read_csv(path)
+    return bars_from_frame(frame)
+
+
+def load_bars(path: str) -> OHLCVView:
+    """
+    Загрузка OHLCV из локального Parquet (нужен pyarrow или fastparquet) или CSV.
+    Результат кэшируется в процессе по (путь, mtime) - воркеры пула не перечитывают
+    файл для каждого набора параметров.
+    """
+    path = os.path.abspath(path)
+    return _load_bars_cached(path, os.path.getmtime(path))
+
+
+def symbol_from_path(path: str) -> str:
+    """BTCUSDT_1m.parquet -> BTCUSDT"""
+    name = os.path.basename(path).split('.')[0]
+    return name.replace('-', '_').split('_')[0].upper()
+
+
+# ---------------------------------------------------------------------------
+# Метрики и результат
+# ---------------------------------------------------------------------------
+
+@dataclass
+class BacktestConfig:
+    """Параметры симуляции"""
+    initial_balance: float = 10000.0
+    fee_rate: float = 0.0004  # комиссия тейкера, доля от номинала
+    slippage_bps: float = 1.0  # проскальзывание в базисных пунктах
+    risk_per_trade_pct: float = 1.0  # риск на сделку для калькулятора размера позиции
+
+
+def _bars_per_year(ts: np.ndarray) -> float:
+    if len(ts) < 2:
+        return 365.0
+    step = float(np.median(np.diff(ts)))
+    return YEAR_MS / step if step > 0 else 365.0
+
+
+def compute_metrics(ts: np.ndarray, equity: np.ndarray, trade_returns: np.ndarray,
+                    trade_pnls: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    Метрики кривой капитала и сделок. Проценты - в процентах, просадка отрицательная.
+    profit_factor считается по P&L сделок (или по доходностям, если P&L не передан).
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    trade_returns = np.asarray(trade_returns, dtype=np.float64)
+    pnls = trade_returns if trade_pnls is None else np.asarray(trade_pnls, dtype=np.float64)
+    start_value = float(equity[0]) if len(equity) else 0.0
+    end_value = float(equity[-1]) if len(equity) else 0.0
+
+    total_return = end_value / start_value - 1 if start_value else 0.0
+    span_years = (float(ts[-1] - ts[0]) / YEAR_MS) if len(ts) > 1 else 0.0
+    if span_years > 0 and end_value > 0:
+        annualized = (end_value / start_value) ** (1 / span_years) - 1
+    else:
+        annualized = 0.0
+
+    if len(equity) > 1:
+        peak = np.maximum.accumulate(equity)
+        max_drawdown = float(np.min(equity / peak - 1))
+        returns = equity[1:] / equity[:-1] - 1
+        std = float(np.std(returns))
+        sharpe = float(np.mean(returns) / std * np.sqrt(_bars_per_year(ts))) if std > 0 else 0.0
+    else:
+        max_drawdown = 0.0
+        sharpe = 0.0
+
+    gains = float(pnls[pnls > 0].sum())
+    losses = float(-pnls[pnls < 0].sum())
+    if losses > 0:
+        profit_factor = gains / losses
+    else:
+        profit_factor = float('inf') if gains > 0 else 0.0
+
+    # Доходность по календарным месяцам (UTC)
+    monthly = []
+    if len(ts):
+        months = ts.astype('datetime64[ms]').astype('datetime64[M]')
+        ends = np.append(np.flatnonzero(months[1:] != months[:-1]), len(ts) - 1)
+        month_end = equity[ends]
+        month_start = np.concatenate(([start_value], month_end[:-1]))
+        monthly = ((month_end / month_start - 1) * 100).round(2).tolist()
+
+    n_trades = len(trade_returns)
+    return {
+        'total_return': round(total_return * 100, 2),
+        'annualized_return': round(annualized * 100, 2),
+        'max_drawdown': round(max_drawdown * 100, 2),
+        'sharpe_ratio': round(sharpe, 3),
+        'calmar_ratio': round(annualized / abs(max_drawdown), 2) if max_drawdown else 0.0,
+        'win_rate': round(float(np.mean(trade_returns > 0)) * 100, 1) if n_trades else 0.0,
+        'total_trades': n_trades,
+        'avg_trade_return': round(float(np.mean(trade_returns)) * 100, 3) if n_trades else 0.0,
+        'best_trade': round(float(np.max(trade_returns)) * 100, 2) if n_trades else 0.0,
+        'worst_trade': round(float(np.min(trade_returns)) * 100, 2) if n_trades else 0.0,
+        'profit_factor': round(profit_factor, 2) if np.isfinite(profit_factor) else None,
+        'final_equity': round(end_value, 2),
+        'monthly_returns': monthly,
+    }
+
+
+@dataclass
+class BacktestResult:
+    """Результат одного прогона"""
+    symbol: str
+    mode: str
+    strategy: str
+    params: Dict[str, Any]
+    ts: np.ndarray
+    equity: np.ndarray
+    trades: List[Dict[str, Any]]
+    metrics: Dict[str, Any]
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+    def compact(self, points: int = 1000) -> 'BacktestResult':
+        """Прореживание кривой капитала до ``points`` точек (последняя точка сохраняется)"""
+        if points and len(self.equity) > points:
+            idx = np.unique(np.linspace(0, len(self.equity) - 1, points).astype(np.int64))
+            self.ts = self.ts[idx]
+            self.equity = self.equity[idx]
+        return self
+
+    def to_dict(self, equity_points: int = 200) -> Dict[str, Any]:
+        """Сериализуемое представление в формате /analytics/backtesting"""
+        idx = np.arange(len(self.equity))
+        if equity_points and len(idx) > equity_points:
+            idx = np.unique(np.linspace(0, len(idx) - 1, equity_points).astype(np.int64))
+
+        def iso(ms) -> Optional[str]:
+            return datetime.fromtimestamp(int(ms) / 1000, timezone.utc).isoformat() if ms is not None else None
+
+        return {
+            'strategy_name': self.strategy,
+            'symbol': self.symbol,
+            'mode': self.mode,
+            'params': self.params,
+            'start': iso(self.ts[0]) if len(self.ts) else None,
+            'end': iso(self.ts[-1]) if len(self.ts) else None,
+            **self.metrics,
+            'equity_curve': self.equity[idx].round(2).tolist(),
+            'equity_ts': self.ts[idx].tolist(),
+            'stats': self.stats,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Векторный режим
+# ---------------------------------------------------------------------------
+
+def sma_crossover(bars: OHLCVView, fast: int = 10, slow: int = 30) -> np.ndarray:
+    """Лонг, пока быстрая SMA выше медленной, шорт - пока ниже"""
+    close = np.ascontiguousarray(bars.close, dtype=np.float64)
+    spread = TechnicalIndicators.moving_average(close, int(fast)) - TechnicalIndicators.moving_average(close, int(slow))
+    return np.sign(np.nan_to_num(spread))
+
+
+def rsi_reversion(bars: OHLCVView, period: int = 14, oversold: float = 30.0, overbought: float = 70.0) -> np.ndarray:
+    """Вход против перепроданности/перекупленности RSI, выход при пересечении 50"""
+    close = np.ascontiguousarray(bars.close, dtype=np.float64)
+    rsi = TechnicalIndicators.rsi(close, int(period))
+    n = len(rsi)
+
+    events = np.full(n, np.nan)
+    side = np.sign(rsi - 50)
+    crossed = np.ones(n, dtype=bool)
+    crossed[1:] = side[1:] != side[:-1]
+    events[crossed] = 0.0
+    events[rsi < oversold] = 1.0
+    events[rsi > overbought] = -1.0
+
+    # Протягиваем последнее событие вперед (ffill)
+    last = np.where(np.isnan(events), 0, np.arange(n))
+    np.maximum.accumulate(last, out=last)
+    return np.nan_to_num(events[last])
+
+
+SIGNALS: Dict[str, Callable[..., np.ndarray]] = {
+    'sma_crossover': sma_crossover,
+    'rsi_reversion': rsi_reversion,
+}
+
+
+def run_vectorized(bars: OHLCVView, signal: Union[str, Callable[..., np.ndarray]],
+                   params: Optional[Dict[str, Any]] = None, config: Optional[BacktestConfig] = None,
+                   symbol: str = '') -> BacktestResult:
+    """
+    Векторный бэктест сигнальной стратегии.
+
+    ``signal(bars, **params)`` возвращает целевую позицию на каждый бар в долях
+    капитала (-1..1). Сигнал по закрытию бара i исполняется по этому закрытию с
+    проскальзыванием и приносит доходность бара i+1 - заглядывания вперед нет.
+    Комиссия и проскальзывание списываются с оборота позиции.
+    """
+    config = config or BacktestConfig()
+    params = dict(params or {})
+    name = signal if isinstance(signal, str) else getattr(signal, '__name__', 'signal')
+    signal_fn = SIGNALS[signal] if isinstance(signal, str) else signal
+
+    close = np.asarray(bars.close, dtype=np.float64)
+    n = len(close)
+    target = np.clip(np.nan_to_num(np.asarray(signal_fn(bars, **params), dtype=np.float64)), -1.0, 1.0)
+    if len(target) != n:
+        raise ValueError(f"Сигнал вернул {len(target)} значений для {n} баров")
+
+    held = np.zeros(n)
+    held[1:] = target[:-1]
+    returns = np.zeros(n)
+    returns[1:] = close[1:] / close[:-1] - 1
+
+    cost_rate = config.fee_rate + config.slippage_bps / 10_000
+    turnover = np.abs(np.diff(target, prepend=0.0))
+    gross = held * returns
+    net = gross - turnover * cost_rate
+    equity = config.initial_balance * np.cumprod(1 + net)
+
+    # Сделки - отрезки постоянной ненулевой позиции
+    starts = np.flatnonzero((held != 0) & (held != np.concatenate(([0.0], held[:-1]))))
+    if len(starts):
+        changes = np.flatnonzero(np.diff(held) != 0) + 1
+        ends = np.concatenate((changes, [n]))
+        ends = ends[np.searchsorted(ends, starts, side='right')]
+        log_growth = np.concatenate(([0.0], np.cumsum(np.log1p(gross))))
+        size = np.abs(held[starts])
+        trade_returns = (np.exp(log_growth[ends] - log_growth[starts]) * (1 - size * cost_rate) ** 2 - 1)
+        trades = [
+            {'entry_ts': int(bars.ts[s - 1]), 'exit_ts': int(bars.ts[e - 1]), 'side': int(np.sign(held[s])),
+             'size': float(abs(held[s])), 'return': float(r)}
+            for s, e, r in zip(starts.tolist(), ends.tolist(), trade_returns.tolist())
+        ]
+    else:
+        trade_returns = np.zeros(0)
+        trades = []
+
+    metrics = compute_metrics(bars.ts, equity, trade_returns)
+    stats = {'bars': n, 'turnover': round(float(turnover.sum()), 4)}
+    return BacktestResult(symbol, 'vectorized', name, params, np.asarray(bars.ts), equity, trades, metrics, stats)
+
+
+# ---------------------------------------------------------------------------
+# Событийный режим
+# ---------------------------------------------------------------------------
+
+class SimulatedBroker:
+    """Исполнение по цене бара с проскальзыванием против нас и комиссией с номинала"""
+
+    def __init__(self, fee_rate: float = 0.0004, slippage_bps: float = 1.0):
+        self.fee_rate = fee_rate
+        self.slippage = slippage_bps / 10_000
+        self.fees_paid = 0.0
+        self.fills = 0
+
+    def fill_price(self, direction: int, price: float) -> float:
+        """Цена исполнения: покупка (direction=1) дороже, продажа дешевле"""
+        return price * (1 + direction * self.slippage)
+
+    def fee(self, price: float, quantity: float) -> float:
+        fee = abs(price * quantity) * self.fee_rate
+        self.fees_paid += fee
+        self.fills += 1
+        return fee
+
+
+class BacktestRiskEngine(AdvancedRiskEngine):
+    """AdvancedRiskEngine без SQLite: события только подсчитываются"""
+
+    def __init__(self, initial_balance: float = 10000.0, limits: RiskLimits = None,
+                 clock: Callable[[], datetime] = None):
+        self.event_counts: Dict[str, int] = {}
+        super().__init__(initial_balance, limits, clock)
+
+    def init_database(self):
+        pass
+
+    async def save_position_to_db(self, position):
+        pass
+
+    async def save_closed_positions_to_db(self, positions, events):
+        for event_type, *_ in events:
+            self.event_counts[event_type] = self.event_counts.get(event_type, 0) + 1
+
+    async def log_risk_event(self, event_type: str, description: str, severity: str, position_id: str = None):
+        self.event_counts[event_type] = self.event_counts.get(event_type, 0) + 1
+
+
+class _ReplayIndicators:
+    """
+    Индикаторы стратегии, посчитанные один раз по всей истории, в интерфейсе
+    IncrementalIndicatorSet для BaseTradingStrategy.analyze_stream. talib-индикаторы
+    причинные, поэтому значение на баре i совпадает с потоковым расчетом.
+    """
+
+    def __init__(self, indicators: Dict[str, np.ndarray], close: np.ndarray):
+        self.indicators = indicators
+        self.close = close
+        self.index = 0
+        valid = np.ones(len(close), dtype=bool)
+        for values in indicators.values():
+            valid &= ~np.isnan(values)
+        # Готовность: все индикаторы определены на предыдущем баре
+        self.first_ready = int(np.argmax(valid)) + 1 if valid.any() else len(close)
+
+    @property
+    def ready(self) -> bool:
+        return self.index >= self.first_ready
+
+    def as_arrays(self) -> Dict[str, np.ndarray]:
+        i = self.index
+        return {key: values[i - 1:i + 1] for key, values in self.indicators.items()}
+
+    def recent_close(self) -> np.ndarray:
+        i = self.index
+        return self.close[max(0, i - REGIME_WINDOW + 1):i + 1]
+
+
+# Коды режимов в массиве regime_codes
+REGIMES = (MarketRegime.UNKNOWN, MarketRegime.TRENDING, MarketRegime.VOLATILE, MarketRegime.SIDEWAYS)
+
+
+def regime_codes(detector, close: np.ndarray, chunk: int = 65536) -> np.ndarray:
+    """
+    MarketRegimeDetector.detect_regime_from_close, посчитанный векторно сразу для
+    всех баров (окно REGIME_WINDOW): наклон регрессии по 20 барам через свертку,
+    волатильность - std 20 последних доходностей. Возвращает индексы в REGIMES.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    codes = np.zeros(n, dtype=np.int8)
+    if n < REGIME_MIN_BARS or REGIME_WINDOW < REGIME_MIN_BARS:
+        return codes
+
+    x = np.arange(REGIME_FIT_BARS, dtype=np.float64)
+    weights = (x - x.mean()) / np.sum((x - x.mean()) ** 2)
+    slope = np.correlate(close, weights, mode='valid')  # slope[j] - бар j + 19
+    trend = np.abs(slope[REGIME_MIN_BARS - REGIME_FIT_BARS:]) / close[REGIME_MIN_BARS - 1:]
+
+    returns = np.diff(close) / close[:-1]
+    windows = sliding_window_view(returns, REGIME_FIT_BARS)[REGIME_MIN_BARS - REGIME_FIT_BARS - 1:]
+    volatility = np.concatenate([windows[i:i + chunk].std(axis=1) for i in range(0, len(windows), chunk)])
+
+    codes[REGIME_MIN_BARS - 1:] = np.where(trend > detector.trend_threshold, 1,
+                                           np.where(volatility > detector.volatility_threshold, 2, 3))
+    return codes
+
+
+class _ReplayRegimeDetector:
+    """Подмена regime_detector стратегии: режим бара ``index`` из regime_codes"""
+
+    def __init__(self, codes: np.ndarray):
+        self.index = 0
+        self.regimes: List[MarketRegime] = [REGIMES[code] for code in codes.tolist()]
+
+    def detect_regime_from_close(self, close: np.ndarray) -> MarketRegime:
+        return self.regimes[self.index]
+
+
+class _BarClock:
+    """Часы риск-движка, показывающие время текущего бара"""
+
+    def __init__(self):
+        self.ms = 0
+
+    def __call__(self) -> datetime:
+        return datetime.fromtimestamp(self.ms / 1000, timezone.utc)
+
+
+@contextmanager
+def _quiet(*names: str):
+    """Приглушение INFO-логов стратегии и риск-движка на время прогона"""
+    saved = [(logging.getLogger(name), logging.getLogger(name).level) for name in names]
+    for log, _ in saved:
+        log.setLevel(logging.WARNING)
+    try:
+        yield
+    finally:
+        for log, level in saved:
+            log.setLevel(level)
+
+
+class EventDrivenBacktester:
+    """
+    Побарный прогон: стратегия -> риск-движок -> симулятор брокера.
+
+    - решение принимается по закрытию бара i, вход исполняется по open бара i+1;
+    - стоп-лосс/тейк-профит/время удержания проверяет PositionBook по закрытию бара,
+      выход - по закрытию с проскальзыванием;
+    - противоположный сигнал закрывает открытую позицию;
+    - дневные счетчики риск-движка сбрасываются на границе суток UTC.
+    """
+
+    def __init__(self, bars: OHLCVView, symbol: str = '', strategy: Optional[BaseTradingStrategy] = None,
+                 config: Optional[BacktestConfig] = None, limits: Optional[RiskLimits] = None,
+                 indicators: Optional[Dict[str, np.ndarray]] = None, regimes: Optional[np.ndarray] = None):
+        self.bars = bars
+        # Готовые массивы индикаторов/режимов (например, из общей памяти оптимизатора)
+        self.indicators = indicators
+        self.regimes = regimes
+        self.symbol = symbol or 'SYMBOL'
+        self.strategy = strategy or BaseTradingStrategy()
+        self.config = config or BacktestConfig()
+        self.clock = _BarClock()
+        self.engine = BacktestRiskEngine(self.config.initial_balance, limits, clock=self.clock)
+        self.broker = SimulatedBroker(self.config.fee_rate, self.config.slippage_bps)
+        self.trades: List[Dict[str, Any]] = []
+        self._entry_fees: Dict[str, float] = {}
+        self._entry_ts: Dict[str, int] = {}
+
+    def _charge(self, fee: float):
+        self.engine.current_balance -= fee
+        self.engine.daily_pnl -= fee
+
+    async def _enter(self, signal, direction: int, price: float):
+        engine = self.engine
+        fill = self.broker.fill_price(direction, price)
+        stop_distance = abs(fill - signal.stop_loss)
+        if stop_distance <= 0:
+            return
+        quantity = self.strategy.position_size_calculator(
+            engine.current_balance, self.config.risk_per_trade_pct, stop_distance
+        )
+        # Чуть меньше лимита риск-движка, чтобы не упереться в строгое сравнение
+        max_quantity = engine.current_balance * engine.limits.max_position_size_pct / 100 / fill * 0.999
+        quantity = min(quantity, max_quantity)
+        if quantity <= 0:
+            return
+
+        position_type = PositionType.LONG if direction > 0 else PositionType.SHORT
+        opened, position_id = await engine.open_position(
+            self.symbol, position_type, fill, quantity, signal.stop_loss, signal.take_profit
+        )
+        if opened:
+            fee = self.broker.fee(fill, quantity)
+            self._charge(fee)
+            self._entry_fees[position_id] = fee
+            self._entry_ts[position_id] = self.clock.ms
+
+    async def _exit(self, rows: np.ndarray, price: float, reasons: List[str]):
+        engine = self.engine
+        book = engine.book
+        position_ids = [book.positions[row].id for row in rows.tolist()]
+        exits = [self.broker.fill_price(-int(side), price) for side in book.side[rows].tolist()]
+        pnls = await engine.close_positions(position_ids, exits, reasons)
+
+        for position, exit_price, pnl, reason in zip(engine.closed_positions[-len(position_ids):], exits, pnls, reasons):
+            fee = self.broker.fee(exit_price, position.quantity)
+            self._charge(fee)
+            fees = self._entry_fees.pop(position.id, 0.0) + fee
+            net = pnl - fees
+            self.trades.append({
+                'entry_ts': self._entry_ts.pop(position.id, None),
+                'exit_ts': self.clock.ms,
+                'side': 1 if position.position_type == PositionType.LONG else -1,
+                'entry_price': position.entry_price,
+                'exit_price': exit_price,
+                'quantity': position.quantity,
+                'pnl': net,
+                'fees': fees,
+                'return': net / (position.entry_price * position.quantity),
+                'reason': reason,
+            })
+
+    async def run_async(self) -> BacktestResult:
+        bars, engine, strategy = self.bars, self.engine, self.strategy
+        book = engine.book
+        n = len(bars)
+        ts = np.asarray(bars.ts, dtype=np.int64)
+        close = np.ascontiguousarray(bars.close, dtype=np.float64)
+        high = np.ascontiguousarray(bars.high, dtype=np.float64)
+        low = np.ascontiguousarray(bars.low, dtype=np.float64)
+        volume = np.ascontiguousarray(bars.volume, dtype=np.float64)
+        opens = np.asarray(bars.open, dtype=np.float64)
+        equity = np.full(n, self.config.initial_balance)
+        max_hold = engine.limits.max_position_hold_hours * 3600
+
+        # Индикаторы стратегии считаются один раз по всей истории
+        indicators = self.indicators
+        if indicators is None:
+            indicators = await strategy._calculate_indicators(close, high, low, volume)
+        replay = _ReplayIndicators(indicators, close)
+        codes = self.regimes if self.regimes is not None else regime_codes(strategy.regime_detector, close)
+        regimes = _ReplayRegimeDetector(codes)
+        detector, strategy.regime_detector = strategy.regime_detector, regimes
+
+        pending = None
+        current_day = None
+        signals = 0
+        try:
+            for i in range(min(replay.first_ready, n), n):
+                now_ms = int(ts[i])
+                self.clock.ms = now_ms
+                day = now_ms // DAY_MS
+                if day != current_day:
+                    current_day = day
+                    engine.daily_trades_count = 0
+                    engine.daily_pnl = 0.0
+
+                if pending is not None:
+                    await self._enter(pending[0], pending[1], float(opens[i]))
+                    pending = None
+
+                price = float(close[i])
+                if book.size:
+                    triggered, reasons = book.mark({self.symbol: price}, now_ms / 1000, max_hold)
+                    rows = np.flatnonzero(triggered)
+                    if len(rows):
+                        await self._exit(rows, price, [book.CLOSE_REASONS[code] for code in reasons[rows].tolist()])
+
+                replay.index = regimes.index = i
+                signal = await strategy.analyze_stream(self.symbol, replay)
+                direction = _SIGNAL_DIRECTION.get(signal.signal_type, 0)
+                if direction:
+                    signals += 1
+                    if book.size:
+                        opposite = np.flatnonzero(book.side[:book.size] == -direction)
+                        if len(opposite):
+                            await self._exit(opposite, price, ["signal_reverse"] * len(opposite))
+                    if not book.size and await strategy.validate_signal(signal, engine.current_balance):
+                        pending = (signal, direction)
+
+                if book.size:
+                    k = book.size
+                    unrealized = float(np.dot((price - book.entry[:k]) * book.side[:k], book.quantity[:k]))
+                    equity[i] = engine.current_balance + unrealized
+                else:
+                    equity[i] = engine.current_balance
+
+            if book.size and n:
+                await self._exit(np.arange(book.size), float(close[-1]), ["end_of_data"] * book.size)
+                equity[-1] = engine.current_balance
+        finally:
+            strategy.regime_detector = detector
+
+        trade_returns = np.array([trade['return'] for trade in self.trades])
+        trade_pnls = np.array([trade['pnl'] for trade in self.trades])
+        metrics = compute_metrics(ts, equity, trade_returns, trade_pnls)
+        stats = {
+            'bars': n,
+            'signals': signals,
+            'fees_paid': round(self.broker.fees_paid, 2),
+            'rejected_entries': engine.event_counts.get('POSITION_REJECTED', 0),
+        }
+        params = {
+            key: value for key, value in vars(strategy.params).items()
+            if value != getattr(StrategyParams, key, None)
+        }
+        return BacktestResult(self.symbol, 'event', type(strategy).__name__, params, ts, equity,
+                              self.trades, metrics, stats)
+
+    def run(self) -> BacktestResult:
+        with _quiet(BaseTradingStrategy.__module__, AdvancedRiskEngine.__module__):
+            return asyncio.run(self.run_async())
+
+
+def run_event_driven(bars: OHLCVView, params: Optional[Dict[str, Any]] = None,
+                     config: Optional[BacktestConfig] = None, limits: Optional[RiskLimits] = None,
+                     symbol: str = '') -> BacktestResult:
+    """Событийный бэктест BaseTradingStrategy с параметрами StrategyParams(**params)"""
+    params = dict(params or {})
+    strategy = BaseTradingStrategy(StrategyParams(**params))
+    result = EventDrivenBacktester(bars, symbol, strategy, config, limits).run()
+    result.params = params
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Параллельные прогоны
+# ---------------------------------------------------------------------------
+
+@dataclass
+class BacktestJob:
+    """Задание для пула процессов (должно быть сериализуемым)"""
+    path: str
+    mode: str = 'vectorized'  # 'vectorized' | 'event'
+    signal: str = 'sma_crossover'  # имя из SIGNALS, только для векторного режима
+    params: Dict[str, Any] = field(default_factory=dict)
+    symbol: str = ''
+    config: BacktestConfig = field(default_factory=BacktestConfig)
+    equity_points: int = 1000
+
+
+def run_job(job: BacktestJob) -> BacktestResult:
+    bars = load_bars(job.path)
+    symbol = job.symbol or symbol_from_path(job.path)
+    if job.mode == 'vectorized':
+        result = run_vectorized(bars, job.signal, job.params, job.config, symbol)
+    elif job.mode == 'event':
+        result = run_event_driven(bars, job.params, job.config, symbol=symbol)
+    else:
+        raise ValueError(f"Неизвестный режим бэктеста: {job.mode}")
+    # Полная кривая капитала не нужна при передаче результата из воркера
+    return result.compact(job.equity_points)
+
+
+def param_grid(**values: Iterable[Any]) -> List[Dict[str, Any]]:
+    """param_grid(fast=[5, 10], slow=[30, 60]) -> декартово произведение наборов"""
+    names = list(values)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(list(values[name]) for name in names))]
+
+
+def run_parallel(jobs: List[BacktestJob], max_workers: Optional[int] = None) -> List[BacktestResult]:
+    """Прогон заданий пулом процессов; порядок результатов совпадает с порядком заданий"""
+    if not jobs:
+        return []
+    workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+    if workers == 1:
+        return [run_job(job) for job in jobs]
+    # Задания одного файла идут подряд - воркер переиспользует загруженные бары
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_job, jobs, chunksize=chunksize))
+
+
+def save_results(results: List[BacktestResult], path: str = DEFAULT_RESULTS_PATH) -> str:
+    """Запись результатов в JSON, который читает /analytics/backtesting"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    payload = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'results': [result.to_dict() for result in results],
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _parse_value(value: str) -> Any:
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Mirai Agent backtester")
+    parser.add_argument('paths', nargs='+', help="Parquet/CSV файлы с историей (по одному на символ)")
+    parser.add_argument('--mode', choices=('vectorized', 'event'), default='vectorized')
+    parser.add_argument('--signal', choices=sorted(SIGNALS), default='sma_crossover')
+    parser.add_argument('--param', action='append', default=[],
+                        help="name=v1,v2,... (перебираются все комбинации)")
+    parser.add_argument('--fee-rate', type=float, default=BacktestConfig.fee_rate)
+    parser.add_argument('--slippage-bps', type=float, default=BacktestConfig.slippage_bps)
+    parser.add_argument('--initial-balance', type=float, default=BacktestConfig.initial_balance)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default=DEFAULT_RESULTS_PATH)
+    args = parser.parse_args(argv)
+
+    grid = param_grid(**{
+        name: [_parse_value(v) for v in values.split(',')]
+        for name, values in (item.split('=', 1) for item in args.param)
+    })
+    config = BacktestConfig(initial_balance=args.initial_balance, fee_rate=args.fee_rate,
+                            slippage_bps=args.slippage_bps)
+    jobs = [BacktestJob(path, args.mode, args.signal, params, config=config)
+            for path in args.paths for params in grid]
+
+    results = run_parallel(jobs, args.workers)
+    for result in results:
+        m = result.metrics
+        print(f"{result.symbol:<10} {result.strategy:<20} {json.dumps(result.params):<30} "
+              f"return={m['total_return']:>8}% sharpe={m['sharpe_ratio']:>7} "
+              f"dd={m['max_drawdown']:>7}% trades={m['total_trades']}")
+    print(f"Результаты сохранены: {save_results(results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
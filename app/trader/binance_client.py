@@ -17,6 +17,7 @@ except ImportError:
     ServerError = Exception
 
 from .exchange_info import ExchangeInfo
+from .rest_transport import RestTransport, get_transport
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +51,18 @@ class BinanceClient:
         else:
             logger.info("Running in dry-run mode")
 
+    @property
+    def transport(self) -> RestTransport:
+        """Shared async transport for use from event loops instead of the blocking client"""
+        base_url = "https://testnet.binancefuture.com" if self.testnet else "https://fapi.binance.com"
+        return get_transport(base_url, self.api_key, self.secret_key)
+
+    def refresh_exchange_info(self) -> set[str]:
+        """Reload symbol filters from the exchange into the shared filter index"""
+        if self.dry_run or not self.client:
+            return set()
+        return self.exchange_info.refresh(self.client.exchange_info)
+
     def test_connection(self) -> bool:
         """Test connection to Binance API"""
         if self.dry_run:
@@ -6,6 +6,8 @@ import asyncio
 import json
 import logging
 import os
+import random
+import time
 import websockets
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Callable
@@ -13,7 +15,15 @@ from dataclasses import dataclass, asdict
 import threading
 from queue import Queue
 
+from .bar_store import BarStore, OHLCVRingBuffer, default_bar_store
 from .binance_client import BinanceClient
+from .order_book import OrderBookManager
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:  # pragma: no cover - optional speedup
+    json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
@@ -55,21 +65,179 @@ class KlineData:
     number_of_trades: int
     taker_buy_base_asset_volume: float
     taker_buy_quote_asset_volume: float
+    interval: str = ""
+    is_closed: bool = False
+
+class TickerRecord:
+    """Compact ticker record produced by the fast decode path"""
+    __slots__ = ('symbol', 'event_time', 'price', 'open_price', 'high', 'low', 'volume', 'change_percent')
+    
+    def __init__(self, symbol: str, event_time: int, price: float, open_price: float,
+                 high: float, low: float, volume: float, change_percent: float):
+        self.symbol = symbol
+        self.event_time = event_time
+        self.price = price
+        self.open_price = open_price
+        self.high = high
+        self.low = low
+        self.volume = volume
+        self.change_percent = change_percent
+
+class DepthRecord:
+    """Compact depth record: levels are lists of (price, quantity) tuples"""
+    __slots__ = ('symbol', 'event_time', 'first_update_id', 'final_update_id', 'prev_final_update_id', 'bids', 'asks')
+    
+    def __init__(self, symbol: str, event_time: int, first_update_id: int, final_update_id: int,
+                 prev_final_update_id: int, bids: List[tuple], asks: List[tuple]):
+        self.symbol = symbol
+        self.event_time = event_time
+        self.first_update_id = first_update_id
+        self.final_update_id = final_update_id
+        self.prev_final_update_id = prev_final_update_id
+        self.bids = bids
+        self.asks = asks
+
+class KlineRecord:
+    """Compact kline record produced by the fast decode path"""
+    __slots__ = ('symbol', 'interval', 'event_time', 'open_time', 'close_time', 'open_price', 'high_price',
+                 'low_price', 'close_price', 'volume', 'number_of_trades', 'is_closed')
+    
+    def __init__(self, symbol: str, interval: str, event_time: int, open_time: int, close_time: int,
+                 open_price: float, high_price: float, low_price: float, close_price: float,
+                 volume: float, number_of_trades: int, is_closed: bool):
+        self.symbol = symbol
+        self.interval = interval
+        self.event_time = event_time
+        self.open_time = open_time
+        self.close_time = close_time
+        self.open_price = open_price
+        self.high_price = high_price
+        self.low_price = low_price
+        self.close_price = close_price
+        self.volume = volume
+        self.number_of_trades = number_of_trades
+        self.is_closed = is_closed
+
+def decode_levels(levels: List[List[str]]) -> List[tuple]:
+    """
+    Parse [[price, qty], ...] string pairs. A plain comprehension beats
+    np.array(..., dtype=float) here because NumPy has to build a string array first.
+    """
+    return [(float(price), float(qty)) for price, qty in levels]
+
+KLINE_INTERVAL_MS = {'m': 60_000, 'h': 3_600_000, 'd': 86_400_000, 'w': 604_800_000}
+
+def is_diff_depth_stream(stream: str) -> bool:
+    """``sym@depth`` / ``sym@depth@100ms`` (diff) as opposed to ``sym@depth5`` (partial)"""
+    rest = stream.partition('@')[2]
+    return rest == 'depth' or rest.startswith('depth@')
+
+
+def interval_to_ms(interval: str) -> Optional[int]:
+    """Convert a kline interval ("1m", "4h", ...) to milliseconds"""
+    unit = interval[-1:]
+    if unit not in KLINE_INTERVAL_MS or not interval[:-1].isdigit():
+        return None
+    return int(interval[:-1]) * KLINE_INTERVAL_MS[unit]
+
+@dataclass
+class StreamStats:
+    """Per-stream ingest counters"""
+    messages: int = 0
+    messages_per_second: float = 0.0
+    lag_ms: float = 0.0
+    last_event_time: int = 0
+    gaps: int = 0
+    backfilled: int = 0
+    window_start: float = 0.0
+    window_count: int = 0
+    
+    def record(self, event_time: Optional[int], now: float):
+        """Account for one message received at ``now`` (seconds)"""
+        self.messages += 1
+        self.window_count += 1
+        if event_time:
+            self.last_event_time = event_time
+            self.lag_ms = now * 1000 - event_time
+        
+        elapsed = now - self.window_start
+        if elapsed >= 1.0:
+            if self.window_start:
+                self.messages_per_second = self.window_count / elapsed
+            self.window_start = now
+            self.window_count = 0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'messages': self.messages,
+            'messages_per_second': round(self.messages_per_second, 2),
+            'lag_ms': round(self.lag_ms, 1),
+            'last_event_time': self.last_event_time,
+            'gaps': self.gaps,
+            'backfilled': self.backfilled
+        }
+
+class StreamShard:
+    """One combined-stream WebSocket connection carrying a subset of subscriptions"""
+    
+    def __init__(self, shard_id: int, streams: List[str]):
+        self.shard_id = shard_id
+        self.streams = streams
+        self.ws = None
+        self.connected = False
+        self.reconnects = 0
+        self.next_request_id = 1
 
 class BinanceDataStream:
     """
-    Real-time data streaming from Binance WebSocket
+    Real-time data streaming from Binance WebSocket.
+    
+    Subscriptions are sharded across several combined-stream connections;
+    each shard reconnects with exponential backoff, kline gaps are
+    backfilled over REST and per-stream lag / rate counters are kept.
     """
     
-    def __init__(self, testnet: bool = True, dry_run: bool = True):
+    # Binance allows up to 200 streams per futures connection
+    MAX_STREAMS_PER_CONNECTION = 200
+    
+    def __init__(self, testnet: bool = True, dry_run: bool = True,
+                 max_streams_per_connection: int = MAX_STREAMS_PER_CONNECTION,
+                 rest_client: Optional[Any] = None,
+                 reconnect_delay: float = 1.0, max_reconnect_delay: float = 60.0,
+                 fast_decode: bool = False, batch_size: int = 256, batch_interval: float = 0.05):
         self.testnet = testnet
         self.dry_run = dry_run
-        self.base_url = "wss://stream.binancefuture.com/ws/" if not testnet else "wss://stream.binancefuture.com/ws/"
-        self.ws = None
+        host = "wss://stream.binancefuture.com" if testnet else "wss://fstream.binance.com"
+        self.base_url = f"{host}/ws/"
+        self.stream_url = f"{host}/stream"
         self.running = False
         self.callbacks = {}
         self.subscriptions = set()
         
+        # Sharded connections
+        self.max_streams_per_connection = max_streams_per_connection
+        self.shards: List[StreamShard] = []
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        
+        # Gap detection / REST backfill (any object with get_historical_klines)
+        self.rest_client = rest_client
+        self.stream_stats: Dict[str, StreamStats] = {}
+        self._kline_last_closed: Dict[str, int] = {}
+        
+        # High-throughput decode path: callbacks receive __slots__ records
+        # (TickerRecord / DepthRecord / KlineRecord) stamped with exchange event time
+        self.fast_decode = fast_decode
+        self.batch_callbacks: Dict[str, Callable[[List[Any]], None]] = {}
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self._batches: Dict[str, List[Any]] = {}
+        self._stream_handlers: Dict[str, Callable[[dict], None]] = {}
+        
+        # Diff-depth streams always take the decode path: DepthRecord keeps the
+        # update ids a local order book needs for sequence validation
+        self._diff_depth_streams: set = set()
+        
         # Threading for WebSocket management
         self.ws_thread = None
         self.event_loop = None
@@ -86,20 +254,70 @@ class BinanceDataStream:
         """Add callback for kline updates"""
         self.callbacks['kline'] = callback
     
+    def add_diff_depth_callback(self, callback: Callable[[DepthRecord], None]):
+        """Add callback for diff-depth updates (e.g. OrderBookManager.on_depth)"""
+        self.callbacks['diff_depth'] = callback
+    
+    def add_batch_callback(self, kind: str, callback: Callable[[List[Any]], None]):
+        """
+        Deliver fast-path records of ``kind`` ('ticker', 'orderbook', 'kline') in
+        lists of up to batch_size, flushed at least every batch_interval seconds.
+        'diff_depth' is not batched: order books must see every event in order.
+        """
+        self.batch_callbacks[kind] = callback
+        self._batches.setdefault(kind, [])
+    
     def subscribe_ticker(self, symbol: str):
         """Subscribe to ticker updates for symbol"""
-        stream = f"{symbol.lower()}@ticker"
-        self.subscriptions.add(stream)
+        self._add_subscription(f"{symbol.lower()}@ticker")
         
     def subscribe_orderbook(self, symbol: str, levels: int = 5):
         """Subscribe to order book updates"""
-        stream = f"{symbol.lower()}@depth{levels}"
-        self.subscriptions.add(stream)
+        self._add_subscription(f"{symbol.lower()}@depth{levels}")
         
     def subscribe_kline(self, symbol: str, interval: str = "1m"):
         """Subscribe to kline updates"""
-        stream = f"{symbol.lower()}@kline_{interval}"
+        self._add_subscription(f"{symbol.lower()}@kline_{interval}")
+    
+    def subscribe_diff_depth(self, symbol: str, speed: str = "100ms"):
+        """Subscribe to diff-depth updates for maintaining a local order book"""
+        stream = f"{symbol.lower()}@depth@{speed}" if speed else f"{symbol.lower()}@depth"
+        self._diff_depth_streams.add(stream)
+        self._add_subscription(stream)
+    
+    def _add_subscription(self, stream: str):
+        """Register a stream; while running it is added to a live shard"""
+        if stream in self.subscriptions:
+            return
         self.subscriptions.add(stream)
+        self._resolve_handler(stream)
+        if self.running and self.event_loop and self.shards:
+            asyncio.run_coroutine_threadsafe(self._subscribe_live(stream), self.event_loop)
+    
+    def _build_shards(self) -> List[StreamShard]:
+        """Split subscriptions into connections within the per-connection stream limit"""
+        streams = sorted(self.subscriptions)
+        size = self.max_streams_per_connection
+        return [StreamShard(i, streams[start:start + size]) for i, start in enumerate(range(0, len(streams), size))]
+    
+    async def _subscribe_live(self, stream: str):
+        """Attach a stream added after start to a shard with spare capacity"""
+        shard = next((s for s in self.shards if len(s.streams) < self.max_streams_per_connection), None)
+        if shard is None:
+            shard = StreamShard(len(self.shards), [])
+            self.shards.append(shard)
+            shard.streams.append(stream)
+            asyncio.ensure_future(self._run_shard(shard))
+            return
+        
+        shard.streams.append(stream)
+        if shard.ws is not None:
+            try:
+                await shard.ws.send(json.dumps({"method": "SUBSCRIBE", "params": [stream], "id": shard.next_request_id}))
+                shard.next_request_id += 1
+            except Exception as e:
+                # The stream is part of shard.streams and will be picked up on reconnect
+                logger.warning(f"Live subscribe of {stream} failed: {e}")
     
     def start(self):
         """Start WebSocket connection in a separate thread"""
@@ -119,10 +337,11 @@ class BinanceDataStream:
         logger.info("Started Binance data stream")
     
     def stop(self):
-        """Stop WebSocket connection"""
+        """Stop WebSocket connections"""
         self.running = False
-        if self.ws:
-            asyncio.run_coroutine_threadsafe(self.ws.close(), self.event_loop)
+        for shard in self.shards:
+            if shard.ws and self.event_loop:
+                asyncio.run_coroutine_threadsafe(shard.ws.close(), self.event_loop)
         if self.ws_thread:
             self.ws_thread.join(timeout=5)
         logger.info("Stopped Binance data stream")
@@ -134,35 +353,220 @@ class BinanceDataStream:
         self.event_loop.run_until_complete(self._websocket_handler())
     
     async def _websocket_handler(self):
-        """Handle WebSocket connection and messages"""
+        """Run one supervised connection per shard"""
         if not self.subscriptions:
             logger.warning("No subscriptions, nothing to stream")
             return
+        
+        self.shards = self._build_shards()
+        logger.info(f"Streaming {len(self.subscriptions)} streams over {len(self.shards)} connection(s)")
+        tasks = [self._run_shard(shard) for shard in self.shards]
+        if self.fast_decode and self.batch_callbacks:
+            tasks.append(self._batch_flusher())
+        await asyncio.gather(*tasks)
+    
+    async def _run_shard(self, shard: StreamShard):
+        """Keep a shard connected, reconnecting with exponential backoff"""
+        delay = self.reconnect_delay
+        
+        while self.running:
+            url = f"{self.stream_url}?streams={'/'.join(shard.streams)}"
+            try:
+                async with websockets.connect(url) as websocket:
+                    shard.ws = websocket
+                    shard.connected = True
+                    logger.info(f"Shard {shard.shard_id} connected ({len(shard.streams)} streams)")
+                    
+                    async for message in websocket:
+                        # Only reset the backoff once the connection actually delivers data
+                        delay = self.reconnect_delay
+                        await self._process_message(message)
+                        
+            except websockets.exceptions.ConnectionClosed as e:
+                logger.warning(f"Shard {shard.shard_id} connection closed: {e}")
+            except Exception as e:
+                logger.error(f"Shard {shard.shard_id} WebSocket error: {e}")
+            finally:
+                shard.ws = None
+                shard.connected = False
+            
+            if not self.running:
+                break
             
-        # Build WebSocket URL with streams
-        streams = '/'.join(self.subscriptions)
-        url = f"{self.base_url}{streams}"
+            shard.reconnects += 1
+            wait = delay * (1 + random.uniform(0, 0.25))
+            logger.info(f"Reconnecting shard {shard.shard_id} in {wait:.1f}s")
+            await asyncio.sleep(wait)
+            delay = min(delay * 2, self.max_reconnect_delay)
+    
+    async def _process_message(self, message: str):
+        """Update stream counters, repair kline gaps and dispatch"""
+        data = json_loads(message)
+        stream = data.get('stream')
+        if not stream:
+            return  # SUBSCRIBE acknowledgements
+        
+        payload = data.get('data') or {}
+        stats = self.stream_stats.get(stream)
+        if stats is None:
+            stats = self.stream_stats[stream] = StreamStats()
+        stats.record(payload.get('E'), time.time())
+        
+        if '@kline' in stream and 'k' in payload:
+            await self._check_kline_gap(stream, payload['k'])
+        
+        if self.fast_decode or stream in self._diff_depth_streams:
+            handler = self._stream_handlers.get(stream) or self._resolve_handler(stream)
+            if handler is not None:
+                try:
+                    handler(payload)
+                except Exception as e:
+                    logger.error(f"Error decoding {stream}: {e}")
+            return
+        
+        await self._handle_message(data)
+    
+    def _resolve_handler(self, stream: str) -> Optional[Callable[[dict], None]]:
+        """Classify a stream once and cache its fast-path decoder"""
+        if '@ticker' in stream:
+            handler = self._decode_ticker
+        elif is_diff_depth_stream(stream):
+            handler = self._decode_diff_depth
+        elif '@depth' in stream:
+            handler = self._decode_depth
+        elif '@kline' in stream:
+            handler = self._decode_kline
+        else:
+            return None
+        self._stream_handlers[stream] = handler
+        return handler
+    
+    def _decode_ticker(self, data: dict):
+        self._emit('ticker', TickerRecord(
+            data['s'], data['E'], float(data['c']), float(data['o']),
+            float(data['h']), float(data['l']), float(data['v']), float(data['P'])
+        ))
+    
+    def _decode_depth(self, data: dict):
+        self._emit('orderbook', DepthRecord(
+            data['s'], data['E'], data.get('U', 0), data.get('u', 0), data.get('pu', 0),
+            decode_levels(data['b']), decode_levels(data['a'])
+        ))
+    
+    def _decode_diff_depth(self, data: dict):
+        record = DepthRecord(
+            data['s'], data['E'], data['U'], data['u'], data.get('pu', 0),
+            decode_levels(data['b']), decode_levels(data['a'])
+        )
+        callback = self.callbacks.get('diff_depth')
+        if callback:
+            callback(record)
+    
+    def _decode_kline(self, data: dict):
+        k = data['k']
+        self._emit('kline', KlineRecord(
+            k['s'], k['i'], data['E'], k['t'], k['T'], float(k['o']), float(k['h']),
+            float(k['l']), float(k['c']), float(k['v']), k['n'], k['x']
+        ))
+    
+    def _emit(self, kind: str, record: Any):
+        """Hand a record to its batch buffer or per-record callback"""
+        batch = self._batches.get(kind)
+        if batch is not None and kind in self.batch_callbacks:
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                self._flush_batch(kind)
+            return
         
+        callback = self.callbacks.get(kind)
+        if callback:
+            callback(record)
+    
+    def _flush_batch(self, kind: str):
+        batch = self._batches.get(kind)
+        if not batch:
+            return
+        self._batches[kind] = []
         try:
-            async with websockets.connect(url) as websocket:
-                self.ws = websocket
-                logger.info(f"Connected to Binance WebSocket: {url}")
-                
-                while self.running:
-                    try:
-                        message = await asyncio.wait_for(websocket.recv(), timeout=1.0)
-                        await self._handle_message(json.loads(message))
-                    except asyncio.TimeoutError:
-                        continue
-                    except websockets.exceptions.ConnectionClosed:
-                        logger.warning("WebSocket connection closed")
-                        break
-                    except Exception as e:
-                        logger.error(f"WebSocket error: {e}")
-                        break
-                        
+            self.batch_callbacks[kind](batch)
         except Exception as e:
-            logger.error(f"Failed to connect to WebSocket: {e}")
+            logger.error(f"Batch callback error for {kind}: {e}")
+    
+    def flush_batches(self):
+        """Deliver all pending batched records"""
+        for kind in list(self._batches):
+            self._flush_batch(kind)
+    
+    async def _batch_flusher(self):
+        """Bound batch delivery latency to batch_interval"""
+        while self.running:
+            await asyncio.sleep(self.batch_interval)
+            self.flush_batches()
+        self.flush_batches()
+    
+    async def _check_kline_gap(self, stream: str, kline: dict):
+        """Detect missing closed bars since the last one seen and backfill them"""
+        interval_ms = interval_to_ms(kline['i'])
+        open_time = kline['t']
+        last_closed = self._kline_last_closed.get(stream)
+        
+        if last_closed is not None and interval_ms and open_time > last_closed + interval_ms:
+            await self._backfill_klines(stream, kline['s'], kline['i'], last_closed + interval_ms, open_time - 1)
+        
+        if kline['x']:
+            self._kline_last_closed[stream] = max(open_time, self._kline_last_closed.get(stream, 0))
+    
+    async def _backfill_klines(self, stream: str, symbol: str, interval: str, start_time: int, end_time: int):
+        """Fetch missed closed klines over REST and replay them through the kline callback"""
+        stats = self.stream_stats[stream]
+        stats.gaps += 1
+        
+        if self.rest_client is None:
+            logger.warning(f"Gap in {stream} from {start_time} to {end_time}, no REST client to backfill")
+            return
+        
+        try:
+            loop = asyncio.get_running_loop()
+            klines = await loop.run_in_executor(
+                None,
+                lambda: self.rest_client.get_historical_klines(
+                    symbol, interval, start_time=start_time, end_time=end_time, limit=1000
+                )
+            )
+        except Exception as e:
+            logger.error(f"Backfill of {stream} failed: {e}")
+            return
+        
+        callback = self.callbacks.get('kline')
+        replayed = 0
+        for kline in klines:
+            if not start_time <= kline.open_time < end_time:
+                continue
+            kline.interval = interval
+            kline.is_closed = True
+            replayed += 1
+            stats.backfilled += 1
+            self._kline_last_closed[stream] = max(kline.open_time, self._kline_last_closed.get(stream, 0))
+            if callback:
+                callback(kline)
+        
+        logger.info(f"Backfilled {replayed} bars for {stream}")
+    
+    def get_stream_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stream message counters, rate and lag"""
+        return {stream: stats.to_dict() for stream, stats in self.stream_stats.items()}
+    
+    def get_connection_status(self) -> List[Dict[str, Any]]:
+        """Status of every shard connection"""
+        return [
+            {
+                'shard_id': shard.shard_id,
+                'streams': len(shard.streams),
+                'connected': shard.connected,
+                'reconnects': shard.reconnects
+            }
+            for shard in self.shards
+        ]
     
     async def _handle_message(self, data: dict):
         """Handle incoming WebSocket message"""
@@ -236,7 +640,9 @@ class BinanceDataStream:
                 quote_asset_volume=float(kline_data['q']),
                 number_of_trades=kline_data['n'],
                 taker_buy_base_asset_volume=float(kline_data['V']),
-                taker_buy_quote_asset_volume=float(kline_data['Q'])
+                taker_buy_quote_asset_volume=float(kline_data['Q']),
+                interval=kline_data.get('i', ''),
+                is_closed=bool(kline_data.get('x', False))
             )
             
             if 'kline' in self.callbacks:
@@ -293,7 +699,8 @@ class EnhancedBinanceClient(BinanceClient):
     
     def __init__(self, dry_run: bool = True, testnet: bool = True):
         super().__init__(dry_run, testnet)
-        self.data_stream = BinanceDataStream(testnet, dry_run)
+        self.data_stream = BinanceDataStream(testnet, dry_run, rest_client=self)
+        self.order_books: Optional[OrderBookManager] = None
         
     def start_realtime_data(self, symbols: List[str], 
                            ticker_callback: Optional[Callable] = None,
@@ -325,6 +732,42 @@ class EnhancedBinanceClient(BinanceClient):
         """Stop real-time data streaming"""
         self.data_stream.stop()
     
+    def get_depth_snapshot(self, symbol: str, limit: int = 1000) -> Dict[str, Any]:
+        """REST depth snapshot used to seed a local order book"""
+        if self.dry_run:
+            base_price = 45000 if symbol == 'BTCUSDT' else 3000
+            tick = base_price * 0.0001
+            return {
+                'lastUpdateId': int(time.time() * 1000),
+                'E': int(time.time() * 1000),
+                'bids': [[str(base_price - (i + 1) * tick), str(random.uniform(0.1, 5))] for i in range(min(limit, 100))],
+                'asks': [[str(base_price + (i + 1) * tick), str(random.uniform(0.1, 5))] for i in range(min(limit, 100))],
+            }
+        
+        if not self.client:
+            raise RuntimeError("Client not initialized")
+        
+        return self.client.depth(symbol=symbol, limit=limit)
+    
+    def start_order_books(self, symbols: List[str], listener: Optional[Callable] = None,
+                          speed: str = "100ms", depth_limit: int = 1000) -> OrderBookManager:
+        """
+        Maintain local order books for symbols from diff-depth streams.
+        ``listener`` is called with the LocalOrderBook after every applied update.
+        """
+        manager = OrderBookManager(self.get_depth_snapshot, depth_limit=depth_limit)
+        if listener:
+            manager.add_listener(listener)
+        
+        self.data_stream.add_diff_depth_callback(manager.on_depth)
+        for symbol in symbols:
+            self.data_stream.subscribe_diff_depth(symbol, speed)
+        
+        if not self.data_stream.running:
+            self.data_stream.start()
+        self.order_books = manager
+        return manager
+    
     def get_historical_klines(self, symbol: str, interval: str, 
                              start_time: Optional[str] = None,
                              end_time: Optional[str] = None,
@@ -356,7 +799,9 @@ class EnhancedBinanceClient(BinanceClient):
                     quote_asset_volume=random.uniform(10000, 100000),
                     number_of_trades=random.randint(50, 500),
                     taker_buy_base_asset_volume=random.uniform(50, 500),
-                    taker_buy_quote_asset_volume=random.uniform(5000, 50000)
+                    taker_buy_quote_asset_volume=random.uniform(5000, 50000),
+                    interval=interval,
+                    is_closed=True
                 ))
             
             return klines[::-1]  # Reverse to get chronological order
@@ -393,7 +838,9 @@ class EnhancedBinanceClient(BinanceClient):
                     quote_asset_volume=float(kline[7]),
                     number_of_trades=int(kline[8]),
                     taker_buy_base_asset_volume=float(kline[9]),
-                    taker_buy_quote_asset_volume=float(kline[10])
+                    taker_buy_quote_asset_volume=float(kline[10]),
+                    interval=interval,
+                    is_closed=True
                 ))
             
             return klines
@@ -402,6 +849,28 @@ class EnhancedBinanceClient(BinanceClient):
             logger.error(f"Error fetching historical klines: {e}")
             raise
     
+    def load_historical_bars(self, symbol: str, interval: str, limit: int = 500,
+                             store: Optional[BarStore] = None) -> OHLCVRingBuffer:
+        """Load historical klines straight into the columnar bar store"""
+        if store is None:
+            store = default_bar_store
+        
+        if self.dry_run:
+            klines = self.get_historical_klines(symbol, interval, limit=limit)
+            rows = [(k.open_time, k.open_price, k.high_price, k.low_price, k.close_price, k.volume) for k in klines]
+            store.load_rest_klines(symbol, interval, rows)
+            return store.buffer(symbol, interval)
+        
+        if not self.client:
+            raise RuntimeError("Client not initialized")
+        
+        try:
+            store.load_rest_klines(symbol, interval, self.client.klines(symbol=symbol, interval=interval, limit=limit))
+            return store.buffer(symbol, interval)
+        except Exception as e:
+            logger.error(f"Error loading historical bars: {e}")
+            raise
+    
     def get_multiple_market_data(self, symbols: List[str]) -> Dict[str, MarketTicker]:
         """Get market data for multiple symbols"""
         market_data = {}
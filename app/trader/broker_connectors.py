@@ -22,6 +22,11 @@ import os
 # Добавляем пути для импортов
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+try:
+    from .rest_transport import RestAPIError, get_transport
+except ImportError:
+    from rest_transport import RestAPIError, get_transport
+
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -221,12 +226,12 @@ class BinanceConnector(BrokerConnector):
         super().__init__(credentials)
         self.base_url = "https://testnet.binancefuture.com" if credentials.testnet else "https://fapi.binance.com"
         self.ws_url = "wss://stream.binancefuture.com/ws" if credentials.testnet else "wss://fstream.binance.com/ws"
+        # Общий пул соединений и лимит веса запросов для всех клиентов с этим ключом
+        self.transport = get_transport(self.base_url, credentials.api_key, credentials.api_secret)
         
     async def connect(self) -> bool:
         """Подключение к Binance"""
         try:
-            self.session = aiohttp.ClientSession()
-            
             # Проверяем подключение
             account_info = await self.get_account_info()
             self.connected = True
@@ -240,8 +245,7 @@ class BinanceConnector(BrokerConnector):
     
     async def disconnect(self):
         """Отключение от Binance"""
-        if self.session:
-            await self.session.close()
+        # Пул соединений общий, его не закрываем
         if self.ws_connection:
             await self.ws_connection.close()
         self.connected = False
@@ -251,20 +255,10 @@ class BinanceConnector(BrokerConnector):
         """Получение информации об аккаунте Binance"""
         await self._rate_limit("account", 5, 60)  # 5 запросов в минуту
         
-        timestamp = int(time.time() * 1000)
-        params = f"timestamp={timestamp}"
-        signature = self._generate_signature(params)
-        
-        url = f"{self.base_url}/fapi/v2/account"
-        headers = {"X-MBX-APIKEY": self.credentials.api_key}
-        params_with_sig = f"{params}&signature={signature}"
-        
-        async with self.session.get(f"{url}?{params_with_sig}", headers=headers) as response:
-            if response.status == 200:
-                return await response.json()
-            else:
-                error_text = await response.text()
-                raise Exception(f"Binance API error: {response.status} - {error_text}")
+        try:
+            return await self.transport.request("GET", "/fapi/v2/account", signed=True)
+        except RestAPIError as e:
+            raise Exception(f"Binance API error: {e.status} - {e.payload}")
     
     async def get_balances(self) -> List[Balance]:
         """Получение балансов Binance"""
@@ -286,35 +280,26 @@ class BinanceConnector(BrokerConnector):
         """Получение позиций Binance"""
         await self._rate_limit("positions", 5, 60)
         
-        timestamp = int(time.time() * 1000)
-        params = f"timestamp={timestamp}"
-        signature = self._generate_signature(params)
-        
-        url = f"{self.base_url}/fapi/v2/positionRisk"
-        headers = {"X-MBX-APIKEY": self.credentials.api_key}
-        params_with_sig = f"{params}&signature={signature}"
+        try:
+            data = await self.transport.request("GET", "/fapi/v2/positionRisk", signed=True)
+        except RestAPIError as e:
+            raise Exception(f"Binance positions error: {e.status} - {e.payload}")
         
         positions = []
-        async with self.session.get(f"{url}?{params_with_sig}", headers=headers) as response:
-            if response.status == 200:
-                data = await response.json()
-                for pos_data in data:
-                    if float(pos_data["positionAmt"]) != 0:
-                        position = Position(
-                            symbol=pos_data["symbol"],
-                            side="long" if float(pos_data["positionAmt"]) > 0 else "short",
-                            size=abs(float(pos_data["positionAmt"])),
-                            entry_price=float(pos_data["entryPrice"]),
-                            mark_price=float(pos_data["markPrice"]),
-                            unrealized_pnl=float(pos_data["unRealizedProfit"]),
-                            percentage=float(pos_data["percentage"]),
-                            margin=float(pos_data["isolatedMargin"]),
-                            timestamp=datetime.now()
-                        )
-                        positions.append(position)
-            else:
-                error_text = await response.text()
-                raise Exception(f"Binance positions error: {response.status} - {error_text}")
+        for pos_data in data:
+            if float(pos_data["positionAmt"]) != 0:
+                position = Position(
+                    symbol=pos_data["symbol"],
+                    side="long" if float(pos_data["positionAmt"]) > 0 else "short",
+                    size=abs(float(pos_data["positionAmt"])),
+                    entry_price=float(pos_data["entryPrice"]),
+                    mark_price=float(pos_data["markPrice"]),
+                    unrealized_pnl=float(pos_data["unRealizedProfit"]),
+                    percentage=float(pos_data["percentage"]),
+                    margin=float(pos_data["isolatedMargin"]),
+                    timestamp=datetime.now()
+                )
+                positions.append(position)
         
         return positions
     
@@ -322,15 +307,12 @@ class BinanceConnector(BrokerConnector):
         """Размещение ордера на Binance"""
         await self._rate_limit("orders", 10, 60)  # 10 ордеров в минуту
         
-        timestamp = int(time.time() * 1000)
-        
         # Подготавливаем параметры ордера
         params = {
             "symbol": order.symbol,
             "side": order.side.value.upper(),
             "type": self._convert_order_type(order.type),
-            "quantity": str(order.quantity),
-            "timestamp": str(timestamp)
+            "quantity": str(order.quantity)
         }
         
         if order.price:
@@ -342,111 +324,78 @@ class BinanceConnector(BrokerConnector):
         if order.time_in_force:
             params["timeInForce"] = order.time_in_force
         
-        # Создаем строку запроса для подписи
-        query_string = "&".join([f"{k}={v}" for k, v in params.items()])
-        signature = self._generate_signature(query_string)
-        params["signature"] = signature
+        try:
+            result = await self.transport.request("POST", "/fapi/v1/order", params, signed=True)
+        except RestAPIError as e:
+            raise Exception(f"Binance order error: {e.status} - {e.payload}")
         
-        url = f"{self.base_url}/fapi/v1/order"
-        headers = {"X-MBX-APIKEY": self.credentials.api_key}
+        # Обновляем ордер результатами
+        order.order_id = result["orderId"]
+        order.status = self._convert_order_status(result["status"])
+        order.created_at = datetime.fromtimestamp(result["updateTime"] / 1000)
         
-        async with self.session.post(url, data=params, headers=headers) as response:
-            if response.status == 200:
-                result = await response.json()
-                
-                # Обновляем ордер результатами
-                order.order_id = result["orderId"]
-                order.status = self._convert_order_status(result["status"])
-                order.created_at = datetime.fromtimestamp(result["updateTime"] / 1000)
-                
-                logger.info(f"Ордер размещен: {order.order_id}")
-                return order
-            else:
-                error_text = await response.text()
-                raise Exception(f"Binance order error: {response.status} - {error_text}")
+        logger.info(f"Ордер размещен: {order.order_id}")
+        return order
     
     async def cancel_order(self, symbol: str, order_id: str) -> bool:
         """Отмена ордера на Binance"""
         await self._rate_limit("cancel_order", 10, 60)
         
-        timestamp = int(time.time() * 1000)
-        params = f"symbol={symbol}&orderId={order_id}&timestamp={timestamp}"
-        signature = self._generate_signature(params)
-        
-        url = f"{self.base_url}/fapi/v1/order"
-        headers = {"X-MBX-APIKEY": self.credentials.api_key}
-        params_with_sig = f"{params}&signature={signature}"
+        try:
+            await self.transport.request(
+                "DELETE", "/fapi/v1/order", {"symbol": symbol, "orderId": order_id}, signed=True
+            )
+        except RestAPIError as e:
+            logger.error(f"Ошибка отмены ордера: {e.status} - {e.payload}")
+            return False
         
-        async with self.session.delete(f"{url}?{params_with_sig}", headers=headers) as response:
-            if response.status == 200:
-                logger.info(f"Ордер отменен: {order_id}")
-                return True
-            else:
-                error_text = await response.text()
-                logger.error(f"Ошибка отмены ордера: {response.status} - {error_text}")
-                return False
+        logger.info(f"Ордер отменен: {order_id}")
+        return True
     
     async def get_order(self, symbol: str, order_id: str) -> Order:
         """Получение информации об ордере"""
         await self._rate_limit("get_order", 10, 60)
         
-        timestamp = int(time.time() * 1000)
-        params = f"symbol={symbol}&orderId={order_id}&timestamp={timestamp}"
-        signature = self._generate_signature(params)
-        
-        url = f"{self.base_url}/fapi/v1/order"
-        headers = {"X-MBX-APIKEY": self.credentials.api_key}
-        params_with_sig = f"{params}&signature={signature}"
-        
-        async with self.session.get(f"{url}?{params_with_sig}", headers=headers) as response:
-            if response.status == 200:
-                data = await response.json()
-                
-                order = Order(
-                    symbol=data["symbol"],
-                    side=OrderSide.BUY if data["side"] == "BUY" else OrderSide.SELL,
-                    type=self._convert_binance_order_type(data["type"]),
-                    quantity=float(data["origQty"]),
-                    price=float(data["price"]) if data["price"] != "0" else None,
-                    order_id=data["orderId"],
-                    status=self._convert_order_status(data["status"]),
-                    filled_quantity=float(data["executedQty"]),
-                    avg_fill_price=float(data["avgPrice"]) if data["avgPrice"] != "0" else None,
-                    created_at=datetime.fromtimestamp(data["time"] / 1000),
-                    updated_at=datetime.fromtimestamp(data["updateTime"] / 1000)
-                )
-                
-                return order
-            else:
-                error_text = await response.text()
-                raise Exception(f"Binance get order error: {response.status} - {error_text}")
+        try:
+            data = await self.transport.request(
+                "GET", "/fapi/v1/order", {"symbol": symbol, "orderId": order_id}, signed=True
+            )
+        except RestAPIError as e:
+            raise Exception(f"Binance get order error: {e.status} - {e.payload}")
+        
+        return Order(
+            symbol=data["symbol"],
+            side=OrderSide.BUY if data["side"] == "BUY" else OrderSide.SELL,
+            type=self._convert_binance_order_type(data["type"]),
+            quantity=float(data["origQty"]),
+            price=float(data["price"]) if data["price"] != "0" else None,
+            order_id=data["orderId"],
+            status=self._convert_order_status(data["status"]),
+            filled_quantity=float(data["executedQty"]),
+            avg_fill_price=float(data["avgPrice"]) if data["avgPrice"] != "0" else None,
+            created_at=datetime.fromtimestamp(data["time"] / 1000),
+            updated_at=datetime.fromtimestamp(data["updateTime"] / 1000)
+        )
     
     async def get_market_data(self, symbol: str) -> MarketData:
         """Получение рыночных данных"""
         await self._rate_limit("market_data", 20, 60)
         
-        # Получаем ticker 24hr
-        url = f"{self.base_url}/fapi/v1/ticker/24hr"
-        params = {"symbol": symbol}
+        # Получаем ticker 24hr (одинаковые запросы в полёте объединяются)
+        try:
+            data = await self.transport.request("GET", "/fapi/v1/ticker/24hr", {"symbol": symbol})
+        except RestAPIError as e:
+            raise Exception(f"Binance market data error: {e.status} - {e.payload}")
         
-        async with self.session.get(url, params=params) as response:
-            if response.status == 200:
-                data = await response.json()
-                
-                market_data = MarketData(
-                    symbol=data["symbol"],
-                    price=float(data["lastPrice"]),
-                    bid=float(data["bidPrice"]),
-                    ask=float(data["askPrice"]),
-                    volume_24h=float(data["volume"]),
-                    change_24h=float(data["priceChangePercent"]),
-                    timestamp=datetime.now()
-                )
-                
-                return market_data
-            else:
-                error_text = await response.text()
-                raise Exception(f"Binance market data error: {response.status} - {error_text}")
+        return MarketData(
+            symbol=data["symbol"],
+            price=float(data["lastPrice"]),
+            bid=float(data["bidPrice"]),
+            ask=float(data["askPrice"]),
+            volume_24h=float(data["volume"]),
+            change_24h=float(data["priceChangePercent"]),
+            timestamp=datetime.now()
+        )
     
     async def subscribe_to_updates(self):
         """Подписка на обновления через WebSocket"""
@@ -457,31 +406,22 @@ class BinanceConnector(BrokerConnector):
         
         try:
             # Создаем listen key для пользовательских данных
-            timestamp = int(time.time() * 1000)
-            params = f"timestamp={timestamp}"
-            signature = self._generate_signature(params)
+            listen_data = await self.transport.request("POST", "/fapi/v1/listenKey")
+            listen_key = listen_data["listenKey"]
             
-            url = f"{self.base_url}/fapi/v1/listenKey"
-            headers = {"X-MBX-APIKEY": self.credentials.api_key}
+            # Подключаемся к WebSocket
+            ws_url = f"{self.ws_url}/{listen_key}"
             
-            async with self.session.post(url, headers=headers) as response:
-                if response.status == 200:
-                    listen_data = await response.json()
-                    listen_key = listen_data["listenKey"]
-                    
-                    # Подключаемся к WebSocket
-                    ws_url = f"{self.ws_url}/{listen_key}"
-                    
-                    async with websockets.connect(ws_url) as websocket:
-                        self.ws_connection = websocket
-                        logger.info("WebSocket подключен")
-                        
-                        async for message in websocket:
-                            try:
-                                data = json.loads(message)
-                                await self._handle_ws_message(data)
-                            except Exception as e:
-                                logger.error(f"Ошибка обработки WebSocket сообщения: {e}")
+            async with websockets.connect(ws_url) as websocket:
+                self.ws_connection = websocket
+                logger.info("WebSocket подключен")
+                
+                async for message in websocket:
+                    try:
+                        data = json.loads(message)
+                        await self._handle_ws_message(data)
+                    except Exception as e:
+                        logger.error(f"Ошибка обработки WebSocket сообщения: {e}")
                                 
         except Exception as e:
             logger.error(f"Ошибка WebSocket подключения: {e}")
@@ -0,0 +1,349 @@
+"""
+Rolling exponentially weighted covariance/correlation of bar returns
+
+State is kept as decayed weighted sums so new bars fold in with a handful of
+matrix operations (weighted parallel-merge of the old state with the new block),
+independent of history length. Missing bars are allowed: every pair tracks its
+own weight, and assets without enough overlap are reported as NaN.
+"""
+
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+try:
+    from .bar_store import BarStore, default_bar_store
+except ImportError:
+    from bar_store import BarStore, default_bar_store
+
+logger = logging.getLogger(__name__)
+
+INTERVAL_SECONDS = {
+    '1m': 60, '3m': 180, '5m': 300, '15m': 900, '30m': 1800,
+    '1h': 3600, '2h': 7200, '4h': 14400, '6h': 21600, '8h': 28800, '12h': 43200,
+    '1d': 86400,
+}
+
+SHRINKAGE_TARGETS = ('identity', 'diagonal', 'constant_correlation')
+
+
+class EWCovariance:
+    """
+    Exponentially weighted covariance of log returns for a growing set of symbols.
+
+    ``halflife`` is in bars. Weights follow time, not observations: after ``k`` bars
+    an observation weighs ``0.5 ** (k / halflife)`` whether or not other symbols
+    printed in between, and estimates are normalized by the accumulated pair weight
+    (pandas ``ewm(adjust=True)`` semantics for fully observed data).
+    """
+
+    def __init__(self, halflife: float = 120.0, min_periods: int = 30, interval: str = '1h',
+                 symbols: Iterable[str] = ()):
+        if halflife <= 0:
+            raise ValueError("halflife must be positive")
+        self.halflife = halflife
+        self.decay = 0.5 ** (1.0 / halflife)
+        self.min_periods = min_periods
+        self.interval = interval
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self._weight = np.zeros(0)          # per-asset weight sum
+        self._mean = np.zeros(0)            # per-asset EW mean
+        self._comoment = np.zeros((0, 0))   # sum w * (x - mean_x)(y - mean_y) over pair overlaps
+        self._pair_weight = np.zeros((0, 0))
+        self._pair_weight_sq = np.zeros((0, 0))
+        self._pair_count = np.zeros((0, 0), dtype=np.int64)
+
+        # Bar store sync position
+        self._last_ts: Dict[str, int] = {}
+        self._last_close: Dict[str, float] = {}
+
+        self.add_symbols(symbols)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self._index
+
+    # -- state management ---------------------------------------------------------
+
+    def add_symbols(self, symbols: Iterable[str]) -> List[int]:
+        """Register symbols (new ones start with no observations); returns their indices"""
+        symbols = [symbol.upper() for symbol in symbols]
+        new = [symbol for symbol in dict.fromkeys(symbols) if symbol not in self._index]
+        if new:
+            n, k = len(self.symbols), len(new)
+            self._weight = np.concatenate([self._weight, np.zeros(k)])
+            self._mean = np.concatenate([self._mean, np.zeros(k)])
+            self._comoment = self._grow(self._comoment, k)
+            self._pair_weight = self._grow(self._pair_weight, k)
+            self._pair_weight_sq = self._grow(self._pair_weight_sq, k)
+            self._pair_count = self._grow(self._pair_count, k)
+            for offset, symbol in enumerate(new):
+                self._index[symbol] = n + offset
+            self.symbols.extend(new)
+        return [self._index[symbol] for symbol in symbols]
+
+    @staticmethod
+    def _grow(matrix: np.ndarray, k: int) -> np.ndarray:
+        n = matrix.shape[0]
+        grown = np.zeros((n + k, n + k), dtype=matrix.dtype)
+        grown[:n, :n] = matrix
+        return grown
+
+    def update(self, returns: np.ndarray, symbols: Optional[Sequence[str]] = None):
+        """
+        Fold a block of returns into the estimate.
+
+        ``returns`` is (bars, assets) in chronological order, NaN where a symbol has no
+        bar; columns follow ``symbols`` (default: registered order). A single bar may be
+        passed as a 1-D vector.
+        """
+        block = np.asarray(returns, dtype=np.float64)
+        if block.ndim == 1:
+            block = block[None, :]
+        if not len(block):
+            return
+        with self._lock:
+            index = self.add_symbols(symbols) if symbols is not None else list(range(len(self.symbols)))
+            if block.shape[1] != len(index):
+                raise ValueError(f"expected {len(index)} columns, got {block.shape[1]}")
+            n = len(self.symbols)
+            if len(index) != n or index != list(range(n)):
+                full = np.full((len(block), n), np.nan)
+                full[:, index] = block
+                block = full
+            self._merge(block)
+
+    def _merge(self, block: np.ndarray):
+        bars = len(block)
+        weights = self.decay ** np.arange(bars - 1, -1, -1, dtype=np.float64)
+        observed = np.isfinite(block)
+        mask = observed.astype(np.float64)
+        weighted_mask = mask * weights[:, None]
+
+        # Weighted moments of the new block, each asset centered on its own block mean
+        weight_b = weighted_mask.sum(axis=0)
+        values = np.where(observed, block, 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_b = np.where(weight_b > 0, (weighted_mask * values).sum(axis=0) / weight_b, 0.0)
+        centered = np.where(observed, block - mean_b, 0.0)
+        comoment_b = (centered * weights[:, None]).T @ centered
+        pair_weight_b = weighted_mask.T @ mask
+        pair_weight_sq_b = (mask * (weights ** 2)[:, None]).T @ mask
+        pair_count_b = observed.T.astype(np.int64) @ observed.astype(np.int64)
+
+        # Age the existing state by the block length, then merge (weighted parallel update)
+        age = self.decay ** bars
+        weight_a = self._weight * age
+        pair_weight_a = self._pair_weight * age
+        delta = mean_b - self._mean
+        total_weight = weight_a + weight_b
+        total_pair_weight = pair_weight_a + pair_weight_b
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self._mean = np.where(total_weight > 0, self._mean + delta * weight_b / total_weight, self._mean)
+            cross = np.where(
+                total_pair_weight > 0, pair_weight_a * pair_weight_b / total_pair_weight, 0.0
+            )
+        self._comoment = self._comoment * age + comoment_b + np.outer(delta, delta) * cross
+        self._weight = total_weight
+        self._pair_weight = total_pair_weight
+        self._pair_weight_sq = self._pair_weight_sq * age ** 2 + pair_weight_sq_b
+        self._pair_count += pair_count_b
+
+    def update_prices(self, closes: Dict[str, float]):
+        """Fold in one bar of closes ({symbol: close}); the first price of a symbol only sets its base"""
+        returns = {}
+        for symbol, close in closes.items():
+            symbol = symbol.upper()
+            previous = self._last_close.get(symbol)
+            if previous and close > 0:
+                returns[symbol] = np.log(close / previous)
+            if close > 0:
+                self._last_close[symbol] = close
+        if returns:
+            self.update(np.fromiter(returns.values(), dtype=np.float64), list(returns))
+
+    # -- bar store ----------------------------------------------------------------
+
+    def sync(self, store: Optional[BarStore] = None, symbols: Optional[Iterable[str]] = None) -> int:
+        """
+        Consume closed bars added to the bar store since the last sync; returns bars folded in.
+
+        The newest bar of each buffer may still be forming (it is overwritten in place),
+        so it is left for the next sync.
+        """
+        store = store if store is not None else default_bar_store
+        if symbols is None:
+            symbols = [symbol for symbol, interval in store.keys() if interval == self.interval]
+        symbols = [symbol.upper() for symbol in symbols]
+
+        series = {}
+        for symbol in symbols:
+            buffer = store.get(symbol, self.interval)
+            if buffer is None or len(buffer) < 2:
+                continue
+            view = buffer.view()
+            ts, close = view.ts[:-1], view.close[:-1]
+            last_ts = self._last_ts.get(symbol)
+            start = int(np.searchsorted(ts, last_ts, side='right')) if last_ts is not None else 0
+            if start >= len(ts):
+                continue
+            ts, close = ts[start:], close[start:]
+            previous = self._last_close.get(symbol)
+            prices = np.concatenate([[previous], close]) if previous else close
+            with np.errstate(invalid='ignore', divide='ignore'):
+                returns = np.diff(np.log(prices))
+            if not previous:
+                ts = ts[1:]
+            series[symbol] = (ts, returns)
+            self._last_ts[symbol] = int(view.ts[-2])
+            self._last_close[symbol] = float(view.close[-2])
+
+        series = {symbol: data for symbol, data in series.items() if len(data[0])}
+        if not series:
+            return 0
+
+        # Align on the union of bar timestamps
+        timeline = np.unique(np.concatenate([ts for ts, _ in series.values()]))
+        block = np.full((len(timeline), len(series)), np.nan)
+        for column, (ts, returns) in enumerate(series.values()):
+            block[np.searchsorted(timeline, ts), column] = returns
+        block[~np.isfinite(block)] = np.nan
+        self.update(block, list(series))
+        return len(timeline)
+
+    def load(self, store: Optional[BarStore] = None, symbols: Optional[Iterable[str]] = None) -> int:
+        """Alias of sync for the initial history load"""
+        return self.sync(store, symbols)
+
+    # -- estimates ----------------------------------------------------------------
+
+    def _indices(self, symbols: Optional[Sequence[str]]) -> np.ndarray:
+        if symbols is None:
+            return np.arange(len(self.symbols))
+        return np.array([self._index.get(symbol.upper(), -1) for symbol in symbols], dtype=np.int64)
+
+    def ready(self, symbols: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Boolean mask of symbols with at least min_periods observations"""
+        index = self._indices(symbols)
+        counts = np.append(np.diagonal(self._pair_count), 0)  # index -1 -> no data
+        return counts[index] >= self.min_periods
+
+    def effective_observations(self, symbols: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Kish effective sample size per symbol: (sum w)^2 / sum w^2"""
+        weight = np.diagonal(self._pair_weight)
+        weight_sq = np.diagonal(self._pair_weight_sq)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            n_eff = np.where(weight_sq > 0, weight ** 2 / weight_sq, 0.0)
+        return np.append(n_eff, 0.0)[self._indices(symbols)]
+
+    def covariance(self, symbols: Optional[Sequence[str]] = None,
+                   shrinkage: Union[None, float, str] = None, target: str = 'identity') -> np.ndarray:
+        """
+        Per-bar covariance for ``symbols`` (default: all), NaN for pairs with fewer
+        than min_periods joint observations or unknown symbols.
+
+        ``shrinkage``: None, a fixed intensity in [0, 1] towards ``target``, or
+        ``'oas'`` (Oracle Approximating Shrinkage towards the scaled identity, with
+        the EW effective sample size). Shrinkage applies to the finite block only.
+        """
+        with self._lock:
+            index = self._indices(symbols)
+            known = index >= 0
+            safe = np.maximum(index, 0)
+            if not len(self.symbols):
+                return np.full((len(index), len(index)), np.nan)
+            comoment = self._comoment[np.ix_(safe, safe)]
+            pair_weight = self._pair_weight[np.ix_(safe, safe)]
+            pair_count = self._pair_count[np.ix_(safe, safe)]
+            n_eff = float(np.median(self.effective_observations(
+                [self.symbols[i] for i in safe[known]]))) if known.any() else 0.0
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = comoment / pair_weight
+        valid = (pair_count >= self.min_periods) & np.outer(known, known)
+        cov = np.where(valid, cov, np.nan)
+
+        if shrinkage is not None:
+            block = np.flatnonzero(np.isfinite(np.diagonal(cov)))
+            if len(block):
+                sub = cov[np.ix_(block, block)]
+                sub = np.where(np.isfinite(sub), sub, 0.0)  # missing overlap -> uncorrelated
+                cov[np.ix_(block, block)] = shrink(sub, shrinkage, target, n_eff)
+        return cov
+
+    def correlation(self, symbols: Optional[Sequence[str]] = None,
+                    shrinkage: Union[None, float, str] = None, target: str = 'identity') -> np.ndarray:
+        """Correlation matrix derived from ``covariance`` (NaN where unavailable)"""
+        return covariance_to_correlation(self.covariance(symbols, shrinkage, target))
+
+    def volatility(self, symbols: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Per-bar EW volatility (NaN where unavailable)"""
+        return np.sqrt(np.diagonal(self.covariance(symbols)))
+
+    def mean(self, symbols: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Per-bar EW mean return (NaN where unavailable)"""
+        with self._lock:
+            index = self._indices(symbols)
+            means = np.append(self._mean, np.nan)[index]
+        return np.where(self.ready(symbols), means, np.nan)
+
+    def bars_per_day(self) -> float:
+        """Scale factor from per-bar to daily variance"""
+        return 86400.0 / INTERVAL_SECONDS.get(self.interval, 86400)
+
+
+def covariance_to_correlation(cov: np.ndarray) -> np.ndarray:
+    std = np.sqrt(np.diagonal(cov))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = cov / np.outer(std, std)
+    corr = np.clip(corr, -1.0, 1.0)
+    np.fill_diagonal(corr, np.where(np.isfinite(std) & (std > 0), 1.0, np.nan))
+    return corr
+
+
+def shrink(cov: np.ndarray, shrinkage: Union[float, str], target: str = 'identity',
+           n_samples: float = 0.0) -> np.ndarray:
+    """
+    Shrink a covariance matrix towards a structured target.
+
+    Targets: ``identity`` (average variance times I), ``diagonal`` (own variances,
+    zero covariances) or ``constant_correlation`` (own variances, average
+    correlation). ``shrinkage='oas'`` picks the OAS intensity for the identity target.
+    """
+    p = cov.shape[0]
+    if p == 0:
+        return cov
+    if shrinkage == 'oas':
+        mu = np.trace(cov) / p
+        alpha = np.mean(cov ** 2)
+        num = alpha + mu ** 2
+        den = (n_samples + 1.0) * (alpha - mu ** 2 / p)
+        intensity = 1.0 if den <= 0 else min(num / den, 1.0)
+        target = 'identity'
+    else:
+        intensity = float(shrinkage)
+        if not 0.0 <= intensity <= 1.0:
+            raise ValueError("shrinkage intensity must be in [0, 1]")
+
+    variances = np.diagonal(cov)
+    if target == 'identity':
+        goal = np.eye(p) * variances.mean()
+    elif target == 'diagonal':
+        goal = np.diag(variances)
+    elif target == 'constant_correlation':
+        corr = covariance_to_correlation(cov)
+        off_diagonal = corr[~np.eye(p, dtype=bool)]
+        mean_corr = float(np.nanmean(off_diagonal)) if off_diagonal.size else 0.0
+        std = np.sqrt(variances)
+        goal = mean_corr * np.outer(std, std)
+        np.fill_diagonal(goal, variances)
+    else:
+        raise ValueError(f"unknown shrinkage target {target!r}, expected one of {SHRINKAGE_TARGETS}")
+    return (1.0 - intensity) * cov + intensity * goal
@@ -2,12 +2,196 @@
 Exchange information and trading filters for Binance UMFutures
 """
 
+import asyncio
 import logging
-from decimal import ROUND_DOWN, Decimal
+import math
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from decimal import Decimal
 from typing import Any
 
 logger = logging.getLogger(__name__)
 
+# Default trading filters for common symbols, replaced by exchangeInfo on refresh
+DEFAULT_TRADING_FILTERS = {
+    "BTCUSDT": {
+        "tickSize": "0.1",
+        "stepSize": "0.001",
+        "minQty": "0.001",
+        "maxQty": "1000",
+        "minNotional": "5",
+    },
+    "ETHUSDT": {
+        "tickSize": "0.01",
+        "stepSize": "0.001",
+        "minQty": "0.001",
+        "maxQty": "10000",
+        "minNotional": "5",
+    },
+    "ADAUSDT": {
+        "tickSize": "0.0001",
+        "stepSize": "1",
+        "minQty": "1",
+        "maxQty": "9000000",
+        "minNotional": "5",
+    },
+}
+
+FALLBACK_SYMBOL = "BTCUSDT"
+
+
+def _decimals(value: str) -> int:
+    """Number of decimal places of a filter value ("0.010" -> 3)"""
+    return max(0, -Decimal(value).as_tuple().exponent)
+
+
+class SymbolFilters:
+    """
+    Filters for one symbol, parsed once. Tick and step sizes are held as
+    integer quanta at their own precision so rounding is integer arithmetic.
+    """
+
+    __slots__ = (
+        "symbol", "raw", "tick_size", "step_size", "min_qty", "max_qty", "min_notional",
+        "price_precision", "qty_precision", "price_scale", "qty_scale", "tick_units", "step_units",
+    )
+
+    def __init__(self, symbol: str, raw: dict[str, str]):
+        self.symbol = symbol
+        self.raw = dict(raw)
+        self.tick_size = Decimal(raw["tickSize"])
+        self.step_size = Decimal(raw["stepSize"])
+        self.min_qty = float(raw["minQty"])
+        self.max_qty = float(raw["maxQty"])
+        self.min_notional = float(raw["minNotional"])
+        self.price_precision = _decimals(raw["tickSize"])
+        self.qty_precision = _decimals(raw["stepSize"])
+        self.price_scale = 10**self.price_precision
+        self.qty_scale = 10**self.qty_precision
+        self.tick_units = int(self.tick_size * self.price_scale)
+        self.step_units = int(self.step_size * self.qty_scale)
+
+    @staticmethod
+    def _floor(value: float, scale: int, quantum: int) -> float:
+        # round() strips binary noise (0.3 * 10 = 2.9999999999999996) before flooring
+        units = math.floor(round(value * scale, 6))
+        return (units - units % quantum) / scale
+
+    def round_price(self, price: float) -> float:
+        """Round price down to the tick size"""
+        return self._floor(price, self.price_scale, self.tick_units)
+
+    def round_qty(self, quantity: float) -> float:
+        """Clamp to [minQty, maxQty] and round down to the step size"""
+        quantity = min(max(quantity, self.min_qty), self.max_qty)
+        return max(self._floor(quantity, self.qty_scale, self.step_units), self.min_qty)
+
+    def meets_notional(self, price: float, quantity: float) -> bool:
+        return price * quantity + 1e-9 >= self.min_notional
+
+
+def parse_exchange_info(payload: dict[str, Any]) -> dict[str, dict[str, str]]:
+    """Extract raw filter strings per symbol from a /fapi/v1/exchangeInfo response"""
+    result = {}
+    for entry in payload.get("symbols", []):
+        raw = {}
+        for f in entry.get("filters", []):
+            kind = f.get("filterType")
+            if kind == "PRICE_FILTER":
+                raw["tickSize"] = f["tickSize"]
+            elif kind == "LOT_SIZE":
+                raw["stepSize"] = f["stepSize"]
+                raw["minQty"] = f["minQty"]
+                raw["maxQty"] = f["maxQty"]
+            elif kind in ("MIN_NOTIONAL", "NOTIONAL"):
+                # Futures use "notional", spot uses "minNotional"
+                raw["minNotional"] = f.get("notional", f.get("minNotional"))
+        if len(raw) == 5 and all(raw.values()):
+            result[entry["symbol"]] = raw
+    return result
+
+
+class SymbolFilterIndex:
+    """
+    Process-wide index of compiled symbol filters.
+    Refreshes are single-flight; subscribers are pushed the set of changed symbols.
+    """
+
+    def __init__(self, filters: dict[str, dict[str, str]] | None = None):
+        self._filters: dict[str, SymbolFilters] = {}
+        self._subscribers: list[Callable[[set[str]], None]] = []
+        self._refresh_task: asyncio.Task | None = None
+        self._sync_lock = threading.Lock()
+        self.version = 0
+        self.updated_at = 0.0
+        if filters:
+            self.update(filters)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._filters
+
+    def get(self, symbol: str) -> SymbolFilters:
+        """Compiled filters for symbol (BTCUSDT defaults for unknown symbols)"""
+        filters = self._filters.get(symbol)
+        if filters is None:
+            logger.warning(f"No filters found for {symbol}, using {FALLBACK_SYMBOL} defaults")
+            return self._filters[FALLBACK_SYMBOL]
+        return filters
+
+    def raw_filters(self) -> dict[str, dict[str, str]]:
+        return {symbol: filters.raw for symbol, filters in self._filters.items()}
+
+    def subscribe(self, callback: Callable[[set[str]], None]):
+        """Register a callback receiving the symbols whose filters changed"""
+        self._subscribers.append(callback)
+
+    def update(self, raw_filters: dict[str, dict[str, str]]) -> set[str]:
+        """Compile and swap in new filters; returns changed symbols"""
+        changed = {symbol for symbol, raw in raw_filters.items() if symbol not in self._filters or self._filters[symbol].raw != raw}
+        if not changed:
+            self.updated_at = time.time()
+            return changed
+
+        filters = dict(self._filters)
+        for symbol in changed:
+            filters[symbol] = SymbolFilters(symbol, raw_filters[symbol])
+        self._filters = filters  # single reference swap, readers never see a partial update
+        self.version += 1
+        self.updated_at = time.time()
+
+        for callback in self._subscribers:
+            try:
+                callback(changed)
+            except Exception as e:
+                logger.error(f"Symbol filter subscriber error: {e}")
+        return changed
+
+    def load_exchange_info(self, payload: dict[str, Any]) -> set[str]:
+        return self.update(parse_exchange_info(payload))
+
+    async def refresh(self, fetch: Callable[[], Awaitable[dict[str, Any]]]) -> set[str]:
+        """Refresh from an async exchangeInfo fetch; concurrent callers share one fetch"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh(fetch))
+        return await asyncio.shield(self._refresh_task)
+
+    async def _refresh(self, fetch: Callable[[], Awaitable[dict[str, Any]]]) -> set[str]:
+        return self.load_exchange_info(await fetch())
+
+    def refresh_sync(self, fetch: Callable[[], dict[str, Any]]) -> set[str]:
+        """Blocking refresh; threads arriving during a refresh wait for it instead of fetching again"""
+        if not self._sync_lock.acquire(blocking=False):
+            with self._sync_lock:
+                return set()
+        try:
+            return self.load_exchange_info(fetch())
+        finally:
+            self._sync_lock.release()
+
+
+default_filter_index = SymbolFilterIndex(DEFAULT_TRADING_FILTERS)
+
 
 class ExchangeInfo:
     """
@@ -15,60 +199,31 @@ class ExchangeInfo:
     Implements strict validation for tickSize, stepSize, and minQty
     """
 
-    def __init__(self):
-        # Default trading filters for common symbols (in real implementation, fetch from API)
-        self.trading_filters = {
-            "BTCUSDT": {
-                "tickSize": "0.1",
-                "stepSize": "0.001",
-                "minQty": "0.001",
-                "maxQty": "1000",
-                "minNotional": "5",
-            },
-            "ETHUSDT": {
-                "tickSize": "0.01",
-                "stepSize": "0.001",
-                "minQty": "0.001",
-                "maxQty": "10000",
-                "minNotional": "5",
-            },
-            "ADAUSDT": {
-                "tickSize": "0.0001",
-                "stepSize": "1",
-                "minQty": "1",
-                "maxQty": "9000000",
-                "minNotional": "5",
-            },
-        }
+    def __init__(self, index: SymbolFilterIndex | None = None):
+        self.index = index if index is not None else default_filter_index
+
+    @property
+    def trading_filters(self) -> dict[str, dict[str, str]]:
+        return self.index.raw_filters()
+
+    def refresh(self, fetch: Callable[[], dict[str, Any]]) -> set[str]:
+        """Reload filters from a blocking exchangeInfo call (e.g. UMFutures.exchange_info)"""
+        return self.index.refresh_sync(fetch)
 
     def get_symbol_filters(self, symbol: str) -> dict[str, str]:
         """Get trading filters for a symbol"""
-        if symbol not in self.trading_filters:
-            # Use BTCUSDT defaults for unknown symbols
-            logger.warning(f"No filters found for {symbol}, using BTCUSDT defaults")
-            return self.trading_filters["BTCUSDT"].copy()
-
-        return self.trading_filters[symbol].copy()
+        return self.index.get(symbol).raw.copy()
 
     def validate_price(self, symbol: str, price: float) -> float:
         """
         Validate and adjust price according to tickSize filter
         Uses strict rounding to avoid -1013 errors
         """
-        filters = self.get_symbol_filters(symbol)
-        tick_size = Decimal(filters["tickSize"])
-
-        # Convert price to Decimal for precise calculation
-        price_decimal = Decimal(str(price))
-
-        # Use strict rounding to nearest tick to avoid precision errors
-        # Round to nearest tick, then ensure it's properly formatted
-        adjusted_price = (price_decimal / tick_size).quantize(Decimal("1"), rounding=ROUND_DOWN) * tick_size
-
-        result = float(adjusted_price)
+        filters = self.index.get(symbol)
+        result = filters.round_price(price)
 
         if result != price:
-            logger.info(f"Price adjusted for {symbol}: {price} -> {result} (tickSize: {tick_size})")
+            logger.info(f"Price adjusted for {symbol}: {price} -> {result} (tickSize: {filters.tick_size})")
 
         return result
 
@@ -77,36 +232,17 @@ class ExchangeInfo:
         Validate and adjust quantity according to stepSize and minQty filters
         Uses strict rounding to avoid -1013 errors
         """
-        filters = self.get_symbol_filters(symbol)
-        step_size = Decimal(filters["stepSize"])
-        min_qty = Decimal(filters["minQty"])
-        max_qty = Decimal(filters["maxQty"])
-
-        # Convert quantity to Decimal for precise calculation
-        qty_decimal = Decimal(str(quantity))
-
-        # Check minimum quantity
-        if qty_decimal < min_qty:
-            logger.warning(f"Quantity {quantity} below minimum {min_qty} for {symbol}")
-            qty_decimal = min_qty
+        filters = self.index.get(symbol)
 
-        # Check maximum quantity
-        if qty_decimal > max_qty:
-            logger.warning(f"Quantity {quantity} above maximum {max_qty} for {symbol}")
-            qty_decimal = max_qty
+        if quantity < filters.min_qty:
+            logger.warning(f"Quantity {quantity} below minimum {filters.raw['minQty']} for {symbol}")
+        elif quantity > filters.max_qty:
+            logger.warning(f"Quantity {quantity} above maximum {filters.raw['maxQty']} for {symbol}")
 
-        # Use strict rounding to nearest step to avoid precision errors
-        # Round down to nearest step
-        adjusted_qty = (qty_decimal / step_size).quantize(Decimal("1"), rounding=ROUND_DOWN) * step_size
-
-        # Ensure we don't go below minimum after rounding
-        if adjusted_qty < min_qty:
-            adjusted_qty = min_qty
-
-        result = float(adjusted_qty)
+        result = filters.round_qty(quantity)
 
         if result != quantity:
-            logger.info(f"Quantity adjusted for {symbol}: {quantity} -> {result} (stepSize: {step_size})")
+            logger.info(f"Quantity adjusted for {symbol}: {quantity} -> {result} (stepSize: {filters.step_size})")
 
         return result
 
@@ -114,13 +250,10 @@ class ExchangeInfo:
         """
         Validate that the notional value (price * quantity) meets minimum requirements
         """
-        filters = self.get_symbol_filters(symbol)
-        min_notional = Decimal(filters["minNotional"])
-
-        notional = Decimal(str(price)) * Decimal(str(quantity))
+        filters = self.index.get(symbol)
 
-        if notional < min_notional:
-            logger.error(f"Order notional {notional} below minimum {min_notional} for {symbol}")
+        if not filters.meets_notional(price, quantity):
+            logger.error(f"Order notional {price * quantity} below minimum {filters.raw['minNotional']} for {symbol}")
             return False
 
         return True
@@ -147,23 +280,11 @@ class ExchangeInfo:
 
     def get_lot_size_precision(self, symbol: str) -> int:
         """Get the precision for quantity (lot size) based on stepSize"""
-        filters = self.get_symbol_filters(symbol)
-        step_size = filters["stepSize"]
-
-        # Count decimal places
-        if "." in step_size:
-            return len(step_size.split(".")[1])
-        return 0
+        return self.index.get(symbol).qty_precision
 
     def get_price_precision(self, symbol: str) -> int:
         """Get the precision for price based on tickSize"""
-        filters = self.get_symbol_filters(symbol)
-        tick_size = filters["tickSize"]
-
-        # Count decimal places
-        if "." in tick_size:
-            return len(tick_size.split(".")[1])
-        return 0
+        return self.index.get(symbol).price_precision
 
     def format_quantity(self, symbol: str, quantity: float) -> str:
         """Format quantity with correct precision"""
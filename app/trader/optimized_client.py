@@ -4,20 +4,21 @@ High-performance trading operations with connection pooling, caching, and async
 """
 
 import asyncio
-import aiohttp
 import time
 import json
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Union
 from dataclasses import dataclass
-import hashlib
 from decimal import Decimal
 
+from .exchange_info import default_filter_index
+from .rest_transport import RestAPIError, get_transport
+
 # Import our performance framework
 try:
     from ..performance.optimization import (
-        performance_optimized, cached, connection_pool_manager,
+        performance_optimized, cached,
         advanced_cache, task_manager, PerformanceMetrics
     )
     PERFORMANCE_AVAILABLE = True
@@ -67,6 +68,10 @@ class OptimizedTradingClient:
     High-performance trading client with connection pooling and caching
     """
     
+    ORDER_ENDPOINT = '/fapi/v1/order'
+    BATCH_ORDERS_ENDPOINT = '/fapi/v1/batchOrders'
+    MAX_BATCH_ORDERS = 5  # Binance futures batchOrders limit
+    
     def __init__(self, api_key: str, api_secret: str, testnet: bool = True):
         self.api_key = api_key
         self.api_secret = api_secret
@@ -79,6 +84,9 @@ class OptimizedTradingClient:
         else:
             self.base_url = "https://fapi.binance.com"
         
+        # Shared pooled transport (one per host/API key across all clients)
+        self.transport = get_transport(self.base_url, api_key, api_secret)
+        
         # Performance tracking
         self.request_count = 0
         self.failed_requests = 0
@@ -99,24 +107,18 @@ class OptimizedTradingClient:
         self.pending_orders: Dict[str, TradingOrder] = {}
         self.executed_orders: List[Dict[str, Any]] = []
         
+        # Batch order placement
+        self.batch_endpoint_available = True
+        self._batch_tasks: set = set()
+        
+        # Local order books (OrderBookManager) kept in sync from diff-depth streams
+        self.order_books = None
+        
         self.logger.info(f"Initialized OptimizedTradingClient (testnet={testnet})")
     
-    def _generate_signature(self, query_string: str) -> str:
-        """Generate API signature for authenticated requests"""
-        import hmac
-        return hmac.new(
-            self.api_secret.encode('utf-8'),
-            query_string.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
-    
-    def _prepare_headers(self, signed: bool = False) -> Dict[str, str]:
-        """Prepare request headers"""
-        headers = {
-            'X-MBX-APIKEY': self.api_key,
-            'Content-Type': 'application/json'
-        }
-        return headers
+    def attach_order_books(self, manager):
+        """Serve get_order_book from local books (see BinanceDataStream.subscribe_diff_depth)"""
+        self.order_books = manager
     
     @performance_optimized("api_request", cache_ttl=0)
     async def _make_request(self, method: str, endpoint: str, params: Optional[Dict] = None,
@@ -130,33 +132,9 @@ class OptimizedTradingClient:
             if cached_result:
                 return cached_result
         
-        url = f"{self.base_url}{endpoint}"
-        params = params or {}
-        
-        # Add timestamp for signed requests
-        if signed:
-            params['timestamp'] = int(time.time() * 1000)
-            query_string = '&'.join([f"{k}={v}" for k, v in params.items()])
-            params['signature'] = self._generate_signature(query_string)
-        
-        headers = self._prepare_headers(signed)
-        
         try:
-            # Use connection pool manager if available
-            if PERFORMANCE_AVAILABLE:
-                response = await connection_pool_manager.make_http_request(
-                    method, url, 
-                    pool_name="binance_api",
-                    headers=headers,
-                    params=params if method.upper() == 'GET' else None,
-                    json=params if method.upper() != 'GET' else None
-                )
-                result = await response.json()
-            else:
-                # Fallback to direct aiohttp
-                async with aiohttp.ClientSession() as session:
-                    async with session.request(method, url, headers=headers, params=params) as response:
-                        result = await response.json()
+            # Shared keep-alive pool; signs, tracks request weight and coalesces GETs
+            result = await self.transport.request(method, endpoint, params, signed=signed)
             
             # Update performance metrics
             latency = time.time() - start_time
@@ -178,10 +156,17 @@ class OptimizedTradingClient:
     @cached(ttl=3600, cache_key_prefix="exchange_info")
     async def get_exchange_info(self) -> Dict[str, Any]:
         """Get exchange trading rules and symbol information (cached)"""
-        return await self._make_request(
+        result = await self._make_request(
             'GET', '/fapi/v1/exchangeInfo',
             cache_key='exchange_info:all'
         )
+        # Push compiled filters to every ExchangeInfo / order validator
+        default_filter_index.load_exchange_info(result)
+        return result
+    
+    async def refresh_symbol_filters(self) -> set:
+        """Refresh the shared symbol-filter index; concurrent callers share one fetch"""
+        return await default_filter_index.refresh(self.get_exchange_info)
     
     @performance_optimized("ticker_price", cache_ttl=10)
     async def get_ticker_price(self, symbol: Optional[str] = None) -> Union[Dict, List[Dict]]:
@@ -197,7 +182,12 @@ class OptimizedTradingClient:
     
     @performance_optimized("order_book", cache_ttl=1)
     async def get_order_book(self, symbol: str, limit: int = 100) -> Dict[str, Any]:
-        """Get order book with minimal cache for low latency"""
+        """Get order book, served from the local book when one is synced"""
+        if self.order_books is not None:
+            book = self.order_books.get_book(symbol)
+            if book is not None:
+                return book.to_depth(limit)
+        
         cache_key = f"order_book:{symbol}:{limit}"
         
         return await self._make_request(
@@ -329,31 +319,133 @@ class OptimizedTradingClient:
         
         return result
     
+    def _order_params(self, order: TradingOrder) -> Dict[str, str]:
+        """Exchange order parameters (no None values, no timeInForce on market orders)"""
+        params = {k: v for k, v in order.to_dict().items() if v is not None}
+        if order.order_type.lower() == 'market':
+            params.pop('timeInForce', None)
+        return params
+    
+    async def submit_batch_orders(self, orders: List[TradingOrder], max_concurrent: int = 5,
+                                  dry_run: bool = True, use_batch_endpoint: bool = True) -> List[asyncio.Future]:
+        """
+        Submit orders and return one future per order, resolving to the exchange
+        result or to a rejection dict (``status`` == 'REJECTED' with code/msg).
+        
+        Orders go out in /fapi/v1/batchOrders chunks of MAX_BATCH_ORDERS, or one
+        request per order when the batch endpoint is unavailable, with at most
+        ``max_concurrent`` requests in flight. Request weight and order-count
+        budget are reserved and every request is signed before anything is sent.
+        """
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in orders]
+        if not orders:
+            return futures
+        
+        if dry_run:
+            for order, future in zip(orders, futures):
+                future.set_result(await self.place_order(order, dry_run=True))
+            return futures
+        
+        indexed = list(zip(orders, futures))
+        if use_batch_endpoint and self.batch_endpoint_available:
+            path = self.BATCH_ORDERS_ENDPOINT
+            groups = [indexed[i:i + self.MAX_BATCH_ORDERS] for i in range(0, len(indexed), self.MAX_BATCH_ORDERS)]
+        else:
+            path = self.ORDER_ENDPOINT
+            groups = [[item] for item in indexed]
+        
+        await self.transport.reserve(self.transport.endpoint_weight(path) * len(groups), orders=len(orders))
+        signed = [(self._sign_orders(path, [order for order, _ in group]), group) for group in groups]
+        
+        semaphore = asyncio.Semaphore(max_concurrent)
+        task = asyncio.ensure_future(asyncio.gather(*(
+            self._send_signed_orders(path, query, group, semaphore) for query, group in signed
+        )))
+        self._batch_tasks.add(task)
+        
+        def finish(task):
+            self._batch_tasks.discard(task)
+            error = None if task.cancelled() else task.exception()
+            if error:
+                self.logger.error(f"Batch order submission failed: {error}")
+            # Never leave a caller waiting on an order whose outcome is unknown
+            for order, future in indexed:
+                if not future.done():
+                    future.set_result({
+                        'symbol': order.symbol,
+                        'clientOrderId': order.client_order_id,
+                        'status': 'REJECTED',
+                        'code': None,
+                        'msg': f"submission failed: {error or 'cancelled'}",
+                    })
+        
+        task.add_done_callback(finish)
+        return futures
+    
+    def _sign_orders(self, path: str, orders: List[TradingOrder]) -> str:
+        if path == self.BATCH_ORDERS_ENDPOINT:
+            payload = json.dumps([self._order_params(order) for order in orders], separators=(',', ':'))
+            return self.transport.sign({'batchOrders': payload})
+        return self.transport.sign(self._order_params(orders[0]))
+    
+    async def _send_signed_orders(self, path: str, query: str, group: List[tuple], semaphore: asyncio.Semaphore):
+        """Send one pre-signed request and resolve the futures of its orders"""
+        start_time = time.time()
+        async with semaphore:
+            try:
+                response = await self.transport.send_query('POST', path, query, reserved=True)
+                results = response if isinstance(response, list) else [response]
+            except RestAPIError as e:
+                if path == self.BATCH_ORDERS_ENDPOINT and e.status == 404:
+                    # No batch endpoint on this host: resend the chunk order by order
+                    self.batch_endpoint_available = False
+                    self.logger.warning("Batch order endpoint unavailable, falling back to single orders")
+                    # Order counts were reserved with the batch; the single requests need their own weight
+                    await self.transport.reserve(self.transport.endpoint_weight(self.ORDER_ENDPOINT) * len(group))
+                    for order, future in group:
+                        query = self._sign_orders(self.ORDER_ENDPOINT, [order])
+                        await self._send_signed_orders(self.ORDER_ENDPOINT, query, [(order, future)], asyncio.Semaphore(1))
+                    return
+                error = e.payload if isinstance(e.payload, dict) else {'msg': str(e)}
+                results = [error] * len(group)
+            except Exception as e:
+                results = [{'msg': str(e)}] * len(group)
+        
+        latency = time.time() - start_time
+        for (order, future), result in zip(group, results):
+            if future.done():
+                continue
+            if isinstance(result, dict) and 'orderId' in result:
+                self.pending_orders[order.client_order_id] = order
+                self.executed_orders.append({
+                    'order': order,
+                    'result': result,
+                    'timestamp': datetime.now(),
+                    'latency': latency
+                })
+                future.set_result(result)
+            else:
+                self.failed_requests += 1
+                future.set_result({
+                    'symbol': order.symbol,
+                    'clientOrderId': order.client_order_id,
+                    'status': 'REJECTED',
+                    'code': result.get('code') if isinstance(result, dict) else None,
+                    'msg': result.get('msg') if isinstance(result, dict) else str(result),
+                })
+                self.logger.warning(f"Order rejected: {order.symbol} {order.side} {order.quantity} - {future.result()['msg']}")
+    
     async def batch_place_orders(self, orders: List[TradingOrder], 
                                 max_concurrent: int = 5, dry_run: bool = True) -> List[Dict[str, Any]]:
-        """Place multiple orders concurrently with rate limiting"""
-        if not PERFORMANCE_AVAILABLE:
-            # Sequential fallback
-            results = []
-            for order in orders:
-                result = await self.place_order(order, dry_run)
-                results.append(result)
-            return results
-        
-        # Submit orders as background tasks with priority
-        tasks = []
-        for order in orders:
-            task_id = await task_manager.submit_task(
-                self.place_order(order, dry_run),
-                priority="high"  # Trading orders get high priority
-            )
-            tasks.append(task_id)
+        """Place multiple orders and wait for every fill or rejection (results in input order)"""
+        futures = await self.submit_batch_orders(orders, max_concurrent=max_concurrent, dry_run=dry_run)
+        results = list(await asyncio.gather(*futures))
         
-        # Wait for all orders to complete (simplified)
-        # In production, you'd track tasks properly
-        await asyncio.sleep(1)  # Allow tasks to process
+        if not dry_run and PERFORMANCE_AVAILABLE and any(r.get('status') != 'REJECTED' for r in results):
+            await advanced_cache.trigger_invalidation('order_placed')
         
-        return [{"task_id": task_id, "status": "submitted"} for task_id in tasks]
+        return results
     
     async def get_real_time_data_stream(self, symbols: List[str]) -> Dict[str, Any]:
         """Get real-time market data stream (optimized)"""
@@ -388,17 +480,16 @@ class OptimizedTradingClient:
             'success_rate': 1 - failure_rate,
             'avg_latency_ms': self.avg_latency * 1000,
             'pending_orders': len(self.pending_orders),
-            'executed_orders': len(self.executed_orders)
+            'executed_orders': len(self.executed_orders),
+            'transport': self.transport.get_stats()
         }
         
         # Add performance system metrics if available
         if PERFORMANCE_AVAILABLE:
             try:
-                pool_stats = connection_pool_manager.get_pool_stats()
                 cache_stats = advanced_cache.get_cache_stats()
                 
                 metrics.update({
-                    'connection_pool_stats': pool_stats.get('binance_api', {}),
                     'cache_hit_rate': cache_stats.get('hit_rate', 0),
                     'cache_items': cache_stats.get('memory_items', 0)
                 })
@@ -0,0 +1,776 @@
+"""
+Mirai Agent - Оптимизатор параметров стратегии
+Перебор по сетке, случайный и байесовский поиск StrategyParams, walk-forward
+проверка. Точки оцениваются событийным бэктестом в пуле процессов: OHLCV и
+индикаторы лежат в общей памяти (воркерам передается только манифест),
+результаты кэшируются на диске, по итогам строится таблица лидеров.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime, timezone
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+try:
+    from ..strategies.technical.base_strategy import BaseTradingStrategy, MarketRegimeDetector, StrategyParams, TechnicalIndicators
+    from .advanced_risk_engine import AdvancedRiskEngine, RiskLimits
+    from .backtesting import BacktestConfig, EventDrivenBacktester, _quiet, load_bars, regime_codes, symbol_from_path
+    from .bar_store import OHLCVView
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    from strategies.technical.base_strategy import BaseTradingStrategy, MarketRegimeDetector, StrategyParams, TechnicalIndicators
+    from advanced_risk_engine import AdvancedRiskEngine, RiskLimits
+    from backtesting import BacktestConfig, EventDrivenBacktester, _quiet, load_bars, regime_codes, symbol_from_path
+    from bar_store import OHLCVView
+
+logger = logging.getLogger(__name__)
+
+# Меняется при изменении логики бэктеста - старые записи кэша перестают совпадать
+CACHE_VERSION = 1
+
+STATE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'state', 'optimizer'
+)
+DEFAULT_CACHE_PATH = os.path.join(STATE_DIR, 'cache.db')
+DEFAULT_LEADERBOARD_PATH = os.path.join(STATE_DIR, 'leaderboard.json')
+
+BAR_ARRAYS = ('bar:ts', 'bar:open', 'bar:high', 'bar:low', 'bar:close', 'bar:volume')
+REGIME_ARRAY = 'regime'
+PARAM_FIELDS = {f.name: f.type for f in fields(StrategyParams)}
+# Индикаторы с несколькими выходами: имя массива "<группа>:<номер выхода>"
+MULTI_OUTPUT = {'macd': 3, 'bb': 3, 'stoch': 2}
+
+
+# ---------------------------------------------------------------------------
+# Пространство поиска
+# ---------------------------------------------------------------------------
+
+class ParamSpace:
+    """
+    Пространство поиска по полям StrategyParams:
+    (low, high) - диапазон (целочисленный, если обе границы int), список - варианты.
+    """
+
+    def __init__(self, spec: Dict[str, Union[Tuple[float, float], Sequence[Any]]]):
+        self.dims: Dict[str, Tuple[str, Any]] = {}
+        for name, values in spec.items():
+            if name not in PARAM_FIELDS:
+                raise ValueError(f"Неизвестный параметр стратегии: {name}")
+            if isinstance(values, tuple) and len(values) == 2 and all(isinstance(v, (int, float)) for v in values):
+                low, high = values
+                if low > high:
+                    raise ValueError(f"Пустой диапазон для {name}: {values}")
+                kind = 'int' if isinstance(low, int) and isinstance(high, int) else 'float'
+                self.dims[name] = (kind, (low, high))
+            else:
+                choices = list(values)
+                if not choices:
+                    raise ValueError(f"Нет вариантов для {name}")
+                self.dims[name] = ('choice', choices)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.dims)
+
+    def _value(self, name: str, u: float) -> Any:
+        kind, values = self.dims[name]
+        u = min(max(u, 0.0), 1.0)
+        if kind == 'choice':
+            return values[min(int(u * len(values)), len(values) - 1)]
+        low, high = values
+        if kind == 'int':
+            return int(min(high, low + math.floor(u * (high - low + 1))))
+        return float(low + u * (high - low))
+
+    def from_unit(self, u: Sequence[float]) -> Dict[str, Any]:
+        return {name: self._value(name, float(x)) for name, x in zip(self.dims, u)}
+
+    def to_unit(self, point: Dict[str, Any]) -> np.ndarray:
+        """Координаты точки в [0, 1]^d (центр ячейки для целых и вариантов)"""
+        u = []
+        for name, (kind, values) in self.dims.items():
+            value = point[name]
+            if kind == 'choice':
+                u.append((values.index(value) + 0.5) / len(values))
+            elif kind == 'int':
+                low, high = values
+                u.append((value - low + 0.5) / (high - low + 1))
+            else:
+                low, high = values
+                u.append((value - low) / (high - low) if high > low else 0.5)
+        return np.array(u, dtype=np.float64)
+
+    def grid(self, steps: int = 5) -> List[Dict[str, Any]]:
+        """Все комбинации: варианты целиком, диапазоны - ``steps`` равномерных значений"""
+        axes = []
+        for name, (kind, values) in self.dims.items():
+            if kind == 'choice':
+                axes.append(values)
+            elif kind == 'int':
+                axes.append(sorted(set(np.linspace(values[0], values[1], steps).round().astype(int).tolist())))
+            else:
+                axes.append(np.linspace(values[0], values[1], steps).tolist())
+        points = [dict(zip(self.dims, combo)) for combo in _product(axes)]
+        return [point for point in points if self.valid(point)]
+
+    def sample(self, rng: np.random.Generator, n: int, max_tries: int = 50) -> List[Dict[str, Any]]:
+        """До ``n`` случайных допустимых точек"""
+        points = []
+        for _ in range(max_tries):
+            for u in rng.random((n, len(self.dims))):
+                point = self.from_unit(u)
+                if self.valid(point):
+                    points.append(point)
+                    if len(points) == n:
+                        return points
+        return points
+
+    @staticmethod
+    def valid(point: Dict[str, Any], base: Optional[StrategyParams] = None) -> bool:
+        """Ограничения между полями StrategyParams"""
+        params = {**asdict(base or StrategyParams()), **point}
+        return (params['ma_fast_period'] < params['ma_slow_period']
+                and params['macd_fast'] < params['macd_slow']
+                and params['rsi_oversold'] < params['rsi_overbought'])
+
+
+def _product(axes: List[List[Any]]) -> Iterable[Tuple[Any, ...]]:
+    if not axes:
+        yield ()
+        return
+    for value in axes[0]:
+        for rest in _product(axes[1:]):
+            yield (value, *rest)
+
+
+# ---------------------------------------------------------------------------
+# Индикаторы в общей памяти
+# ---------------------------------------------------------------------------
+
+def indicator_layout(params: StrategyParams) -> Dict[str, str]:
+    """Ключ BaseTradingStrategy._calculate_indicators -> имя общего массива"""
+    macd = f"macd:{params.macd_fast}:{params.macd_slow}:{params.macd_signal}"
+    return {
+        'ma_fast': f"sma:{params.ma_fast_period}",
+        'ma_slow': f"sma:{params.ma_slow_period}",
+        'ema_fast': f"ema:{params.ma_fast_period}",
+        'rsi': f"rsi:{params.rsi_period}",
+        'macd': f"{macd}:0",
+        'macd_signal': f"{macd}:1",
+        'macd_histogram': f"{macd}:2",
+        'bb_upper': "bb:0",
+        'bb_middle': "bb:1",
+        'bb_lower': "bb:2",
+        'stoch_k': "stoch:0",
+        'stoch_d': "stoch:1",
+        'atr': "atr",
+    }
+
+
+def _indicator_group(name: str) -> str:
+    return name.rsplit(':', 1)[0] if name.split(':', 1)[0] in MULTI_OUTPUT else name
+
+
+def compute_indicator_group(group: str, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict[str, np.ndarray]:
+    """Массивы группы теми же вызовами, что и в _calculate_indicators"""
+    kind, *args = group.split(':')
+    args = [int(arg) for arg in args]
+    indicators = TechnicalIndicators
+    if kind == 'sma':
+        return {group: indicators.moving_average(close, *args)}
+    if kind == 'ema':
+        return {group: indicators.exponential_moving_average(close, *args)}
+    if kind == 'rsi':
+        return {group: indicators.rsi(close, *args)}
+    if kind == 'atr':
+        return {group: indicators.atr(high, low, close)}
+    if kind == 'macd':
+        outputs = indicators.macd(close, *args)
+    elif kind == 'bb':
+        outputs = indicators.bollinger_bands(close)
+    elif kind == 'stoch':
+        outputs = indicators.stochastic(high, low, close)
+    else:
+        raise ValueError(f"Неизвестный индикатор: {group}")
+    return {f"{group}:{i}": output for i, output in enumerate(outputs)}
+
+
+# Сегменты, подключенные в этом процессе (у воркера живут между задачами)
+_ATTACHED: Dict[str, SharedMemory] = {}
+
+
+def _attach(manifest: Dict[str, Tuple[str, int, Tuple[int, ...], str]], names: Iterable[str]) -> Dict[str, np.ndarray]:
+    arrays = {}
+    for name in names:
+        segment, offset, shape, dtype = manifest[name]
+        shm = _ATTACHED.get(segment)
+        if shm is None:
+            shm = SharedMemory(name=segment)
+            # Сегментом владеет родительский процесс: воркер не должен удалять его при выходе
+            resource_tracker.unregister(shm._name, 'shared_memory')
+            _ATTACHED[segment] = shm
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+        array.flags.writeable = False
+        arrays[name] = array
+    return arrays
+
+
+class SharedArrayStore:
+    """
+    Именованные массивы в сегментах multiprocessing.shared_memory. Каждое
+    добавление создает новый сегмент; воркерам передается только манифест
+    (имя -> сегмент, смещение, форма, dtype), сами данные не сериализуются.
+    """
+
+    ALIGN = 64
+
+    def __init__(self):
+        self.manifest: Dict[str, Tuple[str, int, Tuple[int, ...], str]] = {}
+        self._segments: List[SharedMemory] = []
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.manifest
+
+    @property
+    def nbytes(self) -> int:
+        return sum(shm.size for shm in self._segments)
+
+    def add(self, arrays: Dict[str, np.ndarray]):
+        arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items() if name not in self.manifest}
+        if not arrays:
+            return
+        offsets, size = {}, 0
+        for name, array in arrays.items():
+            offsets[name] = size
+            size += -(-array.nbytes // self.ALIGN) * self.ALIGN
+        shm = SharedMemory(create=True, size=max(size, 1))
+        self._segments.append(shm)
+        _ATTACHED[shm.name] = shm
+        for name, array in arrays.items():
+            view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf, offset=offsets[name])
+            view[...] = array
+            self.manifest[name] = (shm.name, offsets[name], array.shape, array.dtype.str)
+
+    def subset(self, names: Iterable[str]) -> Dict[str, Tuple[str, int, Tuple[int, ...], str]]:
+        return {name: self.manifest[name] for name in names}
+
+    def close(self):
+        for shm in self._segments:
+            _ATTACHED.pop(shm.name, None)
+            shm.close()
+            shm.unlink()
+        self._segments.clear()
+        self.manifest.clear()
+
+
+# ---------------------------------------------------------------------------
+# Оценка точки (выполняется в воркере)
+# ---------------------------------------------------------------------------
+
+def _evaluate_task(task: Tuple) -> Dict[str, Any]:
+    params, manifest, start, end, symbol, config, limits = task
+    try:
+        strategy_params = StrategyParams(**params)
+        layout = indicator_layout(strategy_params)
+        arrays = _attach(manifest, manifest.keys())
+        window = slice(start, end)
+        bars = OHLCVView(*(arrays[name][window] for name in BAR_ARRAYS))
+        indicators = {key: arrays[name][window] for key, name in layout.items()}
+        with _quiet(BaseTradingStrategy.__module__, AdvancedRiskEngine.__module__):
+            strategy = BaseTradingStrategy(strategy_params)
+            backtester = EventDrivenBacktester(bars, symbol, strategy, config, limits, indicators=indicators,
+                                               regimes=arrays[REGIME_ARRAY][window])
+        result = backtester.run()
+        metrics = {key: value for key, value in result.metrics.items() if key != 'monthly_returns'}
+        return {'metrics': metrics, 'stats': result.stats}
+    except Exception as e:
+        return {'error': f"{type(e).__name__}: {e}"}
+
+
+# ---------------------------------------------------------------------------
+# Кэш и результаты
+# ---------------------------------------------------------------------------
+
+class EvaluationCache:
+    """Оцененные точки на диске (SQLite): ключ - хэш данных, окна, настроек и параметров"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS optimizer_evaluations (
+                    key TEXT PRIMARY KEY,
+                    params TEXT,
+                    result TEXT,
+                    created_at TEXT
+                )
+            """)
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        found = {}
+        for i in range(0, len(keys), 500):
+            chunk = list(keys[i:i + 500])
+            rows = self._conn.execute(
+                f"SELECT key, result FROM optimizer_evaluations WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            found.update((key, json.loads(result)) for key, result in rows)
+        return found
+
+    def put_many(self, items: Sequence[Tuple[str, Dict[str, Any], Dict[str, Any]]]):
+        now = datetime.now(timezone.utc).isoformat()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO optimizer_evaluations (key, params, result, created_at) VALUES (?, ?, ?, ?)",
+                [(key, json.dumps(params, sort_keys=True), json.dumps(result), now) for key, params, result in items]
+            )
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM optimizer_evaluations").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+@dataclass
+class Evaluation:
+    """Оценка одной точки пространства"""
+    params: Dict[str, Any]
+    score: Optional[float]
+    metrics: Dict[str, Any] = field(default_factory=dict)
+    stats: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    cached: bool = False
+
+
+@dataclass
+class SearchResult:
+    """Результат поиска с таблицей лидеров"""
+    method: str
+    objective: str
+    evaluations: List[Evaluation]
+    elapsed: float
+    window: Tuple[int, int]
+
+    def ranked(self) -> List[Evaluation]:
+        scored = [e for e in self.evaluations if e.score is not None]
+        return sorted(scored, key=lambda e: e.score, reverse=True)
+
+    @property
+    def best(self) -> Optional[Evaluation]:
+        ranked = self.ranked()
+        return ranked[0] if ranked else None
+
+    def best_params(self, base: Optional[StrategyParams] = None) -> Optional[StrategyParams]:
+        """Лучшая точка в виде StrategyParams (поверх ``base``)"""
+        best = self.best
+        if best is None:
+            return None
+        return StrategyParams(**{**asdict(base or StrategyParams()), **best.params})
+
+    def leaderboard(self, top: int = 20) -> List[Dict[str, Any]]:
+        return [
+            {'rank': rank, 'score': evaluation.score, 'params': evaluation.params, **evaluation.metrics}
+            for rank, evaluation in enumerate(self.ranked()[:top], 1)
+        ]
+
+    def to_dict(self, top: int = 20) -> Dict[str, Any]:
+        return {
+            'method': self.method,
+            'objective': self.objective,
+            'evaluated': len(self.evaluations),
+            'cached': sum(e.cached for e in self.evaluations),
+            'failed': sum(e.error is not None for e in self.evaluations),
+            'elapsed_seconds': round(self.elapsed, 2),
+            'window': list(self.window),
+            'leaderboard': self.leaderboard(top),
+        }
+
+    def save(self, path: str = DEFAULT_LEADERBOARD_PATH, top: int = 20) -> str:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        payload = {'generated_at': datetime.now(timezone.utc).isoformat(), **self.to_dict(top)}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+
+# ---------------------------------------------------------------------------
+# Оптимизатор
+# ---------------------------------------------------------------------------
+
+def _normal_cdf(z: np.ndarray) -> np.ndarray:
+    return 0.5 * (1 + np.vectorize(math.erf, otypes=[float])(z / math.sqrt(2)))
+
+
+def _expected_improvement(X: np.ndarray, y: np.ndarray, candidates: np.ndarray,
+                          length_scale: float = 0.2, noise: float = 1e-4, xi: float = 0.01) -> np.ndarray:
+    """Ожидаемое улучшение по гауссовскому процессу с RBF-ядром на [0, 1]^d"""
+    std = y.std() or 1.0
+    y = (y - y.mean()) / std
+
+    def kernel(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        d2 = ((a[:, None, :] - b[None, :, :]) ** 2).sum(-1)
+        return np.exp(-0.5 * d2 / length_scale ** 2)
+
+    K = kernel(X, X) + noise * np.eye(len(X))
+    L = np.linalg.cholesky(K)
+    alpha = np.linalg.solve(L.T, np.linalg.solve(L, y))
+    Ks = kernel(candidates, X)
+    mu = Ks @ alpha
+    v = np.linalg.solve(L, Ks.T)
+    sigma = np.sqrt(np.maximum(1.0 - (v ** 2).sum(0), 1e-12))
+
+    improvement = mu - y.max() - xi
+    z = improvement / sigma
+    pdf = np.exp(-0.5 * z ** 2) / math.sqrt(2 * math.pi)
+    return improvement * _normal_cdf(z) + sigma * pdf
+
+
+class StrategyOptimizer:
+    """
+    Поиск StrategyParams по событийному бэктесту одного символа.
+
+    OHLCV, режимы рынка и все нужные точкам индикаторы считаются один раз в
+    родительском процессе и кладутся в общую память; воркеры пула собирают из
+    них входы бэктеста без пересчета и без передачи массивов. Результаты
+    кэшируются по (данные, окно, настройки, параметры).
+    """
+
+    def __init__(self, bars: OHLCVView, space: ParamSpace, symbol: str = 'SYMBOL',
+                 objective: str = 'sharpe_ratio', min_trades: int = 10,
+                 config: Optional[BacktestConfig] = None, limits: Optional[RiskLimits] = None,
+                 base_params: Optional[StrategyParams] = None, max_workers: Optional[int] = None,
+                 cache_path: Optional[str] = DEFAULT_CACHE_PATH):
+        self.bars = bars
+        self.space = space
+        self.symbol = symbol
+        self.objective = objective
+        self.min_trades = min_trades
+        self.config = config or BacktestConfig()
+        self.limits = limits or RiskLimits()
+        self.base_params = base_params or StrategyParams()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache = EvaluationCache(cache_path) if cache_path else None
+        self.store = SharedArrayStore()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        self._high = np.ascontiguousarray(bars.high, dtype=np.float64)
+        self._low = np.ascontiguousarray(bars.low, dtype=np.float64)
+        self._close = np.ascontiguousarray(bars.close, dtype=np.float64)
+        digest = hashlib.sha1(np.ascontiguousarray(bars.ts, dtype=np.int64).tobytes())
+        for column in bars[1:]:
+            digest.update(np.ascontiguousarray(column, dtype=np.float64).tobytes())
+        self.data_fingerprint = digest.hexdigest()
+
+        arrays = {name: np.asarray(column) for name, column in zip(BAR_ARRAYS, bars)}
+        arrays[REGIME_ARRAY] = regime_codes(MarketRegimeDetector(), self._close)
+        self.store.add(arrays)
+
+    @classmethod
+    def from_path(cls, path: str, space: ParamSpace, **kwargs) -> 'StrategyOptimizer':
+        kwargs.setdefault('symbol', symbol_from_path(path))
+        return cls(load_bars(path), space, **kwargs)
+
+    def __enter__(self) -> 'StrategyOptimizer':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self.store.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    # -- оценка ---------------------------------------------------------------
+
+    def _full_params(self, point: Dict[str, Any]) -> Dict[str, Any]:
+        return {**asdict(self.base_params), **point}
+
+    def _cache_key(self, params: Dict[str, Any], start: int, end: int) -> str:
+        payload = {
+            'version': CACHE_VERSION,
+            'data': self.data_fingerprint,
+            'window': [start, end],
+            'symbol': self.symbol,
+            'config': asdict(self.config),
+            'limits': asdict(self.limits),
+            'params': params,
+        }
+        return hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _ensure_indicators(self, params_list: Iterable[Dict[str, Any]]):
+        groups = {
+            _indicator_group(name)
+            for params in params_list
+            for name in indicator_layout(StrategyParams(**params)).values()
+            if name not in self.store
+        }
+        arrays = {}
+        for group in sorted(groups):
+            arrays.update(compute_indicator_group(group, self._high, self._low, self._close))
+        self.store.add(arrays)
+
+    def _score(self, result: Dict[str, Any]) -> Optional[float]:
+        if 'error' in result:
+            return None
+        metrics = result['metrics']
+        value = metrics.get(self.objective)
+        if value is None or metrics.get('total_trades', 0) < self.min_trades:
+            return None
+        return float(value)
+
+    def _run_tasks(self, tasks: List[Tuple]) -> List[Dict[str, Any]]:
+        if self.max_workers == 1 or len(tasks) == 1:
+            return [_evaluate_task(task) for task in tasks]
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(tasks)
+        futures = {self._pool.submit(_evaluate_task, task): i for i, task in enumerate(tasks)}
+        step = max(1, len(tasks) // 10)
+        for done, future in enumerate(as_completed(futures), 1):
+            results[futures[future]] = future.result()
+            if done % step == 0 or done == len(tasks):
+                logger.info(f"Оценено {done}/{len(tasks)} точек")
+        return results
+
+    def evaluate(self, points: List[Dict[str, Any]], start: int = 0, end: Optional[int] = None) -> List[Evaluation]:
+        """Оценка точек на окне баров [start, end) с учетом кэша"""
+        end = len(self.bars) if end is None else end
+        full = [self._full_params(point) for point in points]
+        keys = [self._cache_key(params, start, end) for params in full]
+        known = self.cache.get_many(keys) if self.cache is not None else {}
+
+        pending: Dict[str, int] = {}
+        for i, key in enumerate(keys):
+            if key not in known and key not in pending:
+                pending[key] = i
+        if pending:
+            todo = [full[i] for i in pending.values()]
+            self._ensure_indicators(todo)
+            names = set(BAR_ARRAYS) | {REGIME_ARRAY}
+            tasks = []
+            for params in todo:
+                manifest = self.store.subset(names | set(indicator_layout(StrategyParams(**params)).values()))
+                tasks.append((params, manifest, start, end, self.symbol, self.config, self.limits))
+            computed = dict(zip(pending, self._run_tasks(tasks)))
+            if self.cache is not None:
+                self.cache.put_many([
+                    (key, full[i], computed[key]) for key, i in pending.items() if 'error' not in computed[key]
+                ])
+        else:
+            computed = {}
+
+        evaluations = []
+        for point, key in zip(points, keys):
+            result = known.get(key) or computed[key]
+            evaluations.append(Evaluation(
+                params=point,
+                score=self._score(result),
+                metrics=result.get('metrics', {}),
+                stats=result.get('stats', {}),
+                error=result.get('error'),
+                cached=key in known,
+            ))
+        return evaluations
+
+    # -- поиск ----------------------------------------------------------------
+
+    def grid_search(self, steps: int = 5, start: int = 0, end: Optional[int] = None) -> SearchResult:
+        started = time.monotonic()
+        evaluations = self.evaluate(self.space.grid(steps), start, end)
+        return SearchResult('grid', self.objective, evaluations, time.monotonic() - started,
+                            (start, len(self.bars) if end is None else end))
+
+    def random_search(self, n_points: int = 100, seed: Optional[int] = None,
+                      start: int = 0, end: Optional[int] = None) -> SearchResult:
+        started = time.monotonic()
+        points = self.space.sample(np.random.default_rng(seed), n_points)
+        evaluations = self.evaluate(points, start, end)
+        return SearchResult('random', self.objective, evaluations, time.monotonic() - started,
+                            (start, len(self.bars) if end is None else end))
+
+    def bayesian_search(self, n_points: int = 100, initial_points: Optional[int] = None,
+                        batch_size: Optional[int] = None, candidates: int = 2048, seed: Optional[int] = None,
+                        start: int = 0, end: Optional[int] = None) -> SearchResult:
+        """
+        Байесовский поиск: GP + expected improvement. Точки предлагаются пачками
+        по ``batch_size`` (по умолчанию - число воркеров), соседние кандидаты в
+        пачке подавляются, чтобы воркеры не считали почти одинаковые точки.
+        """
+        started = time.monotonic()
+        rng = np.random.default_rng(seed)
+        batch_size = batch_size or self.max_workers
+        initial_points = min(n_points, initial_points or max(10, 2 * batch_size))
+
+        evaluations = self.evaluate(self.space.sample(rng, initial_points), start, end)
+        seen = {json.dumps(e.params, sort_keys=True) for e in evaluations}
+        while len(evaluations) < n_points:
+            X = np.array([self.space.to_unit(e.params) for e in evaluations])
+            scores = [e.score for e in evaluations]
+            finite = [s for s in scores if s is not None]
+            # Неудачные точки (ошибка, мало сделок) считаются худшими
+            floor = min(finite) - 1.0 if finite else 0.0
+            y = np.array([floor if s is None else s for s in scores])
+
+            pool = [p for p in self.space.sample(rng, candidates) if json.dumps(p, sort_keys=True) not in seen]
+            if not pool:
+                break
+            U = np.array([self.space.to_unit(p) for p in pool])
+            ei = _expected_improvement(X, y, U)
+
+            batch = []
+            for _ in range(min(batch_size, n_points - len(evaluations), len(pool))):
+                i = int(np.argmax(ei))
+                if ei[i] == -np.inf:
+                    break
+                batch.append(pool[i])
+                # Подавление соседей выбранной точки
+                ei = ei * (1 - np.exp(-0.5 * ((U - U[i]) ** 2).sum(1) / 0.1 ** 2))
+                ei[i] = -np.inf
+            seen.update(json.dumps(p, sort_keys=True) for p in batch)
+            evaluations.extend(self.evaluate(batch, start, end))
+
+        return SearchResult('bayesian', self.objective, evaluations, time.monotonic() - started,
+                            (start, len(self.bars) if end is None else end))
+
+    def search(self, method: str = 'random', **kwargs) -> SearchResult:
+        methods = {'grid': self.grid_search, 'random': self.random_search, 'bayesian': self.bayesian_search}
+        if method not in methods:
+            raise ValueError(f"Неизвестный метод поиска: {method}")
+        return methods[method](**kwargs)
+
+    def walk_forward(self, train_bars: int, test_bars: int, folds: Optional[int] = None,
+                     anchored: bool = False, method: str = 'random', **search_kwargs) -> Dict[str, Any]:
+        """
+        Walk-forward: поиск на обучающем окне, проверка лучшей точки на следующем
+        тестовом окне, сдвиг на test_bars. Индикаторы посчитаны по всей истории и
+        причинны, поэтому тестовое окно не видит будущего, но и не прогревается заново.
+        """
+        started = time.monotonic()
+        n = len(self.bars)
+        report_folds = []
+        train_end = train_bars
+        while train_end + test_bars <= n and (folds is None or len(report_folds) < folds):
+            train_start = 0 if anchored else train_end - train_bars
+            search = self.search(method, start=train_start, end=train_end, **search_kwargs)
+            best = search.best
+            fold = {
+                'train': [train_start, train_end],
+                'test': [train_end, train_end + test_bars],
+                'evaluated': len(search.evaluations),
+                'best_params': best.params if best else None,
+                'in_sample_score': best.score if best else None,
+                'out_of_sample_score': None,
+                'out_of_sample': None,
+            }
+            if best is not None:
+                test = self.evaluate([best.params], train_end, train_end + test_bars)[0]
+                fold['out_of_sample_score'] = test.score
+                fold['out_of_sample'] = test.metrics
+            report_folds.append(fold)
+            logger.info(f"Walk-forward окно {len(report_folds)}: IS={fold['in_sample_score']} OOS={fold['out_of_sample_score']}")
+            train_end += test_bars
+
+        in_sample = [f['in_sample_score'] for f in report_folds if f['in_sample_score'] is not None]
+        out_of_sample = [f['out_of_sample_score'] for f in report_folds if f['out_of_sample_score'] is not None]
+        mean_is = float(np.mean(in_sample)) if in_sample else None
+        mean_oos = float(np.mean(out_of_sample)) if out_of_sample else None
+        return {
+            'method': method,
+            'objective': self.objective,
+            'anchored': anchored,
+            'folds': report_folds,
+            'mean_in_sample_score': mean_is,
+            'mean_out_of_sample_score': mean_oos,
+            # Доля результата на обучении, сохранившаяся вне выборки
+            'efficiency': mean_oos / mean_is if mean_is and mean_oos is not None else None,
+            'elapsed_seconds': round(time.monotonic() - started, 2),
+        }
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _parse_dimension(text: str) -> Tuple[str, Any]:
+    """name=lo:hi (диапазон) или name=a,b,c (варианты)"""
+    name, values = text.split('=', 1)
+
+    def number(value: str):
+        return int(value) if value.lstrip('-').isdigit() else float(value)
+
+    if ':' in values:
+        low, high = values.split(':', 1)
+        return name, (number(low), number(high))
+    return name, [number(value) for value in values.split(',')]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Mirai Agent StrategyParams optimizer")
+    parser.add_argument('path', help="Parquet/CSV файл с историей")
+    parser.add_argument('--space', action='append', required=True, help="name=lo:hi или name=a,b,c")
+    parser.add_argument('--method', choices=('grid', 'random', 'bayesian'), default='random')
+    parser.add_argument('--points', type=int, default=200, help="число точек (random/bayesian)")
+    parser.add_argument('--steps', type=int, default=5, help="шагов на диапазон (grid)")
+    parser.add_argument('--objective', default='sharpe_ratio')
+    parser.add_argument('--min-trades', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH)
+    parser.add_argument('--output', default=DEFAULT_LEADERBOARD_PATH)
+    parser.add_argument('--walk-forward', action='store_true')
+    parser.add_argument('--train-bars', type=int, default=None)
+    parser.add_argument('--test-bars', type=int, default=None)
+    parser.add_argument('--folds', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    space = ParamSpace(dict(_parse_dimension(item) for item in args.space))
+    if args.method == 'grid':
+        search_kwargs = {'steps': args.steps}
+    else:
+        search_kwargs = {'n_points': args.points, 'seed': args.seed}
+
+    with StrategyOptimizer.from_path(args.path, space, objective=args.objective, min_trades=args.min_trades,
+                                     max_workers=args.workers, cache_path=args.cache) as optimizer:
+        if args.walk_forward:
+            n = len(optimizer.bars)
+            train_bars = args.train_bars or n // 2
+            test_bars = args.test_bars or max(1, (n - train_bars) // (args.folds or 4))
+            report = optimizer.walk_forward(train_bars, test_bars, args.folds, method=args.method, **search_kwargs)
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+            with open(args.output, 'w') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            for i, fold in enumerate(report['folds'], 1):
+                print(f"fold {i}: IS={fold['in_sample_score']} OOS={fold['out_of_sample_score']} {fold['best_params']}")
+            print(f"efficiency={report['efficiency']} -> {args.output}")
+            return
+
+        result = optimizer.search(args.method, **search_kwargs)
+        for row in result.leaderboard(10):
+            print(f"#{row['rank']:<3} {args.objective}={row['score']:<8} return={row['total_return']:>8}% "
+                  f"dd={row['max_drawdown']:>7}% trades={row['total_trades']:<6} {json.dumps(row['params'])}")
+        print(f"{len(result.evaluations)} точек за {result.elapsed:.1f}с -> {result.save(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
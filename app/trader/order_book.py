@@ -0,0 +1,360 @@
+"""
+Local L2 order book maintained from Binance diff-depth streams
+"""
+
+import asyncio
+import inspect
+import logging
+from bisect import bisect_left, bisect_right
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class OrderBookSyncError(Exception):
+    """Raised when a diff-depth event does not continue the local book"""
+
+
+class BookSide:
+    """
+    One side of the book as parallel sorted arrays, best level first.
+    Bids are keyed by negated price so both sides sort ascending from the top.
+    """
+
+    def __init__(self, is_bid: bool):
+        self.is_bid = is_bid
+        self._keys: List[float] = []
+        self._qty: List[float] = []
+        self._cum_qty: Optional[np.ndarray] = None
+        self._cum_notional: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _key(self, price: float) -> float:
+        return -price if self.is_bid else price
+
+    def _price(self, key: float) -> float:
+        return -key if self.is_bid else key
+
+    def clear(self):
+        self._keys.clear()
+        self._qty.clear()
+        self._cum_qty = None
+
+    def set(self, price: float, qty: float):
+        """Set the quantity at a price level; zero removes the level"""
+        key = self._key(price)
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            if qty == 0:
+                del self._keys[i]
+                del self._qty[i]
+            else:
+                self._qty[i] = qty
+        elif qty != 0:
+            self._keys.insert(i, key)
+            self._qty.insert(i, qty)
+        self._cum_qty = None
+
+    def best(self) -> Optional[Tuple[float, float]]:
+        if not self._keys:
+            return None
+        return self._price(self._keys[0]), self._qty[0]
+
+    def qty_at(self, price: float) -> float:
+        """Resting quantity at exactly ``price``"""
+        key = self._key(price)
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return self._qty[i]
+        return 0.0
+
+    def levels(self, n: Optional[int] = None) -> List[Tuple[float, float]]:
+        keys = self._keys if n is None else self._keys[:n]
+        return [(self._price(key), qty) for key, qty in zip(keys, self._qty)]
+
+    def _prefix(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Cumulative quantity/notional from the top, rebuilt lazily after updates"""
+        if self._cum_qty is None:
+            qty = np.asarray(self._qty, dtype=np.float64)
+            prices = np.abs(np.asarray(self._keys, dtype=np.float64))
+            self._cum_qty = np.cumsum(qty)
+            self._cum_notional = np.cumsum(qty * prices)
+        return self._cum_qty, self._cum_notional
+
+    def cumulative_qty(self, n_levels: int) -> float:
+        """Total quantity in the top ``n_levels`` levels"""
+        if not self._keys or n_levels <= 0:
+            return 0.0
+        cum_qty, _ = self._prefix()
+        return float(cum_qty[min(n_levels, len(cum_qty)) - 1])
+
+    def qty_through(self, price: float) -> float:
+        """Total quantity at prices at least as good as ``price``"""
+        i = bisect_right(self._keys, self._key(price))
+        if i == 0:
+            return 0.0
+        cum_qty, _ = self._prefix()
+        return float(cum_qty[i - 1])
+
+    def vwap_for_size(self, size: float) -> Optional[float]:
+        """Average fill price when sweeping ``size`` from the top; None if depth is insufficient"""
+        if size <= 0 or not self._keys:
+            return None
+        cum_qty, cum_notional = self._prefix()
+        i = int(np.searchsorted(cum_qty, size))
+        if i >= len(cum_qty):
+            return None
+        filled_qty = cum_qty[i - 1] if i else 0.0
+        filled_notional = cum_notional[i - 1] if i else 0.0
+        notional = filled_notional + (size - filled_qty) * abs(self._keys[i])
+        return float(notional / size)
+
+
+class LocalOrderBook:
+    """Order book for one symbol, synced from a REST snapshot plus diff-depth events"""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = BookSide(is_bid=True)
+        self.asks = BookSide(is_bid=False)
+        self.last_update_id = 0
+        self.event_time = 0
+        self.synced = False
+        self._first_event = True
+        self.updates_applied = 0
+
+    def apply_snapshot(self, snapshot: Dict[str, Any]):
+        """Reset the book from a REST depth snapshot"""
+        self.bids.clear()
+        self.asks.clear()
+        for price, qty in snapshot.get('bids', []):
+            self.bids.set(float(price), float(qty))
+        for price, qty in snapshot.get('asks', []):
+            self.asks.set(float(price), float(qty))
+        self.last_update_id = int(snapshot['lastUpdateId'])
+        self.event_time = int(snapshot.get('E', 0))
+        self.synced = True
+        self._first_event = True
+
+    def apply_diff(self, first_update_id: int, final_update_id: int, prev_final_update_id: int,
+                   bids: List[Tuple[float, float]], asks: List[Tuple[float, float]],
+                   event_time: int = 0) -> bool:
+        """
+        Apply a diff-depth event. Returns False for stale events that are
+        skipped, raises OrderBookSyncError when the sequence is broken.
+        """
+        if not self.synced:
+            raise OrderBookSyncError(f"{self.symbol}: book is not synced")
+
+        if final_update_id < self.last_update_id:
+            return False
+
+        if self._first_event:
+            # First event must straddle the snapshot id (futures: U <= id <= u, spot: U <= id + 1 <= u)
+            if not first_update_id <= self.last_update_id + 1 <= final_update_id + 1:
+                self.synced = False
+                raise OrderBookSyncError(
+                    f"{self.symbol}: first event {first_update_id}-{final_update_id} "
+                    f"does not cover snapshot {self.last_update_id}"
+                )
+        elif prev_final_update_id:
+            if prev_final_update_id != self.last_update_id:
+                self.synced = False
+                raise OrderBookSyncError(
+                    f"{self.symbol}: expected pu={self.last_update_id}, got {prev_final_update_id}"
+                )
+        elif first_update_id != self.last_update_id + 1:
+            self.synced = False
+            raise OrderBookSyncError(
+                f"{self.symbol}: expected U={self.last_update_id + 1}, got {first_update_id}"
+            )
+
+        for price, qty in bids:
+            self.bids.set(price, qty)
+        for price, qty in asks:
+            self.asks.set(price, qty)
+
+        self.last_update_id = final_update_id
+        self.event_time = event_time or self.event_time
+        self._first_event = False
+        self.updates_applied += 1
+        return True
+
+    # Queries
+
+    def best_bid(self) -> Optional[Tuple[float, float]]:
+        return self.bids.best()
+
+    def best_ask(self) -> Optional[Tuple[float, float]]:
+        return self.asks.best()
+
+    def mid_price(self) -> Optional[float]:
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return (bid[0] + ask[0]) / 2
+
+    def spread(self) -> Optional[float]:
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return ask[0] - bid[0]
+
+    def depth_at(self, side: str, price: float) -> float:
+        """Resting quantity at a price on 'bid' or 'ask' side"""
+        return (self.bids if side == 'bid' else self.asks).qty_at(price)
+
+    def vwap(self, side: str, size: float) -> Optional[float]:
+        """Expected average price for a market order: 'buy' sweeps asks, 'sell' sweeps bids"""
+        return (self.asks if side.lower() == 'buy' else self.bids).vwap_for_size(size)
+
+    def imbalance(self, levels: int = 10) -> float:
+        """(bid qty - ask qty) / (bid qty + ask qty) over the top ``levels`` levels"""
+        bid_qty = self.bids.cumulative_qty(levels)
+        ask_qty = self.asks.cumulative_qty(levels)
+        total = bid_qty + ask_qty
+        return (bid_qty - ask_qty) / total if total else 0.0
+
+    def to_depth(self, limit: int = 100) -> Dict[str, Any]:
+        """Book in the REST /depth response layout"""
+        return {
+            'lastUpdateId': self.last_update_id,
+            'E': self.event_time,
+            'bids': [[str(price), str(qty)] for price, qty in self.bids.levels(limit)],
+            'asks': [[str(price), str(qty)] for price, qty in self.asks.levels(limit)],
+        }
+
+    def summary(self, levels: int = 10) -> Dict[str, Any]:
+        """Top-of-book snapshot published to strategies"""
+        bid, ask = self.bids.best(), self.asks.best()
+        return {
+            'symbol': self.symbol,
+            'best_bid': bid[0] if bid else None,
+            'best_bid_qty': bid[1] if bid else None,
+            'best_ask': ask[0] if ask else None,
+            'best_ask_qty': ask[1] if ask else None,
+            'spread': self.spread(),
+            'mid_price': self.mid_price(),
+            'imbalance': self.imbalance(levels),
+            'last_update_id': self.last_update_id,
+            'event_time': self.event_time,
+        }
+
+
+SnapshotFetcher = Callable[[str, int], Union[Dict[str, Any], Awaitable[Dict[str, Any]]]]
+
+
+class OrderBookManager:
+    """
+    Keeps local books in sync for many symbols.
+    Feed it DepthRecord events via ``on_depth`` (BinanceDataStream diff-depth callback);
+    events arriving before a snapshot are buffered and replayed.
+    """
+
+    def __init__(self, snapshot_fetcher: SnapshotFetcher, depth_limit: int = 1000, max_buffer: int = 10000):
+        self.snapshot_fetcher = snapshot_fetcher
+        self.depth_limit = depth_limit
+        self.max_buffer = max_buffer
+        self.books: Dict[str, LocalOrderBook] = {}
+        self.listeners: List[Callable[[LocalOrderBook], None]] = []
+        self.resyncs: Dict[str, int] = {}
+        self._pending: Dict[str, List[Any]] = {}
+        self._syncing: set = set()
+
+    def add_listener(self, callback: Callable[[LocalOrderBook], None]):
+        """Called with the book after every applied update"""
+        self.listeners.append(callback)
+
+    def get_book(self, symbol: str) -> Optional[LocalOrderBook]:
+        book = self.books.get(symbol.upper())
+        return book if book is not None and book.synced else None
+
+    def on_depth(self, record):
+        """Diff-depth callback (DepthRecord)"""
+        symbol = record.symbol
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = LocalOrderBook(symbol)
+
+        if not book.synced:
+            pending = self._pending.setdefault(symbol, [])
+            if len(pending) < self.max_buffer:
+                pending.append(record)
+            if symbol not in self._syncing:
+                self._syncing.add(symbol)
+                asyncio.get_running_loop().create_task(self._sync(symbol))
+            return
+
+        try:
+            if self._apply(book, record):
+                self._publish(book)
+        except OrderBookSyncError as e:
+            logger.warning(f"Order book out of sync, resyncing: {e}")
+            self.resyncs[symbol] = self.resyncs.get(symbol, 0) + 1
+            self.on_depth(record)
+
+    def _apply(self, book: LocalOrderBook, record) -> bool:
+        return book.apply_diff(
+            record.first_update_id, record.final_update_id, record.prev_final_update_id,
+            record.bids, record.asks, record.event_time
+        )
+
+    async def _fetch_snapshot(self, symbol: str) -> Dict[str, Any]:
+        if inspect.iscoroutinefunction(self.snapshot_fetcher):
+            return await self.snapshot_fetcher(symbol, self.depth_limit)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.snapshot_fetcher, symbol, self.depth_limit)
+
+    async def _sync(self, symbol: str, attempts: int = 5):
+        """Fetch a snapshot and replay buffered events until the book is consistent"""
+        try:
+            for attempt in range(attempts):
+                try:
+                    snapshot = await self._fetch_snapshot(symbol)
+                except Exception as e:
+                    logger.error(f"Depth snapshot for {symbol} failed: {e}")
+                    await asyncio.sleep(min(2 ** attempt, 30))
+                    continue
+
+                book = self.books[symbol]
+                book.apply_snapshot(snapshot)
+                pending = self._pending.pop(symbol, [])
+                try:
+                    for record in pending:
+                        self._apply(book, record)
+                except OrderBookSyncError as e:
+                    # Snapshot older than the buffered stream: fetch a fresher one
+                    logger.warning(f"Replay failed for {symbol}: {e}")
+                    self._pending[symbol] = [r for r in pending if r.final_update_id > book.last_update_id]
+                    continue
+
+                logger.info(f"Order book {symbol} synced at update {book.last_update_id}")
+                self._publish(book)
+                return
+            logger.error(f"Giving up syncing order book {symbol} after {attempts} attempts")
+        finally:
+            self._syncing.discard(symbol)
+
+    def _publish(self, book: LocalOrderBook):
+        for listener in self.listeners:
+            try:
+                listener(book)
+            except Exception as e:
+                logger.error(f"Order book listener error: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            symbol: {
+                'synced': book.synced,
+                'bid_levels': len(book.bids),
+                'ask_levels': len(book.asks),
+                'updates_applied': book.updates_applied,
+                'resyncs': self.resyncs.get(symbol, 0),
+                'last_update_id': book.last_update_id,
+            }
+            for symbol, book in self.books.items()
+        }
@@ -8,7 +8,7 @@ from enum import Enum
 from typing import Any
 
 from .binance_client import BinanceClient
-from .exchange_info import ExchangeInfo
+from .exchange_info import ExchangeInfo, default_filter_index
 
 logger = logging.getLogger(__name__)
 
@@ -339,13 +339,10 @@ def validate_and_round_qty(symbol: str, qty: float, sl_distance: float, margin:
         ValueError: If quantity is below exchange minimums
     """
     try:
-        # Initialize exchange info to get filters
-        exchange_info = ExchangeInfo()
-
-        # Get exchange filters
-        filters = exchange_info.get_symbol_filters(symbol)
-        min_qty = float(filters["minQty"])
-        min_notional = float(filters["minNotional"])
+        # Precompiled filters from the shared index (no parsing or fetch on this path)
+        filters = default_filter_index.get(symbol)
+        min_qty = filters.min_qty
+        min_notional = filters.min_notional
 
         # Calculate quantity by stop loss (risk-based sizing)
         if sl_distance > 0:
@@ -364,7 +361,7 @@ def validate_and_round_qty(symbol: str, qty: float, sl_distance: float, margin:
             raise ValueError(f"Quantity {safe_qty} below minQty {min_qty} for {symbol}")
 
         # Round to exchange step size
-        validated_qty = exchange_info.validate_quantity(symbol, safe_qty)
+        validated_qty = filters.round_qty(safe_qty)
 
         # Check notional value (assuming current price from exchange info)
         # For this validator, we'll use a mock price since we don't have real-time data
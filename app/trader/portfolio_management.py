@@ -7,12 +7,21 @@ import logging
 import json
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass, asdict
 from enum import Enum
 import sys
 import os
 
+try:
+    from .bar_store import BarStore
+    from .covariance import EWCovariance
+    from .portfolio_solvers import PortfolioSolvers, SolverResult
+except ImportError:
+    from bar_store import BarStore
+    from covariance import EWCovariance
+    from portfolio_solvers import PortfolioSolvers, SolverResult
+
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -30,6 +39,9 @@ class RebalanceStrategy(Enum):
     THRESHOLD_BASED = "threshold_based" # По отклонению
     VOLATILITY_BASED = "volatility_based" # По волатильности
     RISK_PARITY = "risk_parity"        # Равенство рисков
+    EQUAL_RISK_CONTRIBUTION = "equal_risk_contribution"  # Равные вклады в риск по ковариации
+    MINIMUM_VARIANCE = "minimum_variance"  # Минимальная дисперсия
+    MAX_SHARPE = "max_sharpe"          # Максимальный коэффициент Шарпа
 
 @dataclass
 class AssetAllocation:
@@ -68,43 +80,62 @@ class RebalanceAction:
     reasoning: str
 
 class CorrelationAnalyzer:
-    """Анализатор корреляций между активами"""
-    
-    def __init__(self):
-        # Матрица корреляций (симуляция)
-        self.correlation_matrix = {
-            "BTCUSDT": {"ETHUSDT": 0.85, "ADAUSDT": 0.70, "EURUSD": -0.20},
-            "ETHUSDT": {"BTCUSDT": 0.85, "ADAUSDT": 0.75, "EURUSD": -0.15},
-            "ADAUSDT": {"BTCUSDT": 0.70, "ETHUSDT": 0.75, "EURUSD": -0.10},
-            "EURUSD": {"BTCUSDT": -0.20, "ETHUSDT": -0.15, "ADAUSDT": -0.10}
-        }
+    """Анализатор корреляций между активами по реальным доходностям из BarStore"""
+    
+    def __init__(self, bar_store: Optional[BarStore] = None, interval: str = "1h",
+                 halflife: float = 120.0, min_periods: int = 30,
+                 shrinkage: Union[None, float, str] = "oas"):
+        # Экспоненциально взвешенная ковариация, обновляется инкрементально при refresh()
+        self.bar_store = bar_store
+        self.shrinkage = shrinkage
+        self.engine = EWCovariance(halflife=halflife, min_periods=min_periods, interval=interval)
+    
+    def refresh(self, symbols: Optional[List[str]] = None) -> int:
+        """Учет новых закрытых баров из BarStore; возвращает число обработанных баров"""
+        return self.engine.sync(self.bar_store, symbols)
+    
+    def correlation_matrix(self, symbols: List[str]) -> np.ndarray:
+        """Матрица корреляций (0 для пар без достаточной истории)"""
+        corr = self.engine.correlation(symbols, shrinkage=self.shrinkage)
+        corr = np.where(np.isfinite(corr), corr, 0.0)
+        np.fill_diagonal(corr, 1.0)
+        return corr
+    
+    def covariance_matrix(self, allocations: List[AssetAllocation]) -> np.ndarray:
+        """
+        Дневная ковариационная матрица активов портфеля.
+        Для активов без истории - волатильность по риск-скору (2% за единицу) и нулевые корреляции.
+        """
+        symbols = [asset.symbol for asset in allocations]
+        cov = self.engine.covariance(symbols, shrinkage=self.shrinkage) * self.engine.bars_per_day()
+        missing = np.flatnonzero(~np.isfinite(np.diagonal(cov)))
+        cov = np.where(np.isfinite(cov), cov, 0.0)
+        fallback_volatility = np.array([asset.risk_score for asset in allocations]) * 0.02
+        cov[missing, missing] = fallback_volatility[missing] ** 2
+        return cov
+    
+    def expected_returns(self, allocations: List[AssetAllocation]) -> np.ndarray:
+        """Дневная ожидаемая доходность (EW среднее); 0 для активов без истории"""
+        mean = self.engine.mean([asset.symbol for asset in allocations]) * self.engine.bars_per_day()
+        return np.where(np.isfinite(mean), mean, 0.0)
     
     def get_correlation(self, symbol1: str, symbol2: str) -> float:
         """Получение корреляции между двумя активами"""
-        if symbol1 in self.correlation_matrix and symbol2 in self.correlation_matrix[symbol1]:
-            return self.correlation_matrix[symbol1][symbol2]
-        elif symbol2 in self.correlation_matrix and symbol1 in self.correlation_matrix[symbol2]:
-            return self.correlation_matrix[symbol2][symbol1]
-        else:
-            return 0.0  # Нет данных о корреляции
+        return float(self.correlation_matrix([symbol1, symbol2])[0, 1])
     
     def calculate_portfolio_correlation_risk(self, allocations: List[AssetAllocation]) -> float:
-        """Расчет корреляционного риска портфеля"""
-        if len(allocations) < 2:
+        """Расчет корреляционного риска портфеля: средний |corr_ij| * w_i * w_j по парам"""
+        n = len(allocations)
+        if n < 2:
             return 0.0
         
-        total_correlation_risk = 0.0
-        pair_count = 0
+        weights = np.array([asset.current_weight for asset in allocations])
+        abs_corr = np.abs(self.correlation_matrix([asset.symbol for asset in allocations]))
+        np.fill_diagonal(abs_corr, 0.0)
         
-        for i, asset1 in enumerate(allocations):
-            for j, asset2 in enumerate(allocations[i+1:], i+1):
-                correlation = abs(self.get_correlation(asset1.symbol, asset2.symbol))
-                weight_product = asset1.current_weight * asset2.current_weight
-                risk_contribution = correlation * weight_product
-                total_correlation_risk += risk_contribution
-                pair_count += 1
-        
-        return total_correlation_risk / max(1, pair_count) if pair_count > 0 else 0.0
+        # Сумма по парам i<j = половина квадратичной формы
+        pair_count = n * (n - 1) / 2
+        return float(weights @ abs_corr @ weights / 2 / pair_count)
 
 class RiskMetricsCalculator:
     """Калькулятор метрик риска"""
@@ -112,29 +143,27 @@ class RiskMetricsCalculator:
     @staticmethod
     def calculate_portfolio_volatility(allocations: List[AssetAllocation], 
                                      correlation_analyzer: CorrelationAnalyzer) -> float:
-        """Расчет волатильности портфеля"""
+        """Расчет волатильности портфеля: sqrt(w' Σ w)"""
         if not allocations:
             return 0.0
         
-        # Упрощенный расчет волатильности портфеля
-        portfolio_variance = 0.0
-        
-        # Индивидуальные риски
-        for asset in allocations:
-            # Предполагаем волатильность на основе риск-скора
-            asset_volatility = asset.risk_score * 0.02  # 2% за единицу риска
-            portfolio_variance += (asset.current_weight ** 2) * (asset_volatility ** 2)
-        
-        # Корреляционные эффекты
-        for i, asset1 in enumerate(allocations):
-            for j, asset2 in enumerate(allocations[i+1:], i+1):
-                correlation = correlation_analyzer.get_correlation(asset1.symbol, asset2.symbol)
-                vol1 = asset1.risk_score * 0.02
-                vol2 = asset2.risk_score * 0.02
-                covariance = correlation * vol1 * vol2
-                portfolio_variance += 2 * asset1.current_weight * asset2.current_weight * covariance
+        weights = np.array([asset.current_weight for asset in allocations])
+        cov = correlation_analyzer.covariance_matrix(allocations)
+        return float(np.sqrt(max(0.0, weights @ cov @ weights)))
+    
+    @staticmethod
+    def calculate_risk_contributions(allocations: List[AssetAllocation],
+                                     correlation_analyzer: CorrelationAnalyzer) -> Dict[str, float]:
+        """Доли активов в волатильности портфеля: w_i (Σw)_i / w'Σw"""
+        if not allocations:
+            return {}
         
-        return np.sqrt(max(0, portfolio_variance))
+        weights = np.array([asset.current_weight for asset in allocations])
+        marginal = correlation_analyzer.covariance_matrix(allocations) @ weights
+        variance = float(weights @ marginal)
+        if variance <= 0:
+            return {asset.symbol: 0.0 for asset in allocations}
+        return {asset.symbol: float(c) for asset, c in zip(allocations, weights * marginal / variance)}
     
     @staticmethod
     def calculate_diversification_ratio(allocations: List[AssetAllocation]) -> float:
@@ -143,7 +172,8 @@ class RiskMetricsCalculator:
             return 0.0
         
         # Коэффициент Херфиндаля-Хиршмана (обратный)
-        hhi = sum(weight.current_weight ** 2 for weight in allocations)
+        weights = np.array([asset.current_weight for asset in allocations])
+        hhi = float(weights @ weights)
         max_diversification = 1.0 / len(allocations)  # Равномерное распределение
         
         return max(0, 1 - hhi / max_diversification) if max_diversification > 0 else 0.0
@@ -154,28 +184,42 @@ class RiskMetricsCalculator:
         if not allocations:
             return 0.0
         
-        # Максимальная доля активов
-        max_weight = max(asset.current_weight for asset in allocations)
-        
-        # Доля топ-3 активов
-        sorted_weights = sorted([asset.current_weight for asset in allocations], reverse=True)
-        top3_weight = sum(sorted_weights[:3])
+        # Максимальная доля и доля топ-3 активов
+        sorted_weights = np.sort([asset.current_weight for asset in allocations])[::-1]
+        max_weight = float(sorted_weights[0])
+        top3_weight = float(sorted_weights[:3].sum())
         
         return max(max_weight, top3_weight / 3.0)
 
 class PortfolioOptimizer:
     """Оптимизатор портфеля"""
     
-    def __init__(self, strategy: RebalanceStrategy = RebalanceStrategy.THRESHOLD_BASED):
+    SOLVER_STRATEGIES = (
+        RebalanceStrategy.EQUAL_RISK_CONTRIBUTION,
+        RebalanceStrategy.MINIMUM_VARIANCE,
+        RebalanceStrategy.MAX_SHARPE,
+    )
+    
+    def __init__(self, strategy: RebalanceStrategy = RebalanceStrategy.THRESHOLD_BASED,
+                 correlation_analyzer: Optional[CorrelationAnalyzer] = None,
+                 max_turnover: Optional[float] = None, risk_free_rate: float = 0.0):
         self.strategy = strategy
-        self.correlation_analyzer = CorrelationAnalyzer()
+        self.correlation_analyzer = correlation_analyzer or CorrelationAnalyzer()
         self.risk_calculator = RiskMetricsCalculator()
+        # Солверы хранят факторизации и прошлое решение между ребалансировками (warm start)
+        self.solvers = PortfolioSolvers()
+        self.max_turnover = max_turnover  # Лимит оборота sum|w - w_current| за ребалансировку
+        self.risk_free_rate = risk_free_rate  # Дневная безрисковая ставка
+        self.last_result: Optional[SolverResult] = None
     
     def optimize_allocation(self, allocations: List[AssetAllocation], 
                           market_conditions: Dict) -> List[AssetAllocation]:
         """Оптимизация распределения активов"""
         
-        if self.strategy == RebalanceStrategy.THRESHOLD_BASED:
+        self.last_result = None
+        if self.strategy in self.SOLVER_STRATEGIES:
+            return self._solver_optimization(allocations, market_conditions)
+        elif self.strategy == RebalanceStrategy.THRESHOLD_BASED:
             return self._threshold_optimization(allocations)
         elif self.strategy == RebalanceStrategy.VOLATILITY_BASED:
             return self._volatility_optimization(allocations, market_conditions)
@@ -252,6 +296,47 @@ class PortfolioOptimizer:
         
         return self._normalize_weights(optimized)
     
+    def _solver_optimization(self, allocations: List[AssetAllocation],
+                             market_conditions: Dict) -> List[AssetAllocation]:
+        """
+        ERC / минимальная дисперсия / максимальный Шарп по ковариационной матрице.
+        Лимиты min_weight/max_weight и оборот (market_conditions['max_turnover'] или
+        max_turnover) учитываются MV и Sharpe; ERC - long-only без лимитов (решение единственно).
+        Ожидаемые доходности для Sharpe - market_conditions['expected_returns'] или EW среднее.
+        """
+        if not allocations:
+            return allocations
+        
+        cov = self.correlation_analyzer.covariance_matrix(allocations)
+        lower = np.array([asset.min_weight for asset in allocations])
+        upper = np.array([asset.max_weight for asset in allocations])
+        current = np.array([asset.current_weight for asset in allocations])
+        max_turnover = market_conditions.get('max_turnover', self.max_turnover)
+        
+        try:
+            if self.strategy == RebalanceStrategy.EQUAL_RISK_CONTRIBUTION:
+                result = self.solvers.equal_risk_contribution(cov)
+            elif self.strategy == RebalanceStrategy.MINIMUM_VARIANCE:
+                result = self.solvers.minimum_variance(cov, lower, upper, current, max_turnover)
+            else:
+                mu = self.correlation_analyzer.expected_returns(allocations)
+                overrides = market_conditions.get('expected_returns') or {}
+                mu = np.array([overrides.get(asset.symbol, m) for asset, m in zip(allocations, mu)])
+                result = self.solvers.max_sharpe(cov, mu, lower, upper, current, max_turnover,
+                                                 risk_free=self.risk_free_rate)
+        except (ValueError, np.linalg.LinAlgError) as e:
+            logger.error(f"Ошибка оптимизатора {self.strategy.value}: {e}")
+            return allocations
+        
+        for asset, weight in zip(allocations, result.weights):
+            asset.target_weight = float(weight)
+        self.last_result = result
+        
+        if not result.converged:
+            logger.warning(f"Оптимизатор {result.method} не сошелся за {result.iterations} итераций")
+        logger.info(f"Оптимизация {result.method}: {len(allocations)} активов за {result.solve_time_ms:.1f} мс")
+        return allocations
+    
     def _normalize_weights(self, allocations: List[AssetAllocation]) -> List[AssetAllocation]:
         """Нормализация весов до суммы 1.0"""
         total_weight = sum(asset.target_weight for asset in allocations)
@@ -265,12 +350,14 @@ class PortfolioOptimizer:
 class PortfolioManager:
     """Основной менеджер портфеля"""
     
-    def __init__(self, initial_balance: float = 10000.0):
+    def __init__(self, initial_balance: float = 10000.0, bar_store: Optional[BarStore] = None,
+                 interval: str = "1h"):
         self.initial_balance = initial_balance
         self.current_balance = initial_balance
         self.allocations: List[AssetAllocation] = []
-        self.optimizer = PortfolioOptimizer()
-        self.correlation_analyzer = CorrelationAnalyzer()
+        # Одна ковариационная модель на менеджер и оптимизатор
+        self.correlation_analyzer = CorrelationAnalyzer(bar_store=bar_store, interval=interval)
+        self.optimizer = PortfolioOptimizer(correlation_analyzer=self.correlation_analyzer)
         self.risk_calculator = RiskMetricsCalculator()
         
         # История ребалансировок
@@ -315,6 +402,9 @@ class PortfolioManager:
         total_pnl = total_value - self.initial_balance
         daily_return = total_pnl / self.initial_balance if self.initial_balance > 0 else 0.0
         
+        # Свежие бары из BarStore
+        self.correlation_analyzer.refresh([asset.symbol for asset in self.allocations])
+        
         # Риск-метрики
         volatility = self.risk_calculator.calculate_portfolio_volatility(
             self.allocations, self.correlation_analyzer
@@ -367,6 +457,7 @@ class PortfolioManager:
             return True, f"Высокая рыночная волатильность: {market_volatility:.1%}"
         
         # Критерий корреляционного риска
+        self.correlation_analyzer.refresh([asset.symbol for asset in self.allocations])
         correlation_risk = self.correlation_analyzer.calculate_portfolio_correlation_risk(self.allocations)
         if correlation_risk > 0.5:  # Высокая корреляция
             return True, f"Высокий корреляционный риск: {correlation_risk:.1%}"
@@ -378,7 +469,8 @@ class PortfolioManager:
         
         logger.info("Начало ребалансировки портфеля")
         
-        # Оптимизация распределения
+        # Оптимизация распределения по свежей ковариации
+        self.correlation_analyzer.refresh([asset.symbol for asset in self.allocations])
         optimized_allocations = self.optimizer.optimize_allocation(self.allocations, market_conditions)
         self.allocations = optimized_allocations
         
@@ -413,6 +505,17 @@ class PortfolioManager:
             "market_conditions": market_conditions,
             "actions": [asdict(action) for action in actions]
         }
+        result = self.optimizer.last_result
+        if result is not None:
+            rebalance_record["optimizer"] = {
+                "method": result.method,
+                "solve_time_ms": result.solve_time_ms,
+                "iterations": result.iterations,
+                "converged": result.converged,
+                "volatility": result.volatility,
+                "sharpe": result.sharpe,
+                "turnover": result.turnover,
+            }
         
         self.rebalance_history.append(rebalance_record)
         self.last_rebalance = datetime.now()
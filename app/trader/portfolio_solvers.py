@@ -0,0 +1,344 @@
+"""
+Vectorized portfolio optimizers over a covariance matrix
+
+- Equal risk contribution: Newton's method on Spinu's convex formulation
+- Minimum variance and maximum Sharpe with box, budget and turnover constraints:
+  ADMM on the QP, budget handled in the linear step (cached inverse of
+  Sigma + rho*I), box + turnover in an exact projection; maximum Sharpe searches
+  the risk tolerance along that constrained frontier for the Sharpe optimum
+
+Solvers keep factorizations and the last solution between calls, so a rebalance
+with an unchanged covariance only pays for the warm-started iterations.
+"""
+
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    from scipy.linalg import cho_factor, cho_solve
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class SolverResult:
+    """Optimizer output with diagnostics"""
+    weights: np.ndarray
+    method: str
+    solve_time_ms: float
+    iterations: int
+    converged: bool
+    volatility: float
+    expected_return: Optional[float] = None
+    sharpe: Optional[float] = None
+    turnover: Optional[float] = None
+    info: Dict[str, float] = field(default_factory=dict)
+
+
+class _Factorization:
+    """Cholesky factorization of a symmetric positive definite matrix (SciPy when available)"""
+
+    def __init__(self, matrix: np.ndarray):
+        if SCIPY_AVAILABLE:
+            self._factor = cho_factor(matrix, lower=True, check_finite=False)
+        else:
+            self._factor = np.linalg.cholesky(matrix)
+
+    def solve(self, rhs: np.ndarray) -> np.ndarray:
+        if SCIPY_AVAILABLE:
+            return cho_solve(self._factor, rhs, check_finite=False)
+        return np.linalg.solve(self._factor.T, np.linalg.solve(self._factor, rhs))
+
+
+def project_box_turnover(v: np.ndarray, lower: np.ndarray, upper: np.ndarray,
+                         anchor: Optional[np.ndarray] = None, max_turnover: Optional[float] = None) -> np.ndarray:
+    """
+    Euclidean projection onto {lower <= w <= upper, ||w - anchor||_1 <= max_turnover}.
+
+    The solution is w = clip(anchor + soft(v - anchor, lam)); the turnover is a
+    piecewise-linear non-increasing function of lam, so lam is found exactly from
+    its sorted breakpoints (O(n log n)). ``anchor`` must lie inside the box.
+    """
+    clipped = np.clip(v, lower, upper)
+    if anchor is None or max_turnover is None:
+        return clipped
+    if np.abs(clipped - anchor).sum() <= max_turnover:
+        return clipped
+
+    diff = v - anchor
+    size = np.abs(diff)
+    cap = np.where(diff >= 0, upper - anchor, anchor - lower)  # room to move towards v
+    start = np.maximum(size - cap, 0.0)  # lam below which coordinate i sits at its cap
+
+    # turnover(lam) = sum_i min(max(size_i - lam, 0), cap_i): slope -1 on [start_i, size_i]
+    events = np.concatenate([start, size])
+    slopes = np.concatenate([-np.ones_like(start), np.ones_like(size)])
+    order = np.argsort(events, kind='stable')
+    events, slopes = events[order], slopes[order]
+    slope_after = np.cumsum(slopes)
+    values = np.minimum(size, cap).sum() + np.concatenate(
+        [[0.0], np.cumsum(slope_after[:-1] * np.diff(events))]
+    )
+    k = int(np.searchsorted(-values, -max_turnover))  # first event with turnover <= limit
+    if k == 0:
+        lam = events[0]
+    else:
+        lam = events[k - 1] + (values[k - 1] - max_turnover) / max(-slope_after[k - 1], 1e-300)
+    shrunk = np.sign(diff) * np.maximum(size - lam, 0.0)
+    return np.clip(anchor + shrunk, lower, upper)
+
+
+class QPSolver:
+    """
+    min 1/2 w'Sw + q'w  s.t.  sum(w) = 1, lower <= w <= upper, ||w - anchor||_1 <= max_turnover
+
+    ADMM splitting: the w-step solves the budget-constrained linear system with a
+    cached inverse of S + rho*I, the z-step is ``project_box_turnover``.
+    """
+
+    def __init__(self, max_iter: int = 4000, eps_abs: float = 1e-7, eps_rel: float = 1e-6,
+                 alpha: float = 1.6):
+        self.max_iter = max_iter
+        self.eps_abs = eps_abs
+        self.eps_rel = eps_rel
+        self.alpha = alpha
+        self._cov: Optional[np.ndarray] = None
+        self._rho = 1.0
+        self._inverse: Optional[np.ndarray] = None
+        self._ones_solved: Optional[np.ndarray] = None
+        self._state: Optional[Tuple[np.ndarray, np.ndarray]] = None  # (z, u) warm start
+        self.factorizations = 0
+
+    def _prepare(self, cov: np.ndarray):
+        if self._cov is not None and self._cov.shape == cov.shape and np.array_equal(self._cov, cov):
+            return
+        n = cov.shape[0]
+        self._cov = cov.copy()
+        self._rho = max(float(np.trace(cov)) / n, 1e-12)
+        # Sigma + rho*I is well conditioned, so its inverse (from the Cholesky factor)
+        # turns every ADMM linear step into a single matrix-vector product
+        self._inverse = _Factorization(cov + self._rho * np.eye(n)).solve(np.eye(n))
+        self._ones_solved = self._inverse.sum(axis=1)
+        self.factorizations += 1
+        if self._state is not None and len(self._state[0]) != n:
+            self._state = None
+
+    def solve(self, cov: np.ndarray, q: np.ndarray, lower: np.ndarray, upper: np.ndarray,
+              anchor: Optional[np.ndarray] = None, max_turnover: Optional[float] = None,
+              warm_start: Optional[np.ndarray] = None) -> Tuple[np.ndarray, int, bool]:
+        self._prepare(cov)
+        n = cov.shape[0]
+        rho, inverse, ones_solved = self._rho, self._inverse, self._ones_solved
+        ones_sum = ones_solved.sum()
+
+        if warm_start is not None:
+            z, u = project_box_turnover(warm_start, lower, upper, anchor, max_turnover), np.zeros(n)
+        elif self._state is not None:
+            z, u = self._state
+        else:
+            z, u = project_box_turnover(np.full(n, 1.0 / n), lower, upper, anchor, max_turnover), np.zeros(n)
+
+        converged = False
+        iteration = 0
+        for iteration in range(1, self.max_iter + 1):
+            rhs = rho * (z - u) - q
+            solved = inverse @ rhs
+            nu = (solved.sum() - 1.0) / ones_sum
+            w = solved - nu * ones_solved
+
+            relaxed = self.alpha * w + (1.0 - self.alpha) * z
+            z_prev = z
+            z = project_box_turnover(relaxed + u, lower, upper, anchor, max_turnover)
+            u = u + relaxed - z
+
+            if iteration % 5 == 0:
+                primal = np.abs(w - z).max()
+                dual = rho * np.abs(z - z_prev).max()
+                scale = max(np.abs(w).max(), np.abs(z).max())
+                if primal <= self.eps_abs + self.eps_rel * scale and dual <= self.eps_abs + self.eps_rel * scale:
+                    converged = True
+                    break
+
+        self._state = (z, u)
+        return z, iteration, converged
+
+
+def _portfolio_stats(weights: np.ndarray, cov: np.ndarray, mu: Optional[np.ndarray],
+                     risk_free: float) -> Tuple[float, Optional[float], Optional[float]]:
+    volatility = float(np.sqrt(max(weights @ cov @ weights, 0.0)))
+    if mu is None:
+        return volatility, None, None
+    expected = float(weights @ mu)
+    sharpe = (expected - risk_free) / volatility if volatility > 0 else None
+    return volatility, expected, sharpe
+
+
+class PortfolioSolvers:
+    """Stateful front end: keeps warm starts and factorizations between rebalances"""
+
+    def __init__(self, max_iter: int = 4000, tolerance: float = 1e-7):
+        self.qp = QPSolver(max_iter=max_iter, eps_abs=tolerance)
+        self.tolerance = tolerance
+        self._erc_warm: Optional[np.ndarray] = None
+        self._sharpe_log_t: Optional[float] = None
+
+    @staticmethod
+    def _check(cov: np.ndarray, lower: np.ndarray, upper: np.ndarray):
+        if cov.ndim != 2 or cov.shape[0] != cov.shape[1] or not np.all(np.isfinite(cov)):
+            raise ValueError("covariance must be a finite square matrix")
+        if np.any(lower > upper) or lower.sum() > 1.0 + 1e-12 or upper.sum() < 1.0 - 1e-12:
+            raise ValueError("box constraints are infeasible for a fully invested portfolio")
+
+    @staticmethod
+    def _turnover_anchor(current: Optional[np.ndarray], lower: np.ndarray, upper: np.ndarray,
+                         max_turnover: Optional[float]) -> Tuple[Optional[np.ndarray], Optional[float]]:
+        """Turnover applies around the current (box-clipped) weights if they form a full portfolio"""
+        if max_turnover is None or current is None:
+            return None, None
+        anchor = np.clip(current, lower, upper)
+        if abs(anchor.sum() - 1.0) > 1e-6:
+            logger.warning("Current weights are not a fully invested portfolio; turnover limit ignored")
+            return None, None
+        return anchor, max_turnover
+
+    def equal_risk_contribution(self, cov: np.ndarray, budgets: Optional[np.ndarray] = None,
+                                max_iter: int = 100) -> SolverResult:
+        """Long-only portfolio whose risk contributions w_i (Sigma w)_i are proportional to ``budgets``"""
+        started = time.perf_counter()
+        n = cov.shape[0]
+        b = np.full(n, 1.0 / n) if budgets is None else np.asarray(budgets, dtype=np.float64) / np.sum(budgets)
+
+        # min 1/2 y'Sy - b'log(y); optimum has y'Sy = sum(b) = 1, so rescale the warm start onto it
+        y = self._erc_warm if self._erc_warm is not None and len(self._erc_warm) == n \
+            else 1.0 / np.sqrt(np.maximum(np.diagonal(cov), 1e-18))
+        y = y / np.sqrt(max(y @ cov @ y, 1e-300))
+
+        converged = False
+        iteration = 0
+        for iteration in range(1, max_iter + 1):
+            marginal = cov @ y
+            gradient = marginal - b / y
+            hessian = cov + np.diag(b / y ** 2)
+            step = _Factorization(hessian).solve(gradient)
+            decrement = math.sqrt(max(float(gradient @ step), 0.0))
+            if decrement < self.tolerance:
+                converged = True
+                break
+            # Damped Newton keeps y > 0 (self-concordant barrier)
+            y = y - (step / (1.0 + decrement) if decrement > 0.25 else step)
+            y = np.maximum(y, 1e-300)
+
+        self._erc_warm = y
+        weights = y / y.sum()
+        volatility, _, _ = _portfolio_stats(weights, cov, None, 0.0)
+        contributions = weights * (cov @ weights)
+        spread = float(contributions.max() / contributions.min()) if contributions.min() > 0 else float('inf')
+        return SolverResult(
+            weights=weights, method='equal_risk_contribution',
+            solve_time_ms=(time.perf_counter() - started) * 1000, iterations=iteration, converged=converged,
+            volatility=volatility, info={'contribution_spread': spread},
+        )
+
+    def minimum_variance(self, cov: np.ndarray, lower: np.ndarray, upper: np.ndarray,
+                         current: Optional[np.ndarray] = None, max_turnover: Optional[float] = None) -> SolverResult:
+        """Fully invested minimum-variance portfolio within the box and turnover limits"""
+        started = time.perf_counter()
+        self._check(cov, lower, upper)
+        anchor, turnover = self._turnover_anchor(current, lower, upper, max_turnover)
+        weights, iterations, converged = self.qp.solve(cov, np.zeros(cov.shape[0]), lower, upper, anchor, turnover)
+        volatility, _, _ = _portfolio_stats(weights, cov, None, 0.0)
+        return SolverResult(
+            weights=weights, method='minimum_variance',
+            solve_time_ms=(time.perf_counter() - started) * 1000, iterations=iterations, converged=converged,
+            volatility=volatility,
+            turnover=float(np.abs(weights - current).sum()) if current is not None else None,
+        )
+
+    def max_sharpe(self, cov: np.ndarray, mu: np.ndarray, lower: np.ndarray, upper: np.ndarray,
+                   current: Optional[np.ndarray] = None, max_turnover: Optional[float] = None,
+                   risk_free: float = 0.0, max_solves: int = 40) -> SolverResult:
+        """
+        Maximum Sharpe ratio portfolio within the box and turnover limits.
+
+        Every point of the constrained mean-variance frontier solves
+        min 1/2 w'Sw - t*mu'w for some risk tolerance t >= 0, and the Sharpe optimum
+        is the one with t = w'Sw / (mu'w - risk_free). That fixed point is found by a
+        bracketed secant search in log t, started from the previous rebalance's t,
+        with every QP warm-started from the last one and sharing one cached inverse.
+        """
+        started = time.perf_counter()
+        self._check(cov, lower, upper)
+        mu = np.asarray(mu, dtype=np.float64)
+        anchor, turnover = self._turnover_anchor(current, lower, upper, max_turnover)
+        total_iterations = 0
+        solves = 0
+
+        def residual(log_t: float) -> Tuple[float, np.ndarray, bool]:
+            nonlocal total_iterations, solves
+            weights, iterations, converged = self.qp.solve(
+                cov, -math.exp(log_t) * mu, lower, upper, anchor, turnover
+            )
+            total_iterations += iterations
+            solves += 1
+            excess = float(weights @ mu) - risk_free
+            variance = float(weights @ cov @ weights)
+            if excess <= 0 or variance <= 0:
+                return math.inf, weights, converged
+            return math.log(variance / excess) - log_t, weights, converged
+
+        if self._sharpe_log_t is not None:
+            log_t = self._sharpe_log_t
+        else:
+            log_t = math.log(float(np.trace(cov)) / cov.shape[0] / max(float(np.abs(mu).max()), 1e-18))
+        value, weights, converged = residual(log_t)
+
+        # Bracket the root: the residual falls from +inf (min variance) to -inf (max return)
+        step = 1.0 if value > 0 else -1.0
+        other, other_value = log_t, value
+        while solves < max_solves and (other_value > 0) == (value > 0) and abs(other_value) > 1e-7:
+            log_t, value = other, other_value
+            other = log_t + step
+            other_value, weights, converged = residual(other)
+            step *= 2.0
+        if (other_value > 0) == (value > 0) and abs(other_value) > 1e-7:
+            if other_value > 0:
+                logger.warning("No asset beats the risk-free rate; falling back to minimum variance")
+                return self.minimum_variance(cov, lower, upper, current, max_turnover)
+            logger.warning("Max Sharpe search did not bracket an optimum after %d solves", solves)
+        else:
+            # Illinois variant of regula falsi on [log_t, other]
+            side = 0
+            while solves < max_solves and abs(other_value) > 1e-7 and abs(other - log_t) > 1e-7:
+                if math.isinf(value) or math.isinf(other_value):
+                    guess = (log_t + other) / 2
+                else:
+                    guess = other - other_value * (other - log_t) / (other_value - value)
+                guess_value, weights, converged = residual(guess)
+                if (guess_value > 0) == (other_value > 0):
+                    if side == -1:
+                        value /= 2
+                    side = -1
+                else:
+                    log_t, value = other, other_value
+                    if side == 1:
+                        value /= 2
+                    side = 1
+                other, other_value = guess, guess_value
+        self._sharpe_log_t = other
+
+        volatility, expected, sharpe = _portfolio_stats(weights, cov, mu, risk_free)
+        return SolverResult(
+            weights=weights, method='max_sharpe',
+            solve_time_ms=(time.perf_counter() - started) * 1000, iterations=total_iterations,
+            converged=converged and abs(other_value) <= 1e-7, volatility=volatility,
+            expected_return=expected, sharpe=sharpe,
+            turnover=float(np.abs(weights - current).sum()) if current is not None else None,
+            info={'risk_tolerance': math.exp(other), 'qp_solves': solves},
+        )
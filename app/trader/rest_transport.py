@@ -0,0 +1,307 @@
+"""
+Shared async REST transport for exchange HTTP APIs
+"""
+
+import asyncio
+import hashlib
+import hmac
+import logging
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Known request weights, used until a used-weight header delta is observed
+DEFAULT_ENDPOINT_WEIGHTS = {
+    '/fapi/v1/batchOrders': 5,
+    '/fapi/v1/exchangeInfo': 1,
+}
+
+# Order-count windows and their lengths in seconds
+ORDER_WINDOWS = {'10s': 10, '1m': 60}
+
+
+class RestAPIError(Exception):
+    """Non-2xx response from the exchange"""
+
+    def __init__(self, status: int, payload: Any):
+        self.status = status
+        self.payload = payload
+        message = payload.get('msg', payload) if isinstance(payload, dict) else payload
+        super().__init__(f"HTTP {status}: {message}")
+
+
+@dataclass
+class EndpointStats:
+    """Per-endpoint counters; ``weight`` is learned from used-weight header deltas"""
+    requests: int = 0
+    errors: int = 0
+    coalesced: int = 0
+    weight: int = 1
+    total_latency: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        stats = asdict(self)
+        stats['avg_latency_ms'] = (self.total_latency / self.requests * 1000) if self.requests else 0.0
+        return stats
+
+
+class RestTransport:
+    """
+    Keep-alive connection pool to one exchange host.
+
+    - one aiohttp session (per event loop) shared by every caller
+    - request weight budgeted per minute from X-MBX-USED-WEIGHT-* headers,
+      418/429 Retry-After honoured
+    - identical unsigned GETs in flight at the same time share one request
+    """
+
+    USED_WEIGHT_HEADER = 'x-mbx-used-weight-1m'
+    ORDER_COUNT_PREFIX = 'x-mbx-order-count-'
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None, api_secret: Optional[str] = None,
+                 weight_limit: int = 2400, pool_size: int = 100, keepalive_timeout: float = 60.0,
+                 timeout: float = 10.0, recv_window: Optional[int] = None,
+                 order_limits: Optional[Dict[str, int]] = None):
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.weight_limit = weight_limit
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.recv_window = recv_window
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closer: Optional[asyncio.Task] = None
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
+        self._pending = 0
+
+        # Rate-limit state
+        self.used_weight = 0
+        self.order_counts: Dict[str, int] = {}
+        self.order_limits = order_limits or {'10s': 300, '1m': 1200}
+        self._order_windows: Dict[str, Tuple[int, int]] = {}  # window -> (window id, orders sent)
+        self._weight_minute = 0
+        self._header_weight = (0, 0)  # (minute, last used weight reported by the server)
+        self._blocked_until = 0.0
+        self.endpoint_stats: Dict[str, EndpointStats] = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            # aiohttp sessions are bound to the loop they were created on
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._loop = loop
+            self._closer = loop.create_task(self._close_on_shutdown(self._session))
+        return self._session
+
+    @staticmethod
+    async def _close_on_shutdown(session: aiohttp.ClientSession):
+        """
+        Parked until its loop shuts down: asyncio.run cancels leftover tasks before
+        closing the loop, so the session's sockets are closed on the loop that owns them
+        """
+        try:
+            await asyncio.get_running_loop().create_future()
+        finally:
+            if not session.closed:
+                await session.close()
+
+    def sign(self, params: Dict[str, Any]) -> str:
+        """Query string with timestamp and HMAC-SHA256 signature appended"""
+        params = dict(params)
+        params['timestamp'] = int(time.time() * 1000)
+        if self.recv_window:
+            params.setdefault('recvWindow', self.recv_window)
+        query = urlencode(params)
+        signature = hmac.new(self.api_secret.encode('utf-8'), query.encode('utf-8'), hashlib.sha256).hexdigest()
+        return f"{query}&signature={signature}"
+
+    async def request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                      signed: bool = False, coalesce: Optional[bool] = None) -> Any:
+        """Send a request and return the decoded JSON body; raises RestAPIError on HTTP errors"""
+        method = method.upper()
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        if coalesce is None:
+            coalesce = method == 'GET' and not signed
+
+        if not coalesce:
+            return await self._send(method, path, params, signed)
+
+        key = (method, path, tuple(sorted((k, str(v)) for k, v in params.items())))
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._send(method, path, params, signed))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self._stats(path).coalesced += 1
+        # Shield so one cancelled caller does not cancel the request for the others
+        return await asyncio.shield(task)
+
+    async def send_query(self, method: str, path: str, query: str, reserved: bool = False) -> Any:
+        """
+        Send a pre-built (e.g. pre-signed) query string. With ``reserved`` the
+        request weight was already taken via reserve() and is not charged again.
+        """
+        return await self._send(method, path, None, False, query=query, reserved=reserved)
+
+    def endpoint_weight(self, path: str) -> int:
+        return self._stats(path).weight
+
+    async def reserve(self, weight: int, orders: int = 0):
+        """Take request weight and order-count budget up front for a group of requests"""
+        await self._acquire_weight(weight)
+        if orders:
+            await self._acquire_orders(orders)
+
+    def _stats(self, path: str) -> EndpointStats:
+        stats = self.endpoint_stats.get(path)
+        if stats is None:
+            stats = self.endpoint_stats[path] = EndpointStats(weight=DEFAULT_ENDPOINT_WEIGHTS.get(path, 1))
+        return stats
+
+    async def _acquire_orders(self, count: int):
+        """Wait until ``count`` new orders fit in every order-count window"""
+        while True:
+            now = time.time()
+            wait = 0.0
+            for window, limit in self.order_limits.items():
+                length = ORDER_WINDOWS[window]
+                window_id, sent = self._order_windows.get(window, (0, 0))
+                if window_id != int(now // length):
+                    sent = 0
+                if sent + count > limit:
+                    wait = max(wait, length - now % length)
+            if not wait:
+                for window in self.order_limits:
+                    length = ORDER_WINDOWS[window]
+                    window_id, sent = self._order_windows.get(window, (0, 0))
+                    current = int(now // length)
+                    self._order_windows[window] = (current, (sent if window_id == current else 0) + count)
+                return
+            logger.warning(f"Order rate budget exhausted, waiting {wait:.1f}s")
+            await asyncio.sleep(wait)
+
+    async def _acquire_weight(self, weight: int):
+        """Wait until ``weight`` fits in the current minute's budget"""
+        while True:
+            now = time.time()
+            if self._blocked_until > now:
+                await asyncio.sleep(self._blocked_until - now)
+                continue
+
+            minute = int(now // 60)
+            if minute != self._weight_minute:
+                self._weight_minute = minute
+                self.used_weight = 0
+            if self.used_weight + weight <= self.weight_limit:
+                self.used_weight += weight
+                return
+
+            wait = 60 - now % 60
+            logger.warning(f"Request weight budget exhausted ({self.used_weight}/{self.weight_limit}), waiting {wait:.1f}s")
+            await asyncio.sleep(wait)
+
+    def _update_limits(self, stats: EndpointStats, headers, weight_before: int):
+        used = headers.get(self.USED_WEIGHT_HEADER)
+        if used is not None:
+            used = int(used)
+            minute = int(time.time() // 60)
+            # Only trust the delta when no other request overlapped this one
+            if self._pending == 1 and used > weight_before:
+                stats.weight = used - weight_before
+            self.used_weight = used
+            self._weight_minute = minute
+            self._header_weight = (minute, used)
+
+        for name, value in headers.items():
+            name = name.lower()
+            if name.startswith(self.ORDER_COUNT_PREFIX):
+                window = name[len(self.ORDER_COUNT_PREFIX):]
+                self.order_counts[window] = int(value)
+                if window in ORDER_WINDOWS:
+                    self._order_windows[window] = (int(time.time() // ORDER_WINDOWS[window]), int(value))
+
+    async def _send(self, method: str, path: str, params: Optional[Dict[str, Any]], signed: bool,
+                    query: Optional[str] = None, reserved: bool = False) -> Any:
+        stats = self._stats(path)
+        if not reserved:
+            await self._acquire_weight(stats.weight)
+
+        if signed:
+            query = self.sign(params)
+            params = None
+        url = f"{self.base_url}{path}?{query}" if query else f"{self.base_url}{path}"
+        headers = {'X-MBX-APIKEY': self.api_key} if self.api_key else None
+
+        session = self._get_session()
+        minute, last_used = self._header_weight
+        weight_before = last_used if minute == int(time.time() // 60) else 0
+        self._pending += 1
+        start = time.monotonic()
+        try:
+            async with session.request(method, url, params=params or None, headers=headers) as response:
+                self._update_limits(stats, response.headers, weight_before)
+                if response.status in (418, 429):
+                    retry_after = float(response.headers.get('Retry-After', 1))
+                    self._blocked_until = max(self._blocked_until, time.time() + retry_after)
+                    logger.warning(f"Rate limited on {path} (HTTP {response.status}), backing off {retry_after}s")
+                payload = await response.json(content_type=None)
+                if response.status >= 400:
+                    stats.errors += 1
+                    raise RestAPIError(response.status, payload)
+                return payload
+        finally:
+            self._pending -= 1
+            stats.requests += 1
+            stats.total_latency += time.monotonic() - start
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'base_url': self.base_url,
+            'used_weight': self.used_weight,
+            'weight_limit': self.weight_limit,
+            'order_counts': dict(self.order_counts),
+            'in_flight': len(self._inflight),
+            'endpoints': {path: stats.to_dict() for path, stats in self.endpoint_stats.items()},
+        }
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        if self._closer is not None:
+            self._closer.cancel()
+            self._closer = None
+        self._session = None
+
+
+_transports: Dict[Tuple[str, Optional[str]], RestTransport] = {}
+
+
+def get_transport(base_url: str, api_key: Optional[str] = None, api_secret: Optional[str] = None,
+                  **kwargs) -> RestTransport:
+    """Process-wide transport per (host, API key) so every client shares one pool and weight budget"""
+    key = (base_url.rstrip('/'), api_key or None)
+    transport = _transports.get(key)
+    if transport is None:
+        transport = _transports[key] = RestTransport(base_url, api_key, api_secret, **kwargs)
+    return transport
+
+
+async def close_transports():
+    for transport in list(_transports.values()):
+        await transport.close()
+    _transports.clear()
@@ -2,15 +2,30 @@
 Risk Engine for trading risk management and position sizing validation
 """
 
+import atexit
+import json
 import logging
-import sqlite3
-from dataclasses import dataclass
+import os
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, replace
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any
 
 import yaml
 
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, foreign journals are left alone
+    fcntl = None
+
+try:
+    from .storage import get_database
+except ImportError:
+    from storage import get_database
+
 logger = logging.getLogger(__name__)
 
 
@@ -29,13 +44,81 @@ class DayState:
 class RiskEngine:
     """
     Risk Engine for managing trading risk and enforcing gates
+
+    Every change is appended to a write-ahead journal first, then written to
+    SQLite in batches by a background thread over one long-lived WAL connection.
+    Fills are applied to ``day_state`` as increments, so several processes can
+    record fills for the same day without overwriting each other's totals. The
+    cached day state is the database row plus this process's entries not yet
+    written; it is re-read after every flush and after ``read_refresh_seconds``.
+
+    Each engine instance writes its own journal (``<journal>.<pid>-<id>.jsonl``)
+    and holds an exclusive lock on it while open. On startup, journals whose
+    lock is free belong to writers that died without flushing; their entries
+    not yet in the database are replayed and the journal removed. Journals of
+    live writers are never touched.
     """
 
-    def __init__(self, config_path: str = "configs/risk.yaml", db_path: str = "state/mirai.db"):
+    UPSERT_DAY_STATE = (
+        "INSERT OR REPLACE INTO day_state "
+        "(date_utc, day_pnl, max_day_pnl, trades_today, consecutive_losses, cooldown_until) "
+        "VALUES (?, ?, ?, ?, ?, ?)"
+    )
+
+    # One fill on top of whatever the row holds now; mirrors _apply_fill
+    APPLY_FILL = (
+        "INSERT INTO day_state "
+        "(date_utc, day_pnl, max_day_pnl, trades_today, consecutive_losses, cooldown_until) "
+        "VALUES (:date, :pnl, MAX(:pnl, 0.0), 1, :pnl < 0, "
+        "CASE WHEN :pnl < 0 AND :max_losses <= 1 THEN :cooldown END) "
+        "ON CONFLICT(date_utc) DO UPDATE SET "
+        "day_pnl = day_pnl + :pnl, "
+        "max_day_pnl = MAX(max_day_pnl, day_pnl + :pnl), "
+        "trades_today = trades_today + 1, "
+        "consecutive_losses = CASE WHEN :pnl < 0 THEN consecutive_losses + 1 ELSE 0 END, "
+        "cooldown_until = CASE WHEN :pnl >= 0 THEN NULL "
+        "WHEN consecutive_losses + 1 >= :max_losses THEN :cooldown ELSE cooldown_until END"
+    )
+
+    def __init__(
+        self,
+        config_path: str = "configs/risk.yaml",
+        db_path: str = "state/mirai.db",
+        journal_path: str | None = None,
+        flush_interval: float = 0.5,
+        read_refresh_seconds: float = 1.0,
+    ):
         self.config_path = Path(config_path)
         self.db_path = Path(db_path)
+        self.journal_base = (
+            Path(journal_path) if journal_path else self.db_path.with_name(f"{self.db_path.stem}_risk_journal.jsonl")
+        )
+        self.writer_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.journal_path = self.journal_base.with_name(
+            f"{self.journal_base.stem}.{self.writer_id}{self.journal_base.suffix}"
+        )
+        self.flush_interval = flush_interval
+        self.read_refresh_seconds = read_refresh_seconds
         self.config = self._load_config()
+
+        # In-memory state: date -> DayState (database row + unwritten local entries),
+        # re-read after read_refresh_seconds or once a flush has written the date
+        self._states: dict[str, DayState] = {}
+        self._loaded_at: dict[str, float] = {}
+        self._pending: list[dict[str, Any]] = []  # journaled, not yet in the database
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._flusher: threading.Thread | None = None
+        self._closed = False
+
         self._init_database()
+        self._journal = open(self.journal_path, "a", encoding="utf-8", buffering=1)
+        if fcntl is not None:
+            fcntl.flock(self._journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._recover_journals()
+        atexit.register(self.close)
 
     def _load_config(self) -> dict[str, Any]:
         """Load risk configuration from YAML file"""
@@ -56,10 +139,10 @@ class RiskEngine:
 
     def _init_database(self):
         """Initialize SQLite database with required tables"""
-        # Ensure state directory exists
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Shared per-file handle: WAL, busy timeout, per-thread connections
+        self._db = get_database(self.db_path)
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db.transaction() as conn:
             cursor = conn.cursor()
 
             # Create day_state table
@@ -91,7 +174,233 @@ class RiskEngine:
             """
             )
 
-            conn.commit()
+            # Last entry of each writer's journal applied to the tables above
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS risk_journal_writers (
+                    journal TEXT PRIMARY KEY,
+                    last_seq INTEGER NOT NULL
+                )
+            """
+            )
+
+            # Single-journal layout: its position now belongs to the shared journal file
+            if cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'risk_journal_state'"
+            ).fetchone():
+                cursor.execute(
+                    "INSERT OR IGNORE INTO risk_journal_writers (journal, last_seq) "
+                    "SELECT ?, last_seq FROM risk_journal_state WHERE id = 1",
+                    (self.journal_base.name,),
+                )
+                cursor.execute("DROP TABLE risk_journal_state")
+
+    def _recover_journals(self):
+        """Replay journals left behind by writers that stopped before flushing"""
+        pattern = f"{self.journal_base.stem}.*{self.journal_base.suffix}"
+        for path in sorted([self.journal_base, *self.journal_base.parent.glob(pattern)]):
+            if path == self.journal_path or not path.exists():
+                continue
+            try:
+                self._recover_journal(path)
+            except OSError as e:
+                logger.error(f"Failed to recover risk journal {path}: {e}")
+
+    def _recover_journal(self, path: Path):
+        """Replay one abandoned journal and remove it; skipped while its writer holds the lock"""
+        if fcntl is None:
+            return
+        with open(path, encoding="utf-8") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return  # a live writer owns it
+            if os.fstat(f.fileno()).st_nlink == 0:
+                return  # another process recovered and removed it while we waited to open
+
+            row = self._db.fetchone("SELECT last_seq FROM risk_journal_writers WHERE journal = ?", (path.name,))
+            last_seq = row[0] if row else 0
+            entries = []
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn final line from a crash mid-write
+                    logger.warning("Skipping unreadable risk journal entry")
+                    continue
+                if entry["seq"] > last_seq:
+                    entries.append(entry)
+
+            if entries:
+                self._write_batch(entries, path.name)
+                logger.info(f"Replayed {len(entries)} risk journal entries from {path.name}")
+            # Remove the file while still holding its lock, then forget its position
+            path.unlink()
+        self._db.execute("DELETE FROM risk_journal_writers WHERE journal = ?", (path.name,))
+
+    def _load_state(self, date_str: str) -> tuple[DayState | None, int]:
+        """Day state row and how far this writer's journal is applied, read from one snapshot"""
+        row = self._db.fetchone(
+            (
+                "SELECT d.date_utc, d.day_pnl, d.max_day_pnl, d.trades_today, "
+                "d.consecutive_losses, d.cooldown_until, COALESCE(w.last_seq, 0) "
+                "FROM (SELECT ? AS journal, ? AS date_utc) k "
+                "LEFT JOIN risk_journal_writers w ON w.journal = k.journal "
+                "LEFT JOIN day_state d ON d.date_utc = k.date_utc"
+            ),
+            (self.journal_path.name, date_str),
+        )
+        return (DayState(*row[:6]) if row[0] is not None else None), row[6]
+
+    def _state(self, date_str: str) -> DayState:
+        """Cached day state (caller holds self._lock)"""
+        state = self._states.get(date_str)
+        if state is not None and time.monotonic() - self._loaded_at[date_str] < self.read_refresh_seconds:
+            return state
+
+        loaded, applied_seq = self._load_state(date_str)
+        if loaded is None:
+            # Fresh day; nothing is written until the first fill
+            loaded = DayState(
+                date_utc=date_str,
+                day_pnl=0.0,
+                max_day_pnl=0.0,
+                trades_today=0,
+                consecutive_losses=0,
+                cooldown_until=None,
+            )
+        # Local entries the database does not have yet
+        for entry in self._pending:
+            if entry["seq"] > applied_seq and entry["date"] == date_str:
+                loaded = self._apply_entry(loaded, entry)
+        self._states[date_str] = loaded
+        self._loaded_at[date_str] = time.monotonic()
+        return loaded
+
+    @staticmethod
+    def _apply_fill(state: DayState, pnl: float, cooldown: str, max_losses: int) -> DayState:
+        """Day state after one fill; APPLY_FILL does the same in SQL"""
+        day_pnl = state.day_pnl + pnl
+        if pnl < 0:  # Loss; cooldown starts once MAX_CONSECUTIVE_LOSSES is reached
+            consecutive_losses = state.consecutive_losses + 1
+            cooldown_until = cooldown if consecutive_losses >= max_losses else state.cooldown_until
+        else:  # Profit or breakeven
+            consecutive_losses = 0
+            cooldown_until = None
+        return DayState(
+            date_utc=state.date_utc,
+            day_pnl=day_pnl,
+            max_day_pnl=max(state.max_day_pnl, day_pnl),
+            trades_today=state.trades_today + 1,
+            consecutive_losses=consecutive_losses,
+            cooldown_until=cooldown_until,
+        )
+
+    def _apply_entry(self, state: DayState, entry: dict[str, Any]) -> DayState:
+        if entry["type"] == "fill":
+            return self._apply_fill(state, entry["fill"][5], entry["cooldown"], entry["max_losses"])
+        return DayState(**entry["state"])
+
+    def _append(self, entry: dict[str, Any]):
+        """Write an entry to the journal and queue it for the next batch flush (caller holds self._lock)"""
+        self._seq += 1
+        entry["seq"] = self._seq
+        self._journal.write(json.dumps(entry) + "\n")
+        self._pending.append(entry)
+        self._ensure_flusher()
+
+    def _ensure_flusher(self):
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._flush_loop, name="risk-journal-flusher", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._flush_event.wait(self.flush_interval)
+            self._flush_event.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Risk journal flush failed: {e}")
+
+    def _write_batch(self, entries: list[dict[str, Any]], journal: str):
+        """Apply entries from one journal to SQLite in one transaction"""
+
+        def write(conn):
+            for entry in entries:
+                if entry["type"] == "fill":
+                    conn.execute(
+                        "INSERT INTO fills (ts, symbol, side, qty, price, pnl) VALUES (?, ?, ?, ?, ?, ?)",
+                        entry["fill"],
+                    )
+                if "cooldown" in entry:
+                    conn.execute(
+                        self.APPLY_FILL,
+                        {
+                            "date": entry["date"],
+                            "pnl": entry["fill"][5],
+                            "cooldown": entry["cooldown"],
+                            "max_losses": entry["max_losses"],
+                        },
+                    )
+                else:
+                    # Resets, and fills journaled by versions that stored the whole day state
+                    state = entry["state"]
+                    conn.execute(
+                        self.UPSERT_DAY_STATE,
+                        (
+                            state["date_utc"],
+                            state["day_pnl"],
+                            state["max_day_pnl"],
+                            state["trades_today"],
+                            state["consecutive_losses"],
+                            state["cooldown_until"],
+                        ),
+                    )
+            conn.execute(
+                "INSERT OR REPLACE INTO risk_journal_writers (journal, last_seq) VALUES (?, ?)",
+                (journal, entries[-1]["seq"]),
+            )
+
+        self._db.run_transaction(write)
+
+    def flush(self):
+        """Write all journaled changes to the database now"""
+        with self._flush_lock:
+            with self._lock:
+                entries = list(self._pending)
+            if not entries:
+                return
+
+            # On failure the entries stay pending (and journaled) for the next attempt
+            self._write_batch(entries, self.journal_path.name)
+
+            with self._lock:
+                del self._pending[: len(entries)]
+                # Re-read the written days before the next gate check: other writers' fills are in the row too
+                for date_str in {entry["date"] for entry in entries}:
+                    self._loaded_at.pop(date_str, None)
+                    self._states.pop(date_str, None)
+                if not self._pending and not self._journal.closed:
+                    # Everything journaled is in the database
+                    self._journal.truncate(0)
+
+    def close(self):
+        """Flush pending changes and stop the background writer"""
+        if self._closed:
+            return
+        self._closed = True
+        self._flush_event.set()
+        if self._flusher is not None and self._flusher is not threading.current_thread():
+            self._flusher.join(timeout=5)
+        try:
+            self.flush()
+            # Everything is in the database; the journal is only kept if the flush failed
+            self.journal_path.unlink()
+        finally:
+            # The database handle is shared with other users of the file and stays open
+            self._journal.close()
+        self._db.execute("DELETE FROM risk_journal_writers WHERE journal = ?", (self.journal_path.name,))
 
     def get_day_state(self, now_utc: datetime) -> DayState:
         """
@@ -99,52 +408,8 @@ class RiskEngine:
         """
         date_str = now_utc.strftime("%Y-%m-%d")
 
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-
-            # Try to get existing day state
-            cursor.execute(
-                (
-                    "SELECT date_utc, day_pnl, max_day_pnl, trades_today, "
-                    "consecutive_losses, cooldown_until "
-                    "FROM day_state WHERE date_utc = ?"
-                ),
-                (date_str,),
-            )
-            row = cursor.fetchone()
-
-            if row:
-                return DayState(*row)
-            else:
-                # Create new day state
-                new_state = DayState(
-                    date_utc=date_str,
-                    day_pnl=0.0,
-                    max_day_pnl=0.0,
-                    trades_today=0,
-                    consecutive_losses=0,
-                    cooldown_until=None,
-                )
-
-                cursor.execute(
-                    (
-                        "INSERT INTO day_state "
-                        "(date_utc, day_pnl, max_day_pnl, trades_today, "
-                        "consecutive_losses, cooldown_until) "
-                        "VALUES (?, ?, ?, ?, ?, ?)"
-                    ),
-                    (
-                        new_state.date_utc,
-                        new_state.day_pnl,
-                        new_state.max_day_pnl,
-                        new_state.trades_today,
-                        new_state.consecutive_losses,
-                        new_state.cooldown_until,
-                    ),
-                )
-                conn.commit()
-
-                return new_state
+        with self._lock:
+            return replace(self._state(date_str))
 
     def allow_entry(self, now_utc: datetime, symbol: str, account_state: dict[str, Any] = None) -> tuple[bool, str]:
         """
@@ -219,130 +484,42 @@ class RiskEngine:
 
         date_str = fill_time.strftime("%Y-%m-%d")
 
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-
-            # Insert fill record
-            cursor.execute(
-                """
-                INSERT INTO fills (ts, symbol, side, qty, price, pnl)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """,
-                (ts, symbol, side, qty, price, pnl),
-            )
-
-            # Get or create day state within same transaction
-            cursor.execute(
-                "SELECT date_utc, day_pnl, max_day_pnl, trades_today, consecutive_losses, cooldown_until "
-                "FROM day_state WHERE date_utc = ?",
-                (date_str,),
-            )
-            row = cursor.fetchone()
-
-            if row:
-                day_state = DayState(*row)
-            else:
-                # Create new day state
-                day_state = DayState(
-                    date_utc=date_str,
-                    day_pnl=0.0,
-                    max_day_pnl=0.0,
-                    trades_today=0,
-                    consecutive_losses=0,
-                    cooldown_until=None,
-                )
-
-                cursor.execute(
-                    (
-                        "INSERT INTO day_state "
-                        "(date_utc, day_pnl, max_day_pnl, trades_today, "
-                        "consecutive_losses, cooldown_until) "
-                        "VALUES (?, ?, ?, ?, ?, ?)"
-                    ),
-                    (
-                        day_state.date_utc,
-                        day_state.day_pnl,
-                        day_state.max_day_pnl,
-                        day_state.trades_today,
-                        day_state.consecutive_losses,
-                        day_state.cooldown_until,
-                    ),
-                )
-
-            # Update day PnL
-            new_day_pnl = day_state.day_pnl + pnl
-
-            # Update max day PnL if it increased
-            new_max_day_pnl = max(day_state.max_day_pnl, new_day_pnl)
-
-            # Update trades count
-            new_trades_today = day_state.trades_today + 1
+        # Journaled as an increment: the database row may already hold other writers' fills
+        entry = {
+            "type": "fill",
+            "date": date_str,
+            "fill": [ts if isinstance(ts, str) else ts.isoformat(), symbol, side, qty, price, pnl],
+            "cooldown": (fill_time + timedelta(minutes=self.config["COOLDOWN_MINUTES"])).isoformat(),
+            "max_losses": self.config["MAX_CONSECUTIVE_LOSSES"],
+        }
 
-            # Update consecutive losses
-            new_consecutive_losses = day_state.consecutive_losses
-            cooldown_until = day_state.cooldown_until
+        with self._lock:
+            day_state = self._state(date_str)
+            self._states[date_str] = self._apply_entry(day_state, entry)
+            self._append(entry)
 
-            if pnl < 0:  # Loss
-                new_consecutive_losses += 1
-                # Set cooldown if we hit max consecutive losses
-                if new_consecutive_losses >= self.config["MAX_CONSECUTIVE_LOSSES"]:
-                    cooldown_time = fill_time + timedelta(minutes=self.config["COOLDOWN_MINUTES"])
-                    cooldown_until = cooldown_time.isoformat()
-            else:  # Profit or breakeven
-                new_consecutive_losses = 0
-                cooldown_until = None
-
-            # Update day state in database
-            cursor.execute(
-                (
-                    "UPDATE day_state "
-                    "SET day_pnl = ?, max_day_pnl = ?, trades_today = ?, consecutive_losses = ?, cooldown_until = ? "
-                    "WHERE date_utc = ?"
-                ),
-                (
-                    new_day_pnl,
-                    new_max_day_pnl,
-                    new_trades_today,
-                    new_consecutive_losses,
-                    cooldown_until,
-                    day_state.date_utc,
-                ),
-            )
-
-            conn.commit()
-
-            logger.info(f"Recorded fill: {symbol} {side} {qty}@{price} PnL:{pnl}")
+        logger.info(f"Recorded fill: {symbol} {side} {qty}@{price} PnL:{pnl}")
 
     def reset_day_state(self, date_utc: str = None):
         """Reset day state for testing purposes"""
         if date_utc is None:
             date_utc = datetime.now(timezone.utc).strftime("%Y-%m-%d")
 
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                (
-                    "UPDATE day_state "
-                    "SET day_pnl = 0.0, max_day_pnl = 0.0, trades_today = 0, "
-                    "consecutive_losses = 0, cooldown_until = NULL "
-                    "WHERE date_utc = ?"
-                ),
-                (date_utc,),
+        with self._lock:
+            state = DayState(
+                date_utc=date_utc,
+                day_pnl=0.0,
+                max_day_pnl=0.0,
+                trades_today=0,
+                consecutive_losses=0,
+                cooldown_until=None,
             )
+            self._states[date_utc] = state
+            self._loaded_at[date_utc] = time.monotonic()
+            self._append({"type": "state", "date": date_utc, "state": asdict(state)})
 
-            # If no row was updated, insert a new one
-            if cursor.rowcount == 0:
-                cursor.execute(
-                    (
-                        "INSERT INTO day_state "
-                        "(date_utc, day_pnl, max_day_pnl, trades_today, consecutive_losses, cooldown_until) "
-                        "VALUES (?, 0.0, 0.0, 0, 0, NULL)"
-                    ),
-                    (date_utc,),
-                )
-
-            conn.commit()
-            logger.info(f"Reset day state for {date_utc}")
+        self.flush()
+        logger.info(f"Reset day state for {date_utc}")
 
 
 # Global risk engine instance
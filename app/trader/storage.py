@@ -0,0 +1,333 @@
+"""
+Shared SQLite access layer for state/*.db
+
+One Database per file and process: WAL and busy-timeout pragmas, a long-lived
+connection per thread with the statement cache enabled, retries on "database is
+locked", bulk helpers and an async API that runs on a dedicated executor thread.
+Schemas evolve through ordered, versioned migrations (``migrate``).
+"""
+
+import asyncio
+import calendar
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import weakref
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+    "cache_size": -8000,  # KiB
+}
+
+
+class _Connection(sqlite3.Connection):
+    """sqlite3.Connection that can be weakly referenced"""
+
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+class Database:
+    """
+    Thread-safe handle to one SQLite file
+
+    Connections run in autocommit mode: single statements commit on their own,
+    ``transaction()`` / ``run_transaction()`` group several into one BEGIN IMMEDIATE.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        pragmas: dict[str, Any] | None = None,
+        busy_timeout: float = 5.0,
+        retries: int = 5,
+        retry_delay: float = 0.05,
+        cached_statements: int = 256,
+        row_factory: Callable[[sqlite3.Cursor, tuple], Any] | None = None,
+    ):
+        self.path = os.fspath(path)
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        self.busy_timeout = busy_timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.cached_statements = cached_statements
+        self.row_factory = row_factory
+
+        self._local = threading.local()
+        self._connections: weakref.WeakSet[_Connection] = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self._closed = False
+        self.stats = {"connections": 0, "retries": 0}
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def connection(self) -> sqlite3.Connection:
+        """Long-lived connection of the calling thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        if self._closed:
+            raise sqlite3.ProgrammingError(f"Database {self.path} is closed")
+
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,  # only the owning thread uses it; close() may come from another
+            cached_statements=self.cached_statements,
+            factory=_Connection,
+        )
+        if self.row_factory is not None:
+            conn.row_factory = self.row_factory
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}")
+        for name, value in self.pragmas.items():
+            try:
+                conn.execute(f"PRAGMA {name} = {value}")
+            except sqlite3.OperationalError as e:
+                # journal_mode=WAL needs a moment of exclusive access the first time
+                logger.warning(f"Could not set PRAGMA {name} on {self.path}: {e}")
+
+        self._local.conn = conn
+        with self._lock:
+            self._connections.add(conn)
+            self.stats["connections"] += 1
+        return conn
+
+    def _retry(self, fn: Callable[[], T]) -> T:
+        """Run fn, retrying with jittered exponential backoff while the database is locked"""
+        for attempt in range(self.retries + 1):
+            try:
+                return fn()
+            except sqlite3.OperationalError as e:
+                if not _is_busy(e) or attempt == self.retries:
+                    raise
+                self.stats["retries"] += 1
+                delay = self.retry_delay * (2**attempt) * (0.5 + random.random())
+                logger.debug(f"{self.path} is locked, retry {attempt + 1}/{self.retries} in {delay:.3f}s")
+                time.sleep(delay)
+        raise AssertionError("unreachable")
+
+    # -- synchronous API ----------------------------------------------------------
+
+    def execute(self, sql: str, params: Sequence[Any] | dict[str, Any] = ()) -> sqlite3.Cursor:
+        """Execute one statement (committed immediately unless inside transaction())"""
+        conn = self.connection()
+        return self._retry(lambda: conn.execute(sql, params))
+
+    def executemany(self, sql: str, rows: Iterable[Sequence[Any]]) -> int:
+        """Execute a statement for every row in a single transaction; returns the row count"""
+        rows = list(rows)
+        if not rows:
+            return 0
+        return self.run_transaction(lambda conn: conn.executemany(sql, rows).rowcount)
+
+    def executescript(self, script: str):
+        """Run several statements (e.g. schema DDL)"""
+        conn = self.connection()
+        self._retry(lambda: conn.executescript(script))
+
+    def fetchone(self, sql: str, params: Sequence[Any] | dict[str, Any] = (), row_factory=None) -> Any:
+        return self._query(sql, params, row_factory, many=False)
+
+    def fetchall(self, sql: str, params: Sequence[Any] | dict[str, Any] = (), row_factory=None) -> list[Any]:
+        return self._query(sql, params, row_factory, many=True)
+
+    def _query(self, sql: str, params, row_factory, many: bool) -> Any:
+        conn = self.connection()
+
+        def query():
+            cursor = conn.cursor()
+            if row_factory is not None:
+                cursor.row_factory = row_factory
+            cursor.execute(sql, params)
+            return cursor.fetchall() if many else cursor.fetchone()
+
+        return self._retry(query)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        BEGIN IMMEDIATE ... COMMIT on the thread's connection (ROLLBACK on error)
+
+        Taking the write lock up front avoids the read-to-write upgrade that fails with
+        "database is locked" without waiting. Nested use joins the outer transaction.
+        """
+        conn = self.connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        self._retry(lambda: conn.execute("BEGIN IMMEDIATE"))
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            self._retry(conn.commit)
+
+    def run_transaction(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Run fn(conn) in a transaction, retrying the whole unit if it hits a lock"""
+        conn = self.connection()
+        if conn.in_transaction:
+            return fn(conn)
+
+        def unit() -> T:
+            with self.transaction() as tx:
+                return fn(tx)
+
+        return self._retry(unit)
+
+    # -- async API (dedicated executor thread) --------------------------------------
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError(f"Database {self.path} is closed")
+            if self._executor is None:
+                name = os.path.splitext(os.path.basename(self.path))[0] or "memory"
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"sqlite-{name}")
+            return self._executor
+
+    async def arun(self, fn: Callable[..., T], *args) -> T:
+        """Run fn(*args) on the database thread, keeping blocking I/O off the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+
+    async def aexecute(self, sql: str, params: Sequence[Any] | dict[str, Any] = ()) -> int:
+        """Async execute; returns the cursor rowcount"""
+        return await self.arun(lambda: self.execute(sql, params).rowcount)
+
+    async def aexecutemany(self, sql: str, rows: Iterable[Sequence[Any]]) -> int:
+        return await self.arun(self.executemany, sql, list(rows))
+
+    async def afetchone(self, sql: str, params: Sequence[Any] | dict[str, Any] = (), row_factory=None) -> Any:
+        return await self.arun(self.fetchone, sql, params, row_factory)
+
+    async def afetchall(self, sql: str, params: Sequence[Any] | dict[str, Any] = (), row_factory=None) -> list[Any]:
+        return await self.arun(self.fetchall, sql, params, row_factory)
+
+    async def arun_transaction(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        return await self.arun(self.run_transaction, fn)
+
+    # -- lifecycle ----------------------------------------------------------------
+
+    def close(self):
+        """Close every thread's connection and stop the executor thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            executor, self._executor = self._executor, None
+            connections = list(self._connections)
+            self._connections = weakref.WeakSet()
+        if executor is not None:
+            executor.shutdown(wait=True)
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Error closing connection to {self.path}: {e}")
+        self._local = threading.local()
+
+
+Migration = str | Callable[[sqlite3.Connection], None]
+
+
+def _statements(script: str) -> Iterator[str]:
+    """Split a SQL script into complete statements (trigger bodies stay intact)"""
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            yield statement.strip()
+            statement = ""
+    if statement.strip():
+        raise ValueError(f"Incomplete SQL statement in migration: {statement.strip()[:80]}")
+
+
+def migrate(db: Database, component: str, migrations: Sequence[Migration]) -> int:
+    """
+    Apply pending migrations for a component and return its schema version
+
+    Versions are tracked per component in ``schema_migrations`` so several owners can
+    share one file. Each migration (a SQL script or a callable taking the connection)
+    runs in its own transaction together with its version bump.
+    """
+    db.execute("CREATE TABLE IF NOT EXISTS schema_migrations (component TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+
+    def current(conn) -> int:
+        row = conn.execute("SELECT version FROM schema_migrations WHERE component = ?", (component,)).fetchone()
+        return row[0] if row else 0
+
+    version = current(db.connection())
+    for target in range(version + 1, len(migrations) + 1):
+        migration = migrations[target - 1]
+
+        def apply(conn, target=target, migration=migration):
+            if current(conn) >= target:
+                return  # another process got there first
+            if callable(migration):
+                migration(conn)
+            else:
+                for statement in _statements(migration):
+                    conn.execute(statement)
+            conn.execute(
+                "INSERT OR REPLACE INTO schema_migrations (component, version) VALUES (?, ?)", (component, target)
+            )
+
+        db.run_transaction(apply)
+        logger.info(f"Applied {component} migration {target} to {db.path}")
+    return max(version, len(migrations))
+
+
+def epoch(value: datetime | str | float) -> int:
+    """Epoch seconds for a timestamp; naive datetimes/ISO strings are read as UTC, like SQLite's strftime('%s')"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        return calendar.timegm(value.timetuple())
+    return int(value.timestamp())
+
+
+_databases: dict[str, Database] = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(path: str | os.PathLike, **kwargs) -> Database:
+    """Shared Database for a file (one per absolute path and process)"""
+    path = os.fspath(path)
+    key = path if path == ":memory:" else os.path.abspath(path)
+    with _databases_lock:
+        db = _databases.get(key)
+        if db is None or db.closed:
+            db = _databases[key] = Database(path, **kwargs)
+        return db
+
+
+def close_all():
+    """Close all shared databases (tests, shutdown)"""
+    with _databases_lock:
+        databases = list(_databases.values())
+        _databases.clear()
+    for db in databases:
+        db.close()
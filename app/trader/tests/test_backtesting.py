@@ -0,0 +1,116 @@
+"""
+Tests for the vectorized and event-driven backtester
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.strategies.technical.base_strategy import MarketRegimeDetector
+from app.trader.backtesting import (
+    REGIMES, BacktestConfig, BacktestJob, EventDrivenBacktester, compute_metrics, regime_codes,
+    load_bars, param_grid, run_event_driven, run_parallel, run_vectorized
+)
+from app.trader.bar_store import OHLCVView
+
+START_MS = 1_700_000_000_000
+
+
+def _bars(n=3000, seed=7, drift=0.0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(drift, 0.002, n)))
+    ts = START_MS + np.arange(n, dtype=np.int64) * 60_000
+    opens = np.concatenate(([close[0]], close[:-1]))
+    return OHLCVView(ts, opens, close * 1.001, close * 0.999, close, np.ones(n))
+
+
+def test_load_bars_from_csv(tmp_path):
+    ts = START_MS + np.arange(4, dtype=np.int64) * 60_000
+    frame = pd.DataFrame({"open_time": ts, "open": 1.0, "high": 2.0, "low": 0.5, "close": [1.0, 1.1, 1.2, 1.3],
+                          "volume": 10.0, "close_time": ts + 59_999})
+    headerless = tmp_path / "ETHUSDT_1m.csv"
+    # Binance kline dumps come without a header and may repeat or reorder rows
+    frame.iloc[[2, 0, 1, 3, 3]].to_csv(headerless, index=False, header=False)
+    named = tmp_path / "BTCUSDT.csv"
+    pd.DataFrame({"timestamp": pd.to_datetime(ts, unit="ms").astype(str), "close": frame["close"]}).to_csv(named, index=False)
+
+    for path in (headerless, named):
+        bars = load_bars(str(path))
+        assert bars.ts.tolist() == ts.tolist()
+        assert bars.close.tolist() == [1.0, 1.1, 1.2, 1.3]
+
+
+def test_vectorized_matches_manual_equity():
+    close = np.array([100.0, 110.0, 99.0, 99.0, 108.9])
+    bars = OHLCVView(START_MS + np.arange(5, dtype=np.int64) * 60_000, close, close, close, close, np.ones(5))
+    targets = np.array([1.0, 1.0, 0.0, -1.0, 0.0])
+    config = BacktestConfig(initial_balance=1000.0, fee_rate=0.001, slippage_bps=0.0)
+
+    result = run_vectorized(bars, lambda b: targets, config=config)
+
+    # Long 100->110->99 (exit at 99), short 99->108.9; costs are charged on the bar of each change
+    expected = 1000.0 * (1 - 0.001) * 1.1 * (1 - 0.1 - 0.001) * (1 - 0.001) * (1 - 0.1 - 0.001)
+    assert result.equity[-1] == pytest.approx(expected)
+    assert [trade["side"] for trade in result.trades] == [1, -1]
+    assert result.trades[0]["return"] == pytest.approx(0.99 * 0.999 ** 2 - 1)
+    assert result.metrics["total_trades"] == 2
+
+
+def test_replay_regimes_match_detector():
+    bars = _bars(400)
+    detector = MarketRegimeDetector()
+    detector.trend_threshold = 0.0003
+    detector.volatility_threshold = 0.002
+    codes = regime_codes(detector, bars.close)
+
+    expected = [detector.detect_regime_from_close(bars.close[max(0, i - 49):i + 1]) for i in range(len(bars))]
+    assert [REGIMES[code] for code in codes] == expected
+    assert len(set(expected)) > 2
+
+
+def test_event_driven_equity_reconciles_with_trades():
+    config = BacktestConfig(initial_balance=10000.0, fee_rate=0.0004, slippage_bps=2.0)
+    backtester = EventDrivenBacktester(_bars(), "BTCUSDT", config=config)
+    result = backtester.run()
+
+    assert result.trades
+    net = sum(trade["pnl"] for trade in result.trades)
+    assert result.equity[-1] == pytest.approx(10000.0 + net)
+    assert result.stats["fees_paid"] == pytest.approx(sum(trade["fees"] for trade in result.trades), abs=0.01)
+    assert not backtester.engine.positions
+    # Entries fill at the open of a later bar, exits at a close
+    assert all(trade["entry_ts"] <= trade["exit_ts"] for trade in result.trades)
+    assert set(trade["reason"] for trade in result.trades) <= {
+        "stop_loss", "take_profit", "time_limit", "signal_reverse", "end_of_data"
+    }
+
+
+def test_parallel_grid(tmp_path):
+    bars = _bars(2000, seed=3)
+    path = tmp_path / "SOLUSDT_1m.csv"
+    pd.DataFrame({"ts": bars.ts, "open": bars.open, "high": bars.high, "low": bars.low,
+                  "close": bars.close, "volume": bars.volume}).to_csv(path, index=False)
+
+    grid = param_grid(fast=[5, 10], slow=[30, 60])
+    jobs = [BacktestJob(str(path), params=params, equity_points=50) for params in grid]
+    jobs.append(BacktestJob(str(path), mode="event", params={"min_confidence": 70.0}))
+    results = run_parallel(jobs, max_workers=2)
+
+    assert [result.params for result in results] == grid + [{"min_confidence": 70.0}]
+    assert all(result.symbol == "SOLUSDT" for result in results)
+    assert len(results[0].equity) == 50
+    single = run_vectorized(bars, "sma_crossover", {"fast": 10, "slow": 60})
+    assert results[3].metrics == single.metrics
+    event = run_event_driven(bars, {"min_confidence": 70.0})
+    assert results[-1].metrics == event.metrics
+
+
+def test_metrics_drawdown_and_monthly_returns():
+    ts = np.array([START_MS, START_MS + 86_400_000 * 40, START_MS + 86_400_000 * 80], dtype=np.int64)
+    metrics = compute_metrics(ts, np.array([100.0, 80.0, 120.0]), np.array([-0.2, 0.5]), np.array([-20.0, 40.0]))
+
+    assert metrics["max_drawdown"] == -20.0
+    assert metrics["total_return"] == 20.0
+    assert metrics["profit_factor"] == 2.0
+    assert metrics["win_rate"] == 50.0
+    assert len(metrics["monthly_returns"]) == 3
@@ -0,0 +1,63 @@
+"""
+Tests for the columnar OHLCV ring buffer
+"""
+
+import numpy as np
+
+from bar_store import BarStore, OHLCVRingBuffer
+
+
+def test_append_wraps_and_keeps_order():
+    buffer = OHLCVRingBuffer(capacity=4)
+    for i in range(6):
+        buffer.append(i * 60, 1.0 + i, 2.0 + i, 0.5 + i, 1.5 + i, 10.0 * i)
+
+    view = buffer.view()
+    assert len(buffer) == 4
+    assert view.ts.tolist() == [120, 180, 240, 300]
+    assert view.close.tolist() == [3.5, 4.5, 5.5, 6.5]
+    assert view.close.flags["C_CONTIGUOUS"]
+    assert not view.close.flags["WRITEABLE"]
+
+
+def test_same_timestamp_overwrites_and_stale_is_rejected():
+    buffer = OHLCVRingBuffer(capacity=3)
+    buffer.append(60, 1, 1, 1, 1, 1)
+    assert buffer.append(60, 1, 2, 1, 2, 5)
+    assert not buffer.append(0, 1, 1, 1, 1, 1)
+
+    assert len(buffer) == 1
+    assert buffer.last()["close"] == 2.0
+
+
+def test_extend_skips_known_bars():
+    buffer = OHLCVRingBuffer(capacity=5)
+    ts = np.arange(4) * 60
+    prices = np.arange(4, dtype=float)
+    buffer.extend(ts, prices, prices, prices, prices, prices)
+    added = buffer.extend(ts + 120, prices, prices, prices, prices, prices)
+
+    assert added == 2
+    assert buffer.view().ts.tolist() == [60, 120, 180, 240, 300]
+    assert buffer.column("close", 2).tolist() == [2.0, 3.0]
+
+
+def test_store_loads_rest_rows():
+    store = BarStore(capacity=10)
+    rows = [[i * 60000, "1", "2", "0.5", str(1 + i), "100", i * 60000 + 59999] for i in range(3)]
+    store.load_rest_klines("btcusdt", "1m", rows)
+
+    view = store.view("BTCUSDT", "1m")
+    assert ("BTCUSDT", "1m") in store
+    assert view.close.tolist() == [1.0, 2.0, 3.0]
+    assert store.view("ETHUSDT", "1m") is None
+
+
+def test_reset_replaces_buffer():
+    store = BarStore(capacity=10)
+    store.append("BTCUSDT", "1m", 60, 1, 2, 0.5, 1.5, 10)
+    old = store.get("BTCUSDT", "1m")
+
+    fresh = store.reset("btcusdt", "1m")
+    assert fresh is store.get("BTCUSDT", "1m") and fresh is not old
+    assert len(fresh) == 0 and len(old) == 1
@@ -0,0 +1,91 @@
+"""
+Tests for batched order placement
+"""
+
+import asyncio
+import json
+from decimal import Decimal
+from urllib.parse import parse_qs
+
+from aiohttp import web
+
+from app.trader.optimized_client import OptimizedTradingClient, TradingOrder
+from app.trader.rest_transport import RestTransport
+
+
+async def _start_server(routes):
+    app = web.Application()
+    for method, path, handler in routes:
+        app.router.add_route(method, path, handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def _orders(n):
+    return [
+        TradingOrder(symbol="BTCUSDT", side="buy", quantity=Decimal("0.001"), client_order_id=f"o{i}")
+        for i in range(n)
+    ]
+
+
+async def _run(routes, orders):
+    runner, url = await _start_server(routes)
+    client = OptimizedTradingClient("key", "secret")
+    client.transport = RestTransport(url, "key", "secret")
+    try:
+        results = await client.batch_place_orders(orders, dry_run=False)
+        return client, results
+    finally:
+        await client.transport.close()
+        await runner.cleanup()
+
+
+def test_batch_endpoint_resolves_each_order():
+    chunks = []
+
+    async def batch_orders(request):
+        params = parse_qs(request.query_string)
+        assert "signature" in params
+        batch = json.loads(params["batchOrders"][0])
+        chunks.append(len(batch))
+        results = []
+        for order in batch:
+            assert "timeInForce" not in order and "price" not in order
+            if order["newClientOrderId"] == "o3":
+                results.append({"code": -2019, "msg": "Margin is insufficient."})
+            else:
+                results.append({"orderId": 1, "clientOrderId": order["newClientOrderId"], "status": "FILLED"})
+        return web.json_response(results)
+
+    client, results = asyncio.run(_run([("POST", "/fapi/v1/batchOrders", batch_orders)], _orders(7)))
+
+    assert sorted(chunks) == [2, 5]
+    assert [r["clientOrderId"] for r in results] == [f"o{i}" for i in range(7)]
+    assert results[3]["status"] == "REJECTED" and results[3]["code"] == -2019
+    assert sum(r["status"] == "FILLED" for r in results) == 6
+    assert len(client.executed_orders) == 6
+
+
+def test_falls_back_to_single_orders():
+    singles = []
+
+    async def batch_orders(request):
+        return web.json_response({"code": -1, "msg": "not found"}, status=404)
+
+    async def order(request):
+        params = parse_qs(request.query_string)
+        singles.append(params["newClientOrderId"][0])
+        return web.json_response({"orderId": len(singles), "clientOrderId": singles[-1], "status": "NEW"})
+
+    routes = [("POST", "/fapi/v1/batchOrders", batch_orders), ("POST", "/fapi/v1/order", order)]
+    client, results = asyncio.run(_run(routes, _orders(3)))
+
+    assert sorted(singles) == ["o0", "o1", "o2"]
+    assert [r["status"] for r in results] == ["NEW"] * 3
+    assert not client.batch_endpoint_available
+    # One batch request (weight 5) plus three single orders (weight 1 each)
+    assert client.transport.used_weight == 5 + 3
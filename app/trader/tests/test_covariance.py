@@ -0,0 +1,105 @@
+"""
+Tests for the rolling EW covariance engine and portfolio risk math
+"""
+
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStore
+from covariance import EWCovariance, shrink
+from portfolio_management import AssetAllocation, AssetClass, CorrelationAnalyzer, RiskMetricsCalculator
+
+HOUR_MS = 3_600_000
+
+
+def _returns(bars=400, assets=4, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=(bars, assets)) @ rng.normal(size=(assets, assets)) * 0.01
+
+
+def _pandas_cov(returns, halflife):
+    return pd.DataFrame(returns).ewm(halflife=halflife).cov(bias=True).iloc[-returns.shape[1]:].to_numpy()
+
+
+def test_incremental_updates_match_pandas_ewm():
+    returns = _returns()
+    engine = EWCovariance(halflife=40, min_periods=5, symbols=["A", "B", "C", "D"])
+    engine.update(returns[:150])
+    for row in returns[150:160]:
+        engine.update(row)
+    engine.update(returns[160:])
+
+    np.testing.assert_allclose(engine.covariance(), _pandas_cov(returns, 40), rtol=1e-9, atol=1e-15)
+    corr = engine.correlation(["B", "A"])
+    assert corr[0, 0] == 1.0 and np.isclose(corr[0, 1], corr[1, 0])
+
+
+def test_missing_bars_and_unknown_symbols():
+    returns = _returns(assets=2)
+    returns[::3, 1] = np.nan
+    engine = EWCovariance(halflife=40, min_periods=300)
+    engine.update(returns, ["X", "Y"])
+
+    assert engine.ready(["X", "Y", "Z"]).tolist() == [True, False, False]
+    cov = engine.covariance(["X", "Y", "Z"])
+    assert np.isfinite(cov[0, 0]) and np.isnan(cov[1, 1]) and np.isnan(cov[2, 2])
+
+
+def test_sync_reads_closed_bars_from_store():
+    returns = _returns(bars=200, assets=3)
+    prices = 100 * np.exp(np.cumsum(returns, axis=0))
+    store = BarStore()
+    for column, symbol in enumerate(["AAA", "BBB", "CCC"]):
+        for t in range(200):
+            store.append(symbol, "1h", t * HOUR_MS, 1, 1, 1, prices[t, column], 1)
+
+    engine = EWCovariance(halflife=30, min_periods=5)
+    # The newest bar may still be forming and is left for the next sync
+    assert engine.sync(store) == 198
+    assert engine.sync(store) == 0
+    expected = _pandas_cov(np.diff(np.log(prices[:-1]), axis=0), 30)
+    np.testing.assert_allclose(engine.covariance(["AAA", "BBB", "CCC"]), expected, rtol=1e-9, atol=1e-15)
+
+    for column, symbol in enumerate(["AAA", "BBB", "CCC"]):
+        store.append(symbol, "1h", 200 * HOUR_MS, 1, 1, 1, prices[-1, column], 1)
+    assert engine.sync(store) == 1
+
+
+def test_shrinkage_estimators():
+    rng = np.random.default_rng(1)
+    sample = np.cov(rng.normal(size=(20, 10)), rowvar=False)
+
+    oas = shrink(sample, "oas", n_samples=20)
+    assert np.all(np.linalg.eigvalsh(oas) > 0)
+    assert np.isclose(np.trace(oas), np.trace(sample))
+
+    fixed = shrink(sample, 0.5, "constant_correlation")
+    np.testing.assert_allclose(np.diagonal(fixed), np.diagonal(sample))
+    assert np.allclose(shrink(sample, 0.0, "diagonal"), sample)
+    assert np.allclose(shrink(sample, 1.0, "diagonal"), np.diag(np.diagonal(sample)))
+
+
+def test_portfolio_risk_uses_covariance_matrix():
+    returns = _returns(bars=300, assets=3, seed=2)
+    symbols = ["BTCUSDT", "ETHUSDT", "EURUSD"]
+    analyzer = CorrelationAnalyzer(min_periods=10, shrinkage=None)
+    analyzer.engine.update(returns, symbols)
+    allocations = [
+        AssetAllocation(symbol, AssetClass.CRYPTOCURRENCY, 1 / 4, current_weight=w)
+        for symbol, w in zip(symbols + ["NEWUSDT"], [0.4, 0.3, 0.2, 0.1])
+    ]
+    weights = np.array([0.4, 0.3, 0.2, 0.1])
+
+    cov = analyzer.covariance_matrix(allocations)
+    assert cov[3, 3] == (5.0 * 0.02) ** 2 and not cov[3, :3].any()  # no history -> risk-score fallback
+    volatility = RiskMetricsCalculator.calculate_portfolio_volatility(allocations, analyzer)
+    assert np.isclose(volatility, np.sqrt(weights @ cov @ weights))
+    contributions = RiskMetricsCalculator.calculate_risk_contributions(allocations, analyzer)
+    assert np.isclose(sum(contributions.values()), 1.0)
+
+    # Same value as the pairwise definition
+    corr = analyzer.correlation_matrix([a.symbol for a in allocations])
+    pairs = [(i, j) for i in range(4) for j in range(i + 1, 4)]
+    expected = sum(abs(corr[i, j]) * weights[i] * weights[j] for i, j in pairs) / len(pairs)
+    assert np.isclose(analyzer.calculate_portfolio_correlation_risk(allocations), expected)
+    assert np.isclose(analyzer.get_correlation("ETHUSDT", "BTCUSDT"), corr[1, 0])
@@ -0,0 +1,64 @@
+"""
+Tests for the compiled symbol-filter index
+"""
+
+import asyncio
+
+from exchange_info import ExchangeInfo, SymbolFilterIndex, DEFAULT_TRADING_FILTERS
+
+
+def _exchange_info_payload(tick="0.10", step="0.001"):
+    return {
+        "symbols": [
+            {
+                "symbol": "BTCUSDT",
+                "filters": [
+                    {"filterType": "PRICE_FILTER", "tickSize": tick},
+                    {"filterType": "LOT_SIZE", "stepSize": step, "minQty": "0.001", "maxQty": "1000"},
+                    {"filterType": "MIN_NOTIONAL", "notional": "100"},
+                ],
+            }
+        ]
+    }
+
+
+def test_rounding_matches_filters():
+    info = ExchangeInfo(SymbolFilterIndex(DEFAULT_TRADING_FILTERS))
+
+    assert info.validate_price("BTCUSDT", 50123.47) == 50123.4
+    assert info.validate_price("ADAUSDT", 0.3) == 0.3
+    assert info.validate_quantity("BTCUSDT", 0.0129) == 0.012
+    assert info.validate_quantity("BTCUSDT", 0.0001) == 0.001
+    assert info.validate_quantity("ADAUSDT", 12.7) == 12.0
+    assert info.get_price_precision("ETHUSDT") == 2
+    assert info.format_quantity("BTCUSDT", 0.5) == "0.500"
+    assert not info.validate_notional("BTCUSDT", 100.0, 0.01)
+
+
+def test_refresh_is_single_flight_and_pushes_updates():
+    index = SymbolFilterIndex(DEFAULT_TRADING_FILTERS)
+    pushed = []
+    index.subscribe(pushed.append)
+    fetches = []
+
+    async def fetch():
+        fetches.append(1)
+        await asyncio.sleep(0.01)
+        return _exchange_info_payload()
+
+    async def scenario():
+        return await asyncio.gather(*(index.refresh(fetch) for _ in range(3)))
+
+    results = asyncio.run(scenario())
+
+    assert len(fetches) == 1
+    assert results == [{"BTCUSDT"}] * 3
+    assert pushed == [{"BTCUSDT"}]
+    filters = index.get("BTCUSDT")
+    assert filters.min_notional == 100.0
+    assert filters.price_precision == 2
+    assert filters.round_price(50123.47) == 50123.4
+
+    # Unchanged filters do not notify again
+    assert index.load_exchange_info(_exchange_info_payload()) == set()
+    assert len(pushed) == 1
@@ -0,0 +1,107 @@
+"""
+Tests for the StrategyParams optimizer
+"""
+
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from app.strategies.technical.base_strategy import BaseTradingStrategy, StrategyParams
+from app.trader.backtesting import EventDrivenBacktester
+from app.trader.bar_store import OHLCVView
+from app.trader.optimizer import (
+    ParamSpace, SharedArrayStore, StrategyOptimizer, _attach, _indicator_group, compute_indicator_group,
+    indicator_layout
+)
+
+START_MS = 1_700_000_000_000
+SPACE = {"ma_fast_period": (5, 12), "ma_slow_period": [20, 30], "min_confidence": (40.0, 60.0)}
+
+
+def _bars(n=1500, seed=11):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    ts = START_MS + np.arange(n, dtype=np.int64) * 60_000
+    opens = np.concatenate(([close[0]], close[:-1]))
+    return OHLCVView(ts, opens, close * 1.001, close * 0.999, close, np.ones(n))
+
+
+def _optimizer(tmp_path, **kwargs):
+    kwargs.setdefault("max_workers", 2)
+    return StrategyOptimizer(_bars(), ParamSpace(SPACE), symbol="BTCUSDT", min_trades=1,
+                             cache_path=str(tmp_path / "cache.db"), **kwargs)
+
+
+def test_param_space_grid_respects_constraints():
+    space = ParamSpace({"ma_fast_period": (10, 30), "ma_slow_period": [20, 50]})
+    grid = space.grid(steps=3)
+    assert all(point["ma_fast_period"] < point["ma_slow_period"] for point in grid)
+    assert {"ma_fast_period": 30, "ma_slow_period": 50} in grid
+    assert {"ma_fast_period": 30, "ma_slow_period": 20} not in grid
+    for point in grid:
+        assert space.from_unit(space.to_unit(point)) == point
+    with pytest.raises(ValueError):
+        ParamSpace({"not_a_param": (1, 2)})
+
+
+def test_shared_indicators_match_strategy():
+    bars = _bars(300)
+    params = StrategyParams(ma_fast_period=7, ma_slow_period=25, rsi_period=9, macd_fast=8, macd_slow=21)
+    layout = indicator_layout(params)
+    store = SharedArrayStore()
+    try:
+        for group in {_indicator_group(name) for name in layout.values()}:
+            store.add(compute_indicator_group(group, bars.high, bars.low, bars.close))
+        shared = _attach(store.manifest, layout.values())
+        expected = asyncio.run(BaseTradingStrategy(params)._calculate_indicators(
+            bars.close, bars.high, bars.low, bars.volume))
+        assert set(expected) == set(layout)
+        for key, name in layout.items():
+            np.testing.assert_array_equal(shared[name], expected[key])
+    finally:
+        store.close()
+
+
+def test_search_uses_cache_and_matches_backtest(tmp_path):
+    with _optimizer(tmp_path) as optimizer:
+        grid = optimizer.grid_search(steps=2)
+        assert grid.evaluations and not any(e.cached or e.error for e in grid.evaluations)
+        best = grid.best
+        # Same numbers as a standalone backtest computing its own indicators
+        strategy = BaseTradingStrategy(grid.best_params())
+        direct = EventDrivenBacktester(optimizer.bars, "BTCUSDT", strategy, optimizer.config).run()
+        assert best.metrics["total_trades"] == direct.metrics["total_trades"]
+        assert best.score == direct.metrics["sharpe_ratio"]
+
+    with _optimizer(tmp_path) as optimizer:
+        again = optimizer.grid_search(steps=2)
+        assert all(e.cached for e in again.evaluations)
+        assert [e.score for e in again.evaluations] == [e.score for e in grid.evaluations]
+
+        path = again.save(str(tmp_path / "leaderboard.json"), top=3)
+        with open(path) as f:
+            report = json.load(f)
+        assert report["cached"] == len(again.evaluations)
+        assert [row["rank"] for row in report["leaderboard"]] == [1, 2, 3]
+        assert report["leaderboard"][0]["params"] == best.params
+
+
+def test_random_and_bayesian_search(tmp_path):
+    with _optimizer(tmp_path) as optimizer:
+        random = optimizer.random_search(n_points=6, seed=1)
+        assert len(random.evaluations) == 6
+        bayes = optimizer.bayesian_search(n_points=10, initial_points=4, batch_size=3, seed=2)
+        assert len(bayes.evaluations) == 10
+        assert len({json.dumps(e.params, sort_keys=True) for e in bayes.evaluations}) == 10
+        assert bayes.best is not None
+
+
+def test_walk_forward_folds(tmp_path):
+    with _optimizer(tmp_path, max_workers=1) as optimizer:
+        report = optimizer.walk_forward(train_bars=600, test_bars=300, method="random", n_points=3, seed=5)
+
+    assert [fold["test"] for fold in report["folds"]] == [[600, 900], [900, 1200], [1200, 1500]]
+    assert [fold["train"] for fold in report["folds"]] == [[0, 600], [300, 900], [600, 1200]]
+    assert all(fold["best_params"] for fold in report["folds"])
@@ -0,0 +1,98 @@
+"""
+Tests for the local L2 order book
+"""
+
+import asyncio
+
+import pytest
+
+from app.trader.binance_realtime import BinanceDataStream, DepthRecord
+from app.trader.order_book import LocalOrderBook, OrderBookManager, OrderBookSyncError
+
+
+def _snapshot(last_update_id=100):
+    return {
+        "lastUpdateId": last_update_id,
+        "bids": [["100.0", "1.0"], ["99.0", "2.0"], ["98.0", "3.0"]],
+        "asks": [["101.0", "1.5"], ["102.0", "2.5"], ["103.0", "4.0"]],
+    }
+
+
+def _record(U, u, pu, bids=(), asks=(), symbol="BTCUSDT"):
+    return DepthRecord(symbol, 0, U, u, pu, list(bids), list(asks))
+
+
+def test_queries():
+    book = LocalOrderBook("BTCUSDT")
+    book.apply_snapshot(_snapshot())
+
+    assert book.best_bid() == (100.0, 1.0)
+    assert book.best_ask() == (101.0, 1.5)
+    assert book.spread() == 1.0
+    assert book.depth_at("bid", 99.0) == 2.0
+    assert book.depth_at("ask", 99.0) == 0.0
+    # 1.5 @ 101 + 1.0 @ 102
+    assert book.vwap("buy", 2.5) == pytest.approx((1.5 * 101 + 1.0 * 102) / 2.5)
+    assert book.vwap("sell", 10.0) is None
+    assert book.imbalance(2) == pytest.approx((3.0 - 4.0) / 7.0)
+    assert book.bids.qty_through(99.0) == 3.0
+
+
+def test_diff_sequence_validation():
+    book = LocalOrderBook("BTCUSDT")
+    book.apply_snapshot(_snapshot(100))
+
+    # Stale event is dropped
+    assert not book.apply_diff(90, 95, 89, [(100.0, 9.0)], [])
+    assert book.best_bid() == (100.0, 1.0)
+
+    # First event straddles the snapshot, then pu must chain
+    assert book.apply_diff(98, 105, 97, [(100.0, 0.0), (99.5, 4.0)], [(101.0, 0.0)])
+    assert book.best_bid() == (99.5, 4.0)
+    assert book.best_ask() == (102.0, 2.5)
+    assert book.apply_diff(106, 110, 105, [], [(101.5, 1.0)])
+    assert book.best_ask() == (101.5, 1.0)
+
+    with pytest.raises(OrderBookSyncError):
+        book.apply_diff(115, 120, 112, [], [])
+    assert not book.synced
+
+
+def test_manager_buffers_until_snapshot_and_publishes():
+    published = []
+
+    async def fetch(symbol, limit):
+        return _snapshot(100)
+
+    async def scenario():
+        manager = OrderBookManager(fetch)
+        manager.add_listener(lambda book: published.append(book.best_bid()))
+        manager.on_depth(_record(95, 99, 94, bids=[(100.0, 7.0)]))
+        manager.on_depth(_record(100, 104, 99, bids=[(100.0, 5.0)]))
+        await asyncio.sleep(0.01)
+        manager.on_depth(_record(105, 108, 104, bids=[(100.5, 1.0)]))
+        return manager
+
+    manager = asyncio.run(scenario())
+    book = manager.get_book("btcusdt")
+    assert book is not None
+    assert book.last_update_id == 108
+    assert published == [(100.0, 5.0), (100.5, 1.0)]
+
+
+def test_stream_routes_diff_depth():
+    stream = BinanceDataStream()
+    records = []
+    stream.add_diff_depth_callback(records.append)
+    stream.subscribe_diff_depth("BTCUSDT")
+    stream.subscribe_orderbook("BTCUSDT")
+
+    message = (
+        '{"stream":"btcusdt@depth@100ms","data":{"e":"depthUpdate","E":1,"s":"BTCUSDT",'
+        '"U":10,"u":12,"pu":9,"b":[["100.0","1.0"]],"a":[]}}'
+    )
+    asyncio.run(stream._process_message(message))
+
+    assert "btcusdt@depth@100ms" in stream.subscriptions
+    assert (records[0].first_update_id, records[0].final_update_id, records[0].prev_final_update_id) == (10, 12, 9)
+    assert records[0].bids == [(100.0, 1.0)]
@@ -0,0 +1,127 @@
+"""
+Tests for the ERC / minimum-variance / max-Sharpe portfolio solvers
+"""
+
+import asyncio
+
+import numpy as np
+
+from portfolio_management import AssetAllocation, AssetClass, PortfolioManager, RebalanceStrategy
+from portfolio_solvers import PortfolioSolvers, project_box_turnover
+
+
+def _problem(n, seed=0):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(size=(2 * n, n))
+    cov = factors.T @ factors / (2 * n) * 1e-4 + np.diag(rng.uniform(1e-5, 1e-4, n))
+    mu = rng.normal(size=n) * 1e-3 + 2e-4
+    return cov, mu
+
+
+def _sharpe(weights, cov, mu):
+    return weights @ mu / np.sqrt(weights @ cov @ weights)
+
+
+def test_projection_respects_box_and_turnover():
+    rng = np.random.default_rng(3)
+    anchor = np.full(20, 0.05)
+    lower, upper = np.zeros(20), np.full(20, 0.2)
+    for _ in range(20):
+        v = anchor + rng.normal(size=20) * 0.1
+        w = project_box_turnover(v, lower, upper, anchor, 0.3)
+        assert np.all(w >= lower) and np.all(w <= upper)
+        assert np.abs(w - anchor).sum() <= 0.3 + 1e-12
+        # Optimality: no feasible nudge towards v shortens the distance
+        for _ in range(20):
+            other = project_box_turnover(w + rng.normal(size=20) * 0.01, lower, upper, anchor, 0.3)
+            assert np.sum((w - v) ** 2) <= np.sum((other - v) ** 2) + 1e-12
+
+
+def test_equal_risk_contribution():
+    cov, _ = _problem(50)
+    solvers = PortfolioSolvers()
+    result = solvers.equal_risk_contribution(cov)
+    contributions = result.weights * (cov @ result.weights)
+
+    assert result.converged and np.isclose(result.weights.sum(), 1.0)
+    np.testing.assert_allclose(contributions, contributions.mean(), rtol=1e-6)
+    # Warm start from the previous solution converges immediately
+    assert solvers.equal_risk_contribution(cov).iterations == 1
+
+
+def test_minimum_variance_matches_closed_form_and_constraints():
+    cov, _ = _problem(40)
+    n = len(cov)
+    solvers = PortfolioSolvers()
+
+    free = solvers.minimum_variance(cov, np.full(n, -1.0), np.full(n, 1.0))
+    closed_form = np.linalg.solve(cov, np.ones(n))
+    np.testing.assert_allclose(free.weights, closed_form / closed_form.sum(), atol=1e-6)
+
+    lower, upper = np.full(n, 0.01), np.full(n, 0.05)
+    current = np.full(n, 1.0 / n)
+    boxed = solvers.minimum_variance(cov, lower, upper, current, max_turnover=0.2)
+    assert boxed.converged
+    assert np.all(boxed.weights >= lower - 1e-9) and np.all(boxed.weights <= upper + 1e-9)
+    assert boxed.turnover <= 0.2 + 1e-9 and np.isclose(boxed.weights.sum(), 1.0, atol=1e-6)
+    assert free.volatility <= boxed.volatility <= np.sqrt(current @ cov @ current)
+
+
+def test_max_sharpe_beats_feasible_portfolios():
+    cov, mu = _problem(30, seed=4)
+    n = len(cov)
+    lower, upper = np.zeros(n), np.full(n, 0.15)
+    current = np.full(n, 1.0 / n)
+    solvers = PortfolioSolvers()
+
+    for turnover in (None, 0.4):
+        result = solvers.max_sharpe(cov, mu, lower, upper, current, max_turnover=turnover)
+        assert result.converged and np.isclose(result.weights.sum(), 1.0, atol=1e-6)
+        assert np.all(result.weights >= -1e-9) and np.all(result.weights <= 0.15 + 1e-9)
+        if turnover:
+            assert result.turnover <= turnover + 1e-9
+        # Random feasible perturbations never improve the Sharpe ratio
+        rng = np.random.default_rng(5)
+        for _ in range(200):
+            candidate = project_box_turnover(
+                result.weights + rng.normal(size=n) * 0.01, lower, upper, current if turnover else None, turnover
+            )
+            candidate = candidate / candidate.sum()
+            if np.all(candidate <= 0.15) and (not turnover or np.abs(candidate - current).sum() <= turnover):
+                assert _sharpe(candidate, cov, mu) <= result.sharpe + 1e-9
+
+
+def test_hundreds_of_assets_and_warm_start():
+    cov, mu = _problem(300, seed=6)
+    n = len(cov)
+    lower, upper = np.zeros(n), np.full(n, 0.02)
+    solvers = PortfolioSolvers()
+
+    cold = solvers.max_sharpe(cov, mu, lower, upper)
+    warm = solvers.max_sharpe(cov, mu, lower, upper)
+    assert cold.converged and warm.converged
+    assert solvers.qp.factorizations == 1
+    assert warm.iterations < cold.iterations and warm.solve_time_ms < cold.solve_time_ms
+    assert np.isclose(warm.sharpe, cold.sharpe, rtol=1e-6)
+
+
+def test_rebalance_records_solver_result():
+    manager = PortfolioManager(initial_balance=10000.0)
+    manager.optimizer.strategy = RebalanceStrategy.MINIMUM_VARIANCE
+    risk_scores = {"BTCUSDT": 8.0, "ETHUSDT": 9.0, "EURUSD": 2.0, "GBPUSD": 3.0}
+    for symbol, risk_score in risk_scores.items():
+        manager.add_asset(
+            AssetAllocation(
+                symbol, AssetClass.CRYPTOCURRENCY, 0.25, current_weight=0.25, max_weight=0.6, risk_score=risk_score
+            )
+        )
+
+    actions = asyncio.run(manager.execute_rebalance({"max_turnover": 0.5}))
+    record = manager.rebalance_history[-1]["optimizer"]
+    weights = {asset.symbol: asset.target_weight for asset in manager.allocations}
+
+    assert record["method"] == "minimum_variance" and record["converged"]
+    assert record["solve_time_ms"] > 0 and record["turnover"] <= 0.5 + 1e-9
+    assert weights["EURUSD"] > weights["GBPUSD"] > weights["BTCUSDT"] > weights["ETHUSDT"]
+    sides = {action.symbol: action.action for action in actions}
+    assert sides["EURUSD"] == "buy" and sides["ETHUSDT"] == "sell"
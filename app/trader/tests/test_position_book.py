@@ -0,0 +1,66 @@
+"""
+Tests for the vectorized position book in AdvancedRiskEngine
+"""
+
+import asyncio
+import sqlite3
+from datetime import datetime, timedelta
+
+from advanced_risk_engine import AdvancedRiskEngine, Position, PositionBook, PositionType
+
+
+def _position(position_id, symbol, position_type, entry, stop_loss, take_profit, hours_ago=0.0):
+    return Position(
+        id=position_id,
+        symbol=symbol,
+        position_type=position_type,
+        entry_price=entry,
+        current_price=entry,
+        quantity=1.0,
+        entry_time=datetime.now() - timedelta(hours=hours_ago),
+        stop_loss=stop_loss,
+        take_profit=take_profit,
+    )
+
+
+def test_mark_flags_stops_take_profits_and_expiry():
+    book = PositionBook(capacity=2)
+    book.add(_position("long_sl", "BTCUSDT", PositionType.LONG, 100.0, 95.0, 110.0))
+    book.add(_position("short_tp", "BTCUSDT", PositionType.SHORT, 100.0, 105.0, 94.0))
+    book.add(_position("long_open", "ETHUSDT", PositionType.LONG, 50.0, 45.0, 60.0))
+    book.add(_position("expired", "ETHUSDT", PositionType.SHORT, 50.0, 60.0, 40.0, hours_ago=30))
+    book.add(_position("no_price", "SOLUSDT", PositionType.LONG, 10.0, 9.0, 11.0, hours_ago=30))
+
+    triggered, reasons = book.mark({"BTCUSDT": 94.0, "ETHUSDT": 52.0}, datetime.now().timestamp(), 24 * 3600)
+
+    flagged = {book.positions[row].id: PositionBook.CLOSE_REASONS[reasons[row]] for row in triggered.nonzero()[0]}
+    assert flagged == {"long_sl": "stop_loss", "short_tp": "take_profit", "expired": "time_limit"}
+
+    book.sync_positions()
+    assert book.positions[book.row("long_open")].unrealized_pnl == 2.0
+    assert book.positions[book.row("short_tp")].unrealized_pnl == 6.0
+
+    book.remove("long_sl")
+    assert "long_sl" not in book and len(book) == 4
+    assert book.positions[book.row("no_price")].id == "no_price"
+
+
+def test_update_positions_closes_in_one_batch(tmp_path):
+    engine = AdvancedRiskEngine(initial_balance=10000.0)
+    engine.db_path = str(tmp_path / "risk.db")
+    engine.init_database()
+    for position in (
+        _position("a", "BTCUSDT", PositionType.LONG, 100.0, 95.0, 110.0),
+        _position("b", "BTCUSDT", PositionType.SHORT, 100.0, 105.0, 90.0),
+    ):
+        engine.positions[position.id] = position
+        engine.book.add(position)
+
+    asyncio.run(engine.update_positions({"BTCUSDT": 94.0}))
+
+    assert list(engine.positions) == ["b"]
+    assert engine.current_balance == 10000.0 - 6.0
+    conn = sqlite3.connect(engine.db_path)
+    rows = conn.execute("SELECT id, status, realized_pnl FROM positions").fetchall()
+    conn.close()
+    assert rows == [("a", "closed", -6.0)]
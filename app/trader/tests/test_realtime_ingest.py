@@ -0,0 +1,113 @@
+"""
+Tests for sharded realtime ingest in BinanceDataStream
+"""
+
+import asyncio
+import json
+
+from app.trader.binance_realtime import BinanceDataStream, KlineData, interval_to_ms
+
+
+def _kline_message(open_time, closed, interval="1m", symbol="BTCUSDT"):
+    return json.dumps({
+        "stream": f"{symbol.lower()}@kline_{interval}",
+        "data": {
+            "e": "kline", "E": open_time + 1000, "s": symbol,
+            "k": {
+                "t": open_time, "T": open_time + 59999, "s": symbol, "i": interval,
+                "o": "1", "c": "2", "h": "3", "l": "0.5", "v": "10", "n": 5,
+                "x": closed, "q": "20", "V": "4", "Q": "8"
+            }
+        }
+    })
+
+
+class FakeRestClient:
+    def __init__(self):
+        self.calls = []
+
+    def get_historical_klines(self, symbol, interval, start_time=None, end_time=None, limit=500):
+        self.calls.append((start_time, end_time))
+        return [
+            KlineData(symbol, t, t + 59999, 1.0, 3.0, 0.5, 2.0, 10.0, t + 59999, 20.0, 5, 4.0, 8.0)
+            for t in range(start_time, end_time, 60000)
+        ]
+
+
+def test_interval_to_ms():
+    assert interval_to_ms("1m") == 60000
+    assert interval_to_ms("4h") == 4 * 3600000
+    assert interval_to_ms("1M") is None
+
+
+def test_subscriptions_are_sharded():
+    stream = BinanceDataStream(dry_run=False, max_streams_per_connection=2)
+    for symbol in ("BTCUSDT", "ETHUSDT", "SOLUSDT"):
+        stream.subscribe_ticker(symbol)
+
+    shards = stream._build_shards()
+    assert [len(shard.streams) for shard in shards] == [2, 1]
+
+
+def test_kline_gap_is_backfilled_in_order():
+    rest = FakeRestClient()
+    stream = BinanceDataStream(dry_run=False, rest_client=rest)
+    received = []
+    stream.add_kline_callback(lambda kline: received.append((kline.open_time, kline.is_closed)))
+
+    async def feed():
+        await stream._process_message(_kline_message(0, True))
+        # Bars at 60000 and 120000 were missed while disconnected
+        await stream._process_message(_kline_message(180000, False))
+
+    asyncio.run(feed())
+
+    assert rest.calls == [(60000, 179999)]
+    assert received == [(0, True), (60000, True), (120000, True), (180000, False)]
+    stats = stream.get_stream_stats()["btcusdt@kline_1m"]
+    assert stats["messages"] == 2
+    assert stats["gaps"] == 1
+    assert stats["backfilled"] == 2
+
+
+def _depth_message(update_id, symbol="BTCUSDT"):
+    return json.dumps({
+        "stream": f"{symbol.lower()}@depth5",
+        "data": {
+            "e": "depthUpdate", "E": 1700000000000 + update_id, "s": symbol,
+            "U": update_id, "u": update_id + 2, "pu": update_id - 1,
+            "b": [["100.5", "1.0"], ["100.4", "2.5"]], "a": [["100.6", "0.7"]]
+        }
+    })
+
+
+def test_fast_decode_emits_slot_records():
+    stream = BinanceDataStream(dry_run=False, fast_decode=True)
+    stream.subscribe_orderbook("BTCUSDT")
+    received = []
+    stream.add_orderbook_callback(received.append)
+
+    asyncio.run(stream._process_message(_depth_message(10)))
+
+    record = received[0]
+    assert not hasattr(record, "__dict__")
+    assert record.event_time == 1700000000010
+    assert record.final_update_id == 12
+    assert record.bids == [(100.5, 1.0), (100.4, 2.5)]
+    assert "btcusdt@depth5" in stream._stream_handlers
+
+
+def test_fast_decode_batches_callbacks():
+    stream = BinanceDataStream(dry_run=False, fast_decode=True, batch_size=3)
+    batches = []
+    stream.add_batch_callback("orderbook", batches.append)
+
+    async def feed():
+        for update_id in range(4):
+            await stream._process_message(_depth_message(update_id))
+
+    asyncio.run(feed())
+    assert [len(batch) for batch in batches] == [3]
+
+    stream.flush_batches()
+    assert [len(batch) for batch in batches] == [3, 1]
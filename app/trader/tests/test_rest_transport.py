@@ -0,0 +1,108 @@
+"""
+Tests for the shared async REST transport
+"""
+
+import asyncio
+import threading
+from urllib.parse import parse_qs
+
+import pytest
+from aiohttp import web
+
+from rest_transport import RestAPIError, RestTransport
+
+
+async def _start_server(handlers):
+    app = web.Application()
+    for method, path, handler in handlers:
+        app.router.add_route(method, path, handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_coalesces_identical_gets_and_tracks_weight():
+    calls = []
+
+    async def exchange_info(request):
+        calls.append(request.query_string)
+        await asyncio.sleep(0.05)
+        return web.json_response({"symbols": []}, headers={"X-MBX-USED-WEIGHT-1M": str(len(calls) * 40)})
+
+    async def scenario():
+        runner, url = await _start_server([("GET", "/fapi/v1/exchangeInfo", exchange_info)])
+        transport = RestTransport(url)
+        try:
+            results = await asyncio.gather(*(transport.request("GET", "/fapi/v1/exchangeInfo") for _ in range(5)))
+            await transport.request("GET", "/fapi/v1/exchangeInfo")
+            return results, transport.get_stats()
+        finally:
+            await transport.close()
+            await runner.cleanup()
+
+    results, stats = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert all(result == {"symbols": []} for result in results)
+    endpoint = stats["endpoints"]["/fapi/v1/exchangeInfo"]
+    assert endpoint["coalesced"] == 4
+    assert endpoint["weight"] == 40
+    assert stats["used_weight"] == 80
+
+
+def test_signed_request_and_error():
+    seen = {}
+
+    async def order(request):
+        seen.update(parse_qs(request.query_string))
+        seen["api_key"] = request.headers.get("X-MBX-APIKEY")
+        return web.json_response({"code": -2019, "msg": "Margin is insufficient."}, status=400)
+
+    async def scenario():
+        runner, url = await _start_server([("POST", "/fapi/v1/order", order)])
+        transport = RestTransport(url, api_key="key", api_secret="secret")
+        try:
+            with pytest.raises(RestAPIError) as excinfo:
+                await transport.request("POST", "/fapi/v1/order", {"symbol": "BTCUSDT", "price": None}, signed=True)
+            return excinfo.value
+        finally:
+            await transport.close()
+            await runner.cleanup()
+
+    error = asyncio.run(scenario())
+    assert error.status == 400
+    assert "Margin is insufficient" in str(error)
+    assert seen["api_key"] == "key"
+    assert seen["symbol"] == ["BTCUSDT"]
+    assert "price" not in seen
+    assert "timestamp" in seen and "signature" in seen
+
+
+def test_session_closed_with_its_event_loop():
+    async def ping(request):
+        return web.json_response({})
+
+    # Server on its own thread: the client side runs two separate asyncio.run loops
+    server_loop = asyncio.new_event_loop()
+    runner, url = server_loop.run_until_complete(_start_server([("GET", "/fapi/v1/ping", ping)]))
+    thread = threading.Thread(target=server_loop.run_forever, daemon=True)
+    thread.start()
+    transport = RestTransport(url)
+
+    async def call():
+        await transport.request("GET", "/fapi/v1/ping")
+        return transport._session
+
+    try:
+        first = asyncio.run(call())
+        second = asyncio.run(call())
+        # Each asyncio.run closes the session it created instead of leaking its connector
+        assert first is not second
+        assert first.closed and second.closed
+    finally:
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), server_loop).result(5)
+        server_loop.call_soon_threadsafe(server_loop.stop)
+        thread.join(5)
+        server_loop.close()
@@ -0,0 +1,162 @@
+"""
+Tests for the journaled in-memory RiskEngine day state
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from risk_engine import RiskEngine
+
+NOW = datetime(2025, 1, 2, 12, tzinfo=timezone.utc)
+
+
+def _engine(tmp_path, **kwargs):
+    # Missing config file -> built-in defaults
+    return RiskEngine(config_path=str(tmp_path / "missing.yaml"), db_path=str(tmp_path / "mirai.db"), **kwargs)
+
+
+def _fill_count(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "mirai.db"))
+    try:
+        return conn.execute("SELECT COUNT(*) FROM fills").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_journal_replayed_after_crash(tmp_path):
+    engine = _engine(tmp_path, flush_interval=3600)
+    for pnl in (5.0, -2.0, -3.0, -4.0):
+        engine.record_fill(NOW.isoformat(), "BTCUSDT", "BUY", 1.0, 100.0, pnl)
+    before = engine.get_day_state(NOW)
+    assert before.consecutive_losses == 3 and before.cooldown_until
+    assert not engine.allow_entry(NOW, "BTCUSDT")[0]
+    assert _fill_count(tmp_path) == 0
+
+    # Simulate a crash: nothing flushed, journal left behind
+    engine._closed = True
+    engine._db.close()
+    engine._journal.close()
+
+    recovered = _engine(tmp_path)
+    try:
+        assert recovered.get_day_state(NOW) == before
+        assert _fill_count(tmp_path) == 4
+        assert os.path.getsize(recovered.journal_path) == 0
+        assert not engine.journal_path.exists()
+    finally:
+        recovered.close()
+
+
+def test_flush_persists_and_truncates_journal(tmp_path):
+    engine = _engine(tmp_path, flush_interval=3600)
+    engine.record_fill(NOW.isoformat(), "BTCUSDT", "SELL", 1.0, 100.0, 1.5)
+    engine.flush()
+
+    assert _fill_count(tmp_path) == 1
+    assert os.path.getsize(engine.journal_path) == 0
+    engine.close()
+
+    reopened = _engine(tmp_path)
+    try:
+        state = reopened.get_day_state(NOW)
+        assert state.day_pnl == 1.5 and state.trades_today == 1
+    finally:
+        reopened.close()
+
+
+def test_live_writer_journal_is_left_alone(tmp_path):
+    writer = _engine(tmp_path, flush_interval=3600)
+    writer.record_fill(NOW.isoformat(), "BTCUSDT", "BUY", 1.0, 100.0, 2.0)
+
+    # A second process on the same database must not replay (and later duplicate) these fills
+    other = _engine(tmp_path, flush_interval=3600)
+    try:
+        assert other.journal_path != writer.journal_path
+        assert writer.journal_path.stat().st_size > 0
+        assert _fill_count(tmp_path) == 0
+
+        writer.close()
+        assert _fill_count(tmp_path) == 1
+        assert not writer.journal_path.exists()
+    finally:
+        other.close()
+    assert _fill_count(tmp_path) == 1
+
+
+def test_reads_do_not_journal(tmp_path):
+    engine = _engine(tmp_path, flush_interval=3600)
+    try:
+        assert engine.get_day_state(NOW).trades_today == 0
+        assert engine.allow_entry(NOW, "BTCUSDT")[0]
+        assert not engine._pending
+        assert os.path.getsize(engine.journal_path) == 0
+    finally:
+        engine.close()
+
+
+WRITER = """
+import sys
+from risk_engine import RiskEngine
+
+engine = RiskEngine(config_path=sys.argv[1] + "/missing.yaml", db_path=sys.argv[1] + "/mirai.db", flush_interval=3600)
+engine.record_fill("2025-01-02T12:00:00+00:00", "BTCUSDT", "BUY", 1.0, 100.0, -5.0)
+engine.flush()
+print("ready", flush=True)
+sys.stdin.readline()
+engine.record_fill("2025-01-02T12:01:00+00:00", "BTCUSDT", "SELL", 1.0, 100.0, -5.0)
+engine.close()
+"""
+
+
+def test_concurrent_writers_keep_day_state_in_sync_with_fills(tmp_path):
+    env = {**os.environ, "PYTHONPATH": str(Path(__file__).resolve().parents[1])}
+    writers = [
+        subprocess.Popen(
+            [sys.executable, "-c", WRITER, str(tmp_path)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=env,
+        )
+        for _ in range(2)
+    ]
+    # Both have recorded a fill before either records its second one
+    for writer in writers:
+        assert writer.stdout.readline().strip() == "ready"
+    for writer in writers:
+        writer.communicate("go\n", timeout=30)
+        assert writer.returncode == 0
+
+    conn = sqlite3.connect(str(tmp_path / "mirai.db"))
+    try:
+        count, total = conn.execute("SELECT COUNT(*), SUM(pnl) FROM fills").fetchone()
+        day_pnl, trades, losses = conn.execute(
+            "SELECT day_pnl, trades_today, consecutive_losses FROM day_state WHERE date_utc = '2025-01-02'"
+        ).fetchone()
+    finally:
+        conn.close()
+    assert (count, total) == (4, -20.0)
+    assert (day_pnl, trades, losses) == (total, count, 4)
+
+
+def test_flush_picks_up_other_writers_fills(tmp_path):
+    first = _engine(tmp_path, flush_interval=3600, read_refresh_seconds=3600)
+    second = _engine(tmp_path, flush_interval=3600, read_refresh_seconds=3600)
+    try:
+        first.record_fill(NOW.isoformat(), "BTCUSDT", "BUY", 1.0, 100.0, -10.0)
+        second.record_fill(NOW.isoformat(), "ETHUSDT", "BUY", 1.0, 100.0, -10.0)
+        first.flush()
+        second.flush()
+        second.record_fill(NOW.isoformat(), "ETHUSDT", "SELL", 1.0, 100.0, -10.0)
+
+        # Unflushed local fill on top of both writers' flushed ones
+        assert second.get_day_state(NOW).day_pnl == -30.0
+        assert not second.allow_entry(NOW, "SOLUSDT")[0]
+        first.record_fill(NOW.isoformat(), "BTCUSDT", "SELL", 1.0, 100.0, 4.0)
+        first.flush()
+        state = first.get_day_state(NOW)
+        assert (state.day_pnl, state.trades_today, state.consecutive_losses) == (-16.0, 3, 0)
+    finally:
+        first.close()
+        second.close()
@@ -0,0 +1,93 @@
+"""
+Tests for the shared SQLite access layer
+"""
+
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from storage import Database, get_database
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(tmp_path / "test.db", retry_delay=0.001)
+    database.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, thread INTEGER)")
+    yield database
+    database.close()
+
+
+def test_pragmas_and_connection_reuse(db):
+    conn = db.connection()
+    assert db.connection() is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(db.connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+    assert db.stats["connections"] == 2
+
+
+def test_executemany_and_row_factory(db):
+    assert db.executemany("INSERT INTO items (name, thread) VALUES (?, ?)", [(f"n{i}", 0) for i in range(50)]) == 50
+    assert db.fetchone("SELECT COUNT(*) FROM items")[0] == 50
+
+    row = db.fetchone("SELECT name FROM items WHERE id = ?", (1,), row_factory=sqlite3.Row)
+    assert row["name"] == "n0"
+    # Row factory applies to that query only
+    assert db.fetchone("SELECT name FROM items WHERE id = 1") == ("n0",)
+
+
+def test_transaction_rolls_back_on_error(db):
+    with pytest.raises(ValueError):
+        with db.transaction() as conn:
+            conn.execute("INSERT INTO items (name, thread) VALUES ('x', 0)")
+            raise ValueError("boom")
+    assert db.fetchone("SELECT COUNT(*) FROM items")[0] == 0
+
+
+def test_concurrent_writers_do_not_fail(tmp_path):
+    path = tmp_path / "shared.db"
+    setup = get_database(path)
+    setup.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, thread INTEGER)")
+    errors = []
+
+    def writer(n):
+        # Every thread writes through the shared handle; a second handle stands in for another process
+        db = get_database(path) if n % 2 else Database(path, busy_timeout=0.01, retry_delay=0.001, retries=50)
+        try:
+            for i in range(25):
+                db.run_transaction(
+                    lambda conn, i=i: conn.execute("INSERT INTO items (name, thread) VALUES (?, ?)", (f"{n}-{i}", n))
+                )
+        except sqlite3.Error as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert setup.fetchone("SELECT COUNT(*) FROM items")[0] == 150
+    setup.close()
+    assert get_database(path) is not setup
+
+
+def test_async_api_runs_on_database_thread(db):
+    async def run():
+        await db.aexecutemany("INSERT INTO items (name, thread) VALUES (?, ?)", [("a", 1), ("b", 1)])
+        assert await db.aexecute("UPDATE items SET thread = 2 WHERE name = ?", ("a",)) == 1
+        rows = await db.afetchall("SELECT name, thread FROM items ORDER BY id")
+        names = await asyncio.gather(*(db.arun(lambda: threading.current_thread().name) for _ in range(3)))
+        return rows, names
+
+    rows, names = asyncio.run(run())
+    assert rows == [("a", 2), ("b", 1)]
+    assert len(set(names)) == 1 and names[0].startswith("sqlite-test")
@@ -0,0 +1,170 @@
+"""
+Tests for the migration-managed trade analytics schema
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+
+from analytics_48h import analyze_last_48h
+from storage import Database, epoch, migrate
+from trade_analytics import TRADE_MIGRATIONS, ensure_schema, record_trades, window_stats
+
+START = datetime(2025, 3, 1, 9, 40)
+
+
+def _trades(count):
+    for i in range(count):
+        yield {
+            "timestamp": START + timedelta(minutes=7 * i),
+            "symbol": "BTCUSDT",
+            "strategy_name": "trend" if i % 3 else "scalp",
+            "pnl": float(i % 5 - 2),
+        }
+
+
+def _raw_stats(db, since, until):
+    rows = db.fetchall(
+        "SELECT strategy_name, COUNT(*), SUM(pnl > 0), SUM(pnl < 0), TOTAL(pnl) FROM trades "
+        "WHERE ts >= ? AND ts < ? GROUP BY strategy_name",
+        (epoch(since), epoch(until)),
+    )
+    return {name: {"trades": n, "wins": w, "losses": lo, "pnl": p} for name, n, w, lo, p in rows}
+
+
+def test_migrations_upgrade_legacy_table(tmp_path):
+    path = tmp_path / "mirai.db"
+    legacy = sqlite3.connect(path)
+    legacy.execute(
+        "CREATE TABLE trades (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, symbol TEXT, "
+        "strategy_name TEXT, entry_price REAL, exit_price REAL, quantity REAL, pnl REAL, "
+        "duration_minutes INTEGER, market_regime TEXT, volatility REAL, confidence REAL, "
+        "adaptation_version INTEGER DEFAULT 1)"
+    )
+    legacy.execute("INSERT INTO trades (timestamp, strategy_name, pnl) VALUES ('2025-03-01T10:15:00', 'trend', 4.0)")
+    legacy.commit()
+    legacy.close()
+
+    db = Database(path)
+    assert ensure_schema(db) == len(TRADE_MIGRATIONS)
+    assert ensure_schema(db) == len(TRADE_MIGRATIONS)  # idempotent
+    assert db.fetchone("SELECT ts FROM trades")[0] == epoch("2025-03-01T10:15:00")
+    assert db.fetchall("SELECT hour, strategy_name, trade_count, wins, pnl FROM trades_hourly") == [
+        (epoch("2025-03-01T10:00:00"), "trend", 1, 1, 4.0)
+    ]
+
+    # Legacy writers that only set the ISO text still get ts and rollups
+    db.execute("INSERT INTO trades (timestamp, strategy_name, pnl) VALUES ('2025-03-01T10:45:00', 'trend', -1.0)")
+    assert db.fetchone("SELECT trade_count, wins, losses, pnl FROM trades_hourly") == (2, 1, 1, 3.0)
+    db.execute("DELETE FROM trades WHERE pnl = 4.0")
+    assert db.fetchone("SELECT trade_count, wins, losses, pnl FROM trades_hourly") == (1, 0, 1, -1.0)
+    db.close()
+
+
+def test_migrate_tracks_components_separately(tmp_path):
+    db = Database(tmp_path / "x.db")
+    assert migrate(db, "a", ["CREATE TABLE a (x INTEGER);"]) == 1
+    assert migrate(db, "b", ["CREATE TABLE b (x INTEGER);", "ALTER TABLE b ADD COLUMN y TEXT;"]) == 2
+    assert migrate(db, "a", ["CREATE TABLE a (x INTEGER);", lambda conn: conn.execute("INSERT INTO a VALUES (1)")]) == 2
+    assert db.fetchall("SELECT component, version FROM schema_migrations ORDER BY component") == [("a", 2), ("b", 2)]
+    db.close()
+
+
+def test_window_stats_match_raw_scan(tmp_path):
+    db = Database(tmp_path / "mirai.db")
+    ensure_schema(db)
+    assert record_trades(db, _trades(600)) == 600
+
+    for since, until in (
+        (START + timedelta(minutes=13), START + timedelta(hours=40, minutes=5)),  # rollup + both edges
+        (START + timedelta(hours=3, minutes=2), START + timedelta(hours=3, minutes=50)),  # inside one hour
+        (datetime(2025, 3, 1, 12), datetime(2025, 3, 2, 12)),  # hour aligned
+    ):
+        stats = window_stats(db, since, until)
+        assert stats == _raw_stats(db, since, until)
+    db.close()
+
+
+def test_window_queries_use_indexes(tmp_path):
+    db = Database(tmp_path / "mirai.db")
+    ensure_schema(db)
+    plans = [
+        " ".join(row[3] for row in db.fetchall("EXPLAIN QUERY PLAN " + sql))
+        for sql in (
+            "SELECT strategy_name, COUNT(*), TOTAL(pnl) FROM trades WHERE ts >= 0 AND ts < 10 GROUP BY 1",
+            "SELECT COUNT(*), TOTAL(pnl) FROM trades WHERE strategy_name = 'x' AND ts > 0",
+            "SELECT SUM(trade_count) FROM trades_hourly WHERE hour >= 0 AND hour < 10",
+        )
+    ]
+    assert "COVERING INDEX idx_trades_ts" in plans[0]
+    assert "COVERING INDEX idx_trades_strategy_ts" in plans[1]
+    assert "PRIMARY KEY" in plans[2]
+    db.close()
+
+
+def test_analyze_last_48h_reads_window(tmp_path):
+    path = tmp_path / "mirai.db"
+    db = Database(path)
+    ensure_schema(db)
+    now = datetime.utcnow()
+    record_trades(
+        db,
+        [
+            {"timestamp": now - timedelta(hours=50), "strategy_name": "trend", "pnl": 100.0},
+            {"timestamp": now - timedelta(hours=30), "strategy_name": "trend", "pnl": 2.0},
+            {"timestamp": now - timedelta(minutes=5), "strategy_name": "trend", "pnl": -1.0},
+        ],
+    )
+    db.close()
+
+    report = analyze_last_48h(str(path))
+    assert report["strategies"] == {"trend": {"trades": 2, "wins": 1, "win_rate": 50.0, "pnl": 1.0}}
+    assert report["summary"] == {"total_trades": 2, "total_pnl": 1.0}
+
+
+def _dashboard_db(path):
+    # trades as created by monitoring/simple_dashboard.py in the same file
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE trades (id INTEGER PRIMARY KEY, symbol TEXT, side TEXT, amount REAL, price REAL, "
+        "pnl REAL DEFAULT 0, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    )
+    conn.execute("INSERT INTO trades (symbol, side, amount, price, pnl) VALUES ('BTCUSDT', 'BUY', 1, 100, 5)")
+    conn.commit()
+    conn.close()
+
+
+def test_migrations_adapt_dashboard_trades_table(tmp_path):
+    path = tmp_path / "mirai.db"
+    _dashboard_db(path)
+
+    db = Database(path)
+    assert ensure_schema(db) == len(TRADE_MIGRATIONS)
+    # No ISO timestamp to backfill from: dashboard rows stay out of the analytics windows
+    assert db.fetchone("SELECT ts, created_at IS NOT NULL FROM trades") == (None, 1)
+    record_trades(db, [{"timestamp": START, "strategy_name": "trend", "pnl": 2.0}])
+    assert window_stats(db, START, START + timedelta(hours=1)) == {
+        "trend": {"trades": 1, "wins": 1, "losses": 0, "pnl": 2.0}
+    }
+    db.close()
+
+
+def test_analyze_last_48h_falls_back_to_risk_events(tmp_path):
+    path = tmp_path / "mirai.db"
+    _dashboard_db(path)
+    now = datetime.utcnow()
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE risk_events (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, event_type TEXT, "
+        "description TEXT, severity TEXT, position_id TEXT, action_taken TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO risk_events (timestamp, event_type, description) VALUES (?, 'POSITION_CLOSED', ?)",
+        [((now - timedelta(hours=1)).isoformat(), "Closed BTCUSDT P&L $12.5 ok"),
+         ((now - timedelta(hours=2)).isoformat(), "Closed ETHUSDT P&L $-3 ok")],
+    )
+    conn.commit()
+    conn.close()
+
+    report = analyze_last_48h(str(path))
+    assert "error" not in report and "trades_error" not in report
+    assert report["strategies"] == {"all": {"trades": 2, "wins": 1, "win_rate": 50.0, "pnl": None}}
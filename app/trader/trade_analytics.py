@@ -0,0 +1,228 @@
+"""
+Trade analytics schema and time-window queries for state/mirai.db
+
+Trades and risk events carry an epoch-second ``ts`` column backed by indexes, so
+range filters never wrap the column in a function. Triggers keep an hourly rollup
+(``trades_hourly``) current on every insert/delete: a window query reads whole hours
+from the rollup and only the two partial edge hours from ``trades``, which keeps its
+cost proportional to the window length in hours rather than to the trade history.
+"""
+
+import sqlite3
+import time
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any
+
+try:
+    from .storage import Database, epoch, migrate
+except ImportError:
+    from storage import Database, epoch, migrate
+
+HOUR = 3600
+
+TRADE_COLUMNS = (
+    "timestamp",
+    "symbol",
+    "strategy_name",
+    "entry_price",
+    "exit_price",
+    "quantity",
+    "pnl",
+    "duration_minutes",
+    "market_regime",
+    "volatility",
+    "confidence",
+    "adaptation_version",
+)
+
+# Columns the triggers, indexes and writers below rely on. Other writers create tables of
+# the same name in mirai.db with a different shape (the monitoring dashboard's trades table
+# has side/amount/price/created_at), so they are added where missing.
+REQUIRED_COLUMNS = {
+    "trades": {
+        "timestamp": "TEXT",
+        "symbol": "TEXT",
+        "strategy_name": "TEXT",
+        "entry_price": "REAL",
+        "exit_price": "REAL",
+        "quantity": "REAL",
+        "pnl": "REAL",
+        "duration_minutes": "INTEGER",
+        "market_regime": "TEXT",
+        "volatility": "REAL",
+        "confidence": "REAL",
+        "adaptation_version": "INTEGER DEFAULT 1",
+    },
+    "risk_events": {
+        "timestamp": "TEXT",
+        "event_type": "TEXT",
+        "description": "TEXT",
+    },
+}
+
+
+def _epoch_timestamps(conn: sqlite3.Connection):
+    """Epoch timestamps; writers that only set the ISO text get ts filled in by trigger"""
+    for table, required in REQUIRED_COLUMNS.items():
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for column, definition in required.items():
+            if column not in columns:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN ts INTEGER")
+        # Rows of a table that had no ISO timestamp column have nothing to backfill from
+        if "timestamp" in columns:
+            conn.execute(f"UPDATE {table} SET ts = CAST(strftime('%s', timestamp) AS INTEGER)")
+        conn.execute(
+            f"""
+            CREATE TRIGGER {table}_fill_ts AFTER INSERT ON {table}
+            WHEN NEW.ts IS NULL AND NEW.timestamp IS NOT NULL
+            BEGIN
+                UPDATE {table} SET ts = CAST(strftime('%s', NEW.timestamp) AS INTEGER) WHERE id = NEW.id;
+            END
+            """
+        )
+    conn.execute("CREATE INDEX idx_trades_strategy_ts ON trades (strategy_name, ts, pnl)")
+    conn.execute("CREATE INDEX idx_trades_ts ON trades (ts, strategy_name, pnl)")
+    conn.execute("CREATE INDEX idx_risk_events_ts ON risk_events (ts, event_type)")
+
+
+TRADE_MIGRATIONS = [
+    # 1: base tables as created by PerformanceAnalyzer and AdvancedRiskEngine
+    """
+    CREATE TABLE IF NOT EXISTS trades (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT,
+        symbol TEXT,
+        strategy_name TEXT,
+        entry_price REAL,
+        exit_price REAL,
+        quantity REAL,
+        pnl REAL,
+        duration_minutes INTEGER,
+        market_regime TEXT,
+        volatility REAL,
+        confidence REAL,
+        adaptation_version INTEGER DEFAULT 1
+    );
+    CREATE TABLE IF NOT EXISTS risk_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT,
+        event_type TEXT,
+        description TEXT,
+        severity TEXT,
+        position_id TEXT,
+        action_taken TEXT
+    );
+    """,
+    # 2: epoch timestamps
+    _epoch_timestamps,
+    # 3: hourly rollup maintained on insert/delete
+    """
+    CREATE TABLE trades_hourly (
+        hour INTEGER NOT NULL,
+        strategy_name TEXT NOT NULL,
+        trade_count INTEGER NOT NULL,
+        wins INTEGER NOT NULL,
+        losses INTEGER NOT NULL,
+        pnl REAL NOT NULL,
+        PRIMARY KEY (hour, strategy_name)
+    ) WITHOUT ROWID;
+    INSERT INTO trades_hourly (hour, strategy_name, trade_count, wins, losses, pnl)
+    SELECT ts / 3600 * 3600, COALESCE(strategy_name, ''), COUNT(*), TOTAL(pnl > 0), TOTAL(pnl < 0), TOTAL(pnl)
+    FROM trades WHERE ts IS NOT NULL GROUP BY 1, 2;
+    CREATE TRIGGER trades_hourly_insert AFTER INSERT ON trades
+    WHEN COALESCE(NEW.ts, strftime('%s', NEW.timestamp)) IS NOT NULL
+    BEGIN
+        INSERT INTO trades_hourly (hour, strategy_name, trade_count, wins, losses, pnl)
+        VALUES (
+            COALESCE(NEW.ts, CAST(strftime('%s', NEW.timestamp) AS INTEGER)) / 3600 * 3600,
+            COALESCE(NEW.strategy_name, ''),
+            1, COALESCE(NEW.pnl > 0, 0), COALESCE(NEW.pnl < 0, 0), COALESCE(NEW.pnl, 0.0)
+        )
+        ON CONFLICT (hour, strategy_name) DO UPDATE SET
+            trade_count = trade_count + 1,
+            wins = wins + excluded.wins,
+            losses = losses + excluded.losses,
+            pnl = pnl + excluded.pnl;
+    END;
+    CREATE TRIGGER trades_hourly_delete AFTER DELETE ON trades
+    WHEN OLD.ts IS NOT NULL
+    BEGIN
+        UPDATE trades_hourly SET
+            trade_count = trade_count - 1,
+            wins = wins - COALESCE(OLD.pnl > 0, 0),
+            losses = losses - COALESCE(OLD.pnl < 0, 0),
+            pnl = pnl - COALESCE(OLD.pnl, 0.0)
+        WHERE hour = OLD.ts / 3600 * 3600 AND strategy_name = COALESCE(OLD.strategy_name, '');
+    END;
+    """,
+]
+
+
+def ensure_schema(db: Database) -> int:
+    """Bring the trade analytics schema up to date; returns the schema version"""
+    return migrate(db, "trade_analytics", TRADE_MIGRATIONS)
+
+
+def record_trades(db: Database, trades: Iterable[dict[str, Any]]) -> int:
+    """Insert trades (dicts keyed by TRADE_COLUMNS) in one transaction with ts precomputed"""
+    rows = []
+    for trade in trades:
+        timestamp = trade.get("timestamp") or datetime.utcnow().isoformat()
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.isoformat()
+        values = {**trade, "timestamp": timestamp}
+        rows.append(tuple(values.get(column) for column in TRADE_COLUMNS) + (epoch(timestamp),))
+    columns = ", ".join(TRADE_COLUMNS + ("ts",))
+    placeholders = ", ".join("?" * (len(TRADE_COLUMNS) + 1))
+    return db.executemany(f"INSERT INTO trades ({columns}) VALUES ({placeholders})", rows)
+
+
+def window_stats(
+    db: Database, since: datetime | str | float, until: datetime | str | float | None = None
+) -> dict[str, dict[str, float]]:
+    """
+    Per-strategy trade count, wins, losses and P&L for [since, until)
+
+    Whole hours come from trades_hourly, the partial first/last hour from the covering
+    (ts, strategy_name, pnl) index on trades.
+    """
+    since_ts = epoch(since)
+    until_ts = epoch(until) if until is not None else int(time.time())
+    first_hour = -(-since_ts // HOUR) * HOUR
+    last_hour = until_ts // HOUR * HOUR
+
+    queries = []
+    if first_hour < last_hour:
+        queries.append(
+            (
+                "SELECT strategy_name, SUM(trade_count), SUM(wins), SUM(losses), TOTAL(pnl) "
+                "FROM trades_hourly WHERE hour >= ? AND hour < ? GROUP BY strategy_name",
+                (first_hour, last_hour),
+            )
+        )
+        edges = [(since_ts, first_hour), (last_hour, until_ts)]
+    else:
+        edges = [(since_ts, until_ts)]
+    for low, high in edges:
+        if low < high:
+            queries.append(
+                (
+                    "SELECT COALESCE(strategy_name, ''), COUNT(*), SUM(pnl > 0), SUM(pnl < 0), TOTAL(pnl) "
+                    "FROM trades WHERE ts >= ? AND ts < ? GROUP BY 1",
+                    (low, high),
+                )
+            )
+
+    stats: dict[str, dict[str, float]] = {}
+    for sql, params in queries:
+        for strategy, count, wins, losses, pnl in db.fetchall(sql, params):
+            if not count:
+                continue
+            entry = stats.setdefault(strategy or "unknown", {"trades": 0, "wins": 0, "losses": 0, "pnl": 0.0})
+            entry["trades"] += count
+            entry["wins"] += wins or 0
+            entry["losses"] += losses or 0
+            entry["pnl"] += pnl or 0.0
+    return stats
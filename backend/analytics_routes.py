@@ -4,9 +4,17 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
+import json
+import os
 import random
 import numpy as np
 
+# Отчет, который пишет `python -m app.trader.backtesting ... --output <path>`
+BACKTEST_RESULTS_PATH = os.getenv(
+    "BACKTEST_RESULTS_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "state", "backtests", "latest.json")
+)
+
 analytics_router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
 @analytics_router.get("/performance")
@@ -329,65 +337,41 @@ async def get_backtesting_results(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Результаты бэктестирования стратегий"""
+    """Результаты бэктестирования стратегий (из отчета app/trader/backtesting.py)"""
     
-    # Генерируем результаты бэктестинга
-    if strategy == "all":
-        strategies = ["Momentum AI v2.1", "Mean Reversion Pro", "Breakout Hunter"]
-    else:
-        strategies = [strategy]
+    try:
+        with open(BACKTEST_RESULTS_PATH, "r") as f:
+            report = json.load(f)
+    except FileNotFoundError:
+        report = {"results": []}
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=500, detail=f"Не удалось прочитать результаты бэктеста: {e}")
     
     results = []
-    
-    for strat_name in strategies:
-        # Генерируем исторические данные
-        days = 365 if timeframe == "1y" else 90
-        equity_curve = [100000]  # Начальный капитал
-        
-        for i in range(days):
-            daily_return = random.normalvariate(0.001, 0.015)  # Средняя доходность с волатильностью
-            new_value = equity_curve[-1] * (1 + daily_return)
-            equity_curve.append(new_value)
-        
-        equity_array = np.array(equity_curve)
-        returns = np.diff(equity_array) / equity_array[:-1]
-        
-        # Рассчитываем метрики
-        total_return = (equity_curve[-1] - equity_curve[0]) / equity_curve[0]
-        max_dd = np.min(np.minimum.accumulate(equity_array) - equity_array) / 100000
-        sharpe = np.mean(returns) / np.std(returns) * np.sqrt(365) if np.std(returns) > 0 else 0
-        
-        winning_days = np.sum(returns > 0)
-        win_rate = winning_days / len(returns) * 100
-        
-        result = {
-            "strategy_name": strat_name,
+    for result in report.get("results", []):
+        if strategy != "all" and strategy not in (result.get("strategy_name"), result.get("symbol")):
+            continue
+        results.append({
+            **result,
             "timeframe": timeframe,
-            "total_return": round(total_return * 100, 2),
-            "annualized_return": round(total_return * (365/days) * 100, 2),
-            "max_drawdown": round(max_dd * 100, 2),
-            "sharpe_ratio": round(sharpe, 3),
-            "win_rate": round(win_rate, 1),
-            "total_trades": random.randint(100, 500),
-            "avg_trade_return": round(random.uniform(0.1, 0.8), 2),
-            "best_trade": round(random.uniform(5, 15), 2),
-            "worst_trade": round(random.uniform(-8, -2), 2),
-            "profit_factor": round(random.uniform(1.2, 2.1), 2),
-            "calmar_ratio": round(total_return / abs(max_dd) if max_dd != 0 else 0, 2),
-            "equity_curve": equity_curve[-30:],  # Последние 30 точек для графика
-            "monthly_returns": [round(random.uniform(-5, 8), 1) for _ in range(12)]
-        }
-        results.append(result)
+            "equity_curve": result.get("equity_curve", [])[-30:],  # Последние 30 точек для графика
+            "equity_ts": result.get("equity_ts", [])[-30:],
+            "monthly_returns": result.get("monthly_returns", [])[-12:]
+        })
     
-    return {
-        "backtesting_results": results,
-        "comparison": {
+    comparison = None
+    if results:
+        comparison = {
             "best_strategy": max(results, key=lambda x: x["sharpe_ratio"])["strategy_name"],
             "most_stable": min(results, key=lambda x: abs(x["max_drawdown"]))["strategy_name"],
             "highest_return": max(results, key=lambda x: x["total_return"])["strategy_name"]
-        },
+        }
+    
+    return {
+        "backtesting_results": results,
+        "comparison": comparison,
         "disclaimer": "Past performance does not guarantee future results. Backtesting results may not reflect real market conditions.",
-        "generated_at": datetime.utcnow().isoformat()
+        "generated_at": report.get("generated_at", datetime.utcnow().isoformat())
     }
 
 @analytics_router.get("/detailed-report")
@@ -6,7 +6,6 @@ Mirai Knowledge Base
 
 import asyncio
 import json
-import sqlite3
 import logging
 import numpy as np
 import pandas as pd
@@ -23,6 +22,8 @@ from concurrent.futures import ThreadPoolExecutor
 import aiofiles
 import re
 
+from app.trader.storage import get_database
+
 @dataclass
 class KnowledgeEntry:
     """Запись в базе знаний"""
@@ -171,6 +172,8 @@ class MiraiKnowledgeBase:
     
     def __init__(self, db_path: str = '/root/mirai-agent/state/knowledge_base.db'):
         self.db_path = db_path
+        # Общее соединение на поток (WAL, busy timeout, повторы при блокировке)
+        self._db = get_database(db_path)
         self.knowledge_graph = KnowledgeGraph()
         self.semantic_analyzer = SemanticAnalyzer()
         self.logger = self.setup_logging()
@@ -208,7 +211,7 @@ class MiraiKnowledgeBase:
         """Инициализация базы данных знаний"""
         Path(self.db_path).parent.mkdir(exist_ok=True)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db.transaction() as conn:
             # Основная таблица знаний
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS knowledge_entries (
@@ -306,27 +309,25 @@ class MiraiKnowledgeBase:
                 updated_at=current_time
             )
             
-            # Сохранение в базу данных
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute('''
-                    INSERT OR REPLACE INTO knowledge_entries 
-                    (id, topic, content, category, confidence, source, tags, 
-                     created_at, updated_at, access_count, relevance_score)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    entry.id,
-                    entry.topic,
-                    json.dumps(entry.content, default=str),  # Исправлено для datetime
-                    entry.category,
-                    entry.confidence,
-                    entry.source,
-                    json.dumps(entry.tags),
-                    entry.created_at.isoformat(),
-                    entry.updated_at.isoformat(),
-                    entry.access_count,
-                    entry.relevance_score
-                ))
-                conn.commit()
+            # Сохранение в базу данных (в потоке БД, не блокируя event loop)
+            await self._db.aexecute('''
+                INSERT OR REPLACE INTO knowledge_entries 
+                (id, topic, content, category, confidence, source, tags, 
+                 created_at, updated_at, access_count, relevance_score)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                entry.id,
+                entry.topic,
+                json.dumps(entry.content, default=str),  # Исправлено для datetime
+                entry.category,
+                entry.confidence,
+                entry.source,
+                json.dumps(entry.tags),
+                entry.created_at.isoformat(),
+                entry.updated_at.isoformat(),
+                entry.access_count,
+                entry.relevance_score
+            ))
             
             # Добавление в граф знаний
             self.knowledge_graph.add_node(topic, {
@@ -388,19 +389,17 @@ class MiraiKnowledgeBase:
                             relation_type: str, weight: float = 1.0):
         """Создание связи между темами"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute('''
-                    INSERT OR REPLACE INTO knowledge_relations
-                    (topic1, topic2, relation_type, weight, created_at)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    topic1,
-                    topic2,
-                    relation_type,
-                    weight,
-                    datetime.now().isoformat()
-                ))
-                conn.commit()
+            await self._db.aexecute('''
+                INSERT OR REPLACE INTO knowledge_relations
+                (topic1, topic2, relation_type, weight, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (
+                topic1,
+                topic2,
+                relation_type,
+                weight,
+                datetime.now().isoformat()
+            ))
             
             # Обновление графа знаний
             self.knowledge_graph.add_edge(topic1, topic2, weight)
@@ -419,47 +418,44 @@ class MiraiKnowledgeBase:
             
             results = []
             
-            with sqlite3.connect(self.db_path) as conn:
-                # Базовый запрос
-                sql = '''
-                    SELECT id, topic, content, category, confidence, source, tags,
-                           created_at, updated_at, access_count, relevance_score
-                    FROM knowledge_entries
-                    WHERE confidence >= ?
-                '''
-                params = [min_confidence]
-                
-                # Фильтр по категории
-                if category:
-                    sql += ' AND category = ?'
-                    params.append(category)
-                
-                # Поиск по теме и содержимому
-                if query:
-                    sql += ' AND (topic LIKE ? OR content LIKE ?)'
-                    query_pattern = f'%{query}%'
-                    params.extend([query_pattern, query_pattern])
-                
-                sql += ' ORDER BY relevance_score DESC, confidence DESC LIMIT ?'
-                params.append(max_results)
-                
-                cursor = conn.execute(sql, params)
-                
-                for row in cursor.fetchall():
-                    entry = KnowledgeEntry(
-                        id=row[0],
-                        topic=row[1],
-                        content=json.loads(row[2]),
-                        category=row[3],
-                        confidence=row[4],
-                        source=row[5],
-                        tags=json.loads(row[6]),
-                        created_at=datetime.fromisoformat(row[7]),
-                        updated_at=datetime.fromisoformat(row[8]),
-                        access_count=row[9],
-                        relevance_score=row[10]
-                    )
-                    results.append(entry)
+            # Базовый запрос
+            sql = '''
+                SELECT id, topic, content, category, confidence, source, tags,
+                       created_at, updated_at, access_count, relevance_score
+                FROM knowledge_entries
+                WHERE confidence >= ?
+            '''
+            params = [min_confidence]
+            
+            # Фильтр по категории
+            if category:
+                sql += ' AND category = ?'
+                params.append(category)
+            
+            # Поиск по теме и содержимому
+            if query:
+                sql += ' AND (topic LIKE ? OR content LIKE ?)'
+                query_pattern = f'%{query}%'
+                params.extend([query_pattern, query_pattern])
+            
+            sql += ' ORDER BY relevance_score DESC, confidence DESC LIMIT ?'
+            params.append(max_results)
+            
+            for row in await self._db.afetchall(sql, params):
+                entry = KnowledgeEntry(
+                    id=row[0],
+                    topic=row[1],
+                    content=json.loads(row[2]),
+                    category=row[3],
+                    confidence=row[4],
+                    source=row[5],
+                    tags=json.loads(row[6]),
+                    created_at=datetime.fromisoformat(row[7]),
+                    updated_at=datetime.fromisoformat(row[8]),
+                    access_count=row[9],
+                    relevance_score=row[10]
+                )
+                results.append(entry)
             
             # Семантическое ранжирование если есть запрос
             if query and results:
@@ -492,25 +488,20 @@ class MiraiKnowledgeBase:
     async def update_access_counts(self, entry_ids: List[str]):
         """Обновление счетчиков доступа"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                for entry_id in entry_ids:
-                    conn.execute(
-                        'UPDATE knowledge_entries SET access_count = access_count + 1 WHERE id = ?',
-                        (entry_id,)
-                    )
-                conn.commit()
+            await self._db.aexecutemany(
+                'UPDATE knowledge_entries SET access_count = access_count + 1 WHERE id = ?',
+                [(entry_id,) for entry_id in entry_ids]
+            )
         except Exception as e:
             self.logger.error(f"Ошибка обновления счетчиков: {e}")
     
     async def log_search_query(self, query: str, results_count: int):
         """Логирование поискового запроса"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute('''
-                    INSERT INTO search_queries (query, results_count, timestamp)
-                    VALUES (?, ?, ?)
-                ''', (query, results_count, datetime.now().isoformat()))
-                conn.commit()
+            await self._db.aexecute('''
+                INSERT INTO search_queries (query, results_count, timestamp)
+                VALUES (?, ?, ?)
+            ''', (query, results_count, datetime.now().isoformat()))
         except Exception as e:
             self.logger.error(f"Ошибка логирования запроса: {e}")
     
@@ -523,45 +514,44 @@ class MiraiKnowledgeBase:
                              confidence: float = None, tags: List[str] = None) -> bool:
         """Обновление существующего знания"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            # Подготовка обновлений
+            updates = []
+            params = []
+            
+            if content is not None:
+                updates.append('content = ?')
+                params.append(json.dumps(content))
+            
+            if confidence is not None:
+                updates.append('confidence = ?')
+                params.append(confidence)
+            
+            if tags is not None:
+                updates.append('tags = ?')
+                params.append(json.dumps(tags))
+            
+            updates.append('updated_at = ?')
+            params.append(datetime.now().isoformat())
+            
+            params.append(entry_id)
+            sql = f"UPDATE knowledge_entries SET {', '.join(updates)} WHERE id = ?"
+            
+            def update(conn) -> bool:
                 # Получение текущей записи
-                cursor = conn.execute('SELECT * FROM knowledge_entries WHERE id = ?', (entry_id,))
-                row = cursor.fetchone()
-                
-                if not row:
+                if not conn.execute('SELECT 1 FROM knowledge_entries WHERE id = ?', (entry_id,)).fetchone():
                     return False
-                
-                # Подготовка обновлений
-                updates = []
-                params = []
-                
-                if content is not None:
-                    updates.append('content = ?')
-                    params.append(json.dumps(content))
-                
-                if confidence is not None:
-                    updates.append('confidence = ?')
-                    params.append(confidence)
-                
-                if tags is not None:
-                    updates.append('tags = ?')
-                    params.append(json.dumps(tags))
-                
-                updates.append('updated_at = ?')
-                params.append(datetime.now().isoformat())
-                
-                params.append(entry_id)
-                
                 # Выполнение обновления
-                sql = f"UPDATE knowledge_entries SET {', '.join(updates)} WHERE id = ?"
                 conn.execute(sql, params)
-                conn.commit()
-                
-                # Очистка кеша
-                self.cache.clear()
-                
-                self.logger.info(f"✅ Обновлено знание: {entry_id}")
                 return True
+            
+            if not await self._db.arun_transaction(update):
+                return False
+            
+            # Очистка кеша
+            self.cache.clear()
+            
+            self.logger.info(f"✅ Обновлено знание: {entry_id}")
+            return True
                 
         except Exception as e:
             self.logger.error(f"Ошибка обновления знания: {e}")
@@ -570,26 +560,26 @@ class MiraiKnowledgeBase:
     async def delete_knowledge(self, entry_id: str) -> bool:
         """Удаление знания"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            def delete(conn) -> bool:
                 cursor = conn.execute('DELETE FROM knowledge_entries WHERE id = ?', (entry_id,))
-                conn.commit()
-                
-                if cursor.rowcount > 0:
-                    # Удаление связей
-                    conn.execute('''
-                        DELETE FROM knowledge_relations 
-                        WHERE topic1 IN (SELECT topic FROM knowledge_entries WHERE id = ?)
-                        OR topic2 IN (SELECT topic FROM knowledge_entries WHERE id = ?)
-                    ''', (entry_id, entry_id))
-                    conn.commit()
-                    
-                    # Очистка кеша
-                    self.cache.clear()
-                    
-                    self.logger.info(f"🗑️ Удалено знание: {entry_id}")
-                    return True
-                
+                if cursor.rowcount == 0:
+                    return False
+                # Удаление связей
+                conn.execute('''
+                    DELETE FROM knowledge_relations 
+                    WHERE topic1 IN (SELECT topic FROM knowledge_entries WHERE id = ?)
+                    OR topic2 IN (SELECT topic FROM knowledge_entries WHERE id = ?)
+                ''', (entry_id, entry_id))
+                return True
+            
+            if not await self._db.arun_transaction(delete):
                 return False
+            
+            # Очистка кеша
+            self.cache.clear()
+            
+            self.logger.info(f"🗑️ Удалено знание: {entry_id}")
+            return True
                 
         except Exception as e:
             self.logger.error(f"Ошибка удаления знания: {e}")
@@ -598,7 +588,7 @@ class MiraiKnowledgeBase:
     def load_knowledge_graph(self):
         """Загрузка графа знаний из базы данных"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._db.connection() as conn:
                 # Загрузка узлов
                 cursor = conn.execute('SELECT topic, category, confidence, tags FROM knowledge_entries')
                 for topic, category, confidence, tags in cursor.fetchall():
@@ -621,7 +611,7 @@ class MiraiKnowledgeBase:
     def update_statistics(self):
         """Обновление статистики"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._db.connection() as conn:
                 # Общее количество записей
                 cursor = conn.execute('SELECT COUNT(*) FROM knowledge_entries')
                 self.stats['total_entries'] = cursor.fetchone()[0]
@@ -682,8 +672,11 @@ class MiraiKnowledgeBase:
                 })
             
             # Сжатое сохранение
-            with gzip.open(filepath, 'wt', encoding='utf-8') as f:
-                json.dump(export_data, f, indent=2, ensure_ascii=False)
+            def write():
+                with gzip.open(filepath, 'wt', encoding='utf-8') as f:
+                    json.dump(export_data, f, indent=2, ensure_ascii=False)
+            
+            await asyncio.to_thread(write)
             
             self.logger.info(f"📄 Экспорт завершен: {filepath} ({len(results)} записей)")
             return True
@@ -697,8 +690,11 @@ class MiraiKnowledgeBase:
         try:
             imported_count = 0
             
-            with gzip.open(filepath, 'rt', encoding='utf-8') as f:
-                import_data = json.load(f)
+            def read():
+                with gzip.open(filepath, 'rt', encoding='utf-8') as f:
+                    return json.load(f)
+            
+            import_data = await asyncio.to_thread(read)
             
             for entry_data in import_data.get('knowledge_entries', []):
                 await self.add_knowledge(
@@ -9,7 +9,6 @@ import logging
 import json
 import numpy as np
 import pandas as pd
-import sqlite3
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple, Union
 from dataclasses import dataclass, asdict
@@ -26,6 +25,8 @@ from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, mean_squared_error, r2_score
 import warnings
+
+from app.trader.storage import get_database
 warnings.filterwarnings('ignore')
 
 # Добавляем пути для импорта ИИ модулей
@@ -281,6 +282,8 @@ class MiraiLearningEngine:
     def __init__(self):
         self.logger = self.setup_logging()
         self.db_path = '/root/mirai-agent/state/learning_engine.db'
+        # Общее соединение на поток (WAL, busy timeout, повторы при блокировке)
+        self._db = get_database(self.db_path)
         self.models_path = '/root/mirai-agent/models'
         self.experiences_path = '/root/mirai-agent/experiences'
         
@@ -340,7 +343,7 @@ class MiraiLearningEngine:
         """Инициализация базы данных для обучения"""
         Path(self.db_path).parent.mkdir(exist_ok=True)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db.transaction() as conn:
             # Таблица опытов обучения
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS learning_experiences (
@@ -453,7 +456,7 @@ class MiraiLearningEngine:
     
     def save_experience_to_db(self, experience: LearningExperience):
         """Сохранение опыта в базу данных"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db.transaction() as conn:
             conn.execute("""
                 INSERT OR REPLACE INTO learning_experiences 
                 (experience_id, timestamp, context, action_taken, outcome, 
@@ -878,7 +881,7 @@ class MiraiLearningEngine:
     async def save_adaptation_result(self, adaptation_type: str, adaptation_data: Dict,
                                    performance_improvement: float):
         """Сохранение результата адаптации"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db.transaction() as conn:
             conn.execute("""
                 INSERT INTO system_adaptations 
                 (adaptation_type, adaptation_data, performance_before, performance_after, timestamp)
@@ -19,10 +19,14 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Union
 import redis
 import aiohttp
-import httpx
 from dataclasses import dataclass
 import random
 import warnings
+import fnmatch
+import functools
+import re
+from load_balancer import LoadBalancer, UpstreamLease
+from response_cache import ResponseCache
 warnings.filterwarnings('ignore')
 
 # Configure logging
@@ -162,6 +166,8 @@ class GatewayStats(BaseModel):
     average_response_time: float = Field(0.0, description="Average response time in ms")
     requests_per_minute: float = Field(0.0, description="Requests per minute")
     active_connections: int = Field(0, description="Active connections")
+    cache_hit_ratio: float = Field(0.0, description="Response cache hit ratio (fresh, stale and collapsed)")
+    cache: Dict[str, Any] = Field(default_factory=dict, description="Response cache counters")
     service_health: Dict[str, ServiceHealth] = Field(default_factory=dict, description="Service health status")
 
 class RouteRule(BaseModel):
@@ -173,12 +179,23 @@ class RouteRule(BaseModel):
     rate_limit: Optional[int] = Field(None, description="Rate limit per minute")
     timeout: Optional[int] = Field(None, description="Request timeout in seconds")
     enabled: bool = Field(True, description="Rule enabled status")
+    cache_ttl: Optional[float] = Field(None, description="Response cache TTL in seconds for GET (None = no caching)")
+    stale_while_revalidate: float = Field(0.0, description="Seconds past TTL a stale response is served while refreshing")
+    cache_vary: str = Field("role", description="Cache key scope: user, role or none")
+
+@functools.lru_cache(maxsize=256)
+def _route_pattern(path_pattern: str) -> re.Pattern:
+    return re.compile(fnmatch.translate(path_pattern))
 
 # API Gateway Service
 class APIGateway:
     def __init__(self):
         self.service_stats: Dict[str, Dict] = {}
-        self.circuit_breakers: Dict[str, Dict] = {}
+        # Per-host circuit breakers, passive + background health, least-load balancing
+        self.balancer = LoadBalancer(MICROSERVICES)
+        self.redis_client = redis_client
+        # Route-level response cache: in-memory LRU, Redis as shared second tier
+        self.cache = ResponseCache(redis_client=redis_client)
         self.route_rules: Dict[str, RouteRule] = {}
         self.users: Dict[str, User] = {}
         self.request_count = 0
@@ -186,15 +203,6 @@ class APIGateway:
         self.failed_requests = 0
         self.response_times = []
         
-        # Initialize circuit breakers
-        for service_name in MICROSERVICES.keys():
-            self.circuit_breakers[service_name] = {
-                'state': 'CLOSED',  # CLOSED, OPEN, HALF_OPEN
-                'failure_count': 0,
-                'last_failure_time': None,
-                'timeout': 60  # seconds
-            }
-        
         # Initialize default users
         self._initialize_default_users()
         self._initialize_default_routes()
@@ -249,7 +257,10 @@ class APIGateway:
                 target_service="portfolio_manager",
                 methods=["GET", "POST", "PUT", "DELETE"],
                 auth_required=True,
-                rate_limit=200
+                rate_limit=200,
+                cache_ttl=2,
+                stale_while_revalidate=5,
+                cache_vary="user"
             ),
             RouteRule(
                 rule_id="analytics_routes",
@@ -257,7 +268,9 @@ class APIGateway:
                 target_service="analytics",
                 methods=["GET", "POST"],
                 auth_required=True,
-                rate_limit=50
+                rate_limit=50,
+                cache_ttl=5,
+                stale_while_revalidate=30
             ),
             RouteRule(
                 rule_id="data_routes",
@@ -265,7 +278,10 @@ class APIGateway:
                 target_service="data_collector",
                 methods=["GET", "POST"],
                 auth_required=True,
-                rate_limit=500
+                rate_limit=500,
+                cache_ttl=1,
+                stale_while_revalidate=2,
+                cache_vary="none"  # market data is the same for everyone
             ),
             RouteRule(
                 rule_id="strategy_routes",
@@ -273,7 +289,9 @@ class APIGateway:
                 target_service="strategy_engine",
                 methods=["GET", "POST"],
                 auth_required=True,
-                rate_limit=100
+                rate_limit=100,
+                cache_ttl=5,
+                stale_while_revalidate=15
             ),
             RouteRule(
                 rule_id="risk_routes",
@@ -290,85 +308,51 @@ class APIGateway:
                 methods=["GET", "POST", "DELETE"],
                 auth_required=True,
                 rate_limit=100
+            ),
+            RouteRule(
+                rule_id="health_routes",
+                path_pattern="/api/*/healthz",
+                target_service="all",
+                methods=["GET"],
+                auth_required=True,
+                cache_ttl=2,
+                stale_while_revalidate=5,
+                cache_vary="none"
             )
         ]
         
         for route in routes:
             self.route_rules[route.rule_id] = route
     
+    def find_route(self, path: str, method: str) -> Optional[RouteRule]:
+        """Most specific (longest pattern) enabled rule matching the path and method"""
+        best = None
+        for route in self.route_rules.values():
+            if route.enabled and method in route.methods and _route_pattern(route.path_pattern).match(path):
+                if best is None or len(route.path_pattern) > len(best.path_pattern):
+                    best = route
+        return best
+    
+    def acquire_service_host(self, service_name: str) -> Optional[UpstreamLease]:
+        """
+        Least-loaded healthy host for the service, without any network round trip.
+        The lease must be completed (on_response/on_finish) so balancing and
+        the host's circuit breaker see the outcome.
+        """
+        lease = self.balancer.acquire(service_name)
+        if lease is None and service_name in MICROSERVICES:
+            logger.error(f"❌ All hosts unhealthy for service: {service_name}")
+        return lease
+    
     async def get_healthy_service_host(self, service_name: str) -> Optional[str]:
-        """Get a healthy host for the specified service with load balancing"""
-        if service_name not in MICROSERVICES:
-            return None
-        
-        service_config = MICROSERVICES[service_name]
-        hosts = service_config['hosts']
-        
-        # Check circuit breaker
-        circuit_breaker = self.circuit_breakers[service_name]
-        if circuit_breaker['state'] == 'OPEN':
-            # Check if timeout has passed
-            if (datetime.now() - circuit_breaker['last_failure_time']).seconds > circuit_breaker['timeout']:
-                circuit_breaker['state'] = 'HALF_OPEN'
-            else:
-                logger.warning(f"🔴 Circuit breaker OPEN for {service_name}")
-                return None
-        
-        # Round-robin load balancing (simple implementation)
-        # In production, you might want more sophisticated load balancing
-        if not hasattr(self, '_host_indices'):
-            self._host_indices = {}
-        
-        if service_name not in self._host_indices:
-            self._host_indices[service_name] = 0
-        
-        # Try each host in round-robin fashion
-        for _ in range(len(hosts)):
-            host_index = self._host_indices[service_name] % len(hosts)
-            host = hosts[host_index]
-            self._host_indices[service_name] = (self._host_indices[service_name] + 1) % len(hosts)
-            
-            # Check if host is healthy
-            if await self._check_service_health(service_name, host):
-                return host
-        
-        # All hosts are unhealthy
-        logger.error(f"❌ All hosts unhealthy for service: {service_name}")
-        return None
+        """Get a healthy host for the specified service (from cached health state)"""
+        host = self.balancer.pick(service_name)
+        return host.url if host else None
     
     async def _check_service_health(self, service_name: str, host: str) -> bool:
-        """Check if a specific service host is healthy"""
-        try:
-            service_config = MICROSERVICES[service_name]
-            health_url = f"{host}{service_config['health_path']}"
-            
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(health_url)
-                is_healthy = response.status_code == 200
-                
-                if is_healthy:
-                    # Reset circuit breaker on successful health check
-                    self.circuit_breakers[service_name]['failure_count'] = 0
-                    if self.circuit_breakers[service_name]['state'] == 'HALF_OPEN':
-                        self.circuit_breakers[service_name]['state'] = 'CLOSED'
-                
-                return is_healthy
-                
-        except Exception as e:
-            logger.warning(f"⚠️ Health check failed for {service_name} at {host}: {e}")
-            self._handle_service_failure(service_name)
-            return False
-    
-    def _handle_service_failure(self, service_name: str):
-        """Handle service failure and update circuit breaker"""
-        circuit_breaker = self.circuit_breakers[service_name]
-        circuit_breaker['failure_count'] += 1
-        circuit_breaker['last_failure_time'] = datetime.now()
-        
-        # Open circuit breaker after 5 failures
-        if circuit_breaker['failure_count'] >= 5:
-            circuit_breaker['state'] = 'OPEN'
-            logger.error(f"🔴 Circuit breaker OPENED for {service_name}")
+        """Probe a specific service host now and feed the result to its breaker"""
+        upstream = self.balancer.find(service_name, host)
+        return await self.balancer.probe(upstream) if upstream else False
 
 # Initialize gateway
 gateway = APIGateway()
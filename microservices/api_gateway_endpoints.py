@@ -18,10 +18,11 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Union
 import redis
 import aiohttp
-import httpx
 from dataclasses import dataclass
 import random
 import warnings
+from gateway_proxy import GatewayProxy
+from response_cache import CachedResponse, ResponseCache
 warnings.filterwarnings('ignore')
 
 # Configure logging
@@ -39,6 +40,18 @@ app = FastAPI(
 # Security
 security = HTTPBearer()
 
+# Pooled streaming proxy to the microservices
+proxy = GatewayProxy()
+
+@app.on_event("startup")
+async def start_health_probes():
+    gateway.balancer.start()
+
+@app.on_event("shutdown")
+async def close_proxy():
+    await gateway.balancer.stop()
+    await proxy.aclose()
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -149,6 +162,9 @@ class RouteRequest(BaseModel):
     methods: List[str] = ["GET"]
     auth_required: bool = True
     rate_limit: Optional[int] = None
+    cache_ttl: Optional[float] = None
+    stale_while_revalidate: float = 0.0
+    cache_vary: str = "role"
 
 # Health Check
 @app.get("/healthz")
@@ -168,8 +184,7 @@ async def health_check():
         total_services = len(MICROSERVICES)
         
         for service_name in MICROSERVICES.keys():
-            circuit_breaker = gateway.circuit_breakers[service_name]
-            if circuit_breaker['state'] == 'CLOSED':
+            if gateway.balancer.service_state(service_name) == 'CLOSED':
                 healthy_services += 1
         
         return {
@@ -316,58 +331,56 @@ async def proxy_to_service(
         if service_name not in MICROSERVICES:
             raise HTTPException(status_code=404, detail=f"Service '{service_name}' not found")
         
-        # Get healthy service host
-        host = await gateway.get_healthy_service_host(service_name)
-        if not host:
-            raise HTTPException(status_code=503, detail=f"Service '{service_name}' unavailable")
-        
-        # Build target URL
-        target_url = f"{host}/{path}"
-        
-        # Get request body
-        body = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                body = await request.body()
-            except:
-                body = None
-        
-        # Prepare headers
-        headers = dict(request.headers)
-        headers['X-User-ID'] = current_user['user_id']
-        headers['X-User-Roles'] = ','.join(current_user['roles'])
-        headers['X-User-Permissions'] = ','.join(current_user['permissions'])
-        
-        # Remove problematic headers
-        headers.pop('host', None)
-        headers.pop('content-length', None)
-        
-        # Make request to target service
         service_config = MICROSERVICES[service_name]
         timeout = service_config.get('timeout', 30)
+        extra_headers = {
+            'X-User-ID': current_user['user_id'],
+            'X-User-Roles': ','.join(current_user['roles']),
+            'X-User-Permissions': ','.join(current_user['permissions']),
+        }
         
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.request(
-                method=request.method,
-                url=target_url,
-                headers=headers,
-                content=body,
-                params=dict(request.query_params)
-            )
+        # Idempotent reads on routes with a TTL go through the response cache
+        route_path = f"/api/{service_name}/{path}"
+        route = gateway.find_route(route_path, request.method) if request.method == "GET" else None
+        if route and route.cache_ttl:
+            async def fetch() -> CachedResponse:
+                lease = gateway.acquire_service_host(service_name)
+                if not lease:
+                    raise HTTPException(status_code=503, detail=f"Service '{service_name}' unavailable")
+                status_code, headers, body = await proxy.fetch(
+                    request, lease.url, path, timeout=timeout, extra_headers=extra_headers, observer=lease
+                )
+                return CachedResponse(status_code, headers, body, time.time())
+            
+            key = ResponseCache.make_key(request.method, route_path, request.url.query, route.cache_vary, current_user)
+            entry, outcome = await gateway.cache.get(key, fetch, route.cache_ttl, route.stale_while_revalidate)
+            response = Response(content=entry.body, status_code=entry.status_code)
+            response.raw_headers = entry.headers + [
+                (b'x-cache', outcome.encode()),
+                (b'age', str(int(entry.age())).encode()),
+            ]
+            return response
+        
+        # Least-loaded healthy host from cached health state (no health round trip)
+        lease = gateway.acquire_service_host(service_name)
+        if not lease:
+            raise HTTPException(status_code=503, detail=f"Service '{service_name}' unavailable")
         
-        # Return response
-        return Response(
-            content=response.content,
-            status_code=response.status_code,
-            headers=dict(response.headers),
-            media_type=response.headers.get('content-type')
+        # Stream through the pooled upstream client; user identity replaces any client-sent copies.
+        # The lease reports latency/status to the balancer and the host's circuit breaker.
+        return await proxy.forward(
+            request,
+            lease.url,
+            path,
+            timeout=timeout,
+            extra_headers=extra_headers,
+            observer=lease,
         )
         
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"❌ Proxy request failed: {e}")
-        gateway._handle_service_failure(service_name)
         raise HTTPException(status_code=500, detail=f"Proxy request failed: {str(e)}")
 
 @app.post("/api/request/{service_name}")
@@ -384,10 +397,14 @@ async def service_request(
         if service_name not in MICROSERVICES:
             raise HTTPException(status_code=404, detail=f"Service '{service_name}' not found")
         
-        # Get healthy service host
-        host = await gateway.get_healthy_service_host(service_name)
-        if not host:
+        if request.method.upper() not in ("GET", "POST", "PUT", "DELETE"):
+            raise HTTPException(status_code=400, detail=f"Unsupported method: {request.method}")
+        
+        # Least-loaded healthy host from cached health state
+        lease = gateway.acquire_service_host(service_name)
+        if not lease:
             raise HTTPException(status_code=503, detail=f"Service '{service_name}' unavailable")
+        host = lease.url
         
         # Build target URL
         target_url = f"{host}{request.endpoint}"
@@ -402,17 +419,22 @@ async def service_request(
         service_config = MICROSERVICES[service_name]
         timeout = service_config.get('timeout', 30)
         
-        async with httpx.AsyncClient(timeout=timeout) as client:
+        client = proxy.client(host)
+        start_time = time.perf_counter()
+        status = None
+        try:
             if request.method.upper() == "GET":
-                response = await client.get(target_url, headers=headers)
+                response = await client.get(target_url, headers=headers, timeout=timeout)
             elif request.method.upper() == "POST":
-                response = await client.post(target_url, headers=headers, json=request.data)
+                response = await client.post(target_url, headers=headers, json=request.data, timeout=timeout)
             elif request.method.upper() == "PUT":
-                response = await client.put(target_url, headers=headers, json=request.data)
-            elif request.method.upper() == "DELETE":
-                response = await client.delete(target_url, headers=headers)
+                response = await client.put(target_url, headers=headers, json=request.data, timeout=timeout)
             else:
-                raise HTTPException(status_code=400, detail=f"Unsupported method: {request.method}")
+                response = await client.delete(target_url, headers=headers, timeout=timeout)
+            status = response.status_code
+        finally:
+            lease.on_response(status, time.perf_counter() - start_time)
+            lease.on_finish()
         
         return response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text
         
@@ -461,14 +483,15 @@ async def get_gateway_stats():
         
         # Get service health
         service_health = {}
-        for service_name in MICROSERVICES.keys():
-            circuit_breaker = gateway.circuit_breakers[service_name]
+        for service_name, hosts in gateway.balancer.hosts.items():
+            state = gateway.balancer.service_state(service_name)
+            latencies = [host.ewma_latency for host in hosts if host.ewma_latency > 0]
             service_health[service_name] = ServiceHealth(
                 service_name=service_name,
-                status="healthy" if circuit_breaker['state'] == 'CLOSED' else "unhealthy",
-                response_time=0,  # Would need to track this separately
+                status="healthy" if state == 'CLOSED' else "unhealthy",
+                response_time=min(latencies) * 1000 if latencies else 0,  # best host EWMA
                 last_check=datetime.now(),
-                error_message=f"Circuit breaker {circuit_breaker['state']}" if circuit_breaker['state'] != 'CLOSED' else None
+                error_message=f"Circuit breaker {state}" if state != 'CLOSED' else None
             )
         
         return GatewayStats(
@@ -477,7 +500,9 @@ async def get_gateway_stats():
             failed_requests=gateway.failed_requests,
             average_response_time=avg_response_time,
             requests_per_minute=requests_per_minute,
-            active_connections=0,  # Would need WebSocket tracking
+            active_connections=proxy.active_streams,
+            cache_hit_ratio=gateway.cache.stats.hit_ratio,
+            cache=gateway.cache.stats.to_dict(),
             service_health=service_health
         )
         
@@ -510,7 +535,10 @@ async def create_route(
             target_service=request.target_service,
             methods=request.methods,
             auth_required=request.auth_required,
-            rate_limit=request.rate_limit
+            rate_limit=request.rate_limit,
+            cache_ttl=request.cache_ttl,
+            stale_while_revalidate=request.stale_while_revalidate,
+            cache_vary=request.cache_vary
         )
         
         gateway.route_rules[request.rule_id] = route
@@ -528,21 +556,14 @@ async def reset_circuit_breaker(
     service_name: str,
     current_user: Dict[str, Any] = Depends(verify_token)
 ):
-    """Reset circuit breaker for a service"""
+    """Reset circuit breakers of every host of a service"""
     if "admin" not in current_user['roles']:
         raise HTTPException(status_code=403, detail="Admin access required")
     
     try:
-        if service_name not in gateway.circuit_breakers:
+        if not gateway.balancer.reset(service_name):
             raise HTTPException(status_code=404, detail="Service not found")
         
-        gateway.circuit_breakers[service_name] = {
-            'state': 'CLOSED',
-            'failure_count': 0,
-            'last_failure_time': None,
-            'timeout': 60
-        }
-        
         logger.info(f"🔄 Circuit breaker reset for: {service_name}")
         return {"status": "reset", "service": service_name}
         
@@ -554,11 +575,11 @@ async def reset_circuit_breaker(
 
 @app.get("/circuit-breakers")
 async def get_circuit_breakers(current_user: Dict[str, Any] = Depends(verify_token)):
-    """Get circuit breaker status for all services"""
+    """Get circuit breaker status for all services and their hosts"""
     if "admin" not in current_user['roles']:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    return gateway.circuit_breakers
+    return gateway.balancer.snapshot()
 
 # Testing Endpoints
 @app.get("/test/connectivity")
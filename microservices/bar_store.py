@@ -0,0 +1,236 @@
+"""
+Columnar OHLCV bar store backed by fixed-capacity NumPy ring buffers
+(mirror of app/trader/bar_store.py: microservice images are built from ./microservices only)
+"""
+
+import logging
+import threading
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class OHLCVView(NamedTuple):
+    """Zero-copy, read-only views over the most recent bars (oldest first)"""
+    ts: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+
+class OHLCVRingBuffer:
+    """
+    Fixed-capacity ring buffer of OHLCV bars for one (symbol, interval).
+
+    Every bar is written twice, at ``i`` and ``i + capacity``, so the last
+    ``capacity`` bars are always one contiguous slice and views never copy.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._ts = np.zeros(2 * capacity, dtype=np.int64)
+        self._prices = np.zeros((len(PRICE_FIELDS), 2 * capacity), dtype=np.float64)
+        self._head = 0  # next write position in [0, capacity)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def last_ts(self) -> Optional[int]:
+        if not self._size:
+            return None
+        return int(self._ts[self._head - 1 + self.capacity])
+
+    def _write(self, pos: int, ts: int, values: Sequence[float]):
+        self._ts[pos] = ts
+        self._ts[pos + self.capacity] = ts
+        self._prices[:, pos] = values
+        self._prices[:, pos + self.capacity] = values
+
+    def append(self, ts: int, open_: float, high: float, low: float, close: float, volume: float) -> bool:
+        """
+        Append a bar, or overwrite the last one if it has the same timestamp
+        (in-progress kline). Out-of-order bars are rejected.
+        """
+        values = (open_, high, low, close, volume)
+        with self._lock:
+            last_ts = self.last_ts
+            if last_ts is not None:
+                if ts == last_ts:
+                    self._write((self._head - 1) % self.capacity, ts, values)
+                    return True
+                if ts < last_ts:
+                    return False
+
+            self._write(self._head, ts, values)
+            self._head = (self._head + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+            return True
+
+    def extend(self, ts: np.ndarray, open_: np.ndarray, high: np.ndarray, low: np.ndarray,
+               close: np.ndarray, volume: np.ndarray) -> int:
+        """Bulk append of chronologically ordered bars; returns number of new bars"""
+        ts = np.asarray(ts, dtype=np.int64)
+        prices = np.vstack([open_, high, low, close, volume]).astype(np.float64, copy=False)
+
+        with self._lock:
+            last_ts = self.last_ts
+            if last_ts is not None and len(ts):
+                same = np.flatnonzero(ts == last_ts)
+                if len(same):
+                    # Refresh the in-progress bar with the latest values
+                    self._write((self._head - 1) % self.capacity, last_ts, prices[:, same[-1]])
+                keep = ts > last_ts
+                ts, prices = ts[keep], prices[:, keep]
+
+            count = len(ts)
+            if count > self.capacity:
+                ts, prices = ts[-self.capacity:], prices[:, -self.capacity:]
+
+            n = len(ts)
+            positions = (self._head + np.arange(n)) % self.capacity
+            for offset in (0, self.capacity):
+                self._ts[positions + offset] = ts
+                self._prices[:, positions + offset] = prices
+
+            self._head = (self._head + n) % self.capacity
+            self._size = min(self._size + n, self.capacity)
+            return count
+
+    def _bounds(self, n: Optional[int]) -> Tuple[int, int]:
+        size = self._size if n is None else max(0, min(n, self._size))
+        end = self._head + self.capacity
+        return end - size, end
+
+    def view(self, n: Optional[int] = None) -> OHLCVView:
+        """
+        Zero-copy view over the last ``n`` bars (all bars by default).
+        Views alias the buffer: copy them if they must outlive the next append.
+        """
+        start, end = self._bounds(n)
+        ts = self._ts[start:end]
+        prices = self._prices[:, start:end]
+        columns = [ts] + [prices[i] for i in range(len(PRICE_FIELDS))]
+        for column in columns:
+            column.flags.writeable = False
+        return OHLCVView(*columns)
+
+    def column(self, name: str, n: Optional[int] = None) -> np.ndarray:
+        """Zero-copy view over a single column"""
+        start, end = self._bounds(n)
+        if name == 'ts':
+            column = self._ts[start:end]
+        else:
+            column = self._prices[PRICE_FIELDS.index(name), start:end]
+        column.flags.writeable = False
+        return column
+
+    def last(self) -> Optional[Dict[str, float]]:
+        """Most recent bar as a plain dict"""
+        if not self._size:
+            return None
+        pos = self._head - 1 + self.capacity
+        bar = {'ts': int(self._ts[pos])}
+        for i, name in enumerate(PRICE_FIELDS):
+            bar[name] = float(self._prices[i, pos])
+        return bar
+
+    def to_records(self, n: Optional[int] = None) -> List[Dict[str, float]]:
+        """Materialize bars as dicts (for JSON responses only)"""
+        view = self.view(n)
+        return [
+            {'ts': int(ts), 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+            for ts, o, h, l, c, v in zip(view.ts, *(col.tolist() for col in view[1:]))
+        ]
+
+    def nbytes(self) -> int:
+        return self._ts.nbytes + self._prices.nbytes
+
+
+class BarStore:
+    """Registry of ring buffers keyed by (symbol, interval), shared across consumers"""
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._buffers: Dict[Tuple[str, str], OHLCVRingBuffer] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._buffers
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        return iter(list(self._buffers))
+
+    def buffer(self, symbol: str, interval: str) -> OHLCVRingBuffer:
+        """Get or create the ring buffer for (symbol, interval)"""
+        key = (symbol.upper(), interval)
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            with self._lock:
+                buffer = self._buffers.setdefault(key, OHLCVRingBuffer(self.capacity))
+        return buffer
+
+    def reset(self, symbol: str, interval: str) -> OHLCVRingBuffer:
+        """Replace the ring buffer for (symbol, interval) with an empty one (e.g. before reloading history)"""
+        buffer = OHLCVRingBuffer(self.capacity)
+        with self._lock:
+            self._buffers[(symbol.upper(), interval)] = buffer
+        return buffer
+
+    def get(self, symbol: str, interval: str) -> Optional[OHLCVRingBuffer]:
+        return self._buffers.get((symbol.upper(), interval))
+
+    def view(self, symbol: str, interval: str, n: Optional[int] = None) -> Optional[OHLCVView]:
+        buffer = self.get(symbol, interval)
+        return buffer.view(n) if buffer is not None else None
+
+    def append(self, symbol: str, interval: str, ts: int, open_: float, high: float,
+               low: float, close: float, volume: float) -> bool:
+        return self.buffer(symbol, interval).append(ts, open_, high, low, close, volume)
+
+    def append_kline(self, kline) -> bool:
+        """Callback for BinanceDataStream kline updates (KlineData)"""
+        return self.append(
+            kline.symbol, getattr(kline, 'interval', '') or '1m', kline.open_time,
+            kline.open_price, kline.high_price, kline.low_price, kline.close_price, kline.volume,
+        )
+
+    def load_rest_klines(self, symbol: str, interval: str, rows: Iterable[Sequence]) -> int:
+        """
+        Load raw Binance REST kline rows ([open_time, o, h, l, c, v, ...])
+        without building per-bar Python objects
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        table = np.array([row[:6] for row in rows], dtype=np.float64)
+        return self.buffer(symbol, interval).extend(
+            table[:, 0].astype(np.int64), table[:, 1], table[:, 2], table[:, 3], table[:, 4], table[:, 5]
+        )
+
+    def keys(self) -> List[Tuple[str, str]]:
+        return list(self._buffers)
+
+    def memory_usage(self) -> int:
+        """Total bytes held by all buffers"""
+        return sum(buffer.nbytes() for buffer in self._buffers.values())
+
+
+# Process-wide store shared by the data stream, clients and strategies
+default_bar_store = BarStore()
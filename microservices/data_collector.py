@@ -9,13 +9,17 @@ import asyncio
 import logging
 import os
 import json
+import time
 import aiohttp
 import websockets
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Set
+from typing import Dict, List, Optional, Any, Sequence, Set, Tuple
 import redis
+from bar_store import BarStore
+from event_bus import EventBus
+from rest_transport import get_transport
 from binance.client import Client
 from binance.streams import BinanceSocketManager
 from binance.exceptions import BinanceAPIException
@@ -58,6 +62,9 @@ except Exception as e:
     logger.warning(f"⚠️ Redis connection failed: {e}")
     redis_client = None
 
+# Event bus (Redis Streams, in-process fallback)
+event_bus = EventBus('data_collector')
+
 # Binance client
 try:
     binance_client = Client(
@@ -69,6 +76,9 @@ except Exception as e:
     logger.warning(f"⚠️ Binance client initialization failed: {e}")
     binance_client = None
 
+# Non-blocking market data REST calls share one keep-alive pool (spot weight limit 6000/min)
+binance_rest = get_transport(os.getenv('BINANCE_REST_URL', 'https://api.binance.com'), weight_limit=6000)
+
 # Enhanced Data Models
 class MarketData(BaseModel):
     symbol: str = Field(..., description="Trading symbol")
@@ -132,6 +142,25 @@ class HealthCheck(BaseModel):
     active_streams: int
     data_quality_score: float
 
+def ohlcv_records(buffer, symbol: str, interval: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Serialize ring-buffer bars in the OHLCVData JSON layout"""
+    if buffer is None:
+        return []
+    return [
+        {
+            "symbol": symbol,
+            "ts": bar['ts'],  # open time, epoch ms
+            "timestamp": datetime.fromtimestamp(bar['ts'] / 1000),
+            "open": bar['open'],
+            "high": bar['high'],
+            "low": bar['low'],
+            "close": bar['close'],
+            "volume": bar['volume'],
+            "interval": interval
+        }
+        for bar in buffer.to_records(limit)
+    ]
+
 # WebSocket Connection Manager
 class ConnectionManager:
     def __init__(self):
@@ -164,12 +193,13 @@ class ConnectionManager:
 class DataCollectionEngine:
     def __init__(self):
         self.market_data_cache: Dict[str, MarketData] = {}
-        self.ohlcv_cache: Dict[str, List[OHLCVData]] = {}
+        self.ohlcv_cache = BarStore(capacity=1000)
         self.indicators_cache: Dict[str, TechnicalIndicators] = {}
         self.ml_features_cache: Dict[str, MLFeatures] = {}
         self.websocket_connections: Dict[str, Any] = {}
         self.is_collecting = False
         self.subscribed_symbols = {'BTCUSDT', 'ETHUSDT', 'ADAUSDT', 'BNBUSDT', 'SOLUSDT'}
+        self.published_bars: Dict[Tuple[str, str], int] = {}  # (symbol, interval) -> last bar published
         
     async def start_data_collection(self):
         """Start comprehensive data collection"""
@@ -195,7 +225,7 @@ class DataCollectionEngine:
         while self.is_collecting:
             try:
                 if binance_client:
-                    tickers = binance_client.get_ticker()
+                    tickers = await binance_rest.request('GET', '/api/v3/ticker/24hr')
                     
                     for ticker in tickers:
                         symbol = ticker['symbol']
@@ -222,6 +252,9 @@ class DataCollectionEngine:
                                     json.dumps(market_data.dict(), default=str)
                                 )
                             
+                            # Push to subscribed services (no polling of /market-data)
+                            await event_bus.publish('market_data', market_data.dict())
+                            
                             # Broadcast to WebSocket clients
                             await manager.broadcast_market_data({
                                 "type": "ticker_update",
@@ -235,6 +268,31 @@ class DataCollectionEngine:
                 logger.error(f"❌ Ticker data collection error: {e}")
                 await asyncio.sleep(5)
     
+    async def publish_closed_bars(self, symbol: str, interval: str, klines: Sequence[Sequence]):
+        """
+        Publish klines closed since the last call on the ``bar`` topic. Rows use the
+        REST layout ([open_time, o, h, l, c, v, close_time, ...]); the first call per
+        pair only publishes the latest closed bar (subscribers backfill over /ohlcv).
+        """
+        key = (symbol, interval)
+        now_ms = int(time.time() * 1000)
+        closed = [row for row in klines if int(row[6]) < now_ms]
+        last = self.published_bars.get(key)
+        closed = closed[-1:] if last is None else [row for row in closed if int(row[0]) > last]
+        for row in closed:
+            await event_bus.publish('bar', {
+                'symbol': symbol,
+                'interval': interval,
+                'ts': int(row[0]),
+                'open': float(row[1]),
+                'high': float(row[2]),
+                'low': float(row[3]),
+                'close': float(row[4]),
+                'volume': float(row[5]),
+            })
+        if closed:
+            self.published_bars[key] = int(closed[-1][0])
+    
     async def collect_ohlcv_data(self):
         """Collect OHLCV candlestick data"""
         intervals = ['1m', '5m', '15m', '1h', '4h', '1d']
@@ -242,38 +300,29 @@ class DataCollectionEngine:
         while self.is_collecting:
             try:
                 if binance_client:
-                    for symbol in self.subscribed_symbols:
-                        for interval in intervals:
-                            klines = binance_client.get_klines(
-                                symbol=symbol,
-                                interval=interval,
-                                limit=100
-                            )
-                            
-                            ohlcv_data = []
-                            for kline in klines:
-                                ohlcv = OHLCVData(
-                                    symbol=symbol,
-                                    timestamp=datetime.fromtimestamp(kline[0] / 1000),
-                                    open=float(kline[1]),
-                                    high=float(kline[2]),
-                                    low=float(kline[3]),
-                                    close=float(kline[4]),
-                                    volume=float(kline[5]),
-                                    interval=interval
-                                )
-                                ohlcv_data.append(ohlcv)
-                            
+                    pairs = [(symbol, interval) for symbol in self.subscribed_symbols for interval in intervals]
+                    results = await asyncio.gather(*(
+                        binance_rest.request('GET', '/api/v3/klines', {'symbol': symbol, 'interval': interval, 'limit': 100})
+                        for symbol, interval in pairs
+                    ), return_exceptions=True)
+                    
+                    for (symbol, interval), klines in zip(pairs, results):
+                        if isinstance(klines, Exception):
+                            logger.error(f"❌ OHLCV fetch failed for {symbol} {interval}: {klines}")
+                            continue
+                        
+                        # Columnar ring buffer: no per-candle objects
+                        self.ohlcv_cache.load_rest_klines(symbol, interval, klines)
+                        await self.publish_closed_bars(symbol, interval, klines)
+                        
+                        # Cache in Redis
+                        if redis_client:
                             cache_key = f"{symbol}_{interval}"
-                            self.ohlcv_cache[cache_key] = ohlcv_data
-                            
-                            # Cache in Redis
-                            if redis_client:
-                                redis_client.setex(
-                                    f"ohlcv:{cache_key}",
-                                    300,  # 5 minutes TTL
-                                    json.dumps([o.dict() for o in ohlcv_data[-50:]], default=str)
-                                )
+                            redis_client.setex(
+                                f"ohlcv:{cache_key}",
+                                300,  # 5 minutes TTL
+                                json.dumps(ohlcv_records(self.ohlcv_cache.get(symbol, interval), symbol, interval, 50), default=str)
+                            )
                 
                 await asyncio.sleep(60)  # Update every minute
                 
@@ -17,7 +17,7 @@ import ta
 from data_collector import (
     app, redis_client, binance_client, MarketData, OHLCVData, TechnicalIndicators,
     MLFeatures, HealthCheck, ConnectionManager, DataCollectionEngine, manager,
-    data_engine, market_data_cache, is_collecting, logger
+    data_engine, market_data_cache, is_collecting, logger, ohlcv_records, event_bus
 )
 
 # Continue DataCollectionEngine implementation
@@ -27,18 +27,17 @@ async def calculate_technical_indicators_method(self):
         try:
             for symbol in self.subscribed_symbols:
                 # Get 1h OHLCV data for indicators
-                cache_key = f"{symbol}_1h"
-                if cache_key in self.ohlcv_cache:
-                    ohlcv_data = self.ohlcv_cache[cache_key]
+                bars = self.ohlcv_cache.view(symbol, '1h')
+                if bars is not None:
                     
-                    if len(ohlcv_data) >= 50:  # Need sufficient data
-                        # Convert to DataFrame
-                        df = pd.DataFrame([{
-                            'close': o.close,
-                            'high': o.high,
-                            'low': o.low,
-                            'volume': o.volume
-                        } for o in ohlcv_data])
+                    if len(bars) >= 50:  # Need sufficient data
+                        # Wrap ring-buffer columns (no per-candle objects)
+                        df = pd.DataFrame({
+                            'close': bars.close,
+                            'high': bars.high,
+                            'low': bars.low,
+                            'volume': bars.volume
+                        }, copy=False)
                         
                         # Calculate indicators
                         indicators = TechnicalIndicators(symbol=symbol)
@@ -96,39 +95,36 @@ async def extract_ml_features_method(self):
         try:
             for symbol in self.subscribed_symbols:
                 # Get multiple timeframe data
-                h1_key = f"{symbol}_1h"
-                h4_key = f"{symbol}_4h"
-                d1_key = f"{symbol}_1d"
+                h1_data = self.ohlcv_cache.view(symbol, '1h')
+                h4_data = self.ohlcv_cache.view(symbol, '4h')
+                d1_data = self.ohlcv_cache.view(symbol, '1d')
                 
-                if all(key in self.ohlcv_cache for key in [h1_key, h4_key, d1_key]):
-                    h1_data = self.ohlcv_cache[h1_key]
-                    h4_data = self.ohlcv_cache[h4_key]
-                    d1_data = self.ohlcv_cache[d1_key]
+                if h1_data is not None and h4_data is not None and d1_data is not None:
                     
                     if len(h1_data) >= 24 and len(h4_data) >= 6 and len(d1_data) >= 2:
-                        current_price = h1_data[-1].close
+                        current_price = float(h1_data.close[-1])
                         
                         # Calculate momentum features
-                        price_1h_ago = h1_data[-2].close if len(h1_data) >= 2 else current_price
-                        price_4h_ago = h4_data[-2].close if len(h4_data) >= 2 else current_price
-                        price_24h_ago = d1_data[-2].close if len(d1_data) >= 2 else current_price
+                        price_1h_ago = float(h1_data.close[-2]) if len(h1_data) >= 2 else current_price
+                        price_4h_ago = float(h4_data.close[-2]) if len(h4_data) >= 2 else current_price
+                        price_24h_ago = float(d1_data.close[-2]) if len(d1_data) >= 2 else current_price
                         
                         momentum_1h = (current_price - price_1h_ago) / price_1h_ago
                         momentum_4h = (current_price - price_4h_ago) / price_4h_ago
                         momentum_24h = (current_price - price_24h_ago) / price_24h_ago
                         
                         # Calculate volatility
-                        h1_prices = [o.close for o in h1_data[-24:]]
+                        h1_prices = h1_data.close[-24:]
                         h1_returns = np.diff(h1_prices) / h1_prices[:-1]
                         volatility_1h = np.std(h1_returns) if len(h1_returns) > 0 else 0
                         
-                        d1_prices = [o.close for o in d1_data[-7:]]
+                        d1_prices = d1_data.close[-7:]
                         d1_returns = np.diff(d1_prices) / d1_prices[:-1]
                         volatility_24h = np.std(d1_returns) if len(d1_returns) > 0 else 0
                         
                         # Volume analysis
-                        current_volume = h1_data[-1].volume
-                        avg_volume = np.mean([o.volume for o in h1_data[-24:]])
+                        current_volume = float(h1_data.volume[-1])
+                        avg_volume = float(np.mean(h1_data.volume[-24:]))
                         volume_ratio = current_volume / avg_volume if avg_volume > 0 else 1
                         
                         # Trend strength (simplified)
@@ -136,10 +132,8 @@ async def extract_ml_features_method(self):
                         trend_strength = min(1.0, max(0.0, trend_strength))
                         
                         # Support/Resistance distance (simplified)
-                        recent_highs = [o.high for o in h1_data[-24:]]
-                        recent_lows = [o.low for o in h1_data[-24:]]
-                        resistance = max(recent_highs)
-                        support = min(recent_lows)
+                        resistance = float(h1_data.high[-24:].max())
+                        support = float(h1_data.low[-24:].min())
                         
                         dist_to_resistance = (resistance - current_price) / current_price
                         dist_to_support = (current_price - support) / current_price
@@ -227,6 +221,7 @@ async def binance_websocket_stream_method(self):
                         )
                         
                         self.market_data_cache[symbol] = market_data
+                        await event_bus.publish('market_data', market_data.dict())
                         
                         # Broadcast real-time update
                         await manager.broadcast_market_data({
@@ -252,15 +247,15 @@ async def binance_websocket_stream_method(self):
                             interval='1m'
                         )
                         
-                        # Update cache
-                        cache_key = f"{symbol}_1m"
-                        if cache_key not in self.ohlcv_cache:
-                            self.ohlcv_cache[cache_key] = []
-                        
-                        self.ohlcv_cache[cache_key].append(ohlcv)
-                        # Keep only last 1000 candles
-                        if len(self.ohlcv_cache[cache_key]) > 1000:
-                            self.ohlcv_cache[cache_key] = self.ohlcv_cache[cache_key][-1000:]
+                        # Update ring buffer (fixed capacity, oldest candles are overwritten)
+                        self.ohlcv_cache.append(
+                            symbol, '1m', kline_data['t'],
+                            ohlcv.open, ohlcv.high, ohlcv.low, ohlcv.close, ohlcv.volume
+                        )
+                        await self.publish_closed_bars(symbol, '1m', [[
+                            kline_data['t'], ohlcv.open, ohlcv.high, ohlcv.low, ohlcv.close, ohlcv.volume,
+                            kline_data['T'],
+                        ]])
                         
                         # Broadcast kline update
                         await manager.broadcast_market_data({
@@ -364,14 +359,14 @@ async def get_ohlcv_data(
     """📈 Get OHLCV candlestick data"""
     try:
         symbol = symbol.upper()
-        cache_key = f"{symbol}_{interval}"
+        buffer = data_engine.ohlcv_cache.get(symbol, interval)
         
-        if cache_key in data_engine.ohlcv_cache:
-            ohlcv_data = data_engine.ohlcv_cache[cache_key][-limit:]
+        if buffer is not None:
+            ohlcv_data = ohlcv_records(buffer, symbol, interval, limit)
             return {
                 "symbol": symbol,
                 "interval": interval,
-                "data": [o.dict() for o in ohlcv_data],
+                "data": ohlcv_data,
                 "count": len(ohlcv_data)
             }
         
@@ -520,6 +515,11 @@ async def startup_event():
     
     logger.info("✅ Data Collector startup completed")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close the event bus connection"""
+    await event_bus.stop()
+
 # Legacy endpoints for compatibility
 @app.get("/market_data")
 async def get_legacy_market_data():
@@ -0,0 +1,526 @@
+"""
+Pub/sub event bus between the microservices
+
+- fixed topics (market_data, bar, signal, order, fill, risk_alert) with a compact
+  binary schema: packed little-endian numbers and length-prefixed strings
+- wired today: data collector -> bar -> strategy engine -> signal -> risk
+  engine -> risk_alert -> strategy engine; order and fill have schemas but no
+  producer yet (no microservice executes orders)
+- Redis Streams when ``redis`` is installed and reachable, an in-process
+  stream otherwise (single-process deployments and tests need no Redis).
+  An unplanned fallback is logged as an error and reported by ``status()``
+  as ``degraded``: services in other processes never see those events
+- consumer groups: every group sees each event once, shared by its consumers
+- at-least-once delivery: an event is acked only after its handler returns;
+  unacked events are redelivered after ``visibility_timeout``
+"""
+
+import asyncio
+import logging
+import math
+import os
+import socket
+import struct
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import ResponseError
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+_HEADER = struct.Struct('<BBq')  # version, topic id, publish time (epoch ms)
+_STR_LEN = struct.Struct('<H')
+_NULL_STR = 0xFFFF
+
+
+class EventSchema:
+    """
+    Field layout of one topic. Kinds: 'f' float64 (None <-> NaN), 'q' int64,
+    's' UTF-8 string (None allowed). Runs of numeric fields pack into one struct.
+    """
+
+    def __init__(self, topic: str, topic_id: int, fields: Sequence[Tuple[str, str]]):
+        self.topic = topic
+        self.topic_id = topic_id
+        self.fields = list(fields)
+        self._segments: List[Tuple[Optional[struct.Struct], List[str], str]] = []
+        names, codes = [], ''
+        for name, kind in self.fields:
+            if kind == 's':
+                if names:
+                    self._segments.append((struct.Struct('<' + codes), names, codes))
+                    names, codes = [], ''
+                self._segments.append((None, [name], 's'))
+            elif kind in ('f', 'q'):
+                names.append(name)
+                codes += 'd' if kind == 'f' else 'q'
+            else:
+                raise ValueError(f"unknown field kind {kind!r} for {topic}.{name}")
+        if names:
+            self._segments.append((struct.Struct('<' + codes), names, codes))
+
+    def encode(self, data: Dict[str, Any], ts: Optional[int] = None) -> bytes:
+        parts = [_HEADER.pack(SCHEMA_VERSION, self.topic_id, int(time.time() * 1000) if ts is None else ts)]
+        for packer, names, codes in self._segments:
+            if packer is None:
+                value = data.get(names[0])
+                if value is None:
+                    parts.append(_STR_LEN.pack(_NULL_STR))
+                else:
+                    raw = str(value).encode('utf-8')
+                    if len(raw) >= _NULL_STR:
+                        raise ValueError(f"{self.topic}.{names[0]} is too long to encode")
+                    parts.append(_STR_LEN.pack(len(raw)))
+                    parts.append(raw)
+            else:
+                values = []
+                for name, code in zip(names, codes):
+                    value = data.get(name)
+                    if code == 'd':
+                        values.append(math.nan if value is None else float(value))
+                    else:
+                        values.append(0 if value is None else int(value))
+                parts.append(packer.pack(*values))
+        return b''.join(parts)
+
+    def decode_body(self, payload: bytes, offset: int) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        for packer, names, codes in self._segments:
+            if packer is None:
+                (length,) = _STR_LEN.unpack_from(payload, offset)
+                offset += _STR_LEN.size
+                if length == _NULL_STR:
+                    data[names[0]] = None
+                else:
+                    data[names[0]] = payload[offset:offset + length].decode('utf-8')
+                    offset += length
+            else:
+                for name, code, value in zip(names, codes, packer.unpack_from(payload, offset)):
+                    data[name] = None if code == 'd' and math.isnan(value) else value
+                offset += packer.size
+        return data
+
+
+TOPIC_SCHEMAS: Dict[str, EventSchema] = {
+    schema.topic: schema for schema in (
+        EventSchema('market_data', 1, [
+            ('symbol', 's'), ('price', 'f'), ('bid', 'f'), ('ask', 'f'), ('volume', 'f'),
+            ('high_24h', 'f'), ('low_24h', 'f'), ('price_change_24h', 'f'),
+        ]),
+        EventSchema('signal', 2, [
+            ('signal_id', 's'), ('strategy', 's'), ('symbol', 's'), ('action', 's'), ('timeframe', 's'),
+            ('price', 'f'), ('quantity', 'f'), ('confidence', 'f'), ('stop_loss', 'f'), ('take_profit', 'f'),
+            ('expiry', 'q'),
+        ]),
+        EventSchema('order', 3, [
+            ('order_id', 's'), ('symbol', 's'), ('side', 's'), ('order_type', 's'), ('status', 's'),
+            ('quantity', 'f'), ('price', 'f'),
+        ]),
+        EventSchema('fill', 4, [
+            ('fill_id', 's'), ('order_id', 's'), ('symbol', 's'), ('side', 's'),
+            ('quantity', 'f'), ('price', 'f'), ('fee', 'f'),
+        ]),
+        EventSchema('risk_alert', 5, [
+            ('alert_id', 's'), ('alert_type', 's'), ('severity', 's'), ('symbol', 's'), ('portfolio_id', 's'),
+            ('message', 's'), ('metric_name', 's'), ('current_value', 'f'), ('threshold_value', 'f'),
+        ]),
+        EventSchema('bar', 6, [
+            ('symbol', 's'), ('interval', 's'), ('ts', 'q'),
+            ('open', 'f'), ('high', 'f'), ('low', 'f'), ('close', 'f'), ('volume', 'f'),
+        ]),
+    )
+}
+_SCHEMAS_BY_ID = {schema.topic_id: schema for schema in TOPIC_SCHEMAS.values()}
+
+
+def encode_event(topic: str, data: Dict[str, Any], ts: Optional[int] = None) -> bytes:
+    schema = TOPIC_SCHEMAS.get(topic)
+    if schema is None:
+        raise ValueError(f"unknown topic {topic!r}")
+    return schema.encode(data, ts)
+
+
+def decode_event(payload: bytes) -> Tuple[str, int, Dict[str, Any]]:
+    """(topic, publish time in epoch ms, fields)"""
+    version, topic_id, ts = _HEADER.unpack_from(payload)
+    if version != SCHEMA_VERSION:
+        raise ValueError(f"unsupported event schema version {version}")
+    schema = _SCHEMAS_BY_ID.get(topic_id)
+    if schema is None:
+        raise ValueError(f"unknown topic id {topic_id}")
+    return schema.topic, ts, schema.decode_body(payload, _HEADER.size)
+
+
+@dataclass
+class Event:
+    topic: str
+    id: str
+    ts: int  # publish time, epoch ms
+    data: Dict[str, Any]
+    deliveries: int = 1
+
+
+# (id, payload, delivery count)
+RawMessage = Tuple[str, bytes, int]
+
+
+class _Group:
+    def __init__(self, cursor: int):
+        self.cursor = cursor  # last sequence handed out to this group
+        self.pending: 'OrderedDict[int, List[Any]]' = OrderedDict()  # seq -> [consumer, delivered_at, deliveries]
+
+
+class _Stream:
+    def __init__(self):
+        self.entries: 'OrderedDict[int, bytes]' = OrderedDict()
+        self.last_seq = 0
+        self.groups: Dict[str, _Group] = {}
+        self.wakeup = asyncio.Event()
+
+
+class InProcessBackend:
+    """Bounded in-memory streams with Redis-like consumer group semantics"""
+
+    name = 'memory'
+
+    def __init__(self, maxlen: int = 10000):
+        self.maxlen = maxlen
+        self._streams: Dict[str, _Stream] = {}
+
+    def _stream(self, topic: str) -> _Stream:
+        stream = self._streams.get(topic)
+        if stream is None:
+            stream = self._streams[topic] = _Stream()
+        return stream
+
+    async def publish(self, topic: str, payload: bytes) -> str:
+        stream = self._stream(topic)
+        stream.last_seq += 1
+        stream.entries[stream.last_seq] = payload
+        while len(stream.entries) > self.maxlen:
+            stream.entries.popitem(last=False)
+        # Wake every blocked reader, then arm a fresh event for the next wait
+        stream.wakeup.set()
+        stream.wakeup = asyncio.Event()
+        return str(stream.last_seq)
+
+    async def ensure_group(self, topic: str, group: str):
+        stream = self._stream(topic)
+        if group not in stream.groups:
+            stream.groups[group] = _Group(stream.last_seq)  # new groups start at the tail, like '$'
+
+    async def read(self, topic: str, group: str, consumer: str, count: int, block: float,
+                   visibility_timeout: float) -> List[RawMessage]:
+        stream = self._stream(topic)
+        state = stream.groups[group]
+        deadline = time.monotonic() + block
+        while True:
+            now = time.monotonic()
+            messages: List[RawMessage] = []
+
+            # Redeliver events whose consumer did not ack in time
+            for seq, entry in list(state.pending.items()):
+                if len(messages) >= count:
+                    break
+                if now - entry[1] < visibility_timeout:
+                    continue
+                payload = stream.entries.get(seq)
+                if payload is None:  # trimmed away before anyone acked it
+                    del state.pending[seq]
+                    continue
+                entry[0], entry[1] = consumer, now
+                entry[2] += 1
+                messages.append((str(seq), payload, entry[2]))
+
+            while len(messages) < count and state.cursor < stream.last_seq:
+                state.cursor += 1
+                payload = stream.entries.get(state.cursor)
+                if payload is not None:
+                    state.pending[state.cursor] = [consumer, now, 1]
+                    messages.append((str(state.cursor), payload, 1))
+
+            remaining = deadline - time.monotonic()
+            if messages or remaining <= 0:
+                return messages
+            try:
+                await asyncio.wait_for(stream.wakeup.wait(), min(remaining, visibility_timeout))
+            except asyncio.TimeoutError:
+                pass
+
+    async def ack(self, topic: str, group: str, ids: Sequence[str]):
+        pending = self._stream(topic).groups[group].pending
+        for message_id in ids:
+            pending.pop(int(message_id), None)
+
+    def pending(self, topic: str, group: str) -> int:
+        stream = self._streams.get(topic)
+        state = stream.groups.get(group) if stream else None
+        return len(state.pending) if state else 0
+
+    async def close(self):
+        pass
+
+
+class RedisStreamsBackend:
+    """One Redis stream per topic (``<prefix><topic>``), XREADGROUP/XACK/XAUTOCLAIM"""
+
+    name = 'redis'
+
+    def __init__(self, client, maxlen: int = 10000, prefix: str = 'events:'):
+        self.client = client
+        self.maxlen = maxlen
+        self.prefix = prefix
+
+    async def publish(self, topic: str, payload: bytes) -> str:
+        message_id = await self.client.xadd(self.prefix + topic, {b'd': payload}, maxlen=self.maxlen, approximate=True)
+        return message_id.decode()
+
+    async def ensure_group(self, topic: str, group: str):
+        try:
+            await self.client.xgroup_create(self.prefix + topic, group, id='$', mkstream=True)
+        except ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    async def read(self, topic: str, group: str, consumer: str, count: int, block: float,
+                   visibility_timeout: float) -> List[RawMessage]:
+        stream = self.prefix + topic
+        claimed = await self.client.xautoclaim(
+            stream, group, consumer, min_idle_time=int(visibility_timeout * 1000), start_id='0-0', count=count
+        )
+        messages = [(message_id, fields) for message_id, fields in claimed[1] if fields]
+        if messages:
+            pending = await self.client.xpending_range(
+                stream, group, min=messages[0][0], max=messages[-1][0], count=len(messages)
+            )
+            deliveries = {entry['message_id']: entry['times_delivered'] for entry in pending}
+            return [
+                (message_id.decode(), fields[b'd'], deliveries.get(message_id, 2))
+                for message_id, fields in messages
+            ]
+
+        response = await self.client.xreadgroup(group, consumer, {stream: '>'}, count=count, block=int(block * 1000))
+        return [
+            (message_id.decode(), fields[b'd'], 1)
+            for _, entries in response or () for message_id, fields in entries
+        ]
+
+    async def ack(self, topic: str, group: str, ids: Sequence[str]):
+        if ids:
+            await self.client.xack(self.prefix + topic, group, *ids)
+
+    async def close(self):
+        await self.client.aclose()
+
+
+Handler = Callable[[Event], Awaitable[None]]
+
+
+@dataclass
+class Subscription:
+    topic: str
+    group: str
+    handler: Handler
+    consumer: str
+    task: Optional[asyncio.Task] = None
+
+
+@dataclass
+class BusStats:
+    published: int = 0
+    publish_errors: int = 0
+    delivered: int = 0
+    redelivered: int = 0
+    handler_errors: int = 0
+    dead_lettered: int = 0
+    total_latency: float = 0.0  # publish -> handler start, seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        stats = asdict(self)
+        stats['avg_delivery_latency_ms'] = (self.total_latency / self.delivered * 1000) if self.delivered else 0.0
+        return stats
+
+
+class EventBus:
+    """
+    One per service process. ``publish`` from anywhere; ``subscribe`` handlers
+    run in one consumer task per subscription after ``start``.
+
+    The backend is resolved on first use: Redis Streams at REDIS_HOST/REDIS_PORT
+    (unless EVENT_BUS_BACKEND=memory), falling back to in-process streams with
+    ``fallback_reason`` set.
+    """
+
+    def __init__(self, service: str, backend=None, visibility_timeout: float = 30.0, max_deliveries: int = 5,
+                 batch_size: int = 100, block: float = 5.0):
+        self.service = service
+        self.backend = backend
+        self.visibility_timeout = visibility_timeout
+        self.max_deliveries = max_deliveries
+        self.batch_size = batch_size
+        self.block = block
+        self.subscriptions: List[Subscription] = []
+        self.stats = BusStats()
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._running = False
+        # Why Redis was expected but not used; set while running on the in-process fallback
+        self.fallback_reason: Optional[str] = None
+
+    async def _create_backend(self):
+        if os.getenv('EVENT_BUS_BACKEND', 'redis') == 'memory':
+            logger.info(f"Event bus using in-process streams ({self.service}, EVENT_BUS_BACKEND=memory)")
+            return InProcessBackend()
+
+        if not REDIS_AVAILABLE:
+            self.fallback_reason = "redis package not installed"
+        else:
+            client = aioredis.Redis(
+                host=os.getenv('REDIS_HOST', 'localhost'),
+                port=int(os.getenv('REDIS_PORT', 6379)),
+                socket_connect_timeout=2,
+            )
+            try:
+                await client.ping()
+                logger.info(f"✅ Event bus using Redis Streams ({self.service})")
+                return RedisStreamsBackend(client)
+            except Exception as e:
+                self.fallback_reason = f"Redis unreachable: {e}"
+                await client.aclose()
+
+        # Other services cannot see in-process streams: events published here never
+        # leave this process and subscribers here only get this process's events
+        logger.error(
+            f"🔴 Event bus for {self.service} fell back to in-process streams ({self.fallback_reason}); "
+            f"events will not reach other services. Set EVENT_BUS_BACKEND=memory if this is intended"
+        )
+        return InProcessBackend()
+
+    async def connect(self):
+        if self.backend is None:
+            if self._connect_lock is None:
+                self._connect_lock = asyncio.Lock()
+            async with self._connect_lock:
+                if self.backend is None:
+                    self.backend = await self._create_backend()
+        return self.backend
+
+    async def publish(self, topic: str, data: Dict[str, Any]) -> Optional[str]:
+        """Publish one event; returns its id, or None if the backend rejected it (logged)"""
+        payload = encode_event(topic, data)
+        try:
+            backend = await self.connect()
+            message_id = await backend.publish(topic, payload)
+        except Exception as e:
+            self.stats.publish_errors += 1
+            logger.error(f"❌ Event publish failed on {topic}: {e}")
+            return None
+        self.stats.published += 1
+        return message_id
+
+    def subscribe(self, topic: str, handler: Handler, group: Optional[str] = None,
+                  consumer: Optional[str] = None) -> Subscription:
+        """
+        Deliver ``topic`` events to ``handler`` as member ``consumer`` of ``group``
+        (default: this service). A handler that raises gets the event again later.
+        """
+        if topic not in TOPIC_SCHEMAS:
+            raise ValueError(f"unknown topic {topic!r}")
+        subscription = Subscription(
+            topic, group or self.service, handler, consumer or f"{socket.gethostname()}-{os.getpid()}"
+        )
+        self.subscriptions.append(subscription)
+        if self._running:
+            subscription.task = asyncio.create_task(self._consume(subscription))
+        return subscription
+
+    async def start(self):
+        """Start consumer tasks for every subscription on the running loop"""
+        await self.connect()
+        if self.fallback_reason and self.subscriptions:
+            topics = ', '.join(sorted({sub.topic for sub in self.subscriptions}))
+            logger.error(f"🔴 {self.service} subscriptions ({topics}) only receive events published by this process")
+        self._running = True
+        for subscription in self.subscriptions:
+            if subscription.task is None or subscription.task.done():
+                subscription.task = asyncio.create_task(self._consume(subscription))
+
+    async def stop(self):
+        self._running = False
+        tasks = [sub.task for sub in self.subscriptions if sub.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for subscription in self.subscriptions:
+            subscription.task = None
+        if self.backend is not None:
+            await self.backend.close()
+            self.backend = None
+            self.fallback_reason = None
+
+    async def _handle(self, subscription: Subscription, message: RawMessage) -> bool:
+        """True if the event may be acked (handled, undecodable or dead-lettered)"""
+        message_id, payload, deliveries = message
+        try:
+            topic, ts, data = decode_event(payload)
+        except (ValueError, struct.error) as e:
+            logger.error(f"❌ Dropping undecodable event {message_id} on {subscription.topic}: {e}")
+            return True
+
+        self.stats.delivered += 1
+        self.stats.total_latency += max(0.0, time.time() - ts / 1000)
+        if deliveries > 1:
+            self.stats.redelivered += 1
+        try:
+            await subscription.handler(Event(topic, message_id, ts, data, deliveries))
+            return True
+        except Exception as e:
+            self.stats.handler_errors += 1
+            if deliveries >= self.max_deliveries:
+                self.stats.dead_lettered += 1
+                logger.error(f"❌ Giving up on {topic} event {message_id} after {deliveries} deliveries: {e}")
+                return True
+            logger.warning(f"⚠️ {subscription.group} handler failed on {topic} event {message_id}, will retry: {e}")
+            return False
+
+    async def _consume(self, subscription: Subscription):
+        backend = self.backend
+        while True:
+            try:
+                await backend.ensure_group(subscription.topic, subscription.group)
+                break
+            except Exception as e:
+                logger.error(f"❌ Cannot create consumer group {subscription.group} on {subscription.topic}: {e}")
+                await asyncio.sleep(5)
+
+        while True:
+            try:
+                messages = await backend.read(
+                    subscription.topic, subscription.group, subscription.consumer,
+                    self.batch_size, self.block, self.visibility_timeout,
+                )
+                acked = [message[0] for message in messages if await self._handle(subscription, message)]
+                await backend.ack(subscription.topic, subscription.group, acked)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # keep consuming whatever happens to one batch
+                logger.error(f"❌ Event consumer {subscription.group}/{subscription.topic} error: {e}")
+                await asyncio.sleep(1)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'backend': self.backend.name if self.backend is not None else None,
+            'degraded': self.fallback_reason,
+            'subscriptions': [
+                {'topic': sub.topic, 'group': sub.group, 'running': sub.task is not None and not sub.task.done()}
+                for sub in self.subscriptions
+            ],
+            **self.stats.to_dict(),
+        }
@@ -3,7 +3,7 @@
 Standalone API Gateway for Mirai Agent
 """
 
-from fastapi import FastAPI, HTTPException, Depends, Request, Response
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, Field
@@ -16,6 +16,8 @@ import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 
+from gateway_proxy import GatewayProxy
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,6 +33,13 @@ app = FastAPI(
 # Security
 security = HTTPBearer()
 
+# Pooled streaming proxy to the microservices
+proxy = GatewayProxy()
+
+@app.on_event("shutdown")
+async def close_proxy():
+    await proxy.aclose()
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -190,42 +199,16 @@ async def proxy_to_service(
         if service_name not in MICROSERVICES:
             raise HTTPException(status_code=404, detail=f"Service '{service_name}' not found")
         
-        # Build target URL
-        target_url = f"{MICROSERVICES[service_name]}/{path}"
-        
-        # Get request body
-        body = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                body = await request.body()
-            except:
-                body = None
-        
-        # Prepare headers
-        headers = dict(request.headers)
-        headers['X-User-ID'] = current_user['user_id']
-        headers['X-User-Roles'] = ','.join(current_user['roles'])
-        
-        # Remove problematic headers
-        headers.pop('host', None)
-        headers.pop('content-length', None)
-        
-        # Make request to target service
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.request(
-                method=request.method,
-                url=target_url,
-                headers=headers,
-                content=body,
-                params=dict(request.query_params)
-            )
-        
-        # Return response
-        return Response(
-            content=response.content,
-            status_code=response.status_code,
-            headers=dict(response.headers),
-            media_type=response.headers.get('content-type')
+        # Stream through the pooled upstream client; user identity replaces any client-sent copies
+        return await proxy.forward(
+            request,
+            MICROSERVICES[service_name],
+            path,
+            timeout=30.0,
+            extra_headers={
+                'X-User-ID': current_user['user_id'],
+                'X-User-Roles': ','.join(current_user['roles']),
+            },
         )
         
     except HTTPException:
@@ -0,0 +1,208 @@
+"""
+Streaming reverse proxy for the API gateways
+
+- one long-lived httpx client (keep-alive pool) per upstream host, HTTP/2 when
+  the ``h2`` package is installed and the upstream negotiates it
+- request and response bodies are streamed chunk by chunk, never buffered whole
+- hop-by-hop headers are filtered on the raw (name, value) list, no dict copies
+"""
+
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+try:
+    import h2  # noqa: F401  (enables httpx HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# RFC 9110 7.6.1 connection-specific headers, plus host (set by the client for the upstream)
+HOP_BY_HOP_HEADERS = frozenset({
+    b'connection', b'keep-alive', b'proxy-authenticate', b'proxy-authorization', b'proxy-connection',
+    b'te', b'trailer', b'trailers', b'transfer-encoding', b'upgrade', b'host',
+})
+
+RawHeaders = List[Tuple[bytes, bytes]]
+
+
+def filter_headers(raw: Iterable[Tuple[bytes, bytes]], extra: Optional[Dict[str, str]] = None) -> RawHeaders:
+    """
+    Raw (name, value) pairs minus hop-by-hop headers and any header named in
+    ``Connection``, with ``extra`` appended (replacing same-named headers).
+    """
+    raw = [(name.lower(), value) for name, value in raw]
+    appended = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in (extra or {}).items()]
+    dropped = HOP_BY_HOP_HEADERS.union(name for name, _ in appended)
+    nominated = [value for name, value in raw if name == b'connection']
+    if nominated:
+        dropped = dropped.union(token.strip().lower() for value in nominated for token in value.split(b','))
+    return [(name, value) for name, value in raw if name not in dropped] + appended
+
+
+@dataclass
+class UpstreamStats:
+    """Per-upstream counters; latency is time to response headers"""
+    requests: int = 0
+    errors: int = 0
+    active_streams: int = 0
+    total_latency: float = 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        stats = asdict(self)
+        stats['avg_latency_ms'] = (self.total_latency / self.requests * 1000) if self.requests else 0.0
+        return stats
+
+
+class UpstreamStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that releases its upstream however the exchange ends: Starlette
+    cancels the body task on client disconnect, possibly before the body iterator has
+    started (so its finally never runs), and skips background tasks on errors.
+    """
+
+    def __init__(self, content, release: Callable[[], Awaitable[None]], **kwargs):
+        super().__init__(content, **kwargs)
+        self._release = release
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self._release()
+
+
+class GatewayProxy:
+    """Pooled streaming proxy; one instance per gateway process"""
+
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 60.0, connect_timeout: float = 5.0, http2: bool = True):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.connect_timeout = connect_timeout
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self.upstream_stats: Dict[str, UpstreamStats] = {}
+
+    def client(self, host: str) -> httpx.AsyncClient:
+        """Long-lived client for ``host``; the pool is shared by every request to it"""
+        client = self._clients.get(host)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=host,
+                http2=self.http2,
+                limits=self.limits,
+                timeout=httpx.Timeout(30.0, connect=self.connect_timeout),
+            )
+            self._clients[host] = client
+        return client
+
+    @property
+    def active_streams(self) -> int:
+        return sum(stats.active_streams for stats in self.upstream_stats.values())
+
+    async def _send(self, request: Request, host: str, path: str, timeout: float,
+                    extra_headers: Optional[Dict[str, str]], observer) -> httpx.Response:
+        client = self.client(host)
+        stats = self.upstream_stats.setdefault(host, UpstreamStats())
+
+        headers = filter_headers(request.scope['headers'], extra_headers)
+        has_body = request.headers.get('content-length', '0') != '0' or 'transfer-encoding' in request.headers
+        url = '/' + path
+        if request.url.query:
+            url = f"{url}?{request.url.query}"
+
+        upstream_request = client.build_request(
+            request.method, url, headers=headers, content=request.stream() if has_body else None,
+            timeout=httpx.Timeout(timeout, connect=self.connect_timeout),
+        )
+        started = time.perf_counter()
+        stats.requests += 1
+        try:
+            upstream = await client.send(upstream_request, stream=True)
+        except BaseException as e:
+            # Whatever ends the exchange here (client disconnect, cancellation, ...) ends the
+            # lease; only upstream transport errors count against the host
+            upstream_failed = isinstance(e, httpx.HTTPError)
+            if upstream_failed:
+                stats.errors += 1
+            if observer is not None:
+                if upstream_failed:
+                    observer.on_response(None, time.perf_counter() - started)
+                observer.on_finish()
+            raise
+        latency = time.perf_counter() - started
+        stats.total_latency += latency
+        stats.active_streams += 1
+        if observer is not None:
+            observer.on_response(upstream.status_code, latency)
+        return upstream
+
+    async def _close(self, host: str, upstream: httpx.Response, observer):
+        self.upstream_stats[host].active_streams -= 1
+        if observer is not None:
+            observer.on_finish()
+        await upstream.aclose()
+
+    async def forward(self, request: Request, host: str, path: str, timeout: float = 30.0,
+                      extra_headers: Optional[Dict[str, str]] = None, observer=None) -> StreamingResponse:
+        """
+        Send ``request`` to ``host``/``path`` and stream the upstream response back.
+
+        Raises httpx.HTTPError if the upstream fails before response headers arrive;
+        the upstream connection is returned to the pool when the response has been
+        sent or the client went away, even before the body started streaming.
+        ``observer`` (e.g. a load_balancer.UpstreamLease) gets
+        ``on_response(status or None, latency)`` and, once the exchange is over,
+        ``on_finish()``.
+        """
+        upstream = await self._send(request, host, path, timeout, extra_headers, observer)
+        closed = False
+
+        async def release():
+            nonlocal closed
+            if not closed:
+                closed = True
+                await self._close(host, upstream, observer)
+
+        async def body():
+            # Raw bytes: content-encoding and content-length pass through unchanged
+            try:
+                async for chunk in upstream.aiter_raw():
+                    yield chunk
+            finally:
+                await release()
+
+        response = UpstreamStreamingResponse(body(), release, status_code=upstream.status_code)
+        response.raw_headers = filter_headers(upstream.headers.raw)
+        return response
+
+    async def fetch(self, request: Request, host: str, path: str, timeout: float = 30.0,
+                    extra_headers: Optional[Dict[str, str]] = None, observer=None) -> Tuple[int, RawHeaders, bytes]:
+        """Like ``forward`` but buffered: (status, filtered raw headers, raw body) for caching"""
+        upstream = await self._send(request, host, path, timeout, extra_headers, observer)
+        try:
+            body = b''.join([chunk async for chunk in upstream.aiter_raw()])
+        finally:
+            await self._close(host, upstream, observer)
+        return upstream.status_code, filter_headers(upstream.headers.raw), body
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {host: stats.to_dict() for host, stats in self.upstream_stats.items()}
+
+    async def aclose(self):
+        """Close every upstream pool (gateway shutdown)"""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
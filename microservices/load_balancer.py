@@ -0,0 +1,251 @@
+"""
+Upstream host selection for the API gateway
+
+- requests never wait on a health check: host health lives in memory
+- per-host circuit breakers fed by real proxied responses (passive outlier
+  detection: connection errors, timeouts, 5xx) and by background probes
+- least-load choice among healthy hosts: EWMA latency x (outstanding + 1)
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = 'CLOSED', 'OPEN', 'HALF_OPEN'
+
+
+@dataclass
+class UpstreamHost:
+    """Balancing and breaker state of one host of a service"""
+    service: str
+    url: str
+    state: str = CLOSED
+    ewma_latency: float = 0.0  # seconds to response headers; 0 until the first sample
+    outstanding: int = 0
+    consecutive_failures: int = 0
+    probe_failures: int = 0
+    opened_at: float = 0.0  # monotonic
+    last_failure_time: Optional[float] = None
+    last_probe_time: Optional[float] = None
+    last_probe_ok: Optional[bool] = None
+    requests: int = 0
+    failures: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'url': self.url,
+            'state': self.state,
+            'ewma_latency_ms': self.ewma_latency * 1000,
+            'outstanding': self.outstanding,
+            'failure_count': self.consecutive_failures,
+            'last_failure_time': self.last_failure_time,
+            'last_probe_time': self.last_probe_time,
+            'last_probe_ok': self.last_probe_ok,
+            'requests': self.requests,
+            'failures': self.failures,
+        }
+
+
+class UpstreamLease:
+    """
+    One request's claim on a host. Report the outcome with ``on_response`` once
+    headers arrive (status None for a transport error) and call ``on_finish``
+    when the body is done; both are idempotent.
+    """
+
+    def __init__(self, balancer: 'LoadBalancer', host: UpstreamHost):
+        self.balancer = balancer
+        self.host = host
+        self.url = host.url
+        self._reported = False
+        self._finished = False
+
+    def on_response(self, status: Optional[int], latency: float):
+        if not self._reported:
+            self._reported = True
+            self.balancer.record(self.host, status, latency)
+
+    def on_finish(self):
+        if not self._finished:
+            self._finished = True
+            self.host.outstanding -= 1
+
+
+class LoadBalancer:
+    """Per-host breakers and least-load selection over ``services[name]['hosts']``"""
+
+    def __init__(self, services: Dict[str, Dict[str, Any]], failure_threshold: int = 5,
+                 open_timeout: float = 60.0, probe_interval: float = 10.0, probe_timeout: float = 2.0,
+                 unhealthy_probes: int = 2, ewma_alpha: float = 0.3):
+        self.services = services
+        self.failure_threshold = failure_threshold
+        self.open_timeout = open_timeout
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.unhealthy_probes = unhealthy_probes
+        self.ewma_alpha = ewma_alpha
+        self.hosts: Dict[str, List[UpstreamHost]] = {
+            name: [UpstreamHost(name, url.rstrip('/')) for url in config['hosts']]
+            for name, config in services.items()
+        }
+        self._client: Optional[httpx.AsyncClient] = None
+        self._probe_task: Optional[asyncio.Task] = None
+
+    # -- selection --------------------------------------------------------------
+
+    def _available(self, host: UpstreamHost, now: float) -> bool:
+        if host.state == OPEN and now - host.opened_at >= self.open_timeout:
+            host.state = HALF_OPEN
+        if host.state == HALF_OPEN:
+            return host.outstanding == 0  # a single trial request at a time
+        return host.state == CLOSED
+
+    def pick(self, service: str) -> Optional[UpstreamHost]:
+        """Least-loaded available host, or None if every breaker is open"""
+        now = time.monotonic()
+        candidates = [host for host in self.hosts.get(service, ()) if self._available(host, now)]
+        if not candidates:
+            return None
+        # Hosts without samples borrow the best observed latency so they still get traffic
+        sampled = [host.ewma_latency for host in candidates if host.ewma_latency > 0]
+        default = min(sampled) if sampled else 1.0
+        return min(
+            candidates,
+            key=lambda host: ((host.ewma_latency or default) * (host.outstanding + 1), host.outstanding, host.requests),
+        )
+
+    def acquire(self, service: str) -> Optional[UpstreamLease]:
+        """Pick a host and count the request against it until the lease is finished"""
+        host = self.pick(service)
+        if host is None:
+            return None
+        host.outstanding += 1
+        host.requests += 1
+        return UpstreamLease(self, host)
+
+    def healthy_hosts(self, service: str) -> List[str]:
+        """Hosts not ejected by their breaker (half-open ones included)"""
+        hosts = self.hosts.get(service, ())
+        now = time.monotonic()
+        for host in hosts:
+            self._available(host, now)  # moves expired OPEN breakers to HALF_OPEN
+        return [host.url for host in hosts if host.state != OPEN]
+
+    # -- breaker ------------------------------------------------------------------
+
+    def _open(self, host: UpstreamHost, reason: str):
+        if host.state != OPEN:
+            logger.error(f"🔴 Circuit breaker OPENED for {host.service} at {host.url}: {reason}")
+        host.state = OPEN
+        host.opened_at = time.monotonic()
+
+    def record(self, host: UpstreamHost, status: Optional[int], latency: float):
+        """Passive outlier detection from a proxied response (None = transport error)"""
+        if status is not None and status < 500:
+            if host.ewma_latency:
+                host.ewma_latency += self.ewma_alpha * (latency - host.ewma_latency)
+            else:
+                host.ewma_latency = latency
+            host.consecutive_failures = 0
+            if host.state == HALF_OPEN:
+                host.state = CLOSED
+                logger.info(f"🟢 Circuit breaker CLOSED for {host.service} at {host.url}")
+            return
+
+        host.failures += 1
+        host.consecutive_failures += 1
+        host.last_failure_time = time.time()
+        if host.state == HALF_OPEN:
+            self._open(host, "trial request failed")
+        elif host.consecutive_failures >= self.failure_threshold:
+            self._open(host, f"{host.consecutive_failures} consecutive failures")
+
+    def reset(self, service: str) -> bool:
+        hosts = self.hosts.get(service)
+        if hosts is None:
+            return False
+        for host in hosts:
+            host.state = CLOSED
+            host.consecutive_failures = 0
+            host.probe_failures = 0
+        return True
+
+    def service_state(self, service: str) -> str:
+        """CLOSED if any host takes full traffic, else HALF_OPEN if any is on trial, else OPEN"""
+        states = {host.state for host in self.hosts.get(service, ())}
+        for state in (CLOSED, HALF_OPEN):
+            if state in states:
+                return state
+        return OPEN
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {'state': self.service_state(name), 'hosts': [host.to_dict() for host in hosts]}
+            for name, hosts in self.hosts.items()
+        }
+
+    # -- active probes ------------------------------------------------------------
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.probe_timeout)
+        return self._client
+
+    async def probe(self, host: UpstreamHost) -> bool:
+        """One health GET; success lets an open host take a trial request early"""
+        path = self.services[host.service].get('health_path', '/healthz')
+        try:
+            response = await self._get_client().get(host.url + path)
+            ok = response.status_code == 200
+        except httpx.HTTPError as e:
+            logger.warning(f"⚠️ Health check failed for {host.service} at {host.url}: {e}")
+            ok = False
+
+        host.last_probe_time = time.time()
+        host.last_probe_ok = ok
+        if ok:
+            host.probe_failures = 0
+            if host.state == OPEN:
+                host.state = HALF_OPEN
+        else:
+            host.probe_failures += 1
+            if host.probe_failures >= self.unhealthy_probes:
+                self._open(host, f"{host.probe_failures} failed health checks")
+        return ok
+
+    def find(self, service: str, url: str) -> Optional[UpstreamHost]:
+        return next((host for host in self.hosts.get(service, ()) if host.url == url.rstrip('/')), None)
+
+    async def probe_all(self):
+        await asyncio.gather(*(self.probe(host) for hosts in self.hosts.values() for host in hosts))
+
+    async def _probe_loop(self):
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:  # keep probing whatever happens to one round
+                logger.error(f"❌ Health probe round failed: {e}")
+            await asyncio.sleep(self.probe_interval)
+
+    def start(self):
+        """Start background probes on the running loop"""
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.create_task(self._probe_loop())
+
+    async def stop(self):
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,244 @@
+"""
+Route-level response cache for the API gateway
+
+- bounded in-memory LRU (entries and bytes), Redis as an optional shared second tier
+- fresh for ``ttl`` seconds, then served stale for ``stale_while_revalidate``
+  seconds while a single background request refreshes it
+- concurrent misses for the same key share one upstream request
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RawHeaders = List[Tuple[bytes, bytes]]
+
+
+@dataclass
+class CachedResponse:
+    status_code: int
+    headers: RawHeaders
+    body: bytes
+    stored_at: float  # wall clock, so Redis entries age correctly across gateway instances
+
+    def age(self, now: Optional[float] = None) -> float:
+        return max(0.0, (now or time.time()) - self.stored_at)
+
+    def dumps(self) -> str:
+        return json.dumps({
+            'status_code': self.status_code,
+            'headers': [[name.decode('latin-1'), value.decode('latin-1')] for name, value in self.headers],
+            'body': base64.b64encode(self.body).decode('ascii'),
+            'stored_at': self.stored_at,
+        })
+
+    @classmethod
+    def loads(cls, data: str) -> 'CachedResponse':
+        payload = json.loads(data)
+        return cls(
+            status_code=payload['status_code'],
+            headers=[(name.encode('latin-1'), value.encode('latin-1')) for name, value in payload['headers']],
+            body=base64.b64decode(payload['body']),
+            stored_at=payload['stored_at'],
+        )
+
+
+def is_cacheable(status_code: int, headers: RawHeaders) -> bool:
+    """Only plain 200s without no-store/private/Set-Cookie are shared between callers"""
+    if status_code != 200:
+        return False
+    for name, value in headers:
+        name = name.lower()
+        if name == b'set-cookie':
+            return False
+        if name == b'cache-control' and (b'no-store' in value or b'private' in value):
+            return False
+    return True
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    stale_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+    collapsed: int = 0
+    refreshes: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        served = self.hits + self.stale_hits + self.collapsed
+        total = served + self.misses
+        return served / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        stats = asdict(self)
+        stats['hit_ratio'] = self.hit_ratio
+        return stats
+
+
+Fetcher = Callable[[], Awaitable[CachedResponse]]
+
+
+class ResponseCache:
+    """In-memory LRU + optional Redis tier with stale-while-revalidate and request collapsing"""
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 64 * 1024 * 1024,
+                 max_entry_bytes: int = 1024 * 1024, redis_client=None, redis_prefix: str = 'gateway:cache:'):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.redis_client = redis_client
+        self.redis_prefix = redis_prefix
+        self._entries: 'OrderedDict[str, Tuple[CachedResponse, float, float]]' = OrderedDict()
+        self._bytes = 0
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._refreshing: set = set()
+        self._background: set = set()  # strong references to fire-and-forget tasks
+        self.stats = CacheStats()
+
+    @staticmethod
+    def make_key(method: str, path: str, query: str, vary: str, user: Dict[str, Any]) -> str:
+        """Cache key scoped by ``vary``: 'user' (per user id), 'role' (per role set) or 'none'"""
+        if vary == 'user':
+            scope = 'u:' + str(user.get('user_id', ''))
+        elif vary == 'role':
+            scope = 'r:' + ','.join(sorted(user.get('roles', ())))
+        else:
+            scope = '*'
+        return f"{method} {path}?{query} {scope}"
+
+    # -- storage ------------------------------------------------------------------
+
+    def _put_local(self, key: str, entry: CachedResponse, ttl: float, stale: float):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous[0].body)
+        self._entries[key] = (entry, ttl, stale)
+        self._bytes += len(entry.body)
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (evicted, _, _) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted.body)
+            self.stats.evictions += 1
+
+    def _get_local(self, key: str) -> Optional[Tuple[CachedResponse, float, float]]:
+        item = self._entries.get(key)
+        if item is not None:
+            entry, ttl, stale = item
+            if entry.age() >= ttl + stale:
+                del self._entries[key]
+                self._bytes -= len(entry.body)
+                return None
+            self._entries.move_to_end(key)
+        return item
+
+    async def _get_redis(self, key: str) -> Optional[CachedResponse]:
+        if self.redis_client is None:
+            return None
+        try:
+            data = await asyncio.to_thread(self.redis_client.get, self.redis_prefix + key)
+        except Exception as e:
+            logger.warning(f"⚠️ Redis cache read failed: {e}")
+            return None
+        return CachedResponse.loads(data) if data else None
+
+    async def _put_redis(self, key: str, entry: CachedResponse, ttl: float, stale: float):
+        if self.redis_client is None:
+            return
+        try:
+            expiry = max(1, int(ttl + stale + 0.999))
+            await asyncio.to_thread(self.redis_client.setex, self.redis_prefix + key, expiry, entry.dumps())
+        except Exception as e:
+            logger.warning(f"⚠️ Redis cache write failed: {e}")
+
+    def _store(self, key: str, entry: CachedResponse, ttl: float, stale: float):
+        if not is_cacheable(entry.status_code, entry.headers) or len(entry.body) > self.max_entry_bytes:
+            return
+        self._put_local(key, entry, ttl, stale)
+        self.stats.stores += 1
+        if self.redis_client is not None:
+            self._spawn(self._put_redis(key, entry, ttl, stale))
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def invalidate(self, prefix: str = ''):
+        """Drop local entries whose key starts with ``prefix`` (Redis entries expire on their own)"""
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            entry, _, _ = self._entries.pop(key)
+            self._bytes -= len(entry.body)
+
+    # -- lookup -------------------------------------------------------------------
+
+    async def _fetch_and_store(self, key: str, fetch: Fetcher, ttl: float, stale: float) -> CachedResponse:
+        entry = await fetch()
+        self._store(key, entry, ttl, stale)
+        return entry
+
+    def _fetch_done(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every waiter went away
+
+    async def _fetch(self, key: str, fetch: Fetcher, ttl: float, stale: float) -> CachedResponse:
+        """
+        One upstream request per key at a time. It runs as its own task, so a caller
+        that disconnects does not cancel the fetch for the others awaiting it.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_and_store(key, fetch, ttl, stale))
+            task.add_done_callback(lambda done: self._fetch_done(key, done))
+            self._inflight[key] = task
+        else:
+            self.stats.collapsed += 1
+        return await asyncio.shield(task)
+
+    async def _refresh(self, key: str, fetch: Fetcher, ttl: float, stale: float):
+        try:
+            await self._fetch(key, fetch, ttl, stale)
+            self.stats.refreshes += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Background cache refresh failed for {key}: {e}")
+        finally:
+            self._refreshing.discard(key)
+
+    async def get(self, key: str, fetch: Fetcher, ttl: float,
+                  stale_while_revalidate: float = 0.0) -> Tuple[CachedResponse, str]:
+        """
+        Response for ``key`` and how it was served: 'HIT', 'STALE' (refresh started
+        in the background) or 'MISS' (fetched, or joined an identical in-flight fetch).
+        """
+        item = self._get_local(key)
+        if item is None:
+            entry = await self._get_redis(key)
+            if entry is not None and entry.age() < ttl + stale_while_revalidate:
+                self._put_local(key, entry, ttl, stale_while_revalidate)
+                self.stats.redis_hits += 1
+                item = (entry, ttl, stale_while_revalidate)
+
+        if item is not None:
+            entry = item[0]
+            if entry.age() < ttl:
+                self.stats.hits += 1
+                return entry, 'HIT'
+            self.stats.stale_hits += 1
+            if key not in self._refreshing and key not in self._inflight:
+                self._refreshing.add(key)
+                self._spawn(self._refresh(key, fetch, ttl, stale_while_revalidate))
+            return entry, 'STALE'
+
+        if key not in self._inflight:
+            self.stats.misses += 1
+        return await self._fetch(key, fetch, ttl, stale_while_revalidate), 'MISS'
@@ -14,6 +14,7 @@ import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Union
 import redis
+from event_bus import EventBus
 import aiohttp
 from dataclasses import dataclass
 from scipy import stats
@@ -56,6 +57,9 @@ except Exception as e:
     logger.warning(f"⚠️ Redis connection failed: {e}")
     redis_client = None
 
+# Event bus (Redis Streams, in-process fallback)
+event_bus = EventBus('risk_engine')
+
 # Enhanced Data Models
 class RiskAssessment(BaseModel):
     assessment_id: str = Field(..., description="Unique assessment ID")
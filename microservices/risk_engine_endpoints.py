@@ -2,7 +2,8 @@
 Risk Engine API Endpoints - Advanced Risk Management Services
 """
 
-from risk_engine import app, risk_engine, RiskAssessment, RiskConfig, PortfolioRiskMetrics, StressTestResult, RiskAlert
+from risk_engine import app, risk_engine, event_bus, RiskAssessment, RiskConfig, PortfolioRiskMetrics, StressTestResult, RiskAlert
+from event_bus import Event
 from fastapi import HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect, Depends
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
@@ -34,7 +35,8 @@ class RiskConnectionManager:
         logger.info(f"❌ Risk WebSocket client disconnected. Total: {len(self.active_connections)}")
         
     async def broadcast_alert(self, alert: RiskAlert):
-        """Broadcast risk alert to all connected clients"""
+        """Broadcast risk alert to all connected clients and the risk_alert topic"""
+        await event_bus.publish('risk_alert', alert.dict())
         if self.active_connections:
             message = {
                 "type": "risk_alert",
@@ -171,6 +173,35 @@ async def assess_trade_risk(request: TradeRiskRequest):
         logger.error(f"❌ Trade risk assessment failed: {e}")
         raise HTTPException(status_code=500, detail=f"Risk assessment failed: {str(e)}")
 
+# Event bus consumers
+async def on_signal(event: Event):
+    """signal handler: assess every strategy signal and alert on the ones to withdraw"""
+    signal = event.data
+    assessment = await risk_engine.assess_trade_risk(
+        symbol=signal['symbol'],
+        action=signal['action'],
+        quantity=signal['quantity'],
+        price=signal['price']
+    )
+    if assessment.approved and assessment.risk_score <= 0.8:
+        return
+    
+    alert = RiskAlert(
+        alert_id=f"signal_rejected_{signal['signal_id']}",
+        alert_type="SIGNAL_REJECTED",
+        severity="HIGH",
+        symbol=signal['symbol'],
+        message=f"{signal['strategy']} signal {signal['action']} {signal['symbol']} rejected: {assessment.reason}",
+        metric_name="risk_score",
+        current_value=assessment.risk_score,
+        threshold_value=0.8,
+        recommended_action="Signal withdrawn by the strategy engine",
+        auto_action_taken=True
+    )
+    risk_engine.active_alerts[alert.alert_id] = alert
+    await manager.broadcast_alert(alert)
+    logger.warning(f"⚠️ {alert.message}")
+
 @app.get("/portfolio/{portfolio_id}/metrics", response_model=PortfolioRiskMetrics)
 async def get_portfolio_risk_metrics(
     portfolio_id: str = "default",
@@ -515,6 +546,18 @@ async def ai_risk_analysis(
         logger.error(f"❌ AI risk analysis failed: {e}")
         raise HTTPException(status_code=500, detail=f"AI analysis failed: {str(e)}")
 
+@app.on_event("startup")
+async def startup_event():
+    """Start assessing published strategy signals"""
+    if not any(sub.topic == 'signal' for sub in event_bus.subscriptions):
+        event_bus.subscribe('signal', on_signal)
+    await event_bus.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop event consumers"""
+    await event_bus.stop()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8006)
\ No newline at end of file
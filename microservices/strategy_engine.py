@@ -14,6 +14,8 @@ import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Union
 import redis
+from event_bus import EventBus
+from strategy_registry import BarFeed, StrategyRunner, TimeframeScheduler
 import aiohttp
 from dataclasses import dataclass
 from sklearn.ensemble import RandomForestClassifier
@@ -57,6 +59,9 @@ except Exception as e:
     logger.warning(f"⚠️ Redis connection failed: {e}")
     redis_client = None
 
+# Event bus (Redis Streams, in-process fallback)
+event_bus = EventBus('strategy_engine')
+
 # Enhanced Data Models
 class TradingSignal(BaseModel):
     signal_id: str = Field(..., description="Unique signal identifier")
@@ -215,7 +220,12 @@ class StrategyEngine:
         self.performance_metrics: Dict[str, StrategyPerformance] = {}
         self.ai_model = AIStrategyModel()
         self.is_running = False
+        self.risk_halted = False  # set by the risk engine's EMERGENCY_STOP alert
         self.market_data_cache = {}
+        self.runner = StrategyRunner()
+        self.bar_feed = BarFeed(capacity=int(os.getenv('STRATEGY_BAR_CAPACITY', 1000)))
+        self.scheduler = TimeframeScheduler(grace=float(os.getenv('BAR_CLOSE_GRACE', 2)))
+        self.http_session = None  # shared aiohttp session, created on first use
         
         # Initialize default strategies
         self._initialize_default_strategies()
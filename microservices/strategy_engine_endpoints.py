@@ -8,402 +8,246 @@ import asyncio
 import logging
 import json
 import numpy as np
-import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import List, Optional, Any
 import uuid
+import os
+import time
+import aiohttp
+
+from event_bus import Event
+from strategy_registry import STRATEGY_REGISTRY, SignalCandidate
 
 # Import from strategy_engine.py
 from strategy_engine import (
-    app, redis_client, TradingSignal, StrategyConfig, StrategyPerformance,
+    app, redis_client, event_bus, TradingSignal, StrategyConfig, StrategyPerformance,
     MarketAnalysis, AIStrategyModel, StrategyEngine, strategy_engine,
     active_signals, strategies, logger
 )
 
-# Strategy Implementation Methods
-async def generate_ma_crossover_signal(self, symbol: str, timeframe: str, market_data: Dict) -> Optional[TradingSignal]:
-    """Generate Moving Average Crossover signals"""
-    try:
-        strategy = self.strategies.get("ma_crossover")
-        if not strategy or not strategy.enabled:
-            return None
-        
-        # Get OHLCV data from data collector
-        data_collector_url = os.getenv('DATA_COLLECTOR_URL', 'http://localhost:8004')
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{data_collector_url}/ohlcv/{symbol}?interval={timeframe}&limit=50") as response:
-                if response.status != 200:
-                    return None
-                
-                ohlcv_response = await response.json()
-                ohlcv_data = ohlcv_response.get('data', [])
-                
-                if len(ohlcv_data) < 30:
-                    return None
-                
-                # Convert to DataFrame
-                df = pd.DataFrame(ohlcv_data)
-                df['close'] = df['close'].astype(float)
-                
-                # Calculate moving averages
-                fast_ma = strategy.parameters.get('fast_ma', 12)
-                slow_ma = strategy.parameters.get('slow_ma', 26)
-                
-                df['ma_fast'] = df['close'].rolling(window=fast_ma).mean()
-                df['ma_slow'] = df['close'].rolling(window=slow_ma).mean()
-                
-                # Get current and previous values
-                current_fast = df['ma_fast'].iloc[-1]
-                current_slow = df['ma_slow'].iloc[-1]
-                prev_fast = df['ma_fast'].iloc[-2]
-                prev_slow = df['ma_slow'].iloc[-2]
-                
-                current_price = df['close'].iloc[-1]
-                
-                # Detect crossover
-                signal_action = "HOLD"
-                confidence = 0.5
-                
-                if prev_fast <= prev_slow and current_fast > current_slow:
-                    # Golden cross - bullish signal
-                    signal_action = "BUY"
-                    confidence = min(0.9, 0.6 + abs(current_fast - current_slow) / current_slow)
-                elif prev_fast >= prev_slow and current_fast < current_slow:
-                    # Death cross - bearish signal
-                    signal_action = "SELL"
-                    confidence = min(0.9, 0.6 + abs(current_fast - current_slow) / current_slow)
-                
-                if signal_action != "HOLD" and confidence >= strategy.min_confidence:
-                    signal_id = f"ma_crossover_{symbol}_{timeframe}_{int(datetime.now().timestamp())}"
-                    
-                    # Calculate stop loss and take profit
-                    if signal_action == "BUY":
-                        stop_loss = current_price * (1 - strategy.stop_loss_pct)
-                        take_profit = current_price * (1 + strategy.take_profit_pct)
-                    else:
-                        stop_loss = current_price * (1 + strategy.stop_loss_pct)
-                        take_profit = current_price * (1 - strategy.take_profit_pct)
-                    
-                    risk_reward = abs(take_profit - current_price) / abs(current_price - stop_loss)
-                    
-                    return TradingSignal(
-                        signal_id=signal_id,
-                        symbol=symbol,
-                        action=signal_action,
-                        confidence=confidence,
-                        strength=confidence * 0.8,
-                        price=current_price,
-                        quantity=1000,  # Will be adjusted by portfolio manager
-                        stop_loss=stop_loss,
-                        take_profit=take_profit,
-                        risk_reward_ratio=risk_reward,
-                        timeframe=timeframe,
-                        strategy="ma_crossover",
-                        reasoning=f"MA crossover detected: {fast_ma}MA = {current_fast:.2f}, {slow_ma}MA = {current_slow:.2f}",
-                        technical_score=confidence,
-                        ai_score=0.5,
-                        sentiment_score=0.0,
-                        volatility_score=0.5,
-                        trend_alignment="BULLISH" if signal_action == "BUY" else "BEARISH",
-                        market_condition="TRENDING",
-                        expiry_time=datetime.now() + timedelta(hours=2)
-                    )
-        
-        return None
-        
-    except Exception as e:
-        logger.error(f"❌ MA crossover signal generation failed: {e}")
-        return None
+# Strategy Implementation Methods (vectorized strategies live in strategy_registry.py)
+def get_http_session(self) -> aiohttp.ClientSession:
+    """One keep-alive session for every data collector request"""
+    if self.http_session is None or self.http_session.closed:
+        self.http_session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+    return self.http_session
 
-async def generate_rsi_reversion_signal(self, symbol: str, timeframe: str, market_data: Dict) -> Optional[TradingSignal]:
-    """Generate RSI Mean Reversion signals"""
-    try:
-        strategy = self.strategies.get("rsi_reversion")
-        if not strategy or not strategy.enabled:
-            return None
-        
-        # Get technical indicators
-        data_collector_url = os.getenv('DATA_COLLECTOR_URL', 'http://localhost:8004')
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{data_collector_url}/indicators/{symbol}") as response:
-                if response.status != 200:
-                    return None
-                
-                indicators = await response.json()
-                rsi = indicators.get('rsi_14')
-                
-                if rsi is None:
-                    return None
-                
-                current_price = market_data.get('price', 0)
-                if current_price <= 0:
-                    return None
-                
-                # RSI signal logic
-                signal_action = "HOLD"
-                confidence = 0.5
-                
-                rsi_oversold = strategy.parameters.get('rsi_oversold', 30)
-                rsi_overbought = strategy.parameters.get('rsi_overbought', 70)
-                
-                if rsi <= rsi_oversold:
-                    # Oversold - potential buy signal
-                    signal_action = "BUY"
-                    confidence = min(0.9, 0.6 + (rsi_oversold - rsi) / rsi_oversold)
-                elif rsi >= rsi_overbought:
-                    # Overbought - potential sell signal
-                    signal_action = "SELL"
-                    confidence = min(0.9, 0.6 + (rsi - rsi_overbought) / (100 - rsi_overbought))
-                
-                if signal_action != "HOLD" and confidence >= strategy.min_confidence:
-                    signal_id = f"rsi_reversion_{symbol}_{timeframe}_{int(datetime.now().timestamp())}"
-                    
-                    # Calculate stop loss and take profit
-                    if signal_action == "BUY":
-                        stop_loss = current_price * (1 - strategy.stop_loss_pct)
-                        take_profit = current_price * (1 + strategy.take_profit_pct)
-                    else:
-                        stop_loss = current_price * (1 + strategy.stop_loss_pct)
-                        take_profit = current_price * (1 - strategy.take_profit_pct)
-                    
-                    risk_reward = abs(take_profit - current_price) / abs(current_price - stop_loss)
-                    
-                    return TradingSignal(
-                        signal_id=signal_id,
-                        symbol=symbol,
-                        action=signal_action,
-                        confidence=confidence,
-                        strength=confidence * 0.9,
-                        price=current_price,
-                        quantity=500,
-                        stop_loss=stop_loss,
-                        take_profit=take_profit,
-                        risk_reward_ratio=risk_reward,
-                        timeframe=timeframe,
-                        strategy="rsi_reversion",
-                        reasoning=f"RSI mean reversion: RSI = {rsi:.1f}, threshold = {rsi_oversold if signal_action == 'BUY' else rsi_overbought}",
-                        technical_score=confidence,
-                        ai_score=0.5,
-                        sentiment_score=0.0,
-                        volatility_score=0.3,
-                        trend_alignment="NEUTRAL",
-                        market_condition="RANGING",
-                        expiry_time=datetime.now() + timedelta(hours=1)
-                    )
-        
-        return None
-        
-    except Exception as e:
-        logger.error(f"❌ RSI reversion signal generation failed: {e}")
-        return None
+async def backfill_bars(self, timeframe: str, symbols: List[str], window: int):
+    """Load the latest ``window`` bars of each symbol from the data collector into the bar feed"""
+    data_collector_url = os.getenv('DATA_COLLECTOR_URL', 'http://localhost:8004')
+    session = self.get_http_session()
+    
+    async def fetch(symbol: str):
+        # One extra bar: the collector's last one is usually still forming
+        params = {'interval': timeframe, 'limit': window + 1}
+        async with session.get(f"{data_collector_url}/ohlcv/{symbol}", params=params) as response:
+            if response.status != 200:
+                return symbol, None
+            records = (await response.json()).get('data', [])
+            return symbol, {name: [float(record[name]) for record in records]
+                            for name in ('ts', 'open', 'high', 'low', 'close', 'volume')}
+    
+    for result in await asyncio.gather(*(fetch(symbol) for symbol in symbols), return_exceptions=True):
+        if isinstance(result, Exception):
+            logger.warning(f"⚠️ OHLCV backfill failed for {timeframe}: {result}")
+        elif result[1]:
+            self.bar_feed.load(result[0], timeframe, result[1])
 
-async def generate_ai_momentum_signal(self, symbol: str, timeframe: str, market_data: Dict) -> Optional[TradingSignal]:
-    """Generate AI-powered momentum signals"""
-    try:
-        strategy = self.strategies.get("ai_momentum")
-        if not strategy or not strategy.enabled:
-            return None
-        
-        # Get ML features and indicators
-        data_collector_url = os.getenv('DATA_COLLECTOR_URL', 'http://localhost:8004')
-        ai_engine_url = os.getenv('AI_ENGINE_URL', 'http://localhost:8001')
-        
-        # Collect all required data
-        ml_features = None
-        indicators = None
-        ai_analysis = None
-        
-        async with aiohttp.ClientSession() as session:
-            # Get ML features
-            try:
-                async with session.get(f"{data_collector_url}/ml-features/{symbol}") as response:
-                    if response.status == 200:
-                        ml_features = await response.json()
-            except Exception as e:
-                logger.warning(f"Failed to get ML features: {e}")
-            
-            # Get technical indicators
-            try:
-                async with session.get(f"{data_collector_url}/indicators/{symbol}") as response:
-                    if response.status == 200:
-                        indicators = await response.json()
-            except Exception as e:
-                logger.warning(f"Failed to get indicators: {e}")
-            
-            # Get AI analysis
-            try:
-                async with session.post(f"{ai_engine_url}/analyze/signal", json={
-                    "symbol": symbol,
-                    "timeframe": timeframe,
-                    "features": ml_features or {},
-                    "indicators": indicators or {}
-                }) as response:
-                    if response.status == 200:
-                        ai_analysis = await response.json()
-            except Exception as e:
-                logger.warning(f"Failed to get AI analysis: {e}")
-        
-        if not ml_features or not indicators:
-            return None
-        
-        # Combine signals
-        current_price = market_data.get('price', 0)
-        momentum_24h = ml_features.get('price_momentum_24h', 0)
-        volatility = ml_features.get('volatility_24h', 0)
-        volume_ratio = ml_features.get('volume_ratio', 1)
-        rsi = indicators.get('rsi_14', 50)
-        
-        # AI model prediction
-        features = {
-            'rsi': rsi,
-            'macd': indicators.get('macd', 0),
-            'bb_position': (current_price - indicators.get('bollinger_lower', current_price)) / 
-                          (indicators.get('bollinger_upper', current_price) - indicators.get('bollinger_lower', current_price)),
-            'volume_ratio': volume_ratio,
-            'price_momentum': momentum_24h,
-            'volatility': volatility,
-            'trend_strength': ml_features.get('trend_strength', 0.5),
-            'support_distance': ml_features.get('support_resistance_distance', 0.05),
-            'resistance_distance': ml_features.get('support_resistance_distance', 0.05)
-        }
-        
-        ai_prediction = await self.ai_model.predict_signal(features, timeframe)
-        
-        # Strategy logic
-        momentum_threshold = strategy.parameters.get('momentum_threshold', 0.02)
-        volatility_filter = strategy.parameters.get('volatility_filter', 0.05)
-        volume_threshold = strategy.parameters.get('volume_threshold', 1.5)
-        
-        signal_action = "HOLD"
-        confidence = 0.5
-        
-        # Strong momentum with volume confirmation
-        if (abs(momentum_24h) > momentum_threshold and 
-            volatility < volatility_filter and 
-            volume_ratio > volume_threshold and
-            ai_prediction['direction'] != "HOLD"):
-            
-            signal_action = ai_prediction['direction']
-            
-            # Combine technical and AI confidence
-            technical_confidence = min(0.9, abs(momentum_24h) / momentum_threshold * 0.5 + 0.3)
-            ai_confidence = ai_prediction['confidence']
-            confidence = (technical_confidence + ai_confidence) / 2
-        
-        if signal_action != "HOLD" and confidence >= strategy.min_confidence:
-            signal_id = f"ai_momentum_{symbol}_{timeframe}_{int(datetime.now().timestamp())}"
-            
-            # Calculate stop loss and take profit
-            if signal_action == "BUY":
-                stop_loss = current_price * (1 - strategy.stop_loss_pct)
-                take_profit = current_price * (1 + strategy.take_profit_pct)
-            else:
-                stop_loss = current_price * (1 + strategy.stop_loss_pct)
-                take_profit = current_price * (1 - strategy.take_profit_pct)
+async def on_bar(self, event: Event):
+    """bar handler: closed klines published by the data collector"""
+    bar = event.data
+    self.bar_feed.add(bar['symbol'], bar['interval'], bar['ts'],
+                      bar['open'], bar['high'], bar['low'], bar['close'], bar['volume'])
+
+async def on_risk_alert(self, event: Event):
+    """risk_alert handler: withdraw rejected signals, halt on emergency stop"""
+    alert = event.data
+    if alert['alert_type'] == "EMERGENCY_STOP":
+        self.risk_halted = True
+        self.withdraw_signals(list(self.active_signals))
+        logger.warning("🚨 Emergency stop: signal generation halted, active signals withdrawn")
+    elif alert['alert_type'] == "EMERGENCY_RESET":
+        self.risk_halted = False
+        logger.info("🔄 Emergency stop reset: signal generation resumed")
+    elif alert['alert_type'] == "SIGNAL_REJECTED":
+        signal_id = alert['alert_id'][len("signal_rejected_"):]
+        if self.withdraw_signals([signal_id]):
+            logger.warning(f"⚠️ Withdrew signal {signal_id}: {alert['message']}")
+
+def withdraw_signals(self, signal_ids: List[str]) -> int:
+    """Drop active signals and their Redis copies; returns how many were active"""
+    withdrawn = 0
+    for signal_id in signal_ids:
+        if self.active_signals.pop(signal_id, None) is not None:
+            withdrawn += 1
+        if redis_client:
+            redis_client.delete(f"signal:{signal_id}")
+    return withdrawn
+
+def build_signal(self, config: StrategyConfig, timeframe: str, candidate: SignalCandidate,
+                 strategy_cls, ai_score: float = 0.5) -> TradingSignal:
+    """Attach risk levels and bookkeeping fields to a strategy candidate"""
+    price = candidate.price
+    if candidate.action == "BUY":
+        stop_loss = price * (1 - config.stop_loss_pct)
+        take_profit = price * (1 + config.take_profit_pct)
+    else:
+        stop_loss = price * (1 + config.stop_loss_pct)
+        take_profit = price * (1 - config.take_profit_pct)
+    
+    return TradingSignal(
+        signal_id=f"{config.name}_{candidate.symbol}_{timeframe}_{int(datetime.now().timestamp())}",
+        symbol=candidate.symbol,
+        action=candidate.action,
+        confidence=candidate.confidence,
+        strength=candidate.strength,
+        price=price,
+        quantity=strategy_cls.quantity,  # Will be adjusted by portfolio manager
+        stop_loss=stop_loss,
+        take_profit=take_profit,
+        risk_reward_ratio=abs(take_profit - price) / abs(price - stop_loss),
+        timeframe=timeframe,
+        strategy=config.name,
+        reasoning=candidate.reasoning,
+        technical_score=candidate.technical_score,
+        ai_score=ai_score,
+        sentiment_score=0.0,
+        volatility_score=candidate.volatility_score,
+        trend_alignment=candidate.trend_alignment,
+        market_condition=candidate.market_condition,
+        expiry_time=datetime.now() + timedelta(hours=strategy_cls.expiry_hours)
+    )
+
+async def emit_signal(self, signal: TradingSignal):
+    """Store, cache and publish a generated signal"""
+    self.active_signals[signal.signal_id] = signal
+    
+    # Cache in Redis
+    if redis_client:
+        redis_client.setex(
+            f"signal:{signal.signal_id}",
+            3600,  # 1 hour TTL
+            json.dumps(signal.dict(), default=str)
+        )
+    
+    await event_bus.publish('signal', {
+        **signal.dict(),
+        'expiry': int(signal.expiry_time.timestamp() * 1000),
+    })
+    
+    logger.info(f"✅ Generated signal: {signal.action} {signal.symbol} @ {signal.price} (confidence: {signal.confidence:.2f})")
+
+async def evaluate_timeframe(self, timeframe: str, symbols: Optional[List[str]] = None,
+                             poll: bool = False) -> int:
+    """
+    Run every enabled strategy on the stored bars of ``timeframe`` (only ``symbols``
+    if given); returns the number of signals. History is fetched over HTTP for
+    symbols without enough bars yet, or for all of them with ``poll``.
+    """
+    jobs = [
+        (config, STRATEGY_REGISTRY[name], STRATEGY_REGISTRY[name](config.parameters))
+        for name, config in self.strategies.items()
+        if config.enabled and timeframe in config.timeframes and name in STRATEGY_REGISTRY
+    ]
+    if not jobs or self.risk_halted:
+        return 0
+    
+    wanted = sorted({symbol for config, _, _ in jobs for symbol in config.symbols})
+    if symbols is not None:
+        wanted = [symbol for symbol in wanted if symbol in symbols]
+    window = max(strategy.window for _, _, strategy in jobs)
+    backfill = wanted if poll else self.bar_feed.short_of(timeframe, wanted, window)
+    if backfill:
+        await self.backfill_bars(timeframe, backfill, window)
+    bars = self.bar_feed.batch(timeframe, wanted, window)
+    if not len(bars):
+        return 0
+    
+    results = await asyncio.gather(*(
+        self.runner.run(strategy_cls.name, config.parameters, bars.select(config.symbols))
+        for config, strategy_cls, _ in jobs
+    ), return_exceptions=True)
+    
+    generated = 0
+    for (config, strategy_cls, _), candidates in zip(jobs, results):
+        if isinstance(candidates, Exception):
+            logger.error(f"❌ {config.name} signal generation failed on {timeframe}: {candidates}")
+            continue
+        
+        for candidate in candidates:
+            ai_score = 0.5
+            if strategy_cls.uses_ai_model:
+                # The AI model decides the direction; confidence blends both views
+                prediction = await self.ai_model.predict_signal(candidate.features or {}, timeframe)
+                if prediction['direction'] == "HOLD":
+                    continue
+                ai_score = prediction['confidence']
+                candidate.action = prediction['direction']
+                candidate.confidence = (candidate.technical_score + ai_score) / 2
+                candidate.trend_alignment = "BULLISH" if candidate.action == "BUY" else "BEARISH"
+                candidate.reasoning += f", AI confidence = {ai_score:.2f}"
             
-            risk_reward = abs(take_profit - current_price) / abs(current_price - stop_loss)
+            if candidate.confidence < config.min_confidence:
+                continue
             
-            return TradingSignal(
-                signal_id=signal_id,
-                symbol=symbol,
-                action=signal_action,
-                confidence=confidence,
-                strength=confidence,
-                price=current_price,
-                quantity=2000,
-                stop_loss=stop_loss,
-                take_profit=take_profit,
-                risk_reward_ratio=risk_reward,
-                timeframe=timeframe,
-                strategy="ai_momentum",
-                reasoning=f"AI momentum signal: 24h momentum = {momentum_24h:.3f}, AI confidence = {ai_confidence:.2f}",
-                technical_score=technical_confidence,
-                ai_score=ai_confidence,
-                sentiment_score=ai_analysis.get('sentiment_score', 0) if ai_analysis else 0,
-                volatility_score=min(1.0, volatility / 0.1),
-                trend_alignment="BULLISH" if signal_action == "BUY" else "BEARISH",
-                market_condition="TRENDING",
-                expiry_time=datetime.now() + timedelta(hours=4)
-            )
-        
-        return None
-        
-    except Exception as e:
-        logger.error(f"❌ AI momentum signal generation failed: {e}")
-        return None
+            await self.emit_signal(self.build_signal(config, timeframe, candidate, strategy_cls, ai_score))
+            generated += 1
+    
+    return generated
+
+async def evaluate_timeframes(self, timeframes: List[str], poll: bool = False):
+    """Evaluate several timeframes concurrently"""
+    await asyncio.gather(*(self.evaluate_timeframe(timeframe, poll=poll) for timeframe in timeframes))
+
+def active_timeframes(self) -> List[str]:
+    return sorted({timeframe for config in self.strategies.values() if config.enabled
+                   for timeframe in config.timeframes})
 
 async def signal_generation_loop(self):
-    """Main signal generation loop"""
+    """
+    Main signal generation loop. Strategies run as soon as the data collector
+    publishes closed bars on the event bus; without a cross-process bus (no Redis)
+    each timeframe's bars are polled from /ohlcv when the bar closes instead.
+    Risk alerts withdraw rejected signals and pause generation on emergency stop.
+    """
+    for topic, handler in (('bar', self.on_bar), ('risk_alert', self.on_risk_alert)):
+        if not any(sub.topic == topic for sub in event_bus.subscriptions):
+            event_bus.subscribe(topic, handler)
+    await event_bus.start()
+    event_driven = event_bus.backend.name == 'redis'
+    if not event_driven:
+        logger.warning("⚠️ No cross-process event bus: polling the data collector for bars at every bar close")
+    
+    unregistered = [name for name in self.strategies if name not in STRATEGY_REGISTRY]
+    if unregistered:
+        logger.warning(f"⚠️ No registered implementation for strategies: {', '.join(unregistered)}")
+    
+    last_cleanup = 0.0
     while self.is_running:
         try:
-            logger.info("🔄 Running signal generation...")
-            
-            # Get active symbols from data collector
-            data_collector_url = os.getenv('DATA_COLLECTOR_URL', 'http://localhost:8004')
-            
-            symbols = ['BTCUSDT', 'ETHUSDT', 'ADAUSDT', 'BNBUSDT']  # Default symbols
-            
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(f"{data_collector_url}/symbols") as response:
-                        if response.status == 200:
-                            symbols_data = await response.json()
-                            symbols = symbols_data.get('subscribed_symbols', symbols)
-            except Exception as e:
-                logger.warning(f"Failed to get symbols from data collector: {e}")
-            
-            # Generate signals for each symbol and strategy
-            for symbol in symbols:
-                try:
-                    # Get current market data
-                    market_data = {}
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(f"{data_collector_url}/market-data/{symbol}") as response:
-                            if response.status == 200:
-                                market_data = await response.json()
-                    
-                    if not market_data:
-                        continue
-                    
-                    # Generate signals for each enabled strategy
-                    for strategy_name, strategy in self.strategies.items():
-                        if not strategy.enabled or symbol not in strategy.symbols:
-                            continue
-                        
-                        for timeframe in strategy.timeframes:
-                            signal = None
-                            
-                            if strategy_name == "ma_crossover":
-                                signal = await self.generate_ma_crossover_signal(symbol, timeframe, market_data)
-                            elif strategy_name == "rsi_reversion":
-                                signal = await self.generate_rsi_reversion_signal(symbol, timeframe, market_data)
-                            elif strategy_name == "ai_momentum":
-                                signal = await self.generate_ai_momentum_signal(symbol, timeframe, market_data)
-                            
-                            if signal:
-                                # Store signal
-                                self.active_signals[signal.signal_id] = signal
-                                
-                                # Cache in Redis
-                                if redis_client:
-                                    redis_client.setex(
-                                        f"signal:{signal.signal_id}",
-                                        3600,  # 1 hour TTL
-                                        json.dumps(signal.dict(), default=str)
-                                    )
-                                
-                                logger.info(f"✅ Generated signal: {signal.action} {signal.symbol} @ {signal.price} (confidence: {signal.confidence:.2f})")
-                
-                except Exception as e:
-                    logger.error(f"❌ Signal generation failed for {symbol}: {e}")
+            timeframes = self.active_timeframes()
+            if event_driven:
+                updated = await self.bar_feed.wait(timeout=60.0)
+                updated = {timeframe: symbols for timeframe, symbols in updated.items() if timeframe in timeframes}
+                if updated:
+                    logger.info(f"🔄 Running signal generation for closed {', '.join(sorted(updated))} bars...")
+                    await asyncio.gather(*(
+                        self.evaluate_timeframe(timeframe, symbols) for timeframe, symbols in updated.items()
+                    ))
+            else:
+                due = self.scheduler.due(timeframes)
+                if due:
+                    logger.info(f"🔄 Polling closed {', '.join(due)} bars for signal generation...")
+                    await self.evaluate_timeframes(due, poll=True)
             
             # Clean up expired signals
-            await self.cleanup_expired_signals()
+            if time.monotonic() - last_cleanup >= 60:
+                await self.cleanup_expired_signals()
+                last_cleanup = time.monotonic()
             
-            # Sleep before next iteration
-            await asyncio.sleep(60)  # Generate signals every minute
+            if not event_driven:
+                # Sleep until the next bar close
+                await asyncio.sleep(min(60.0, self.scheduler.seconds_until_next(timeframes)))
             
         except Exception as e:
             logger.error(f"❌ Signal generation loop error: {e}")
@@ -419,10 +263,7 @@ async def cleanup_expired_signals(self):
             if signal.expiry_time <= current_time:
                 expired_signals.append(signal_id)
         
-        for signal_id in expired_signals:
-            del self.active_signals[signal_id]
-            if redis_client:
-                redis_client.delete(f"signal:{signal_id}")
+        self.withdraw_signals(expired_signals)
         
         if expired_signals:
             logger.info(f"🧹 Cleaned up {len(expired_signals)} expired signals")
@@ -431,9 +272,16 @@ async def cleanup_expired_signals(self):
         logger.error(f"❌ Signal cleanup failed: {e}")
 
 # Patch methods to StrategyEngine
-StrategyEngine.generate_ma_crossover_signal = generate_ma_crossover_signal
-StrategyEngine.generate_rsi_reversion_signal = generate_rsi_reversion_signal
-StrategyEngine.generate_ai_momentum_signal = generate_ai_momentum_signal
+StrategyEngine.get_http_session = get_http_session
+StrategyEngine.backfill_bars = backfill_bars
+StrategyEngine.on_bar = on_bar
+StrategyEngine.on_risk_alert = on_risk_alert
+StrategyEngine.withdraw_signals = withdraw_signals
+StrategyEngine.build_signal = build_signal
+StrategyEngine.emit_signal = emit_signal
+StrategyEngine.evaluate_timeframe = evaluate_timeframe
+StrategyEngine.evaluate_timeframes = evaluate_timeframes
+StrategyEngine.active_timeframes = active_timeframes
 StrategyEngine.signal_generation_loop = signal_generation_loop
 StrategyEngine.cleanup_expired_signals = cleanup_expired_signals
 
@@ -460,13 +308,18 @@ async def health_check():
     except:
         pass
     
+    # Without Redis no closed bars arrive over the bus and signals never leave this process
+    event_bus_degraded = event_bus.fallback_reason is not None
+    
     return {
-        "status": "healthy" if data_collector_connected else "degraded",
+        "status": "healthy" if data_collector_connected and not event_bus_degraded else "degraded",
         "service": "mirai-strategy-engine",
         "version": "2.0.0",
         "timestamp": datetime.now(),
         "data_collector_connected": data_collector_connected,
         "ai_engine_connected": ai_engine_connected,
+        "event_bus_backend": event_bus.backend.name if event_bus.backend is not None else None,
+        "event_bus_degraded": event_bus.fallback_reason,
         "active_strategies": len([s for s in strategy_engine.strategies.values() if s.enabled]),
         "active_signals": len(strategy_engine.active_signals),
         "is_running": strategy_engine.is_running
@@ -558,8 +411,10 @@ async def disable_strategy(strategy_name: str):
 async def force_signal_generation(background_tasks: BackgroundTasks):
     """🔄 Force signal generation"""
     try:
-        background_tasks.add_task(strategy_engine.signal_generation_loop)
-        return {"message": "Signal generation started"}
+        # Evaluate every timeframe now instead of waiting for its next bar close
+        timeframes = strategy_engine.active_timeframes()
+        background_tasks.add_task(strategy_engine.evaluate_timeframes, timeframes)
+        return {"message": "Signal generation started", "timeframes": timeframes}
         
     except Exception as e:
         logger.error(f"❌ Force signal generation failed: {e}")
@@ -598,11 +453,15 @@ async def get_engine_status():
     try:
         return {
             "is_running": strategy_engine.is_running,
+            "risk_halted": strategy_engine.risk_halted,
             "total_strategies": len(strategy_engine.strategies),
             "enabled_strategies": len([s for s in strategy_engine.strategies.values() if s.enabled]),
             "active_signals": len(strategy_engine.active_signals),
             "strategies": {name: {"enabled": config.enabled, "priority": config.priority} 
                          for name, config in strategy_engine.strategies.items()},
+            "event_bus": event_bus.status(),
+            "bar_series": len(strategy_engine.bar_feed.store),
+            "strategy_timings": strategy_engine.runner.stats(),
             "last_update": datetime.now()
         }
         
@@ -625,6 +484,15 @@ async def startup_event():
     
     logger.info("✅ Strategy Engine startup completed")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop event consumers"""
+    strategy_engine.is_running = False
+    await event_bus.stop()
+    strategy_engine.runner.shutdown()
+    if strategy_engine.http_session is not None:
+        await strategy_engine.http_session.close()
+
 # Legacy endpoints for compatibility
 @app.get("/trading_signals")
 async def get_legacy_trading_signals():
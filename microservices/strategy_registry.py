@@ -0,0 +1,523 @@
+"""
+Vectorized strategy registry for the strategy engine
+
+- strategies implement ``generate(symbols, bars)`` over a BarBatch, one
+  (n_symbols, window) array per OHLCV field, so one call scores every symbol
+- BarFeed: closed bars from the event bus kept in a local BarStore; the
+  engine evaluates a timeframe as soon as new closed bars arrive
+- TimeframeScheduler: bar-close timing for the HTTP polling fallback
+- StrategyRunner: strategies run concurrently; CPU-heavy ones are split by
+  symbol across a process pool; per-strategy timing metrics
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Type
+
+import numpy as np
+
+from bar_store import PRICE_FIELDS, BarStore
+
+logger = logging.getLogger(__name__)
+
+TIMEFRAME_SECONDS = {
+    '1m': 60, '3m': 180, '5m': 300, '15m': 900, '30m': 1800,
+    '1h': 3600, '2h': 7200, '4h': 14400, '6h': 21600, '12h': 43200, '1d': 86400,
+}
+
+
+@dataclass
+class BarBatch:
+    """Last ``window`` bars of several symbols on one timeframe, oldest first, one row per symbol"""
+    timeframe: str
+    symbols: List[str]
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @property
+    def window(self) -> int:
+        return self.close.shape[1]
+
+    @classmethod
+    def from_rows(cls, timeframe: str, rows: Dict[str, Dict[str, Sequence[float]]], window: int) -> 'BarBatch':
+        """Stack per-symbol columns, keeping symbols with at least ``window`` bars"""
+        symbols = [symbol for symbol, columns in rows.items() if len(columns['close']) >= window]
+        arrays = {
+            name: np.array([rows[symbol][name][-window:] for symbol in symbols], dtype=np.float64).reshape(-1, window)
+            for name in ('open', 'high', 'low', 'close', 'volume')
+        }
+        return cls(timeframe, symbols, **arrays)
+
+    def select(self, symbols: Sequence[str]) -> 'BarBatch':
+        index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        rows = [index[symbol] for symbol in symbols if symbol in index]
+        return BarBatch(
+            self.timeframe, [self.symbols[i] for i in rows],
+            self.open[rows], self.high[rows], self.low[rows], self.close[rows], self.volume[rows],
+        )
+
+    def split(self, parts: int) -> List['BarBatch']:
+        bounds = np.linspace(0, len(self), parts + 1).astype(int)
+        return [
+            BarBatch(
+                self.timeframe, self.symbols[start:end], self.open[start:end], self.high[start:end],
+                self.low[start:end], self.close[start:end], self.volume[start:end],
+            )
+            for start, end in zip(bounds[:-1], bounds[1:]) if end > start
+        ]
+
+
+@dataclass
+class SignalCandidate:
+    """Strategy output for one symbol; the engine turns it into a TradingSignal"""
+    symbol: str
+    action: str  # BUY / SELL
+    confidence: float
+    price: float
+    strength: float
+    reasoning: str
+    technical_score: float
+    volatility_score: float = 0.5
+    trend_alignment: str = "NEUTRAL"
+    market_condition: str = "TRENDING"
+    features: Optional[Dict[str, float]] = None  # model inputs for strategies that use the AI model
+
+
+# -- vectorized indicators (one row per symbol) ----------------------------------------
+
+def rolling_mean_last(values: np.ndarray, period: int, offset: int = 0) -> np.ndarray:
+    """Mean of the ``period`` values ending ``offset`` bars before the last one"""
+    end = values.shape[1] - offset
+    return values[:, end - period:end].mean(axis=1)
+
+
+def ema(values: np.ndarray, period: int) -> np.ndarray:
+    alpha = 2.0 / (period + 1)
+    out = np.empty_like(values)
+    out[:, 0] = values[:, 0]
+    for i in range(1, values.shape[1]):
+        out[:, i] = out[:, i - 1] + alpha * (values[:, i] - out[:, i - 1])
+    return out
+
+
+def wilder_rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    RSI of the last bar with Wilder smoothing, seeded by the first ``period`` changes.
+    A flat series (no gains and no losses) is neutral at 50, not overbought.
+    """
+    delta = np.diff(close, axis=1)
+    gains, losses = np.clip(delta, 0, None), np.clip(-delta, 0, None)
+    avg_gain, avg_loss = gains[:, :period].mean(axis=1), losses[:, :period].mean(axis=1)
+    for i in range(period, delta.shape[1]):
+        avg_gain = (avg_gain * (period - 1) + gains[:, i]) / period
+        avg_loss = (avg_loss * (period - 1) + losses[:, i]) / period
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), rsi)
+
+
+# -- registry ----------------------------------------------------------------------------
+
+class Strategy:
+    """
+    Base class for registered strategies. ``generate`` must be a pure function
+    of (params, bars) so CPU-bound strategies can run in worker processes.
+    """
+
+    name = ''
+    cpu_bound = False  # split across the process pool for large batches
+    uses_ai_model = False  # engine asks the AI model for the direction of each candidate
+    quantity = 1000.0
+    expiry_hours = 2.0
+
+    def __init__(self, params: Dict[str, Any]):
+        self.params = params
+
+    @property
+    def window(self) -> int:
+        """Bars needed per symbol"""
+        return 50
+
+    def generate(self, symbols: List[str], bars: BarBatch) -> List[SignalCandidate]:
+        raise NotImplementedError
+
+
+STRATEGY_REGISTRY: Dict[str, Type[Strategy]] = {}
+
+
+def register_strategy(cls: Type[Strategy]) -> Type[Strategy]:
+    """Class decorator: make a strategy available to StrategyConfig entries of the same name"""
+    STRATEGY_REGISTRY[cls.name] = cls
+    return cls
+
+
+@register_strategy
+class MACrossoverStrategy(Strategy):
+    name = 'ma_crossover'
+    quantity = 1000.0
+    expiry_hours = 2.0
+
+    @property
+    def window(self) -> int:
+        return max(30, self.params.get('slow_ma', 26) + 2)
+
+    def generate(self, symbols: List[str], bars: BarBatch) -> List[SignalCandidate]:
+        fast_ma = self.params.get('fast_ma', 12)
+        slow_ma = self.params.get('slow_ma', 26)
+        close = bars.close
+        fast, slow = rolling_mean_last(close, fast_ma), rolling_mean_last(close, slow_ma)
+        prev_fast, prev_slow = rolling_mean_last(close, fast_ma, 1), rolling_mean_last(close, slow_ma, 1)
+
+        golden = (prev_fast <= prev_slow) & (fast > slow)
+        death = (prev_fast >= prev_slow) & (fast < slow)
+        confidence = np.minimum(0.9, 0.6 + np.abs(fast - slow) / slow)
+
+        candidates = []
+        for i in np.flatnonzero(golden | death):
+            action = "BUY" if golden[i] else "SELL"
+            candidates.append(SignalCandidate(
+                symbol=symbols[i],
+                action=action,
+                confidence=float(confidence[i]),
+                price=float(close[i, -1]),
+                strength=float(confidence[i]) * 0.8,
+                reasoning=f"MA crossover detected: {fast_ma}MA = {fast[i]:.2f}, {slow_ma}MA = {slow[i]:.2f}",
+                technical_score=float(confidence[i]),
+                trend_alignment="BULLISH" if action == "BUY" else "BEARISH",
+            ))
+        return candidates
+
+
+@register_strategy
+class RSIReversionStrategy(Strategy):
+    name = 'rsi_reversion'
+    quantity = 500.0
+    expiry_hours = 1.0
+
+    @property
+    def window(self) -> int:
+        return max(50, 3 * self.params.get('rsi_period', 14) + 1)
+
+    def generate(self, symbols: List[str], bars: BarBatch) -> List[SignalCandidate]:
+        oversold = self.params.get('rsi_oversold', 30)
+        overbought = self.params.get('rsi_overbought', 70)
+        rsi = wilder_rsi(bars.close, self.params.get('rsi_period', 14))
+
+        buy, sell = rsi <= oversold, rsi >= overbought
+        confidence = np.where(
+            buy,
+            np.minimum(0.9, 0.6 + (oversold - rsi) / oversold),
+            np.minimum(0.9, 0.6 + (rsi - overbought) / (100 - overbought)),
+        )
+
+        candidates = []
+        for i in np.flatnonzero(buy | sell):
+            action = "BUY" if buy[i] else "SELL"
+            candidates.append(SignalCandidate(
+                symbol=symbols[i],
+                action=action,
+                confidence=float(confidence[i]),
+                price=float(bars.close[i, -1]),
+                strength=float(confidence[i]) * 0.9,
+                reasoning=f"RSI mean reversion: RSI = {rsi[i]:.1f}, threshold = {oversold if action == 'BUY' else overbought}",
+                technical_score=float(confidence[i]),
+                volatility_score=0.3,
+                market_condition="RANGING",
+            ))
+        return candidates
+
+
+@register_strategy
+class AIMomentumStrategy(Strategy):
+    """
+    Momentum with volume confirmation and a volatility filter over up to 24h of
+    bars; the AI model then picks the direction of each surviving candidate.
+    """
+
+    name = 'ai_momentum'
+    cpu_bound = True
+    uses_ai_model = True
+    quantity = 2000.0
+    expiry_hours = 4.0
+
+    def generate(self, symbols: List[str], bars: BarBatch) -> List[SignalCandidate]:
+        momentum_threshold = self.params.get('momentum_threshold', 0.02)
+        volatility_filter = self.params.get('volatility_filter', 0.05)
+        volume_threshold = self.params.get('volume_threshold', 1.5)
+
+        close, volume = bars.close, bars.volume
+        bars_per_day = max(1, 86400 // TIMEFRAME_SECONDS.get(bars.timeframe, 3600))
+        lookback = min(bars_per_day, bars.window - 1)
+        price = close[:, -1]
+
+        momentum = price / close[:, -1 - lookback] - 1
+        returns = np.diff(close[:, -max(lookback, 7) - 1:], axis=1) / close[:, -max(lookback, 7) - 1:-1]
+        volatility = returns.std(axis=1) * math.sqrt(bars_per_day)  # daily scale
+        average_volume = volume[:, -min(24, bars.window):].mean(axis=1)
+        volume_ratio = np.divide(volume[:, -1], average_volume, out=np.ones_like(price), where=average_volume > 0)
+
+        passed = (np.abs(momentum) > momentum_threshold) & (volatility < volatility_filter) & (volume_ratio > volume_threshold)
+        rows = np.flatnonzero(passed)
+        if not len(rows):
+            return []
+
+        # Model features, only for the rows that passed the filters
+        close_rows = close[rows]
+        rsi = wilder_rsi(close_rows, 14)
+        macd = (ema(close_rows, 12) - ema(close_rows, 26))[:, -1]
+        middle, deviation = close_rows[:, -20:].mean(axis=1), close_rows[:, -20:].std(axis=1)
+        band = np.where(deviation > 0, 4 * deviation, 1.0)
+        bb_position = (price[rows] - (middle - 2 * deviation)) / band
+        resistance = bars.high[rows, -min(24, bars.window):].max(axis=1)
+        support = bars.low[rows, -min(24, bars.window):].min(axis=1)
+        sr_distance = np.minimum(resistance - price[rows], price[rows] - support) / price[rows]
+        technical = np.minimum(0.9, np.abs(momentum[rows]) / momentum_threshold * 0.5 + 0.3)
+
+        candidates = []
+        for j, i in enumerate(rows):
+            candidates.append(SignalCandidate(
+                symbol=symbols[i],
+                action="BUY" if momentum[i] > 0 else "SELL",
+                confidence=float(technical[j]),
+                price=float(price[i]),
+                strength=float(technical[j]),
+                reasoning=f"AI momentum signal: 24h momentum = {momentum[i]:.3f}",
+                technical_score=float(technical[j]),
+                volatility_score=float(min(1.0, volatility[i] / 0.1)),
+                trend_alignment="BULLISH" if momentum[i] > 0 else "BEARISH",
+                features={
+                    'rsi': float(rsi[j]),
+                    'macd': float(macd[j]),
+                    'bb_position': float(bb_position[j]),
+                    'volume_ratio': float(volume_ratio[i]),
+                    'price_momentum': float(momentum[i]),
+                    'volatility': float(volatility[i]),
+                    'trend_strength': float(min(1.0, abs(momentum[i]) * 10)),
+                    'support_distance': float(sr_distance[j]),
+                    'resistance_distance': float(sr_distance[j]),
+                },
+            ))
+        return candidates
+
+
+# -- bar input -----------------------------------------------------------------------------
+
+class BarFeed:
+    """
+    Closed bars per (symbol, timeframe) in a local BarStore. ``add`` takes bars
+    published on the ``bar`` topic; ``wait`` hands out the symbols of each
+    timeframe that got a new bar. History is loaded with ``load`` (backfill).
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.store = BarStore(capacity)
+        self._updated: Dict[str, Set[str]] = {}
+        self._event = asyncio.Event()
+
+    def add(self, symbol: str, timeframe: str, ts: int, open_: float, high: float, low: float,
+            close: float, volume: float) -> bool:
+        """Store one closed bar; True if it is new (redelivered and out-of-order bars are not)"""
+        buffer = self.store.buffer(symbol, timeframe)
+        last_ts = buffer.last_ts
+        if not buffer.append(ts, open_, high, low, close, volume) or ts == last_ts:
+            return False
+        self._updated.setdefault(timeframe, set()).add(symbol.upper())
+        self._event.set()
+        return True
+
+    async def wait(self, timeout: float, settle: float = 0.2) -> Dict[str, List[str]]:
+        """
+        Timeframe -> symbols with new bars since the last call ({} after ``timeout``).
+        Waits ``settle`` seconds after the first new bar: the collector publishes
+        every symbol's bar for one close back to back.
+        """
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return {}
+        await asyncio.sleep(settle)
+        self._event.clear()
+        updated, self._updated = self._updated, {}
+        return {timeframe: sorted(symbols) for timeframe, symbols in updated.items()}
+
+    def short_of(self, timeframe: str, symbols: Sequence[str], window: int) -> List[str]:
+        """Symbols with fewer than ``window`` bars stored (need a backfill)"""
+        return [
+            symbol for symbol in symbols
+            if len(self.store.get(symbol, timeframe) or ()) < window
+        ]
+
+    def load(self, symbol: str, timeframe: str, columns: Dict[str, Sequence[float]],
+             now: Optional[float] = None) -> int:
+        """
+        Merge fetched bars (``ts`` in epoch ms plus OHLCV columns, oldest first) around
+        the stored ones; stored bars win on equal timestamps. The bar still forming is
+        dropped so its close arrives as a new bar. Returns the number of bars stored.
+        """
+        now = time.time() if now is None else now
+        ts = np.asarray(columns['ts'], dtype=np.int64)
+        prices = np.array([columns[name] for name in PRICE_FIELDS], dtype=np.float64).reshape(len(PRICE_FIELDS), -1)
+        closed = ts + TIMEFRAME_SECONDS.get(timeframe, 0) * 1000 <= now * 1000
+        ts, prices = ts[closed], prices[:, closed]
+
+        current = self.store.get(symbol, timeframe)
+        if current is not None and len(current):
+            view = current.view()
+            before, after = ts < view.ts[0], ts > view.ts[-1]
+            ts = np.concatenate([ts[before], view.ts, ts[after]])
+            prices = np.hstack([prices[:, before], np.vstack(view[1:]), prices[:, after]])
+
+        buffer = self.store.reset(symbol, timeframe)
+        buffer.extend(ts, *prices)
+        return len(buffer)
+
+    def batch(self, timeframe: str, symbols: Sequence[str], window: int) -> BarBatch:
+        """Last ``window`` bars of the symbols that have that many"""
+        rows = {}
+        for symbol in symbols:
+            buffer = self.store.get(symbol, timeframe)
+            if buffer is not None and len(buffer) >= window:
+                rows[symbol] = buffer.view(window)._asdict()
+        return BarBatch.from_rows(timeframe, rows, window)
+
+
+# -- scheduling ----------------------------------------------------------------------------
+
+class TimeframeScheduler:
+    """
+    Tracks the last bar close handled per timeframe (UTC-aligned, like exchange
+    klines). ``grace`` seconds after a close give the collector time to ingest it.
+    """
+
+    def __init__(self, grace: float = 2.0):
+        self.grace = grace
+        self.last_close: Dict[str, int] = {}
+
+    def _last_close(self, timeframe: str, now: float) -> int:
+        seconds = TIMEFRAME_SECONDS[timeframe]
+        return int((now - self.grace) // seconds) * seconds
+
+    def due(self, timeframes: Sequence[str], now: Optional[float] = None) -> List[str]:
+        """Timeframes whose bar closed since they were last due (all of them on the first call)"""
+        now = time.time() if now is None else now
+        due = []
+        for timeframe in timeframes:
+            if timeframe not in TIMEFRAME_SECONDS:
+                continue
+            close = self._last_close(timeframe, now)
+            if self.last_close.get(timeframe) != close:
+                self.last_close[timeframe] = close
+                due.append(timeframe)
+        return due
+
+    def seconds_until_next(self, timeframes: Sequence[str], now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        waits = [
+            self._last_close(timeframe, now) + TIMEFRAME_SECONDS[timeframe] + self.grace - now
+            for timeframe in timeframes if timeframe in TIMEFRAME_SECONDS
+        ]
+        return max(0.0, min(waits)) if waits else 60.0
+
+
+# -- execution -----------------------------------------------------------------------------
+
+@dataclass
+class StrategyTiming:
+    """Per-strategy counters; wall time includes pool dispatch, compute time is inside generate()"""
+    runs: int = 0
+    symbols: int = 0
+    signals: int = 0
+    errors: int = 0
+    total_wall_time: float = 0.0
+    total_compute_time: float = 0.0
+    last_wall_time: float = 0.0
+    max_wall_time: float = 0.0
+    by_timeframe: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        stats = asdict(self)
+        stats['avg_wall_ms'] = (self.total_wall_time / self.runs * 1000) if self.runs else 0.0
+        stats['avg_compute_ms'] = (self.total_compute_time / self.runs * 1000) if self.runs else 0.0
+        stats['avg_us_per_symbol'] = (self.total_compute_time / self.symbols * 1e6) if self.symbols else 0.0
+        return stats
+
+
+def run_strategy(name: str, params: Dict[str, Any], bars: BarBatch) -> Tuple[List[SignalCandidate], float]:
+    """Worker entry point: (candidates, compute seconds)"""
+    started = time.perf_counter()
+    candidates = STRATEGY_REGISTRY[name](params).generate(bars.symbols, bars)
+    return candidates, time.perf_counter() - started
+
+
+class StrategyRunner:
+    """
+    Evaluates registered strategies. Light vectorized strategies run in a
+    thread; ``cpu_bound`` ones with at least ``2 * min_chunk`` symbols are
+    split into per-core symbol chunks on a process pool.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, min_chunk: int = 32):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_chunk = min_chunk
+        self.timings: Dict[str, StrategyTiming] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    async def _dispatch(self, name: str, params: Dict[str, Any], bars: BarBatch) -> List[Tuple[List[SignalCandidate], float]]:
+        parts = min(self.max_workers, len(bars) // self.min_chunk)
+        if STRATEGY_REGISTRY[name].cpu_bound and parts >= 2:
+            loop = asyncio.get_running_loop()
+            try:
+                return await asyncio.gather(*(
+                    loop.run_in_executor(self._executor(), run_strategy, name, params, chunk)
+                    for chunk in bars.split(parts)
+                ))
+            except BrokenProcessPool:
+                logger.error("❌ Strategy process pool died, recreating it and running in a thread")
+                self._pool = None
+        return [await asyncio.to_thread(run_strategy, name, params, bars)]
+
+    async def run(self, name: str, params: Dict[str, Any], bars: BarBatch) -> List[SignalCandidate]:
+        timing = self.timings.setdefault(name, StrategyTiming())
+        started = time.perf_counter()
+        try:
+            results = await self._dispatch(name, params, bars)
+        except Exception:
+            timing.errors += 1
+            raise
+        wall = time.perf_counter() - started
+
+        candidates = [candidate for part, _ in results for candidate in part]
+        timing.runs += 1
+        timing.symbols += len(bars)
+        timing.signals += len(candidates)
+        timing.total_wall_time += wall
+        timing.total_compute_time += sum(compute for _, compute in results)
+        timing.last_wall_time = wall
+        timing.max_wall_time = max(timing.max_wall_time, wall)
+        timing.by_timeframe[bars.timeframe] = timing.by_timeframe.get(bars.timeframe, 0) + 1
+        return candidates
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: timing.to_dict() for name, timing in self.timings.items()}
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,165 @@
+"""
+Tests for the event bus codec and in-process backend
+"""
+
+import asyncio
+import logging
+import struct
+
+import pytest
+
+import event_bus
+from event_bus import TOPIC_SCHEMAS, EventBus, InProcessBackend, decode_event, encode_event
+
+
+def test_codec_roundtrip():
+    ticker = {
+        'symbol': 'BTCUSDT', 'price': 50123.5, 'bid': 50123.0, 'ask': 50124.0, 'volume': 1234.5,
+        'high_24h': None, 'low_24h': 49000.0, 'price_change_24h': -1.25,
+    }
+    assert decode_event(encode_event('market_data', ticker, ts=1700000000000)) == ('market_data', 1700000000000, ticker)
+
+    bar = {'symbol': 'ETHUSDT', 'interval': '1h', 'ts': 1700002800000,
+           'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5, 'volume': 10.0}
+    assert decode_event(encode_event('bar', bar, ts=1700006400000)) == ('bar', 1700006400000, bar)
+
+    signal = {name: None for name, _ in TOPIC_SCHEMAS['signal'].fields}
+    signal.update(signal_id='s-1', strategy='rsi ✓', action='BUY', price=1.5, expiry=1700000060000)
+    topic, _, decoded = decode_event(encode_event('signal', signal))
+    assert topic == 'signal' and decoded == {**signal, 'expiry': 1700000060000}
+
+
+def test_codec_defaults_and_errors():
+    _, _, decoded = decode_event(encode_event('fill', {'fill_id': 'f', 'price': 2}))
+    assert decoded['order_id'] is None and decoded['quantity'] is None and decoded['price'] == 2.0
+
+    with pytest.raises(ValueError):
+        encode_event('trades', {})
+    with pytest.raises(ValueError):
+        encode_event('order', {'order_id': 'x' * 0xFFFF})
+
+    payload = bytearray(encode_event('order', {'order_id': 'o'}))
+    payload[0] = 99
+    with pytest.raises(ValueError, match='version'):
+        decode_event(bytes(payload))
+    payload[0], payload[1] = 1, 42
+    with pytest.raises(ValueError, match='topic id'):
+        decode_event(bytes(payload))
+    with pytest.raises(struct.error):
+        decode_event(encode_event('order', {'order_id': 'o'})[:-4])
+
+
+def test_groups_each_see_every_event_once():
+    async def run():
+        backend = InProcessBackend()
+        for group in ('a', 'b'):
+            await backend.ensure_group('order', group)
+        for i in range(3):
+            await backend.publish('order', encode_event('order', {'order_id': str(i)}))
+
+        first = await backend.read('order', 'a', 'c1', count=2, block=0, visibility_timeout=30)
+        second = await backend.read('order', 'a', 'c2', count=10, block=0, visibility_timeout=30)
+        other = await backend.read('order', 'b', 'c1', count=10, block=0, visibility_timeout=30)
+        assert [m[0] for m in first] == ['1', '2'] and [m[0] for m in second] == ['3']
+        assert [m[0] for m in other] == ['1', '2', '3']
+        assert backend.pending('order', 'a') == 3
+
+        await backend.ack('order', 'a', ['1', '2', '3'])
+        assert backend.pending('order', 'a') == 0
+        assert await backend.read('order', 'a', 'c1', count=10, block=0, visibility_timeout=30) == []
+
+    asyncio.run(run())
+
+
+def test_new_group_starts_at_tail_and_blocked_read_wakes():
+    async def run():
+        backend = InProcessBackend()
+        await backend.publish('fill', encode_event('fill', {'fill_id': 'old'}))
+        await backend.ensure_group('fill', 'g')
+        reader = asyncio.create_task(backend.read('fill', 'g', 'c', count=10, block=5, visibility_timeout=30))
+        await asyncio.sleep(0.01)
+        await backend.publish('fill', encode_event('fill', {'fill_id': 'new'}))
+        messages = await asyncio.wait_for(reader, 1)
+        assert [decode_event(m[1])[2]['fill_id'] for m in messages] == ['new']
+
+    asyncio.run(run())
+
+
+def test_unacked_event_redelivered_after_visibility_timeout():
+    async def run():
+        backend = InProcessBackend()
+        await backend.ensure_group('order', 'g')
+        await backend.publish('order', encode_event('order', {'order_id': 'o'}))
+        assert [m[2] for m in await backend.read('order', 'g', 'c1', 10, 0, visibility_timeout=0.05)] == [1]
+        assert await backend.read('order', 'g', 'c2', 10, 0, visibility_timeout=0.05) == []
+        await asyncio.sleep(0.06)
+        redelivered = await backend.read('order', 'g', 'c2', 10, 0, visibility_timeout=0.05)
+        assert [(m[0], m[2]) for m in redelivered] == [('1', 2)]
+
+    asyncio.run(run())
+
+
+def test_trimmed_pending_event_is_dropped():
+    async def run():
+        backend = InProcessBackend(maxlen=2)
+        await backend.ensure_group('order', 'g')
+        await backend.publish('order', encode_event('order', {'order_id': '1'}))
+        await backend.read('order', 'g', 'c', 10, 0, visibility_timeout=0)
+        for i in range(2):
+            await backend.publish('order', encode_event('order', {'order_id': str(i + 2)}))
+        messages = await backend.read('order', 'g', 'c', 10, 0, visibility_timeout=0)
+        assert [m[0] for m in messages] == ['2', '3'] and backend.pending('order', 'g') == 2
+
+    asyncio.run(run())
+
+
+def test_failed_handler_retried_then_dead_lettered():
+    async def run():
+        bus = EventBus('test', backend=InProcessBackend(), visibility_timeout=0.01, max_deliveries=3, block=0.02)
+        seen = []
+
+        async def handler(event):
+            seen.append((event.data['alert_id'], event.deliveries))
+            if event.data['alert_id'] == 'bad':
+                raise RuntimeError('boom')
+
+        bus.subscribe('risk_alert', handler)
+        await bus.start()
+        await asyncio.sleep(0.01)  # consumer group starts at the stream tail
+        await bus.publish('risk_alert', {'alert_id': 'bad'})
+        await bus.publish('risk_alert', {'alert_id': 'ok'})
+        await asyncio.sleep(0.2)
+        backend = bus.backend
+        await bus.stop()
+
+        assert [d for alert, d in seen if alert == 'bad'] == [1, 2, 3]
+        assert [d for alert, d in seen if alert == 'ok'] == [1]
+        assert bus.stats.dead_lettered == 1 and bus.stats.handler_errors == 3
+        assert backend.pending('risk_alert', 'test') == 0
+
+    asyncio.run(run())
+
+
+def test_unplanned_fallback_is_reported(monkeypatch, caplog):
+    monkeypatch.setattr(event_bus, 'REDIS_AVAILABLE', False)
+
+    async def run(bus):
+        bus.subscribe('market_data', lambda event: None)
+        await bus.start()
+        status = bus.status()
+        await bus.stop()
+        return status
+
+    monkeypatch.delenv('EVENT_BUS_BACKEND', raising=False)
+    with caplog.at_level(logging.ERROR, logger='event_bus'):
+        status = asyncio.run(run(EventBus('strategy_engine')))
+    assert status['backend'] == 'memory' and status['degraded'] == 'redis package not installed'
+    assert any('fell back to in-process streams' in r.message for r in caplog.records)
+    assert any('(market_data) only receive events published by this process' in r.message for r in caplog.records)
+
+    caplog.clear()
+    monkeypatch.setenv('EVENT_BUS_BACKEND', 'memory')
+    with caplog.at_level(logging.ERROR, logger='event_bus'):
+        status = asyncio.run(run(EventBus('strategy_engine')))
+    assert status['backend'] == 'memory' and status['degraded'] is None
+    assert not caplog.records
@@ -0,0 +1,140 @@
+"""
+Tests for the gateway's streaming reverse proxy
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from starlette.requests import Request
+
+from gateway_proxy import GatewayProxy, filter_headers
+from load_balancer import CLOSED, HALF_OPEN, OPEN, LoadBalancer
+
+HOST = "http://svc-1:8000"
+
+
+def test_filter_headers_drops_hop_by_hop():
+    raw = [
+        (b"Host", b"gateway"),
+        (b"Connection", b"keep-alive"),
+        (b"Keep-Alive", b"timeout=5"),
+        (b"Transfer-Encoding", b"chunked"),
+        (b"Accept", b"application/json"),
+        (b"X-Request-Id", b"1"),
+    ]
+    assert filter_headers(raw) == [(b"accept", b"application/json"), (b"x-request-id", b"1")]
+
+
+def test_filter_headers_drops_connection_nominated():
+    raw = [(b"Connection", b"close, X-Internal-Token"), (b"x-internal-token", b"secret"), (b"accept", b"*/*")]
+    assert filter_headers(raw) == [(b"accept", b"*/*")]
+
+
+def test_filter_headers_extra_replaces_and_keeps_duplicates():
+    raw = [(b"Set-Cookie", b"a=1"), (b"set-cookie", b"b=2"), (b"X-Forwarded-For", b"10.0.0.1")]
+    result = filter_headers(raw, {"X-Forwarded-For": "10.0.0.2", "X-Gateway": "mirai"})
+    assert result == [
+        (b"set-cookie", b"a=1"),
+        (b"set-cookie", b"b=2"),
+        (b"x-forwarded-for", b"10.0.0.2"),
+        (b"x-gateway", b"mirai"),
+    ]
+
+
+def _request(path="/api/svc/items"):
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []})
+
+
+def _proxy(handler):
+    proxy = GatewayProxy()
+    proxy._clients[HOST] = httpx.AsyncClient(base_url=HOST, transport=httpx.MockTransport(handler))
+    return proxy
+
+
+def _lease(state=CLOSED):
+    balancer = LoadBalancer({"svc": {"hosts": [HOST]}})
+    balancer.hosts["svc"][0].state = state
+    return balancer, balancer.acquire("svc")
+
+
+def test_lease_finished_when_send_fails_with_any_error():
+    async def handler(request):
+        raise asyncio.CancelledError()  # e.g. the gateway request was cancelled mid-send
+
+    async def run():
+        balancer, lease = _lease(HALF_OPEN)
+        host = balancer.hosts["svc"][0]
+        assert balancer.pick("svc") is None  # the trial request holds the half-open host
+        with pytest.raises(asyncio.CancelledError):
+            await _proxy(handler).forward(_request(), HOST, "items", observer=lease)
+        # Not the host's fault: no failure recorded, and the host takes the next trial
+        assert host.outstanding == 0 and host.failures == 0 and host.state == HALF_OPEN
+        assert balancer.pick("svc") is host
+
+    asyncio.run(run())
+
+
+def test_transport_error_counts_against_host():
+    async def handler(request):
+        raise httpx.ConnectError("refused")
+
+    async def run():
+        balancer, lease = _lease(HALF_OPEN)
+        proxy = _proxy(handler)
+        with pytest.raises(httpx.ConnectError):
+            await proxy.forward(_request(), HOST, "items", observer=lease)
+        host = balancer.hosts["svc"][0]
+        assert host.outstanding == 0 and host.state == OPEN
+        assert proxy.upstream_stats[HOST].errors == 1
+
+    asyncio.run(run())
+
+
+def test_upstream_released_when_body_never_starts():
+    async def handler(request):
+        return httpx.Response(200, stream=httpx.ByteStream(b"payload"))
+
+    async def run():
+        balancer, lease = _lease()
+        proxy = _proxy(handler)
+        response = await proxy.forward(_request(), HOST, "items", observer=lease)
+        assert proxy.active_streams == 1
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            await asyncio.Event().wait()  # client gone before the response start went out
+
+        await response({"type": "http"}, receive, send)
+        assert proxy.active_streams == 0
+        assert balancer.hosts["svc"][0].outstanding == 0
+
+    asyncio.run(run())
+
+
+def test_streamed_response_releases_once():
+    async def handler(request):
+        headers = {"connection": "close", "x-upstream": "1"}
+        return httpx.Response(200, headers=headers, stream=httpx.ByteStream(b"payload"))
+
+    async def run():
+        balancer, lease = _lease()
+        proxy = _proxy(handler)
+        response = await proxy.forward(_request(), HOST, "items", observer=lease)
+        messages = []
+
+        async def receive():
+            await asyncio.Event().wait()
+
+        async def send(message):
+            messages.append(message)
+
+        await response({"type": "http"}, receive, send)
+        assert messages[0]["status"] == 200 and (b"x-upstream", b"1") in messages[0]["headers"]
+        assert b"".join(m.get("body", b"") for m in messages[1:]) == b"payload"
+        assert proxy.active_streams == 0 and balancer.hosts["svc"][0].outstanding == 0
+        assert proxy.upstream_stats[HOST].requests == 1
+
+    asyncio.run(run())
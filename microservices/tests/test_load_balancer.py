@@ -0,0 +1,110 @@
+"""
+Tests for gateway host selection and per-host circuit breakers
+"""
+
+import asyncio
+
+from load_balancer import CLOSED, HALF_OPEN, OPEN, LoadBalancer
+
+HOSTS = ["http://svc-1:8000", "http://svc-2:8000/"]
+
+
+def _balancer(**kwargs):
+    return LoadBalancer({"svc": {"hosts": HOSTS, "health_path": "/health"}}, **kwargs)
+
+
+def test_pick_prefers_low_latency_times_load():
+    balancer = _balancer()
+    fast, slow = balancer.hosts["svc"]
+    assert slow.url == "http://svc-2:8000"  # trailing slash stripped
+    balancer.record(fast, 200, 0.010)
+    balancer.record(slow, 200, 0.050)
+
+    assert balancer.pick("svc") is fast
+    # Leases spread load: at 10ms x 5 vs 50ms x 1 the tie goes to the idle host
+    picked = [balancer.acquire("svc").host for _ in range(5)]
+    assert picked == [fast] * 4 + [slow]
+    assert fast.outstanding == 4 and slow.outstanding == 1
+
+
+def test_unsampled_host_still_gets_traffic():
+    balancer = _balancer()
+    sampled, fresh = balancer.hosts["svc"]
+    balancer.record(sampled, 200, 0.020)
+    sampled.requests = 10
+    assert balancer.pick("svc") is fresh
+
+
+def test_lease_reports_once_and_finishes_once():
+    balancer = _balancer()
+    lease = balancer.acquire("svc")
+    host = lease.host
+    lease.on_response(500, 0.1)
+    lease.on_response(500, 0.1)
+    lease.on_finish()
+    lease.on_finish()
+    assert host.failures == 1 and host.outstanding == 0 and host.requests == 1
+
+
+def test_breaker_opens_then_single_half_open_trial():
+    balancer = _balancer(failure_threshold=3, open_timeout=0.0)
+    host = balancer.hosts["svc"][0]
+    for _ in range(2):
+        balancer.record(host, None, 0.0)
+    assert host.state == CLOSED
+    balancer.record(host, 503, 0.0)
+    assert host.state == OPEN and host.consecutive_failures == 3
+
+    balancer.hosts["svc"] = [host]
+    lease = balancer.acquire("svc")  # open_timeout elapsed: trial request
+    assert lease.host is host and host.state == HALF_OPEN
+    assert balancer.acquire("svc") is None  # one trial at a time
+    lease.on_response(200, 0.01)
+    lease.on_finish()
+    assert host.state == CLOSED and host.consecutive_failures == 0
+
+
+def test_failed_trial_reopens():
+    balancer = _balancer(open_timeout=0.0)
+    host = balancer.hosts["svc"][0]
+    host.state = HALF_OPEN
+    balancer.record(host, None, 0.0)
+    assert host.state == OPEN
+
+
+def test_service_state_and_healthy_hosts():
+    balancer = _balancer(open_timeout=60.0)
+    first, second = balancer.hosts["svc"]
+    balancer._open(first, "test")
+    assert balancer.service_state("svc") == CLOSED
+    assert balancer.healthy_hosts("svc") == ["http://svc-2:8000"]
+    second.state = HALF_OPEN
+    assert balancer.service_state("svc") == HALF_OPEN
+    balancer._open(second, "test")
+    assert balancer.service_state("svc") == OPEN and balancer.pick("svc") is None
+    assert balancer.reset("svc") and balancer.service_state("svc") == CLOSED
+
+
+def test_probes_open_and_recover_hosts():
+    balancer = _balancer(unhealthy_probes=2)
+    host = balancer.hosts["svc"][0]
+    results = iter([False, False, True])
+
+    class Client:
+        is_closed = False
+
+        async def get(self, url):
+            assert url == "http://svc-1:8000/health"
+            return type("Response", (), {"status_code": 200 if next(results) else 503})()
+
+    balancer._client = Client()
+
+    async def run():
+        assert not await balancer.probe(host)
+        assert host.state == CLOSED
+        assert not await balancer.probe(host)
+        assert host.state == OPEN
+        assert await balancer.probe(host)
+        assert host.state == HALF_OPEN and host.probe_failures == 0
+
+    asyncio.run(run())
@@ -0,0 +1,196 @@
+"""
+Tests for the gateway response cache
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from response_cache import CachedResponse, ResponseCache, is_cacheable
+
+JSON = [(b"content-type", b"application/json")]
+
+
+def _fetcher(bodies, delay=0.0, age=0.0, headers=JSON, status_code=200):
+    """Fetch callable returning the next body; ``calls`` counts upstream requests"""
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        if delay:
+            await asyncio.sleep(delay)
+        return CachedResponse(status_code, list(headers), bodies[len(calls) - 1], time.time() - age)
+
+    return fetch, calls
+
+
+def test_make_key_scopes_by_vary():
+    user = {"user_id": "u1", "roles": ["trader", "admin"]}
+    assert ResponseCache.make_key("GET", "/api/x", "a=1", "none", user) == "GET /api/x?a=1 *"
+    assert ResponseCache.make_key("GET", "/api/x", "a=1", "user", user).endswith("u:u1")
+    assert ResponseCache.make_key("GET", "/api/x", "", "role", user).endswith("r:admin,trader")
+
+
+def test_is_cacheable():
+    assert is_cacheable(200, JSON)
+    assert not is_cacheable(404, JSON)
+    assert not is_cacheable(200, [(b"Set-Cookie", b"s=1")])
+    assert not is_cacheable(200, [(b"cache-control", b"private, max-age=60")])
+    assert not is_cacheable(200, [(b"Cache-Control", b"no-store")])
+
+
+def test_entry_roundtrip():
+    entry = CachedResponse(200, [(b"x-h", b"\xe9")], b"\x00\xffbody", 123.5)
+    assert CachedResponse.loads(entry.dumps()) == entry
+
+
+def test_hit_after_miss():
+    async def run():
+        cache = ResponseCache()
+        fetch, calls = _fetcher([b"1", b"2"])
+        first, outcome = await cache.get("k", fetch, ttl=60)
+        assert (first.body, outcome) == (b"1", "MISS")
+        second, outcome = await cache.get("k", fetch, ttl=60)
+        assert (second.body, outcome) == (b"1", "HIT")
+        assert len(calls) == 1
+
+    asyncio.run(run())
+
+
+def test_concurrent_misses_collapse():
+    async def run():
+        cache = ResponseCache()
+        fetch, calls = _fetcher([b"1"], delay=0.02)
+        results = await asyncio.gather(*(cache.get("k", fetch, ttl=60) for _ in range(10)))
+        assert len(calls) == 1
+        assert {entry.body for entry, _ in results} == {b"1"}
+        assert cache.stats.misses == 1 and cache.stats.collapsed == 9
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_does_not_cancel_shared_fetch():
+    async def run():
+        cache = ResponseCache()
+        fetch, calls = _fetcher([b"1"], delay=0.05)
+        first = asyncio.create_task(cache.get("k", fetch, ttl=60))
+        second = asyncio.create_task(cache.get("k", fetch, ttl=60))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        entry, _ = await second
+        assert entry.body == b"1" and len(calls) == 1
+
+    asyncio.run(run())
+
+
+def test_stale_served_while_one_refresh_runs():
+    async def run():
+        cache = ResponseCache()
+        fetch, calls = _fetcher([b"old", b"new"], delay=0.01, age=5.0)
+        await cache.get("k", fetch, ttl=1, stale_while_revalidate=30)
+
+        # Old entry is past its TTL: callers get it at once, one refresh runs in the background
+        outcomes = [await cache.get("k", fetch, ttl=1, stale_while_revalidate=30) for _ in range(3)]
+        assert [(entry.body, outcome) for entry, outcome in outcomes] == [(b"old", "STALE")] * 3
+        await asyncio.sleep(0.05)
+        assert len(calls) == 2 and cache.stats.refreshes == 1
+        assert cache._entries["k"][0].body == b"new"
+
+    asyncio.run(run())
+
+
+def test_expired_entry_is_fetched_again():
+    async def run():
+        cache = ResponseCache()
+        fetch, calls = _fetcher([b"1", b"2"], age=10.0)
+        await cache.get("k", fetch, ttl=1, stale_while_revalidate=2)
+        entry, outcome = await cache.get("k", fetch, ttl=1, stale_while_revalidate=2)
+        assert (entry.body, outcome) == (b"2", "MISS") and len(calls) == 2
+
+    asyncio.run(run())
+
+
+def test_uncacheable_and_oversized_responses_not_stored():
+    async def run():
+        cache = ResponseCache(max_entry_bytes=4)
+        fetch, calls = _fetcher([b"1", b"2"], headers=[(b"set-cookie", b"s=1")])
+        await cache.get("cookie", fetch, ttl=60)
+        await cache.get("cookie", fetch, ttl=60)
+        assert len(calls) == 2
+
+        fetch, calls = _fetcher([b"too large", b"too large"])
+        await cache.get("big", fetch, ttl=60)
+        await cache.get("big", fetch, ttl=60)
+        assert len(calls) == 2 and cache.stats.stores == 0
+
+    asyncio.run(run())
+
+
+def test_fetch_error_reaches_every_waiter_and_is_not_cached():
+    async def run():
+        cache = ResponseCache()
+        attempts = []
+
+        async def failing():
+            attempts.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        results = await asyncio.gather(*(cache.get("k", failing, ttl=60) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results) and len(attempts) == 1
+        with pytest.raises(RuntimeError):
+            await cache.get("k", failing, ttl=60)
+        assert len(attempts) == 2
+
+    asyncio.run(run())
+
+
+def test_lru_bounded_by_entries_and_bytes():
+    async def run():
+        cache = ResponseCache(max_entries=3, max_bytes=10)
+        for key in "abc":
+            fetch, _ = _fetcher([b"xx"])
+            await cache.get(key, fetch, ttl=60)
+        await cache.get("a", _fetcher([b"unused"])[0], ttl=60)  # touch: b is now least recent
+        fetch, _ = _fetcher([b"yy"])
+        await cache.get("d", fetch, ttl=60)
+        assert list(cache._entries) == ["c", "a", "d"] and cache.stats.evictions == 1
+
+        fetch, _ = _fetcher([b"123456"])
+        await cache.get("e", fetch, ttl=60)
+        assert list(cache._entries) == ["a", "d", "e"] and cache._bytes == 10
+
+        cache.invalidate("d")
+        assert list(cache._entries) == ["a", "e"] and cache._bytes == 8
+
+    asyncio.run(run())
+
+
+def test_redis_tier_shared_between_instances():
+    class FakeRedis:
+        def __init__(self):
+            self.data = {}
+
+        def get(self, key):
+            return self.data.get(key)
+
+        def setex(self, key, seconds, value):
+            assert seconds == 61
+            self.data[key] = value
+
+    async def run():
+        redis = FakeRedis()
+        writer = ResponseCache(redis_client=redis)
+        fetch, _ = _fetcher([b"shared"])
+        await writer.get("k", fetch, ttl=60, stale_while_revalidate=0.5)
+        await asyncio.gather(*writer._background)
+        assert list(redis.data) == ["gateway:cache:k"]
+
+        reader = ResponseCache(redis_client=redis)
+        fetch, calls = _fetcher([b"unused"])
+        entry, outcome = await reader.get("k", fetch, ttl=60, stale_while_revalidate=0.5)
+        assert (entry.body, outcome) == (b"shared", "HIT") and not calls
+        assert reader.stats.redis_hits == 1
+
+    asyncio.run(run())
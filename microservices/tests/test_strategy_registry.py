@@ -0,0 +1,190 @@
+"""
+Tests for the vectorized strategy registry and bar-close scheduling
+"""
+
+import asyncio
+
+import numpy as np
+
+from strategy_registry import (
+    STRATEGY_REGISTRY, BarBatch, BarFeed, StrategyRunner, TimeframeScheduler, ema, rolling_mean_last, wilder_rsi,
+)
+
+HOUR_MS = 3600 * 1000
+
+
+def _batch(closes, timeframe='1h', symbols=None):
+    closes = np.asarray(closes, dtype=np.float64)
+    symbols = symbols or [f"S{i}USDT" for i in range(len(closes))]
+    rows = {
+        symbol: {'open': row, 'high': row * 1.01, 'low': row * 0.99, 'close': row, 'volume': np.ones_like(row)}
+        for symbol, row in zip(symbols, closes)
+    }
+    return BarBatch.from_rows(timeframe, rows, closes.shape[1])
+
+
+def _reference_rsi(close, period):
+    delta = np.diff(close)
+    gains, losses = np.clip(delta, 0, None), np.clip(-delta, 0, None)
+    avg_gain, avg_loss = gains[:period].mean(), losses[:period].mean()
+    for gain, loss in zip(gains[period:], losses[period:]):
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+def test_wilder_rsi_matches_scalar_reference():
+    close = 100 + np.cumsum(np.random.default_rng(7).normal(0, 1, (4, 60)), axis=1)
+    expected = [_reference_rsi(row, 14) for row in close]
+    np.testing.assert_allclose(wilder_rsi(close, 14), expected)
+
+
+def test_wilder_rsi_edge_cases():
+    flat = np.full(30, 100.0)
+    rising = np.linspace(100, 130, 30)
+    rsi = wilder_rsi(np.vstack([flat, rising, rising[::-1]]), 14)
+    np.testing.assert_allclose(rsi, [50.0, 100.0, 0.0])
+
+
+def test_ema_and_rolling_mean():
+    values = np.array([[1.0, 2.0, 3.0, 4.0, 5.0]])
+    expected = [1.0]
+    for value in values[0, 1:]:
+        expected.append(expected[-1] + 0.5 * (value - expected[-1]))
+    np.testing.assert_allclose(ema(values, 3)[0], expected)
+    np.testing.assert_allclose(rolling_mean_last(values, 2), [4.5])
+    np.testing.assert_allclose(rolling_mean_last(values, 2, offset=1), [3.5])
+
+
+def test_bar_batch_drops_short_symbols_and_selects():
+    rows = {
+        'AUSDT': {name: [1.0, 2.0, 3.0] for name in ('open', 'high', 'low', 'close', 'volume')},
+        'BUSDT': {name: [1.0] for name in ('open', 'high', 'low', 'close', 'volume')},
+        'CUSDT': {name: [4.0, 5.0, 6.0, 7.0] for name in ('open', 'high', 'low', 'close', 'volume')},
+    }
+    bars = BarBatch.from_rows('5m', rows, 3)
+    assert bars.symbols == ['AUSDT', 'CUSDT'] and bars.window == 3
+    np.testing.assert_array_equal(bars.close[1], [5.0, 6.0, 7.0])
+
+    selected = bars.select(['CUSDT', 'missing'])
+    assert selected.symbols == ['CUSDT'] and selected.close.shape == (1, 3)
+    assert [part.symbols for part in bars.split(3)] == [['AUSDT'], ['CUSDT']]
+
+    empty = BarBatch.from_rows('5m', {}, 3)
+    assert len(empty) == 0 and empty.close.shape == (0, 3)
+
+
+def test_rsi_reversion_ignores_flat_series():
+    strategy = STRATEGY_REGISTRY['rsi_reversion']({})
+    window = strategy.window
+    falling = 100 - np.arange(window) * 0.5
+    falling[-5::2] += 0.2  # small bounces keep avg_gain above zero
+    bars = _batch([np.full(window, 100.0), falling])
+
+    candidates = strategy.generate(bars.symbols, bars)
+    assert [(c.symbol, c.action) for c in candidates] == [('S1USDT', 'BUY')]
+    assert 0.6 <= candidates[0].confidence <= 0.9
+
+
+def test_ma_crossover_signals_on_the_crossing_bar():
+    strategy = STRATEGY_REGISTRY['ma_crossover']({'fast_ma': 3, 'slow_ma': 5})
+    window = strategy.window
+    crossing = np.full(window, 100.0)
+    crossing[-1] = 110.0
+    trending = np.linspace(100, 130, window)  # fast above slow on both bars: no new cross
+    bars = _batch([crossing, trending])
+
+    candidates = strategy.generate(bars.symbols, bars)
+    assert [(c.symbol, c.action) for c in candidates] == [('S0USDT', 'BUY')]
+
+
+def test_scheduler_fires_once_per_bar_close():
+    scheduler = TimeframeScheduler(grace=2.0)
+    start = 1_700_000_000 - 1_700_000_000 % 3600 + 10  # 10s into an hour
+
+    assert scheduler.due(['1m', '1h', 'bogus'], now=start) == ['1m', '1h']
+    assert scheduler.due(['1m', '1h'], now=start + 40) == []
+    assert scheduler.seconds_until_next(['1m', '1h'], now=start + 40) == 60 + 2 - 50
+
+    # A close only counts once the grace period after it has passed
+    assert scheduler.due(['1m', '1h'], now=start + 51) == []
+    assert scheduler.due(['1m', '1h'], now=start + 52) == ['1m']
+    assert scheduler.due(['1m', '1h'], now=start + 3600) == ['1m', '1h']
+    assert scheduler.seconds_until_next([], now=start) == 60.0
+
+
+def test_runner_records_timings():
+    async def run():
+        runner = StrategyRunner(max_workers=1)
+        bars = _batch(100 + np.cumsum(np.random.default_rng(3).normal(0, 1, (3, 50)), axis=1))
+        candidates = await runner.run('rsi_reversion', {}, bars)
+        runner.shutdown()
+        return runner.stats()['rsi_reversion'], candidates
+
+    timing, candidates = asyncio.run(run())
+    assert timing['runs'] == 1 and timing['symbols'] == 3 and timing['signals'] == len(candidates)
+    assert timing['by_timeframe'] == {'1h': 1}
+
+
+def test_cpu_bound_strategy_split_across_pool_matches_single_run():
+    rng = np.random.default_rng(11)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.002, 0.004, (8, 50)), axis=1))
+    bars = _batch(close)
+    bars.volume[:, -1] = 5.0  # volume spike on the last bar
+    params = {'momentum_threshold': 0.01, 'volatility_filter': 0.5, 'volume_threshold': 1.5}
+
+    async def run(runner):
+        try:
+            return await runner.run('ai_momentum', params, bars)
+        finally:
+            runner.shutdown()
+
+    pooled = asyncio.run(run(StrategyRunner(max_workers=2, min_chunk=2)))
+    single = STRATEGY_REGISTRY['ai_momentum'](params).generate(bars.symbols, bars)
+    assert single and [c.symbol for c in pooled] == [c.symbol for c in single]
+    assert [c.features for c in pooled] == [c.features for c in single]
+
+
+def _history(start, count, close=100.0):
+    ts = [start + i * HOUR_MS for i in range(count)]
+    return {'ts': ts, 'open': [close] * count, 'high': [close] * count, 'low': [close] * count,
+            'close': [close + i for i in range(count)], 'volume': [1.0] * count}
+
+
+def test_bar_feed_reports_each_new_bar_once():
+    async def run():
+        feed = BarFeed()
+        assert feed.add('btcusdt', '1h', HOUR_MS, 1, 2, 0.5, 1.5, 10)
+        assert feed.add('ETHUSDT', '1h', HOUR_MS, 1, 2, 0.5, 1.5, 10)
+        assert feed.add('BTCUSDT', '4h', 0, 1, 2, 0.5, 1.5, 10)
+        assert not feed.add('BTCUSDT', '1h', HOUR_MS, 1, 2, 0.5, 1.5, 10)  # redelivered
+        assert not feed.add('BTCUSDT', '1h', 0, 1, 2, 0.5, 1.5, 10)  # out of order
+        assert await feed.wait(timeout=1, settle=0) == {'1h': ['BTCUSDT', 'ETHUSDT'], '4h': ['BTCUSDT']}
+        assert await feed.wait(timeout=0.01, settle=0) == {}
+
+        waiter = asyncio.create_task(feed.wait(timeout=1, settle=0.01))
+        await asyncio.sleep(0.01)
+        feed.add('BTCUSDT', '1h', 2 * HOUR_MS, 1, 2, 0.5, 1.5, 10)
+        assert await waiter == {'1h': ['BTCUSDT']}
+
+    asyncio.run(run())
+
+
+def test_bar_feed_backfill_merges_around_streamed_bars():
+    feed = BarFeed()
+    now = 10 * HOUR_MS / 1000 + 60  # one minute into the bar that opened at hour 10
+    feed.add('BTCUSDT', '1h', 5 * HOUR_MS, 1, 1, 1, 999.0, 1)
+
+    # Hours 0..10 from the collector: hour 5 is already stored, hour 10 is still forming
+    assert feed.load('BTCUSDT', '1h', _history(0, 11), now=now) == 10
+    view = feed.store.view('BTCUSDT', '1h')
+    assert view.ts.tolist() == [i * HOUR_MS for i in range(10)]
+    assert view.close[5] == 999.0 and view.close[9] == 109.0
+
+    assert feed.short_of('1h', ['BTCUSDT', 'ETHUSDT'], 10) == ['ETHUSDT']
+    assert feed.short_of('1h', ['BTCUSDT'], 11) == ['BTCUSDT']
+    bars = feed.batch('1h', ['BTCUSDT', 'ETHUSDT'], 4)
+    assert bars.symbols == ['BTCUSDT'] and bars.close[0].tolist() == [106.0, 107.0, 108.0, 109.0]
+
+    # The closed hour 10 then arrives as a new bar, not as a refresh of a forming one
+    assert feed.add('BTCUSDT', '1h', 10 * HOUR_MS, 1, 1, 1, 110.0, 1)
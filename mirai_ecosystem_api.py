@@ -14,6 +14,7 @@ import os
 import sys
 import json
 import sqlite3
+import time
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 import asyncio
@@ -22,6 +23,8 @@ import aiofiles
 # Add current directory to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from app.trader.storage import get_database, migrate
+
 app = FastAPI(
     title="Mirai Agent Ecosystem",
     description="Autonomous AI Agent for Trading & Services",
@@ -40,70 +43,132 @@ app.add_middleware(
 # Database setup
 DB_PATH = "/app/state/mirai_ecosystem.db"
 
+HOUR = 3600
+DAY = 86400
+
+# Schema versions are tracked in schema_migrations; append new steps, never edit applied ones
+ECOSYSTEM_MIGRATIONS = [
+    # 1: base tables
+    '''
+    CREATE TABLE IF NOT EXISTS diary_entries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        category TEXT NOT NULL,
+        title TEXT NOT NULL,
+        content TEXT NOT NULL,
+        tags TEXT,
+        project TEXT,
+        outcome TEXT,
+        metrics TEXT
+    );
+    CREATE TABLE IF NOT EXISTS analytics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        metric_name TEXT NOT NULL,
+        metric_value REAL NOT NULL,
+        metadata TEXT
+    );
+    CREATE TABLE IF NOT EXISTS blog_posts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        title TEXT NOT NULL,
+        slug TEXT UNIQUE NOT NULL,
+        content TEXT NOT NULL,
+        excerpt TEXT,
+        published BOOLEAN DEFAULT FALSE,
+        category TEXT,
+        tags TEXT,
+        views INTEGER DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS trading_sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_date DATE NOT NULL,
+        start_balance REAL,
+        end_balance REAL,
+        pnl REAL,
+        trades_count INTEGER,
+        win_rate REAL,
+        notes TEXT
+    );
+    ''',
+    # 2: epoch timestamps and indexes for time-window queries
+    '''
+    ALTER TABLE diary_entries ADD COLUMN ts INTEGER;
+    UPDATE diary_entries SET ts = CAST(strftime('%s', timestamp) AS INTEGER);
+    CREATE INDEX idx_diary_entries_ts ON diary_entries (ts);
+
+    ALTER TABLE analytics ADD COLUMN ts INTEGER;
+    UPDATE analytics SET ts = CAST(strftime('%s', timestamp) AS INTEGER);
+    CREATE INDEX idx_analytics_metric_ts ON analytics (metric_name, ts);
+    CREATE INDEX idx_analytics_ts ON analytics (ts, metric_name, metric_value);
+
+    CREATE INDEX idx_trading_sessions_date ON trading_sessions (session_date, pnl, win_rate, trades_count);
+    ''',
+    # 3: hourly metric rollup maintained on insert
+    '''
+    CREATE TABLE analytics_hourly (
+        hour INTEGER NOT NULL,
+        metric_name TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        total REAL NOT NULL,
+        PRIMARY KEY (hour, metric_name)
+    ) WITHOUT ROWID;
+    INSERT INTO analytics_hourly (hour, metric_name, count, total)
+    SELECT ts / 3600 * 3600, metric_name, COUNT(*), TOTAL(metric_value)
+    FROM analytics WHERE ts IS NOT NULL GROUP BY 1, 2;
+    CREATE TRIGGER analytics_hourly_insert AFTER INSERT ON analytics
+    WHEN NEW.ts IS NOT NULL
+    BEGIN
+        INSERT INTO analytics_hourly (hour, metric_name, count, total)
+        VALUES (NEW.ts / 3600 * 3600, NEW.metric_name, 1, NEW.metric_value)
+        ON CONFLICT (hour, metric_name) DO UPDATE SET
+            count = count + 1,
+            total = total + excluded.total;
+    END;
+    ''',
+]
+
+def utc_now() -> tuple:
+    """(CURRENT_TIMESTAMP-style UTC text, epoch seconds) for new rows"""
+    ts = int(time.time())
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(ts)), ts
+
+def get_db():
+    """Shared SQLite handle (WAL, per-thread connections, retries on lock)"""
+    return get_database(DB_PATH)
+
 def init_database():
     """Initialize SQLite database with ecosystem tables"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Diary entries table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS diary_entries (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            category TEXT NOT NULL,
-            title TEXT NOT NULL,
-            content TEXT NOT NULL,
-            tags TEXT,
-            project TEXT,
-            outcome TEXT,
-            metrics TEXT
-        )
-    ''')
-    
-    # Analytics data
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS analytics (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            metric_name TEXT NOT NULL,
-            metric_value REAL NOT NULL,
-            metadata TEXT
-        )
-    ''')
-    
-    # Blog posts
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS blog_posts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            title TEXT NOT NULL,
-            slug TEXT UNIQUE NOT NULL,
-            content TEXT NOT NULL,
-            excerpt TEXT,
-            published BOOLEAN DEFAULT FALSE,
-            category TEXT,
-            tags TEXT,
-            views INTEGER DEFAULT 0
-        )
-    ''')
-    
-    # Trading data
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS trading_sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_date DATE NOT NULL,
-            start_balance REAL,
-            end_balance REAL,
-            pnl REAL,
-            trades_count INTEGER,
-            win_rate REAL,
-            notes TEXT
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    migrate(get_db(), "ecosystem", ECOSYSTEM_MIGRATIONS)
+
+def metric_summary(since_ts: int, until_ts: int) -> Dict[str, tuple]:
+    """(sum, count) per metric for [since_ts, until_ts): whole hours from analytics_hourly, edges from analytics"""
+    db = get_db()
+    first_hour = -(-since_ts // HOUR) * HOUR
+    last_hour = until_ts // HOUR * HOUR
+    
+    parts = []
+    if first_hour < last_hour:
+        parts += db.fetchall('''
+            SELECT metric_name, TOTAL(total), SUM(count) FROM analytics_hourly
+            WHERE hour >= ? AND hour < ? GROUP BY metric_name
+        ''', (first_hour, last_hour))
+        edges = [(since_ts, first_hour), (last_hour, until_ts)]
+    else:
+        edges = [(since_ts, until_ts)]
+    for low, high in edges:
+        if low < high:
+            parts += db.fetchall('''
+                SELECT metric_name, TOTAL(metric_value), COUNT(*) FROM analytics
+                WHERE ts >= ? AND ts < ? GROUP BY metric_name
+            ''', (low, high))
+    
+    summary = {}
+    for name, total, count in parts:
+        prev_total, prev_count = summary.get(name, (0.0, 0))
+        summary[name] = (prev_total + total, prev_count + count)
+    return summary
 
 # Pydantic models
 class DiaryEntry(BaseModel):
@@ -178,18 +243,13 @@ async def health_check():
 @app.post("/api/v1/diary/entry")
 async def create_diary_entry(entry: DiaryEntry):
     """Создать запись в дневнике"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT INTO diary_entries (category, title, content, tags, project, outcome, metrics)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (entry.category, entry.title, entry.content, entry.tags, 
+    cursor = get_db().execute('''
+        INSERT INTO diary_entries (timestamp, ts, category, title, content, tags, project, outcome, metrics)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (*utc_now(), entry.category, entry.title, entry.content, entry.tags, 
           entry.project, entry.outcome, entry.metrics))
     
     entry_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
     
     return {"id": entry_id, "message": "Diary entry created successfully"}
 
@@ -200,15 +260,13 @@ async def get_diary_entries(
     days: int = 30
 ):
     """Получить записи дневника с фильтрацией"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
     query = '''
-        SELECT * FROM diary_entries 
-        WHERE timestamp >= datetime('now', '-{} days')
-    '''.format(days)
+        SELECT id, timestamp, category, title, content, tags, project, outcome, metrics
+        FROM diary_entries 
+        WHERE ts >= ?
+    '''
     
-    params = []
+    params = [int(time.time()) - days * DAY]
     if category:
         query += ' AND category = ?'
         params.append(category)
@@ -216,11 +274,9 @@ async def get_diary_entries(
         query += ' AND project = ?'
         params.append(project)
     
-    query += ' ORDER BY timestamp DESC'
+    query += ' ORDER BY ts DESC'
     
-    cursor.execute(query, params)
-    entries = cursor.fetchall()
-    conn.close()
+    entries = get_db().fetchall(query, params)
     
     return {
         "entries": [
@@ -244,35 +300,24 @@ async def get_diary_entries(
 @app.post("/api/v1/analytics/metric")
 async def record_metric(metric: AnalyticsMetric):
     """Записать метрику"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
     metadata_json = json.dumps(metric.metadata) if metric.metadata else None
     
-    cursor.execute('''
-        INSERT INTO analytics (metric_name, metric_value, metadata)
-        VALUES (?, ?, ?)
-    ''', (metric.metric_name, metric.metric_value, metadata_json))
-    
-    conn.commit()
-    conn.close()
+    # analytics_hourly is updated by trigger in the same statement
+    get_db().execute('''
+        INSERT INTO analytics (timestamp, ts, metric_name, metric_value, metadata)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (*utc_now(), metric.metric_name, metric.metric_value, metadata_json))
     
     return {"message": "Metric recorded successfully"}
 
 @app.get("/api/v1/analytics/metrics/{metric_name}")
 async def get_metrics(metric_name: str, days: int = 30):
     """Получить метрики за период"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
+    metrics = get_db().fetchall('''
         SELECT timestamp, metric_value, metadata FROM analytics
-        WHERE metric_name = ? AND timestamp >= datetime('now', '-{} days')
-        ORDER BY timestamp DESC
-    '''.format(days), (metric_name,))
-    
-    metrics = cursor.fetchall()
-    conn.close()
+        WHERE metric_name = ? AND ts >= ?
+        ORDER BY ts DESC
+    ''', (metric_name, int(time.time()) - days * DAY))
     
     return {
         "metric_name": metric_name,
@@ -289,34 +334,22 @@ async def get_metrics(metric_name: str, days: int = 30):
 @app.get("/api/v1/analytics/dashboard")
 async def analytics_dashboard():
     """Дашборд аналитики"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Основные метрики за последние 7 дней
-    cursor.execute('''
-        SELECT metric_name, AVG(metric_value) as avg_value, COUNT(*) as count
-        FROM analytics 
-        WHERE timestamp >= datetime('now', '-7 days')
-        GROUP BY metric_name
-    ''')
+    now = int(time.time())
+    since = now - 7 * DAY
     
-    metrics_summary = cursor.fetchall()
+    # Основные метрики за последние 7 дней (почасовые агрегаты + неполные часы по краям)
+    metrics_summary = metric_summary(since, now + 1)
     
     # Количество записей в дневнике за неделю
-    cursor.execute('''
-        SELECT COUNT(*) FROM diary_entries 
-        WHERE timestamp >= datetime('now', '-7 days')
-    ''')
-    diary_count = cursor.fetchone()[0]
-    
-    conn.close()
+    diary_count = get_db().fetchone('SELECT COUNT(*) FROM diary_entries WHERE ts >= ?', (since,))[0]
     
     return {
         "summary": {
             "diary_entries_week": diary_count,
             "metrics": {
-                row[0]: {"average": row[1], "count": row[2]}
-                for row in metrics_summary
+                name: {"average": total / count, "count": count}
+                for name, (total, count) in metrics_summary.items()
+                if count
             }
         }
     }
@@ -326,31 +359,20 @@ async def analytics_dashboard():
 @app.post("/api/v1/blog/post")
 async def create_blog_post(post: BlogPost):
     """Создать пост в блоге"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute('''
+        cursor = get_db().execute('''
             INSERT INTO blog_posts (title, slug, content, excerpt, published, category, tags)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         ''', (post.title, post.slug, post.content, post.excerpt, 
               post.published, post.category, post.tags))
         
-        post_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        
-        return {"id": post_id, "message": "Blog post created successfully"}
+        return {"id": cursor.lastrowid, "message": "Blog post created successfully"}
     except sqlite3.IntegrityError:
-        conn.close()
         raise HTTPException(status_code=400, detail="Post with this slug already exists")
 
 @app.get("/api/v1/blog/posts")
 async def get_blog_posts(published_only: bool = False, category: Optional[str] = None):
     """Получить посты блога"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
     query = 'SELECT * FROM blog_posts'
     params = []
     
@@ -367,9 +389,7 @@ async def get_blog_posts(published_only: bool = False, category: Optional[str] =
     
     query += ' ORDER BY created_at DESC'
     
-    cursor.execute(query, params)
-    posts = cursor.fetchall()
-    conn.close()
+    posts = get_db().fetchall(query, params)
     
     return {
         "posts": [
@@ -406,10 +426,7 @@ async def trading_status():
 @app.post("/api/v1/trading/session")
 async def record_trading_session(session: TradingSession):
     """Записать торговую сессию"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
+    cursor = get_db().execute('''
         INSERT INTO trading_sessions 
         (session_date, start_balance, end_balance, pnl, trades_count, win_rate, notes)
         VALUES (?, ?, ?, ?, ?, ?, ?)
@@ -417,18 +434,14 @@ async def record_trading_session(session: TradingSession):
           session.pnl, session.trades_count, session.win_rate, session.notes))
     
     session_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
     
     return {"id": session_id, "message": "Trading session recorded"}
 
 @app.get("/api/v1/trading/performance")
 async def trading_performance(days: int = 30):
     """Получить статистику торговли"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
+    # session_date is compared bare so idx_trading_sessions_date covers the query
+    stats = get_db().fetchone('''
         SELECT 
             COUNT(*) as total_sessions,
             SUM(pnl) as total_pnl,
@@ -436,11 +449,8 @@ async def trading_performance(days: int = 30):
             AVG(win_rate) as avg_win_rate,
             SUM(trades_count) as total_trades
         FROM trading_sessions 
-        WHERE session_date >= date('now', '-{} days')
-    '''.format(days))
-    
-    stats = cursor.fetchone()
-    conn.close()
+        WHERE session_date >= ?
+    ''', ((datetime.utcnow() - timedelta(days=days)).strftime('%Y-%m-%d'),))
     
     return {
         "period_days": days,